@@ -16,7 +16,7 @@ import {
   Clock, 
   Lightbulb 
 } from 'lucide-react'
-import { ChatMessage, ServerMessage, UserMessage } from '@/types/chat'
+import { ChatMessage, ServerMessage, TelemetryRecord, UserMessage } from '@/types/chat'
 
 // Simple ID generator
 const generateId = () => {
@@ -31,6 +31,7 @@ export default function ChatInterface() {
   const [isConnected, setIsConnected] = useState(false)
   const [isConnecting, setIsConnecting] = useState(false)
   const [pendingMissionId, setPendingMissionId] = useState<string | null>(null)
+  const [telemetry, setTelemetry] = useState<Record<string, TelemetryRecord>>({})
   const [userId] = useState(() => `user-${generateId().slice(0, 8)}`)
   const wsRef = useRef<WebSocket | null>(null)
   const messagesEndRef = useRef<HTMLDivElement>(null)
@@ -161,6 +162,14 @@ export default function ChatInterface() {
         ])
         break
 
+      case 'telemetry':
+        // Latest state per drone, not added to the chat history
+        if (data.telemetry) {
+          const record = data.telemetry
+          setTelemetry((prev) => ({ ...prev, [record.drone_id]: record }))
+        }
+        break
+
       case 'error':
         setMessages((prev) => [
           ...prev,
@@ -395,6 +404,15 @@ export default function ChatInterface() {
               ? 'Connecting...'
               : 'Disconnected'}
           </span>
+          {Object.values(telemetry).map((t) => (
+            <span key={t.drone_id} className="ml-4 text-gray-600 dark:text-gray-400 flex items-center gap-1">
+              <Plane className="w-3 h-3" />
+              {t.drone_id}: {t.state ?? '?'}
+              {t.latitude !== null && t.longitude !== null && ` @ ${t.latitude.toFixed(5)}, ${t.longitude.toFixed(5)}`}
+              {t.altitude !== null && ` ${t.altitude.toFixed(0)} m`}
+              {t.battery_percent !== null && ` ${t.battery_percent.toFixed(0)}%`}
+            </span>
+          ))}
           {pendingMissionId && (
             <span className="ml-auto text-blue-600 dark:text-blue-400 flex items-center gap-1">
               <Clock className="w-3 h-3" />
@@ -19,6 +19,7 @@ export interface ServerMessage {
     | "mission_execution_starting"
     | "mission_execution_result"
     | "mission_execution_blocked"
+    | "telemetry"
     | "error";
   id?: string;
   status?: "processed" | "error" | "rejected";
@@ -32,6 +33,22 @@ export interface ServerMessage {
   ready?: string;
   reason?: string;
   report?: any;
+  telemetry?: TelemetryRecord;
+}
+
+export interface TelemetryRecord {
+  drone_id: string;
+  mission_id: string | null;
+  t: number;
+  segment: number | null;
+  state: string | null;
+  latitude: number | null;
+  longitude: number | null;
+  altitude: number | null;
+  ground_speed: number | null;
+  vertical_speed: number | null;
+  heading: number | null;
+  battery_percent: number | null;
 }
 
 export interface MissionDSL {
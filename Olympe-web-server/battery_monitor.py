@@ -0,0 +1,150 @@
+"""
+Battery watchdog - enforce safety.minBatteryPercent during flight.
+
+A BatteryWatchdog subscribes to the drone's event stream for the whole
+mission (drone.subscribe, like the telemetry collector) and keeps the latest
+battery level and position. On every battery or position event it projects
+the charge left after returning home from where the drone is now (energy
+from the pre-flight estimator's RTH model, see
+mission_planner.estimator.return_home_energy_percent) and trips as soon as
+that projection falls below the reserve.
+
+The watchdog never commands the drone from the event thread: the executor
+polls it between segments and inside its control loops, and takes its
+abort -> RTH path when it has tripped. The home point is the first GPS fix
+received (the takeoff position) unless given.
+"""
+
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from mission_planner.estimator import FlightModel, return_home_energy_percent
+
+logger = logging.getLogger(__name__)
+
+# Olympe reports 500.0 for latitude/longitude/altitude until a GPS fix is available
+_NO_FIX = 500.0
+
+
+class BatteryWatchdog:
+    """
+    Trip when battery - energy_to_home < reserve_percent.
+
+    on_trip(status), if given, is called once from the drone event thread
+    when the watchdog trips and must not block.
+    """
+
+    def __init__(
+        self,
+        drone,
+        reserve_percent: float,
+        home: Optional[Tuple[float, float]] = None,
+        model: Optional[FlightModel] = None,
+        on_trip: Optional[Callable[[Dict[str, Any]], None]] = None,
+        clock: Any = time,
+    ):
+        self._drone = drone
+        self._subscription = None
+        self._model = model or FlightModel.from_env()
+        self._on_trip = on_trip
+        self._clock = clock
+        self.reserve_percent = float(reserve_percent)
+        self.home = home
+        self.battery_percent: Optional[float] = None
+        self.position: Optional[Tuple[float, float, float]] = None
+        self.required_percent: Optional[float] = None
+        self.projected_percent: Optional[float] = None
+        self.min_projected_percent: Optional[float] = None
+        self.tripped = False
+        self.tripped_at: Optional[float] = None
+        self._altitude = 0.0
+
+    def start(self) -> None:
+        if self._subscription is None:
+            self._subscription = self._drone.subscribe(self._on_event)
+
+    def stop(self) -> None:
+        if self._subscription is not None:
+            try:
+                self._drone.unsubscribe(self._subscription)
+            except Exception as exc:
+                logger.warning(f"Battery watchdog unsubscribe failed: {exc}")
+            self._subscription = None
+
+    def __enter__(self) -> "BatteryWatchdog":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def is_tripped(self) -> bool:
+        return self.tripped
+
+    @property
+    def reason(self) -> str:
+        return (
+            f"Battery reserve: {self.battery_percent:.0f}% left, {self.required_percent:.1f}% needed to return home, "
+            f"projected {self.projected_percent:.1f}% < reserve {self.reserve_percent:.0f}%"
+            if self.tripped else ""
+        )
+
+    def status(self) -> Dict[str, Any]:
+        def _round(value: Optional[float]) -> Optional[float]:
+            return round(value, 2) if value is not None else None
+
+        return {
+            "reserve_percent": self.reserve_percent,
+            "battery_percent": self.battery_percent,
+            "required_percent": _round(self.required_percent),
+            "projected_percent": _round(self.projected_percent),
+            "min_projected_percent": _round(self.min_projected_percent),
+            "tripped": self.tripped,
+            "tripped_at": self.tripped_at,
+        }
+
+    def _on_event(self, event, controller=None) -> None:
+        name = getattr(event.message, "name", "")
+        try:
+            if name == "BatteryStateChanged":
+                self.battery_percent = float(event.args["percent"])
+            elif name == "PositionChanged":
+                lat, lon = float(event.args["latitude"]), float(event.args["longitude"])
+                if lat == _NO_FIX or lon == _NO_FIX:
+                    return
+                if self.home is None:
+                    self.home = (lat, lon)
+                self.position = (lat, lon, self._altitude)
+            elif name == "AltitudeChanged":
+                # Relative to takeoff: the altitude the RTH model climbs/descends from
+                self._altitude = float(event.args["altitude"])
+                if self.position is not None:
+                    self.position = (self.position[0], self.position[1], self._altitude)
+                return
+            else:
+                return
+        except (KeyError, TypeError, ValueError) as exc:
+            logger.debug(f"Malformed battery watchdog event {name}: {exc}")
+            return
+        self._evaluate()
+
+    def _evaluate(self) -> None:
+        if self.battery_percent is None or self.tripped:
+            return
+        required = 0.0
+        if self.position is not None and self.home is not None:
+            required = return_home_energy_percent(self.position, self.home, self._model)
+        self.required_percent = required
+        self.projected_percent = self.battery_percent - required
+        if self.min_projected_percent is None or self.projected_percent < self.min_projected_percent:
+            self.min_projected_percent = self.projected_percent
+        if self.projected_percent < self.reserve_percent:
+            self.tripped = True
+            self.tripped_at = self._clock.time()
+            logger.warning(self.reason)
+            if self._on_trip is not None:
+                try:
+                    self._on_trip(self.status())
+                except Exception as exc:
+                    logger.warning(f"Battery watchdog callback failed: {exc}")
@@ -18,19 +18,27 @@ Architecture:
 Note: FastAPI NE FAIT PAS l'exécution Olympe, juste la réception des messages.
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field, field_validator
 from typing import Dict, Any, Optional, Literal
 from contextlib import asynccontextmanager
 import json
+import os
 import time
 import logging
 from datetime import datetime
 from natural_language_processor import get_nlp_processor
-from mission_executor import get_drone_identity, execute_mission, check_olympe_ready
-import asyncio
 from mission_executor import get_drone_identity
+from fleet import FleetError, get_fleet_dispatcher
+from mission_planner.clearance import check_mission_clearance, format_conflict
+from mission_planner.estimator import check_battery, estimate_mission_dsl, min_battery_percent
+from mission_planner.geofence import check_mission_geofence, format_violation
+from mission_planner.map_tiles import get_tile_store
+from mission_planner.path_planner import plan_mission_paths
+from mission_planner.peephole import optimize_mission_segments
+from mission_planner.visit_order import optimize_mission_visit_order
+import asyncio
 
 # ============================================================================
 # Configuration du logging
@@ -315,11 +323,38 @@ async def route_message(user_message: UserMessage) -> MessageResponse:
                 )
             else:
                 logger.info("✅ Mission DSL generated successfully")
-                result = processed_response(
-                    user_message.id,
-                    "Mission DSL created successfully",
-                    mission_dsl
-                )
+                mission_dsl = _estimate_mission(_check_clearance(_check_geofence(_optimize_mission(mission_dsl))))
+                geofence = mission_dsl.get("geofence") or {}
+                clearance = mission_dsl.get("clearance") or {}
+                battery = (mission_dsl.get("estimate") or {}).get("battery") or {}
+                if not geofence.get("ok", True):
+                    logger.warning(f"🚧 Mission refused: geofence violations {geofence['violations']}")
+                    result = rejected_response(
+                        user_message.id,
+                        "Mission refused: the flight path violates the map boundaries:\n"
+                        + "\n".join(format_violation(v) for v in geofence["violations"])
+                    )
+                elif not clearance.get("ok", True):
+                    logger.warning(f"🏢 Mission refused: obstacle conflicts {clearance['conflicts']}")
+                    result = rejected_response(
+                        user_message.id,
+                        f"Mission refused: the flight path comes within {clearance['margin_m']:g} m of obstacles:\n"
+                        + "\n".join(format_conflict(c) for c in clearance["conflicts"])
+                    )
+                elif battery.get("ok", True):
+                    result = processed_response(
+                        user_message.id,
+                        "Mission DSL created successfully",
+                        mission_dsl
+                    )
+                else:
+                    logger.warning(f"🔋 Mission refused: battery reserve breached {battery}")
+                    result = rejected_response(
+                        user_message.id,
+                        f"Mission refused: estimated battery use {battery['energy_percent']:.1f}% would leave "
+                        f"{battery['projected_percent']:.1f}% at the end of the mission, below the "
+                        f"{battery['reserve_percent']:.0f}% reserve (minBatteryPercent)."
+                    )
         
         except Exception as e:
             logger.error(f"❌ Error during NLP processing: {str(e)}", exc_info=True)
@@ -341,6 +376,169 @@ async def route_message(user_message: UserMessage) -> MessageResponse:
     return result
 
 
+def _start_position() -> Optional[tuple]:
+    """Position de départ (lat, lon) de la carte chargée par le NLP processor."""
+    coords = ((getattr(nlp_processor, "poi_data", None) or {}).get("starting_position") or {}).get("coordinates") or {}
+    try:
+        return float(coords["latitude"]), float(coords["longitude"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _mission_map(mission_dsl: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Carte pour vérifier et planifier une mission: les tuiles touchées par ses
+    tronçons quand la carte est découpée (MAP_TILES_DIR), sinon celle du NLP processor.
+    """
+    store = get_tile_store()
+    if store is not None:
+        return store.mission_map(mission_dsl, _start_position())
+    return getattr(nlp_processor, "poi_data", None) or {}
+
+
+def _optimize_mission(mission_dsl: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Passes d'optimisation entre la sortie NLP et la confirmation opérateur.
+    Une passe qui échoue est ignorée (la mission NLP reste valide).
+    """
+    if os.environ.get("OPTIMIZE_VISIT_ORDER", "1").strip().lower() not in ("0", "false", "no", "off"):
+        try:
+            mission_dsl = optimize_mission_visit_order(mission_dsl, _start_position())
+            report = mission_dsl["optimizations"]["visit_order"]
+            if report["reordered"]:
+                logger.info(
+                    f"🧭 Visit order optimized ({report['method']}): {report['original_m']:.0f} m -> "
+                    f"{report['optimized_m']:.0f} m (-{report['saved_percent']:.1f}%) poi segments={report['order']}"
+                )
+        except Exception as e:
+            logger.warning(f"⚠️ Visit order optimization skipped: {e}")
+    if os.environ.get("OPTIMIZE_PEEPHOLE", "1").strip().lower() not in ("0", "false", "no", "off"):
+        try:
+            mission_dsl = optimize_mission_segments(mission_dsl)
+            report = mission_dsl["optimizations"]["peephole"]
+            if report["changes"]:
+                logger.info(f"✂️ Peephole optimizer: {len(report['changes'])} change(s), "
+                            f"{report['removed_segments']} segment(s) removed")
+                for line in report["diff"]:
+                    logger.info(f"   {line}")
+        except Exception as e:
+            logger.warning(f"⚠️ Peephole optimization skipped: {e}")
+    if os.environ.get("PLAN_PATHS", "1").strip().lower() not in ("0", "false", "no", "off"):
+        try:
+            world_map = _mission_map(mission_dsl)
+            # Régions de tuiles: une carte par mission, grille voxel gardée en mémoire (LRU) plutôt qu'écrite sur disque
+            cache_dir = None if get_tile_store() is not None else ""
+            mission_dsl = plan_mission_paths(mission_dsl, world_map, _start_position(), cache_dir=cache_dir)
+            report = mission_dsl["optimizations"]["path_planner"]
+            for change in report["changes"]:
+                logger.info(
+                    f"🗺️ Path planner: segment {change['segment']} rerouted at {change['level_m']:g} m via "
+                    f"{change['waypoints']} waypoint(s) ({change['direct_m']:.0f} m direct -> {change['route_m']:.0f} m)"
+                )
+        except Exception as e:
+            logger.warning(f"⚠️ Path planning skipped: {e}")
+    return mission_dsl
+
+
+def _check_geofence(mission_dsl: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Vérifie le trajet contre les limites de la carte (zones interdites, geofence)
+    et répare ce qui peut l'être (altitude, montée verticale); le reste est refusé.
+    """
+    if os.environ.get("GEOFENCE_CHECK", "1").strip().lower() in ("0", "false", "no", "off"):
+        return mission_dsl
+    world_map = _mission_map(mission_dsl)
+    mission_dsl = check_mission_geofence(mission_dsl, world_map, _start_position())
+    report = mission_dsl["geofence"]
+    if report.get("checked"):
+        logger.info(
+            f"🚧 Geofence: {report['zones']} zone(s), {len(report['repairs'])} repair(s), "
+            f"{len(report['violations'])} violation(s) (checked in {report['compute_us']:.0f} µs)"
+        )
+    return mission_dsl
+
+
+def _check_clearance(mission_dsl: Dict[str, Any]) -> Dict[str, Any]:
+    """Vérifie chaque tronçon du trajet contre les obstacles de la carte (premier conflit par tronçon)."""
+    if os.environ.get("OBSTACLE_CLEARANCE_CHECK", "1").strip().lower() in ("0", "false", "no", "off"):
+        return mission_dsl
+    world_map = _mission_map(mission_dsl)
+    mission_dsl = check_mission_clearance(mission_dsl, world_map, _start_position())
+    report = mission_dsl["clearance"]
+    logger.info(
+        f"🏢 Obstacle clearance: {report['obstacles']} obstacle(s), {len(report['conflicts'])} conflict(s) "
+        f"(checked in {report['compute_us']:.0f} µs)"
+    )
+    return mission_dsl
+
+
+def _estimate_mission(mission_dsl: Dict[str, Any]) -> Dict[str, Any]:
+    """Estimation pré-vol (durée, énergie par segment) depuis la position de départ de la carte."""
+    try:
+        mission_dsl = estimate_mission_dsl(mission_dsl, _start_position())
+        estimate = mission_dsl["estimate"]
+        logger.info(
+            f"⏳ Estimate: {estimate['duration_sec']:.0f} s, {estimate['distance_m']:.0f} m, "
+            f"{estimate['energy_percent']:.1f}% battery (computed in {estimate['compute_us']:.0f} µs)"
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Mission estimate unavailable: {e}")
+    return mission_dsl
+
+
+def _estimate_summary(mission_dsl: Dict[str, Any], battery_percent: Optional[float]) -> str:
+    """Résumé de l'estimation pour le drone pressenti (batterie inconnue = pleine)."""
+    estimate = mission_dsl.get("estimate")
+    if not estimate:
+        return ""
+    minutes, seconds = divmod(int(round(estimate["duration_sec"])), 60)
+    battery = check_battery(estimate["energy_percent"], battery_percent, min_battery_percent(mission_dsl))
+    summary = (
+        f"Estimated duration: {minutes} min {seconds:02d} s, distance {estimate['distance_m']:.0f} m, "
+        f"battery use {battery['energy_percent']:.1f}% ({battery['battery_percent']:.0f}% -> "
+        f"{battery['projected_percent']:.0f}%"
+    )
+    if battery["reserve_percent"] is not None:
+        summary += f", reserve {battery['reserve_percent']:.0f}%"
+    summary += ")"
+    if not battery["ok"]:
+        summary += "\nWarning: this drone would end below the battery reserve; the mission waits for a charged drone."
+    return summary
+
+
+def _optimization_summary(mission_dsl: Dict[str, Any]) -> str:
+    """Résumé lisible des optimisations appliquées, joint au message de confirmation."""
+    optimizations = mission_dsl.get("optimizations") or {}
+    lines = []
+    visit_order = optimizations.get("visit_order") or {}
+    if visit_order.get("reordered"):
+        lines.append(
+            f"Visit order optimized: {visit_order['original_m']:.0f} m -> {visit_order['optimized_m']:.0f} m "
+            f"(-{visit_order['saved_percent']:.1f}%)"
+        )
+    peephole = optimizations.get("peephole") or {}
+    if peephole.get("changes"):
+        lines.append(f"Redundant steps optimized ({peephole['removed_segments']} segment(s) removed):")
+        lines.extend(peephole["diff"])
+    path_planner = optimizations.get("path_planner") or {}
+    if path_planner.get("changes"):
+        lines.append(f"Routed around obstacles ({path_planner['rerouted_legs']} leg(s)):")
+        lines.extend(
+            f"segment {c['segment']}: {c['waypoints']} waypoint(s) at {c['level_m']:g} m "
+            f"({c['direct_m']:.0f} m direct -> {c['route_m']:.0f} m)"
+            for c in path_planner["changes"]
+        )
+    repairs = (mission_dsl.get("geofence") or {}).get("repairs") or []
+    if repairs:
+        lines.append(f"Flight path adjusted for the map boundaries ({len(repairs)} change(s)):")
+        lines.extend(
+            f"segment {r['segment']}: {r['rule'].replace('_', ' ')} over '{r['zone']}' "
+            f"({r['altitude_before']:g} m -> {r['altitude_after']:g} m)"
+            for r in repairs
+        )
+    return "\n".join(lines)
+
+
 def _add_to_history(user_message: UserMessage) -> None:
     """Ajoute un message à l'historique (debug/audit)"""
     message_history.append({
@@ -461,34 +659,50 @@ async def websocket_endpoint(websocket: WebSocket):
                         })
                         continue
                     
-                    # Confirmation accepted → lancer l'exécution en arrière-plan
-                    # Vérifier readiness Olympe/Drone avant démarrage
-                    ready, reason = await asyncio.to_thread(check_olympe_ready)
-                    if not ready:
-                        await websocket.send_json({
-                            "type": "mission_execution_blocked",
-                            "id": confirm_id,
-                            "reason": reason,
-                            "message": "Olympe/Drone not ready. Start Sphinx or connect to the drone, then retry.",
+                    # Confirmation accepted → confier la mission au dispatcher de flotte
+                    # (choix du drone, readiness Olympe/Drone, exécution en parallèle)
+                    mission_to_run = pending_missions.pop(confirm_id)["mission_dsl"]
+                    loop = asyncio.get_running_loop()
+                    
+                    def _on_assigned(drone, _mission_id=confirm_id):
+                        asyncio.run_coroutine_threadsafe(websocket.send_json({
+                            "type": "mission_execution_starting",
+                            "id": _mission_id,
+                            "drone_id": drone.id,
+                            "drone_ip": drone.ip,
+                            "message": f"Mission execution started on {drone.id}",
                             "timestamp": datetime.now().isoformat()
-                        })
-                        continue
+                        }), loop)
                     
-                    await websocket.send_json({
-                        "type": "mission_execution_starting",
-                        "id": confirm_id,
-                        "message": "Mission execution started",
-                        "timestamp": datetime.now().isoformat()
-                    })
+                    def _on_telemetry(record, _mission_id=confirm_id):
+                        # Flux télémétrie (déjà sous-échantillonné, cf. TELEMETRY_RATE_HZ)
+                        asyncio.run_coroutine_threadsafe(websocket.send_json({
+                            "type": "telemetry",
+                            "id": _mission_id,
+                            "telemetry": record.as_dict(),
+                            "message": "",
+                        }), loop)
                     
-                    mission_to_run = pending_missions.pop(confirm_id)["mission_dsl"]
+                    future = get_fleet_dispatcher().submit(
+                        confirm_id, mission_to_run, on_assigned=_on_assigned, on_telemetry=_on_telemetry
+                    )
                     
-                    async def _run_and_stream():
+                    async def _run_and_stream(_mission_id=confirm_id, _future=future):
                         try:
-                            result = await asyncio.to_thread(execute_mission, mission_to_run, False)
+                            result = await asyncio.wrap_future(_future)
+                            if result.get("status") == "blocked":
+                                await websocket.send_json({
+                                    "type": "mission_execution_blocked",
+                                    "id": _mission_id,
+                                    "reason": result.get("reason"),
+                                    "message": "No drone ready for this mission. Start Sphinx or connect a drone, then retry.",
+                                    "timestamp": datetime.now().isoformat()
+                                })
+                                return
                             await websocket.send_json({
                                 "type": "mission_execution_result",
-                                "id": confirm_id,
+                                "id": _mission_id,
+                                "drone_id": result.get("drone_id"),
                                 "status": result.get("status", "unknown"),
                                 "report": result,
                                 "timestamp": datetime.now().isoformat()
@@ -497,7 +711,7 @@ async def websocket_endpoint(websocket: WebSocket):
                             logger.error(f"Mission execution error: {exec_err}", exc_info=True)
                             await websocket.send_json({
                                 "type": "mission_execution_result",
-                                "id": confirm_id,
+                                "id": _mission_id,
                                 "status": "error",
                                 "report": {"errors": [str(exec_err)]},
                                 "timestamp": datetime.now().isoformat()
@@ -640,18 +854,31 @@ async def websocket_endpoint(websocket: WebSocket):
                     }
                     # Memorize this as the last pending mission for this connection
                     last_pending_id = str(result.id)
-                    # Récupérer l'identité du drone (best-effort)
+                    # Drone pressenti par le dispatcher (best-effort, réévalué à la confirmation)
+                    candidate = None
                     try:
-                        identity = get_drone_identity()
+                        candidate = get_fleet_dispatcher().preview(result.mission_dsl)
+                        identity = candidate.identity() if candidate else get_drone_identity()
                     except Exception:
                         identity = {"id": "unknown", "ip": "unknown"}
                     
+                    confirmation_message = "Mission loaded on drone. Ready to execute? (Yes/No)"
+                    summary = "\n".join(filter(None, [
+                        _estimate_summary(result.mission_dsl, candidate.battery_percent if candidate else None),
+                        _optimization_summary(result.mission_dsl),
+                    ]))
+                    if summary:
+                        confirmation_message = f"{summary}\n\n{confirmation_message}"
+                    
                     await websocket.send_json({
                         "type": "mission_confirmation",
                         "id": result.id,
                         "drone_id": identity.get("id", "unknown"),
                         "drone_ip": identity.get("ip", "unknown"),
-                        "message": "Mission loaded on drone. Ready to execute? (Yes/No)",
+                        "message": confirmation_message,
+                        "optimizations": result.mission_dsl.get("optimizations", {}),
+                        "estimate": result.mission_dsl.get("estimate"),
+                        "geofence": result.mission_dsl.get("geofence"),
                         "ready": "No",
                         "timestamp": datetime.now().isoformat()
                     })
@@ -720,6 +947,51 @@ async def health_check():
     )
 
 
+@app.get("/fleet")
+async def get_fleet_status():
+    """
+    État de la flotte: drones enregistrés et taux d'utilisation.
+    
+    Returns:
+        - drones: description et statut de chaque drone
+        - utilization: temps occupé / fenêtre par drone et pour la flotte
+    """
+    dispatcher = get_fleet_dispatcher()
+    return {
+        "drones": [d.as_dict() for d in dispatcher.registry.drones()],
+        "utilization": dispatcher.registry.utilization(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/fleet/{drone_id}/map")
+async def get_drone_map(drone_id: str, radius_m: Optional[float] = None):
+    """
+    Carte autour d'un drone: les tuiles (MAP_TILES_DIR) autour de sa dernière
+    position connue (télémétrie), sinon de son point de départ.
+    
+    Returns:
+        - drone_id, position: drone et position utilisée
+        - map: carte des tuiles dans radius_m (MAP_TILE_MARGIN_M par défaut)
+    """
+    store = get_tile_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="Map tiles are disabled (MAP_TILES_DIR is not set)")
+    try:
+        drone = get_fleet_dispatcher().registry.get(drone_id)
+    except FleetError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    position = drone.position or drone.home
+    if position is None:
+        raise HTTPException(status_code=409, detail=f"No known position for drone {drone_id}")
+    return {
+        "drone_id": drone.id,
+        "position": list(position),
+        "map": store.around(position[0], position[1], radius_m),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
 @app.get("/history")
 async def get_message_history():
     """
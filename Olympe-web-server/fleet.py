@@ -0,0 +1,408 @@
+"""
+Fleet - registry of drones and a dispatcher running confirmed missions in parallel.
+
+The registry describes every aircraft (id, IP, capabilities, home position) and
+tracks its live status. It is loaded from FLEET_CONFIG (JSON file), else from
+FLEET_DRONES ("id=ip,id=ip"), else falls back to the single drone at DRONE_IP.
+
+The dispatcher assigns each mission to the best available drone:
+- idle (not flying another mission, not marked offline)
+- providing the mission's requiredCapabilities
+- with enough battery to fly the estimated mission energy (mission "estimate",
+  see mission_planner.estimator) and still keep safety.minBatteryPercent
+  (unknown battery is accepted)
+- nearest to the first mission waypoint (last known position, else home)
+and runs missions on a thread pool, one worker per drone plus FLEET_MAX_WAITING
+for queued missions. Missions that find no idle drone wait in submission
+order: a queued mission may take a drone no earlier-queued mission could fly,
+so a mission waiting for a specific capability does not hold back the others.
+Live telemetry of running missions keeps each drone's battery and position up
+to date.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from geodesy import haversine_m
+
+logger = logging.getLogger(__name__)
+
+STATUS_IDLE = "idle"
+STATUS_BUSY = "busy"
+STATUS_OFFLINE = "offline"
+
+
+class FleetError(Exception):
+    pass
+
+
+@dataclass
+class DroneRecord:
+    """One aircraft of the fleet, its static description and live status."""
+
+    id: str
+    ip: str
+    capabilities: Tuple[str, ...] = ()
+    home: Optional[Tuple[float, float]] = None
+    status: str = STATUS_IDLE
+    battery_percent: Optional[float] = None
+    position: Optional[Tuple[float, float]] = None
+    current_mission: Optional[str] = None
+    busy_since: Optional[float] = None
+    busy_sec: float = 0.0
+    missions_completed: int = 0
+    missions_failed: int = 0
+
+    def identity(self) -> Dict[str, Any]:
+        return {"id": self.id, "ip": self.ip}
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "ip": self.ip,
+            "capabilities": list(self.capabilities),
+            "home": list(self.home) if self.home else None,
+            "status": self.status,
+            "battery_percent": self.battery_percent,
+            "position": list(self.position) if self.position else None,
+            "current_mission": self.current_mission,
+        }
+
+
+def _parse_drone(entry: Dict[str, Any]) -> DroneRecord:
+    if not entry.get("id") or not entry.get("ip"):
+        raise FleetError(f"Fleet entry needs 'id' and 'ip': {entry}")
+    home = entry.get("home")
+    if isinstance(home, dict):
+        home = (float(home["latitude"]), float(home["longitude"]))
+    elif home is not None:
+        home = (float(home[0]), float(home[1]))
+    battery = entry.get("battery_percent")
+    return DroneRecord(
+        id=str(entry["id"]),
+        ip=str(entry["ip"]),
+        capabilities=tuple(str(c) for c in entry.get("capabilities", [])),
+        home=home,
+        battery_percent=float(battery) if battery is not None else None,
+    )
+
+
+class FleetRegistry:
+    """Thread-safe registry of the drones of the site."""
+
+    def __init__(self, drones: List[DroneRecord]):
+        if not drones:
+            raise FleetError("Fleet is empty")
+        ids = [d.id for d in drones]
+        if len(set(ids)) != len(ids):
+            raise FleetError(f"Duplicate drone ids in fleet: {ids}")
+        self._drones: Dict[str, DroneRecord] = {d.id: d for d in drones}
+        self.lock = threading.RLock()
+        self.created_at = time.time()
+
+    @classmethod
+    def from_env(cls) -> "FleetRegistry":
+        config_path = os.environ.get("FLEET_CONFIG")
+        if config_path:
+            with open(config_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            entries = data.get("drones", []) if isinstance(data, dict) else data
+            return cls([_parse_drone(e) for e in entries])
+        inline = os.environ.get("FLEET_DRONES", "").strip()
+        if inline:
+            drones = []
+            for item in inline.split(","):
+                drone_id, _, ip = item.strip().partition("=")
+                drones.append(_parse_drone({"id": drone_id.strip(), "ip": ip.strip()}))
+            return cls(drones)
+        return cls([DroneRecord(id="drone_1", ip=os.environ.get("DRONE_IP", "10.202.0.1"))])
+
+    def __len__(self) -> int:
+        return len(self._drones)
+
+    def get(self, drone_id: str) -> DroneRecord:
+        try:
+            return self._drones[drone_id]
+        except KeyError:
+            raise FleetError(f"Unknown drone: {drone_id}") from None
+
+    def drones(self) -> List[DroneRecord]:
+        return list(self._drones.values())
+
+    def update_state(
+        self,
+        drone_id: str,
+        battery_percent: Optional[float] = None,
+        position: Optional[Tuple[float, float]] = None,
+    ) -> None:
+        """Record the last known battery / position of a drone (from telemetry or reports)."""
+        with self.lock:
+            drone = self.get(drone_id)
+            if battery_percent is not None:
+                drone.battery_percent = float(battery_percent)
+            if position is not None:
+                drone.position = (float(position[0]), float(position[1]))
+
+    def mark_busy(self, drone_id: str, mission_id: str) -> None:
+        with self.lock:
+            drone = self.get(drone_id)
+            drone.status = STATUS_BUSY
+            drone.current_mission = mission_id
+            drone.busy_since = time.time()
+
+    def mark_released(self, drone_id: str, succeeded: Optional[bool], status: str = STATUS_IDLE) -> None:
+        """Free a drone; succeeded=None when no mission was flown (e.g. failed readiness check)."""
+        with self.lock:
+            drone = self.get(drone_id)
+            if drone.busy_since is not None:
+                drone.busy_sec += time.time() - drone.busy_since
+            if succeeded is True:
+                drone.missions_completed += 1
+            elif succeeded is False:
+                drone.missions_failed += 1
+            drone.status = status
+            drone.current_mission = None
+            drone.busy_since = None
+
+    def utilization(self) -> Dict[str, Any]:
+        """Per-drone busy ratio since the registry was created."""
+        with self.lock:
+            now = time.time()
+            window = max(now - self.created_at, 1e-9)
+            per_drone = {}
+            for drone in self._drones.values():
+                busy = drone.busy_sec + (now - drone.busy_since if drone.busy_since is not None else 0.0)
+                per_drone[drone.id] = {
+                    "status": drone.status,
+                    "current_mission": drone.current_mission,
+                    "busy_sec": round(busy, 1),
+                    "utilization": round(busy / window, 3),
+                    "missions_completed": drone.missions_completed,
+                    "missions_failed": drone.missions_failed,
+                }
+            total_busy = sum(d["busy_sec"] for d in per_drone.values())
+            return {
+                "window_sec": round(window, 1),
+                "fleet_utilization": round(total_busy / (window * len(per_drone)), 3),
+                "drones": per_drone,
+            }
+
+
+def mission_anchor(mission_dsl: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """First georeferenced point of a mission (where the assigned drone has to fly first)."""
+    for segment in mission_dsl.get("segments", []):
+        if isinstance(segment, dict) and "latitude" in segment and "longitude" in segment:
+            return float(segment["latitude"]), float(segment["longitude"])
+    return None
+
+
+def _mission_requirements(mission_dsl: Dict[str, Any]) -> Tuple[Tuple[str, ...], Optional[float]]:
+    required = tuple(str(c) for c in mission_dsl.get("requiredCapabilities", []) or [])
+    safety = mission_dsl.get("safety")
+    min_battery = safety.get("minBatteryPercent") if isinstance(safety, dict) else None
+    return required, float(min_battery) if min_battery is not None else None
+
+
+def is_eligible(drone: DroneRecord, mission_dsl: Dict[str, Any]) -> bool:
+    """Whether the drone could ever fly this mission (capabilities + battery), ignoring its status."""
+    required, min_battery = _mission_requirements(mission_dsl)
+    if not set(required).issubset(drone.capabilities):
+        return False
+    if min_battery is not None and drone.battery_percent is not None:
+        estimate = mission_dsl.get("estimate")
+        energy = float(estimate.get("energy_percent", 0.0)) if isinstance(estimate, dict) else 0.0
+        if drone.battery_percent - energy < min_battery:
+            return False
+    return True
+
+
+def select_drone(drones: List[DroneRecord], mission_dsl: Dict[str, Any]) -> Optional[DroneRecord]:
+    """
+    Best idle, eligible drone for a mission: nearest to the mission anchor,
+    ties (or missing positions) broken by highest battery, then by id.
+    """
+    anchor = mission_anchor(mission_dsl)
+    candidates = [d for d in drones if d.status == STATUS_IDLE and is_eligible(d, mission_dsl)]
+    if not candidates:
+        return None
+
+    def _rank(drone: DroneRecord) -> Tuple[float, float, str]:
+        origin = drone.position or drone.home
+        distance = haversine_m(origin[0], origin[1], *anchor) if anchor and origin else float("inf")
+        battery = drone.battery_percent if drone.battery_percent is not None else 0.0
+        return distance, -battery, drone.id
+
+    return min(candidates, key=_rank)
+
+
+def _default_executor(
+    mission_dsl: Dict[str, Any],
+    drone: DroneRecord,
+    on_telemetry: Optional[Callable[[Any], None]] = None,
+) -> Dict[str, Any]:
+    from mission_executor import execute_mission
+
+    return execute_mission(mission_dsl, False, drone_ip=drone.ip, drone_id=drone.id, on_telemetry=on_telemetry)
+
+
+def _default_ready_check(drone: DroneRecord) -> Tuple[bool, str]:
+    from mission_executor import check_olympe_ready
+
+    return check_olympe_ready(drone_ip=drone.ip)
+
+
+class FleetDispatcher:
+    """
+    Assign missions to drones and run them concurrently.
+
+    executor(mission_dsl, drone, on_telemetry) -> report and
+    ready_check(drone) -> (ok, reason)
+    default to mission_executor.execute_mission / check_olympe_ready on the
+    drone's IP. A drone failing its readiness check is marked offline until
+    the next submission, and the mission moves on to the next best drone.
+    """
+
+    def __init__(
+        self,
+        registry: FleetRegistry,
+        executor: Callable[..., Dict[str, Any]] = _default_executor,
+        ready_check: Optional[Callable[[DroneRecord], Tuple[bool, str]]] = _default_ready_check,
+        assign_timeout_sec: Optional[float] = None,
+    ):
+        self.registry = registry
+        self._executor = executor
+        self._ready_check = ready_check
+        if assign_timeout_sec is None:
+            assign_timeout_sec = float(os.environ.get("FLEET_ASSIGN_TIMEOUT_SEC", "600"))
+        self.assign_timeout_sec = assign_timeout_sec
+        max_waiting = int(os.environ.get("FLEET_MAX_WAITING", "16"))
+        self._pool = ThreadPoolExecutor(max_workers=len(registry) + max_waiting, thread_name_prefix="fleet")
+        self._released = threading.Condition(registry.lock)
+        # (mission_id, mission_dsl) of missions waiting for a drone, in submission order
+        self._queue: List[Tuple[str, Dict[str, Any]]] = []
+
+    def preview(self, mission_dsl: Dict[str, Any]) -> Optional[DroneRecord]:
+        """Drone the mission would be assigned to right now (None if all are busy)."""
+        with self.registry.lock:
+            return select_drone(self.registry.drones(), mission_dsl)
+
+    def submit(
+        self,
+        mission_id: str,
+        mission_dsl: Dict[str, Any],
+        on_assigned: Optional[Callable[[DroneRecord], None]] = None,
+        on_telemetry: Optional[Callable[[Any], None]] = None,
+    ) -> "Future[Dict[str, Any]]":
+        """
+        Queue a mission. The returned future resolves to the execution report,
+        completed with "drone_id"; status "blocked" (with "reason") when no
+        drone of the fleet can take it. on_assigned runs in the worker thread,
+        on_telemetry in the drone event thread (see telemetry.TelemetryCollector).
+        """
+        with self.registry.lock:
+            for drone in self.registry.drones():
+                if drone.status == STATUS_OFFLINE:
+                    drone.status = STATUS_IDLE
+            self._queue.append((mission_id, mission_dsl))
+        return self._pool.submit(self._run, mission_id, mission_dsl, on_assigned, on_telemetry)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+    def _acquire(self, mission_id: str, mission_dsl: Dict[str, Any]) -> Tuple[Optional[DroneRecord], str]:
+        deadline = time.monotonic() + self.assign_timeout_sec
+        with self._released:
+            try:
+                while True:
+                    drones = self.registry.drones()
+                    reachable = [d for d in drones if d.status != STATUS_OFFLINE and is_eligible(d, mission_dsl)]
+                    if not reachable:
+                        return None, "No drone of the fleet can fly this mission (capabilities, battery or readiness)"
+                    # Drones an earlier-queued mission could fly are left to it
+                    ahead = [dsl for _, dsl in self._queue[: self._position(mission_id)]]
+                    free = [d for d in drones if not any(is_eligible(d, dsl) for dsl in ahead)]
+                    drone = select_drone(free, mission_dsl)
+                    if drone is not None:
+                        self.registry.mark_busy(drone.id, mission_id)
+                        return drone, ""
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None, "Timed out waiting for an available drone"
+                    self._released.wait(remaining)
+            finally:
+                del self._queue[self._position(mission_id)]
+                self._released.notify_all()
+
+    def _position(self, mission_id: str) -> int:
+        return next(k for k, (queued_id, _) in enumerate(self._queue) if queued_id == mission_id)
+
+    def _release(self, drone: DroneRecord, succeeded: Optional[bool], status: str = STATUS_IDLE) -> None:
+        with self._released:
+            self.registry.mark_released(drone.id, succeeded, status)
+            self._released.notify_all()
+
+    def _run(
+        self,
+        mission_id: str,
+        mission_dsl: Dict[str, Any],
+        on_assigned: Optional[Callable[[DroneRecord], None]],
+        on_telemetry: Optional[Callable[[Any], None]],
+    ) -> Dict[str, Any]:
+        while True:
+            drone, reason = self._acquire(mission_id, mission_dsl)
+            if drone is None:
+                logger.warning(f"Mission {mission_id} blocked: {reason}")
+                return {"status": "blocked", "reason": reason, "drone_id": None, "errors": [reason]}
+            if self._ready_check is not None:
+                ready, ready_reason = self._ready_check(drone)
+                if not ready:
+                    logger.warning(f"Drone {drone.id} not ready ({ready_reason}), marked offline")
+                    # Rejoin the head of the queue for the next drone
+                    with self._released:
+                        self._queue.insert(0, (mission_id, mission_dsl))
+                    self._release(drone, succeeded=None, status=STATUS_OFFLINE)
+                    continue
+            break
+        logger.info(f"Mission {mission_id} assigned to {drone.id} ({drone.ip})")
+        if on_assigned is not None:
+            try:
+                on_assigned(drone)
+            except Exception as exc:
+                logger.warning(f"on_assigned callback failed: {exc}")
+
+        def _track(record) -> None:
+            position = (record.latitude, record.longitude) if record.latitude is not None else None
+            self.registry.update_state(drone.id, record.battery_percent, position)
+            if on_telemetry is not None:
+                on_telemetry(record)
+
+        succeeded = False
+        try:
+            report = self._executor(mission_dsl, drone, _track)
+            succeeded = report.get("status") == "completed"
+        except Exception as exc:
+            logger.error(f"Mission {mission_id} on {drone.id} failed: {exc}")
+            report = {"status": "error", "errors": [str(exc)]}
+        finally:
+            self._release(drone, succeeded)
+        report["drone_id"] = drone.id
+        return report
+
+
+_dispatcher: Optional[FleetDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_fleet_dispatcher() -> FleetDispatcher:
+    """Process-wide dispatcher over FleetRegistry.from_env()."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = FleetDispatcher(FleetRegistry.from_env())
+        return _dispatcher
@@ -0,0 +1,315 @@
+"""
+Flight recorder - columnar log of what the drone actually did during a mission.
+
+Telemetry samples and executor events are appended into preallocated NumPy
+columns (one row per sample, see COLUMNS). When a chunk of CHUNK_ROWS rows is
+full it is handed to a writer thread, which appends it as compressed .npy
+members to the mission's single `.flight` archive (a zip file), so the
+telemetry and executor threads never wait on compression; the chunk table, the mission DSL and
+the final report are written into the same archive as JSON members. Appending
+a row is a handful of array stores, so recording at tens of Hz is cheap, and
+load_flight() reads a whole mission back from one file into contiguous arrays.
+
+Enabled by default, under FLIGHT_RECORDER_DIR (default: flight_logs in the
+user data directory, ~/.local/share/olympe-web-server; set it to an empty
+string to disable recording).
+"""
+
+import io
+import json
+import math
+import os
+import queue
+import re
+import threading
+import time
+import zipfile
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from mission_planner.storage import user_dir
+
+DEFAULT_CHUNK_ROWS = 4096
+DEFAULT_RECORDER_RATE_HZ = 10.0
+FLIGHT_SUFFIX = ".flight"
+
+KIND_TELEMETRY = 0
+KIND_EVENT = 1
+
+COLUMNS = (
+    ("t", np.float64),
+    ("kind", np.int8),
+    # Telemetry rows: flying state code (STATE_CODES); event rows: event name code
+    ("code", np.int16),
+    ("segment", np.int16),
+    ("latitude", np.float64),
+    ("longitude", np.float64),
+    ("altitude", np.float32),
+    ("ground_speed", np.float32),
+    ("vertical_speed", np.float32),
+    ("heading", np.float32),
+    ("battery_percent", np.float32),
+)
+
+# Olympe FlyingStateChanged states
+STATE_CODES = (
+    "landed",
+    "takingoff",
+    "hovering",
+    "flying",
+    "landing",
+    "emergency",
+    "usertakeoff",
+    "motor_ramping",
+    "emergency_landing",
+)
+_STATE_INDEX = {name: code for code, name in enumerate(STATE_CODES)}
+
+
+def default_recorder_dir() -> Optional[str]:
+    """Recorder directory from FLIGHT_RECORDER_DIR, None when recording is disabled."""
+    directory = os.environ.get("FLIGHT_RECORDER_DIR")
+    if directory is None:
+        return user_dir("flight_logs", kind="data")
+    return directory.strip() or None
+
+
+def _float(value: Optional[float]) -> float:
+    return math.nan if value is None else value
+
+
+class FlightRecorder:
+    """
+    Record one mission of one drone into `<directory>/<flight_id>.flight`.
+
+    record_telemetry / record_event may be called from different threads;
+    full chunks are written by the recorder's writer thread. close() must be
+    called once at the end (it flushes the last chunk, waits for the writer
+    and writes the index); the recorder is also a context manager.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        mission_dsl: Dict[str, Any],
+        drone_id: str,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        clock: Any = time,
+    ):
+        os.makedirs(directory, exist_ok=True)
+        self.mission_id = str(mission_dsl.get("missionId") or "mission")
+        self.drone_id = str(drone_id)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{self.mission_id}_{self.drone_id}")
+        self.flight_id = f"{stamp}_{safe}_{os.getpid()}_{threading.get_ident() % 10000}"
+        self.path = os.path.join(directory, self.flight_id + FLIGHT_SUFFIX)
+        self._clock = clock
+        self._chunk_rows = int(chunk_rows)
+        self._columns = self._new_columns()
+        self._row = 0
+        self._chunks: List[Dict[str, Any]] = []
+        self._event_names: List[str] = []
+        self._event_codes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self.started_at = clock.time()
+        with zipfile.ZipFile(self.path, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("mission.json", json.dumps(mission_dsl))
+        self._pending: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._write_error: Optional[BaseException] = None
+        self._writer = threading.Thread(target=self._write_chunks, name=f"flight-recorder-{self.drone_id}", daemon=True)
+        self._writer.start()
+
+    def __enter__(self) -> "FlightRecorder":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def record_telemetry(self, record) -> None:
+        """Append a telemetry.TelemetryRecord."""
+        with self._lock:
+            i = self._next_row()
+            c = self._columns
+            c["t"][i] = record.t
+            c["kind"][i] = KIND_TELEMETRY
+            c["code"][i] = _STATE_INDEX.get(record.state, -1)
+            c["segment"][i] = -1 if record.segment is None else record.segment
+            c["latitude"][i] = _float(record.latitude)
+            c["longitude"][i] = _float(record.longitude)
+            c["altitude"][i] = _float(record.altitude)
+            c["ground_speed"][i] = _float(record.ground_speed)
+            c["vertical_speed"][i] = _float(record.vertical_speed)
+            c["heading"][i] = _float(record.heading)
+            c["battery_percent"][i] = _float(record.battery_percent)
+            self._commit_row()
+
+    def record_event(self, name: str, segment: Optional[int] = None, t: Optional[float] = None) -> None:
+        """Append an executor event (e.g. "segment_start:move_to") at time t (default: now)."""
+        with self._lock:
+            code = self._event_codes.get(name)
+            if code is None:
+                code = self._event_codes[name] = len(self._event_names)
+                self._event_names.append(name)
+            i = self._next_row()
+            c = self._columns
+            c["t"][i] = self._clock.time() if t is None else t
+            c["kind"][i] = KIND_EVENT
+            c["code"][i] = code
+            c["segment"][i] = -1 if segment is None else segment
+            for name_, _ in COLUMNS[4:]:
+                c[name_][i] = math.nan
+            self._commit_row()
+
+    def close(self, report: Optional[Dict[str, Any]] = None) -> str:
+        """Flush pending rows, write the index (and report) and return the archive path."""
+        with self._lock:
+            if self._closed:
+                return self.path
+            self._closed = True
+            self._flush()
+            self._pending.put(None)
+        self._writer.join()
+        if self._write_error is not None:
+            raise self._write_error
+        # Closed: rows and event names no longer change, no lock needed
+        index = {
+            "flight_id": self.flight_id,
+            "mission_id": self.mission_id,
+            "drone_id": self.drone_id,
+            "started_at": self.started_at,
+            "rows": sum(chunk["rows"] for chunk in self._chunks),
+            "chunks": self._chunks,
+            "columns": [name for name, _ in COLUMNS],
+            "state_codes": list(STATE_CODES),
+            "event_names": self._event_names,
+        }
+        with zipfile.ZipFile(self.path, "a", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("index.json", json.dumps(index))
+            if report is not None:
+                archive.writestr("report.json", json.dumps(report, default=str))
+        return self.path
+
+    def _next_row(self) -> int:
+        if self._closed:
+            raise ValueError("Flight recorder is closed")
+        return self._row
+
+    def _commit_row(self) -> None:
+        self._row += 1
+        if self._row == self._chunk_rows:
+            self._flush()
+
+    def _new_columns(self) -> Dict[str, np.ndarray]:
+        return {name: np.empty(self._chunk_rows, dtype=dtype) for name, dtype in COLUMNS}
+
+    def _flush(self) -> None:
+        """Queue the pending rows for the writer thread and start a new chunk."""
+        rows = self._row
+        if rows == 0:
+            return
+        chunk = {name: values[:rows] for name, values in self._columns.items()}
+        t = chunk["t"]
+        self._pending.put((len(self._chunks), chunk))
+        self._chunks.append({"rows": rows, "t_start": float(t.min()), "t_end": float(t.max())})
+        self._columns = self._new_columns()
+        self._row = 0
+
+    def _write_chunks(self) -> None:
+        """Writer thread: append queued chunks to the archive until close() queues None."""
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            if self._write_error is not None:
+                continue
+            n, chunk = item
+            try:
+                with zipfile.ZipFile(self.path, "a", zipfile.ZIP_DEFLATED) as archive:
+                    for name, _ in COLUMNS:
+                        buffer = io.BytesIO()
+                        np.save(buffer, chunk[name], allow_pickle=False)
+                        archive.writestr(f"chunk_{n:05d}/{name}.npy", buffer.getvalue())
+            except Exception as exc:
+                # Reported by close(); later chunks are dropped
+                self._write_error = exc
+
+
+@dataclass
+class FlightLog:
+    """A recorded mission loaded back into memory."""
+
+    index: Dict[str, Any]
+    mission_dsl: Dict[str, Any]
+    report: Optional[Dict[str, Any]]
+    columns: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return int(self.columns["t"].shape[0])
+
+    def telemetry(self) -> Dict[str, np.ndarray]:
+        """Columns restricted to telemetry rows."""
+        mask = self.columns["kind"] == KIND_TELEMETRY
+        return {name: values[mask] for name, values in self.columns.items()}
+
+    def states(self) -> List[Optional[str]]:
+        """Flying state name of each telemetry row."""
+        codes = self.columns["code"][self.columns["kind"] == KIND_TELEMETRY]
+        return [STATE_CODES[c] if 0 <= c < len(STATE_CODES) else None for c in codes.tolist()]
+
+    def events(self) -> List[Dict[str, Any]]:
+        """Executor events as dicts (t, name, segment), in time order."""
+        mask = self.columns["kind"] == KIND_EVENT
+        names = self.index.get("event_names", [])
+        return [
+            {"t": t, "name": names[code], "segment": None if segment < 0 else segment}
+            for t, code, segment in zip(
+                self.columns["t"][mask].tolist(),
+                self.columns["code"][mask].tolist(),
+                self.columns["segment"][mask].tolist(),
+            )
+        ]
+
+
+def load_flight(path: str) -> FlightLog:
+    """Load a `.flight` archive: all chunks concatenated into contiguous columns."""
+    with zipfile.ZipFile(path, "r") as archive:
+        members = set(archive.namelist())
+        mission_dsl = json.loads(archive.read("mission.json"))
+        if "index.json" not in members:
+            raise ValueError(f"{path}: flight was not closed (no index)")
+        index = json.loads(archive.read("index.json"))
+        report = json.loads(archive.read("report.json")) if "report.json" in members else None
+        total = int(index["rows"])
+        columns = {name: np.empty(total, dtype=dtype) for name, dtype in COLUMNS}
+        offset = 0
+        for n, chunk in enumerate(index["chunks"]):
+            rows = int(chunk["rows"])
+            for name, _ in COLUMNS:
+                columns[name][offset:offset + rows] = np.load(
+                    io.BytesIO(archive.read(f"chunk_{n:05d}/{name}.npy")), allow_pickle=False
+                )
+            offset += rows
+    return FlightLog(index=index, mission_dsl=mission_dsl, report=report, columns=columns)
+
+
+def list_flights(directory: str, mission_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Index of every closed flight in directory (optionally for one missionId), oldest first."""
+    flights = []
+    if not os.path.isdir(directory):
+        return flights
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(FLIGHT_SUFFIX):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            with zipfile.ZipFile(path, "r") as archive:
+                index = json.loads(archive.read("index.json"))
+        except (KeyError, zipfile.BadZipFile):
+            continue
+        if mission_id is None or index.get("mission_id") == mission_id:
+            index["path"] = path
+            flights.append(index)
+    return flights
@@ -0,0 +1,206 @@
+"""
+Flight replay - re-execute a recorded mission on the simulated drone and compare timings.
+
+Takes a `.flight` archive written by the flight recorder, re-runs its mission
+DSL through execute_mission on the simulator backend (virtual time, so a
+mission replays in well under a second by default) from the recorded start
+position and battery, and compares segment durations recorded vs replayed.
+Environment overrides allow what-if runs (arrival policy, execution mode,
+rates...), and the exit code makes it usable with `git bisect run`.
+
+Usage:
+    python flight_replay.py ~/.local/share/olympe-web-server/flight_logs/<flight>.flight
+    python flight_replay.py <flight> --set MOVE_ARRIVAL_POLICY=pass_through --max-regression-pct 10
+    python flight_replay.py <flight> --mode flight_plan --json
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import sys
+from typing import Any, Dict, Iterator, List, Optional
+
+from flight_recorder import FlightLog, load_flight
+
+# Exit codes
+EXIT_SUCCESS = 0
+EXIT_REGRESSION = 1
+EXIT_REPLAY_FAILED = 2
+# `git bisect run` skips the commit: the replay could not judge it
+EXIT_CONFIG_ERROR = 125
+
+
+def segment_timings(log: FlightLog) -> List[Dict[str, Any]]:
+    """
+    Duration of each executed segment of a recorded flight, from its
+    segment_start / segment_end events (falls back to the stored report).
+    """
+    timings: List[Dict[str, Any]] = []
+    starts: Dict[int, float] = {}
+    for event in log.events():
+        kind, _, seg_type = event["name"].partition(":")
+        if kind == "segment_start":
+            starts[event["segment"]] = event["t"]
+        elif kind == "segment_end" and event["segment"] in starts:
+            timings.append({
+                "index": event["segment"],
+                "type": seg_type,
+                "duration_sec": event["t"] - starts.pop(event["segment"]),
+            })
+    if timings or not log.report:
+        return timings
+    return timings_from_report(log.report)
+
+
+def timings_from_report(report: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {"index": seg["index"], "type": seg["type"], "duration_sec": seg.get("elapsed_ms", 0.0) / 1000.0}
+        for seg in report.get("executed_segments", [])
+    ]
+
+
+def initial_conditions(log: FlightLog) -> Dict[str, str]:
+    """Simulator environment reproducing the recorded start position and battery."""
+    env: Dict[str, str] = {}
+    telemetry = log.telemetry()
+    for lat, lon in zip(telemetry["latitude"].tolist(), telemetry["longitude"].tolist()):
+        if not (math.isnan(lat) or math.isnan(lon)):
+            env["SIM_HOME_LAT"], env["SIM_HOME_LON"] = repr(lat), repr(lon)
+            break
+    for battery in telemetry["battery_percent"].tolist():
+        if not math.isnan(battery):
+            env["SIM_BATTERY_PERCENT"] = repr(battery)
+            break
+    return env
+
+
+@contextlib.contextmanager
+def _patched_env(overrides: Dict[str, str]) -> Iterator[None]:
+    saved = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def replay_flight(
+    log: FlightLog,
+    time_factor: float = 0.0,
+    execution_mode: Optional[str] = None,
+    overrides: Optional[Dict[str, str]] = None,
+    record: bool = False,
+) -> Dict[str, Any]:
+    """
+    Re-execute the recorded mission on the simulated drone and return the
+    execution report. The replay itself is not recorded unless record=True.
+    """
+    from mission_executor import execute_mission
+
+    env = {"DRONE_BACKEND": "sim", "SIM_TIME_FACTOR": str(time_factor)}
+    env.update(initial_conditions(log))
+    if not record:
+        env["FLIGHT_RECORDER_DIR"] = ""
+    env.update(overrides or {})
+    with _patched_env(env):
+        return execute_mission(log.mission_dsl, False, execution_mode=execution_mode)
+
+
+def compare_timings(recorded: List[Dict[str, Any]], replayed: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Segment-by-segment comparison, matched on (index, type)."""
+    replayed_by_key = {(seg["index"], seg["type"]): seg for seg in replayed}
+    rows = []
+    for seg in recorded:
+        other = replayed_by_key.pop((seg["index"], seg["type"]), None)
+        row = {"index": seg["index"], "type": seg["type"], "recorded_sec": seg["duration_sec"], "replayed_sec": None,
+               "delta_sec": None, "delta_pct": None}
+        if other is not None:
+            row["replayed_sec"] = other["duration_sec"]
+            row["delta_sec"] = other["duration_sec"] - seg["duration_sec"]
+            if seg["duration_sec"] > 0:
+                row["delta_pct"] = 100.0 * row["delta_sec"] / seg["duration_sec"]
+        rows.append(row)
+    for (index, seg_type), other in sorted(replayed_by_key.items()):
+        rows.append({"index": index, "type": seg_type, "recorded_sec": None, "replayed_sec": other["duration_sec"],
+                     "delta_sec": None, "delta_pct": None})
+    return rows
+
+
+def _format_table(rows: List[Dict[str, Any]]) -> str:
+    def _fmt(value: Optional[float], spec: str) -> str:
+        return "-" if value is None else format(value, spec)
+
+    lines = [f"{'#':>3}  {'segment':<16}{'recorded s':>12}{'replayed s':>12}{'delta s':>10}{'delta %':>9}"]
+    for row in rows:
+        lines.append(
+            f"{row['index']:>3}  {row['type']:<16}{_fmt(row['recorded_sec'], '.2f'):>12}"
+            f"{_fmt(row['replayed_sec'], '.2f'):>12}{_fmt(row['delta_sec'], '+.2f'):>10}{_fmt(row['delta_pct'], '+.1f'):>9}"
+        )
+    return "\n".join(lines)
+
+
+def _parse_overrides(pairs: List[str]) -> Dict[str, str]:
+    overrides = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep or not key:
+            raise ValueError(f"Invalid --set value (expected KEY=VALUE): {pair}")
+        overrides[key] = value
+    return overrides
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a recorded flight on the simulated drone")
+    parser.add_argument("flight", help="Path of a .flight archive")
+    parser.add_argument("--time-factor", type=float, default=0.0,
+                        help="Virtual/wall time ratio (0 = as fast as possible)")
+    parser.add_argument("--mode", choices=("segments", "flight_plan"), default=None, help="Execution mode override")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="Environment override for the replay (what-if), repeatable")
+    parser.add_argument("--max-regression-pct", type=float, default=None,
+                        help="Exit with 1 when a segment is slower than recorded by more than this")
+    parser.add_argument("--record", action="store_true", help="Record the replay as a new flight")
+    parser.add_argument("--json", action="store_true", help="Print the comparison as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        overrides = _parse_overrides(args.set)
+        log = load_flight(args.flight)
+    except (OSError, ValueError, KeyError) as exc:
+        print(f"[REPLAY] {exc}", file=sys.stderr)
+        return EXIT_CONFIG_ERROR
+
+    recorded = segment_timings(log)
+    try:
+        report = replay_flight(log, args.time_factor, args.mode, overrides, args.record)
+    except Exception as exc:
+        print(f"[REPLAY] Replay could not run: {exc}", file=sys.stderr)
+        return EXIT_CONFIG_ERROR
+    rows = compare_timings(recorded, timings_from_report(report))
+    if args.json:
+        print(json.dumps({"flight": log.index.get("flight_id"), "status": report.get("status"),
+                          "errors": report.get("errors", []), "segments": rows}, indent=2))
+    else:
+        print(f"[REPLAY] {log.index.get('flight_id')} mission={log.index.get('mission_id')} "
+              f"status={report.get('status')}")
+        print(_format_table(rows))
+        for error in report.get("errors", []):
+            print(f"[REPLAY] error: {error}")
+
+    if report.get("status") != "completed":
+        return EXIT_REPLAY_FAILED
+    if args.max_regression_pct is not None:
+        regressions = [r for r in rows if r["delta_pct"] is not None and r["delta_pct"] > args.max_regression_pct]
+        if regressions:
+            return EXIT_REGRESSION
+    return EXIT_SUCCESS
+
+
+if __name__ == "__main__":
+    sys.exit(main())
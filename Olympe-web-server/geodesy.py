@@ -0,0 +1,129 @@
+"""
+Geodesy helpers - great-circle distance, bearing and destination point.
+
+Spherical Earth model (mean radius), accurate to well under a meter at the
+scale of an inspection site. The scalar functions use math; the *_array
+variants take NumPy arrays (broadcast together) for bulk work, and
+haversine_matrix gives all-pairs distances; to_local_enu/from_local_enu
+project arrays of points to planar east/north meters around an origin.
+Every distance or offset in the server and the archive CLI tools goes
+through this module.
+"""
+
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in meters between two GPS points (degrees)."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2.0) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_matrix(
+    lat1: np.ndarray,
+    lon1: np.ndarray,
+    lat2: Optional[np.ndarray] = None,
+    lon2: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Pairwise great-circle distances in meters: result[i, j] is the distance
+    from point i of (lat1, lon1) to point j of (lat2, lon2), which default to
+    the first set (symmetric matrix).
+    """
+    lat1, lon1 = np.asarray(lat1, dtype=np.float64)[:, None], np.asarray(lon1, dtype=np.float64)[:, None]
+    if lat2 is None:
+        return haversine_array(lat1, lon1, lat1.T, lon1.T)
+    return haversine_array(lat1, lon1, np.asarray(lat2, dtype=np.float64)[None, :], np.asarray(lon2, dtype=np.float64)[None, :])
+
+
+def haversine_array(lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """Vectorized haversine_m: element-wise distances in meters (inputs broadcast together)."""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    a = np.sin((phi2 - phi1) / 2.0) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(np.radians(np.subtract(lon2, lon1)) / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def to_local_enu(
+    lat: np.ndarray, lon: np.ndarray, origin_lat: float, origin_lon: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (east, north) meters of GPS points relative to an origin (equirectangular
+    projection: exact enough over a few kilometers).
+    """
+    k = math.radians(1.0) * EARTH_RADIUS_M
+    east = (np.asarray(lon, dtype=np.float64) - origin_lon) * k * math.cos(math.radians(origin_lat))
+    north = (np.asarray(lat, dtype=np.float64) - origin_lat) * k
+    return east, north
+
+
+def from_local_enu(
+    east: np.ndarray, north: np.ndarray, origin_lat: float, origin_lon: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(lat, lon) of local east/north meters; inverse of to_local_enu."""
+    k = math.radians(1.0) * EARTH_RADIUS_M
+    lat = origin_lat + np.asarray(north, dtype=np.float64) / k
+    lon = origin_lon + np.asarray(east, dtype=np.float64) / (k * math.cos(math.radians(origin_lat)))
+    return lat, lon
+
+
+def bearing_deg(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Initial bearing from point 1 to point 2, degrees clockwise from north in [0, 360)."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dlmb = math.radians(lon2 - lon1)
+    y = math.sin(dlmb) * math.cos(phi2)
+    x = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(dlmb)
+    return math.degrees(math.atan2(y, x)) % 360.0
+
+
+def destination_point(lat: float, lon: float, bearing: float, distance_m: float) -> Tuple[float, float]:
+    """Point reached from (lat, lon) after distance_m along the given bearing (degrees)."""
+    delta = distance_m / EARTH_RADIUS_M
+    theta = math.radians(bearing)
+    phi1 = math.radians(lat)
+    lmb1 = math.radians(lon)
+    sin_phi2 = math.sin(phi1) * math.cos(delta) + math.cos(phi1) * math.sin(delta) * math.cos(theta)
+    phi2 = math.asin(max(-1.0, min(1.0, sin_phi2)))
+    y = math.sin(theta) * math.sin(delta) * math.cos(phi1)
+    x = math.cos(delta) - math.sin(phi1) * sin_phi2
+    lmb2 = lmb1 + math.atan2(y, x)
+    return math.degrees(phi2), (math.degrees(lmb2) + 540.0) % 360.0 - 180.0
+
+
+def bearing_array(lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """Vectorized bearing_deg (inputs broadcast together)."""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dlmb = np.radians(np.subtract(lon2, lon1))
+    y = np.sin(dlmb) * np.cos(phi2)
+    x = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(dlmb)
+    return np.degrees(np.arctan2(y, x)) % 360.0
+
+
+def destination_array(
+    lat: np.ndarray, lon: np.ndarray, bearing: np.ndarray, distance_m: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized destination_point (inputs broadcast together)."""
+    delta = np.asarray(distance_m, dtype=np.float64) / EARTH_RADIUS_M
+    theta = np.radians(bearing)
+    phi1, lmb1 = np.radians(lat), np.radians(lon)
+    sin_phi2 = np.sin(phi1) * np.cos(delta) + np.cos(phi1) * np.sin(delta) * np.cos(theta)
+    phi2 = np.arcsin(np.clip(sin_phi2, -1.0, 1.0))
+    y = np.sin(theta) * np.sin(delta) * np.cos(phi1)
+    x = np.cos(delta) - np.sin(phi1) * sin_phi2
+    lmb2 = lmb1 + np.arctan2(y, x)
+    return np.degrees(phi2), (np.degrees(lmb2) + 540.0) % 360.0 - 180.0
+
+
+def angle_diff_deg(a: float, b: float) -> float:
+    """Signed smallest difference a - b between two angles, in (-180, 180]."""
+    d = (a - b) % 360.0
+    return d - 360.0 if d > 180.0 else d
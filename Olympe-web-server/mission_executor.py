@@ -4,13 +4,36 @@ Mission Executor - Execute a mission DSL (from Mistral) using Parrot Olympe.
 This module maps the generated mission JSON to Olympe commands, reusing the
 techniques proven in apps/cli/poi_inspection.py (connect, wait_ready,
 extended_move_to, StartPilotedPOIV2 + PCMD orbit, RTH, landing).
+
+The drone backend is selected with DRONE_BACKEND: "olympe" (default, Sphinx
+or real aircraft) or "sim" (simulated_drone, kinematic model in virtual time).
+All sleeps and timings go through the backend clock so simulated missions can
+run faster than real time.
 """
 
 import logging
 import math
 import os
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from battery_monitor import BatteryWatchdog
+from flight_recorder import DEFAULT_RECORDER_RATE_HZ, FlightRecorder, default_recorder_dir
+from geodesy import bearing_deg, destination_point, haversine_m
+from mission_planner.compiled import (
+    CompiledMission,
+    MissionCompileError,
+    MoveTo,
+    PoiInspection,
+    ReturnToHome,
+    Segment,
+    Takeoff,
+    compile_mission,
+)
+from mission_planner.flight_plan import FlightPlan, FlightPlanError, compile_flight_plan
+from mission_planner.orbit import SweepTracker, plan_orbit, radius_hold_pitch
+from rate_control import FixedRateLoop
+from telemetry import TelemetryCollector, TelemetryRecord
 
 logger = logging.getLogger(__name__)
 
@@ -44,12 +67,21 @@ def _import_olympe():
             PCMD,
         )
         from olympe.messages.ardrone3.PilotingState import (  # type: ignore
+            AltitudeChanged,
             FlyingStateChanged,
             PilotedPOI,
+            PositionChanged,
         )
+        from olympe.messages.common.Mavlink import Start as MavlinkStart  # type: ignore
+        from olympe.messages.common.Mavlink import Stop as MavlinkStop  # type: ignore
+        from olympe.messages.common.MavlinkState import MavlinkFilePlayingStateChanged  # type: ignore
         from olympe.messages.move import extended_move_to  # type: ignore
         from olympe.messages.obstacle_avoidance import set_mode  # type: ignore
         from olympe.enums.obstacle_avoidance import mode  # type: ignore
+        try:
+            from olympe.messages import rth  # type: ignore
+        except Exception:
+            rth = None  # Older firmwares: RTH falls back to NavigateHome
         return {
             "Drone": Drone,
             "TakeOff": TakeOff,
@@ -60,9 +92,17 @@ def _import_olympe():
             "PCMD": PCMD,
             "FlyingStateChanged": FlyingStateChanged,
             "PilotedPOI": PilotedPOI,
+            "PositionChanged": PositionChanged,
+            "AltitudeChanged": AltitudeChanged,
             "extended_move_to": extended_move_to,
+            "MavlinkStart": MavlinkStart,
+            "MavlinkStop": MavlinkStop,
+            "MavlinkFilePlayingStateChanged": MavlinkFilePlayingStateChanged,
             "set_mode": set_mode,
             "oa_mode": mode,
+            "rth": rth,
+            "clock": time,
+            "upload_flight_plan": _upload_flight_plan,
         }
     except Exception as exc:  # noqa: BLE001
         raise MissionExecutionError(
@@ -70,42 +110,54 @@ def _import_olympe():
         ) from exc
 
 
-def _meters_to_lat_offset_meters(lat_deg: float, meters: float) -> float:
+def _import_backend() -> Dict[str, Any]:
     """
-    Convert a northward offset in meters to degrees of latitude.
-    Approximation: 1 degree latitude ~ 111,000 meters.
+    Symbol table of the drone backend selected by DRONE_BACKEND (olympe | sim).
+    Both backends expose the same keys, including "clock" (time-like object
+    with time/perf_counter/sleep) and "upload_flight_plan".
     """
-    if meters == 0:
-        return 0.0
-    return meters / 111000.0
+    backend = os.environ.get("DRONE_BACKEND", "olympe").strip().lower()
+    if backend == "sim":
+        from simulated_drone import sim_symbols
 
+        return sim_symbols()
+    if backend != "olympe":
+        raise MissionExecutionError(f"Unknown drone backend: {backend} (expected 'olympe' or 'sim')")
+    return _import_olympe()
 
-def _clamp(value: float, min_v: float, max_v: float) -> float:
-    return max(min_v, min(value, max_v))
+
+def _open_flight_recorder(mission_dsl: Dict[str, Any], drone_id: str, clock: Any) -> Optional[FlightRecorder]:
+    """Flight recorder for this mission, None when disabled (FLIGHT_RECORDER_DIR="") or unavailable."""
+    directory = default_recorder_dir()
+    if directory is None:
+        return None
+    try:
+        return FlightRecorder(directory, mission_dsl, drone_id, clock=clock)
+    except Exception as exc:
+        logger.warning(f"Flight recorder disabled: {exc}")
+        return None
 
 
-def _apply_geofence_altitude(altitude: float, max_altitude_m: Optional[float]) -> float:
-    if max_altitude_m is None:
-        return altitude
-    # Clamp strictly within safe range (>= 1.0m to avoid ground scrape)
-    return _clamp(altitude, 1.0, max_altitude_m)
+def _record_event(recorder: Optional[FlightRecorder], name: str, segment: Optional[int] = None) -> None:
+    if recorder is not None:
+        recorder.record_event(name, segment)
 
 
-def _validate_mission_dsl(mission: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
-    if not isinstance(mission, dict):
-        raise MissionExecutionError("Mission DSL must be a JSON object")
-    segments = mission.get("segments")
-    if not isinstance(segments, list) or not segments:
-        raise MissionExecutionError("Mission DSL must contain a non-empty 'segments' list")
-    safety = mission.get("safety", {})
+def _compile_mission(mission_dsl: Dict[str, Any]) -> CompiledMission:
+    """Validate and compile the DSL (geofence applied), before any drone connection."""
+    try:
+        mission = compile_mission(mission_dsl)
+    except MissionCompileError as exc:
+        raise MissionExecutionError(f"Invalid mission: {exc}") from exc
     # Basic structural checks (non-fatal; log warnings for flexibility)
-    first_type = segments[0].get("type")
-    last_types = [s.get("type") for s in segments[-2:]]
-    if first_type != "takeoff":
+    segments = mission.segments
+    if not isinstance(segments[0], Takeoff):
         logger.warning("First segment is not 'takeoff' - proceeding but this is non-standard")
-    if last_types != ["return_to_home", "land"]:
+    last_types = [s.type for s in segments[-2:]]
+    landing_rth = isinstance(segments[-1], ReturnToHome) and segments[-1].ending_behavior != "hovering"
+    if last_types != ["return_to_home", "land"] and not landing_rth:
         logger.warning("Last segments are not ['return_to_home', 'land'] - proceeding but this is non-standard")
-    return segments, safety
+    return mission
 
 
 def _enable_obstacle_avoidance(drone, set_mode, oa_mode, timeout_sec: float) -> None:
@@ -139,6 +191,37 @@ def _connect_and_prepare(drone, FlyingStateChanged, set_mode, oa_mode, timeout_s
     _enable_obstacle_avoidance(drone, set_mode, oa_mode, timeout_sec)
 
 
+def _get_position(drone, PositionChanged) -> Optional[Tuple[float, float, float]]:
+    """
+    Current GPS position (lat, lon, alt) or None if unavailable.
+    Olympe reports 500.0 for each coordinate until a GPS fix is obtained.
+    """
+    try:
+        pos = drone.get_state(PositionChanged)
+    except Exception:
+        return None
+    if not isinstance(pos, dict):
+        return None
+    lat = pos.get("latitude")
+    lon = pos.get("longitude")
+    alt = pos.get("altitude")
+    if not isinstance(lat, (int, float)) or not isinstance(lon, (int, float)):
+        return None
+    if lat == 500.0 or lon == 500.0:
+        return None
+    return float(lat), float(lon), float(alt) if isinstance(alt, (int, float)) else 0.0
+
+
+def _get_relative_altitude(drone, AltitudeChanged) -> Optional[float]:
+    """Altitude above the takeoff point (the frame of move_to targets), None if unavailable."""
+    try:
+        state = drone.get_state(AltitudeChanged)
+    except Exception:
+        return None
+    alt = state.get("altitude") if isinstance(state, dict) else None
+    return float(alt) if isinstance(alt, (int, float)) else None
+
+
 def _wait_hover(drone, FlyingStateChanged, timeout_sec: float) -> bool:
     return bool(drone(FlyingStateChanged(state="hovering")).wait(_timeout=timeout_sec))
 
@@ -151,23 +234,96 @@ def _segment_takeoff(drone, TakeOff, FlyingStateChanged, timeout_sec: float) ->
         logger.warning("Did not observe hovering state after takeoff")
 
 
+# Arrival policies for move_to, from fastest to most conservative:
+# - pass_through: return as soon as the drone is inside the acceptance radius
+#   (3D, opt-in with MOVE_ARRIVAL_POLICY=pass_through)
+# - arrive: wait for the move to complete, without the extra hover wait
+# - hover: wait for the move to complete, then for the hovering state
+ARRIVAL_POLICIES = ("pass_through", "arrive", "hover")
+
+
+def _check_abort(abort: Optional[Callable[[], bool]]) -> None:
+    if abort is not None and abort():
+        raise MissionExecutionError("Segment aborted: battery reserve reached")
+
+
+def _wait_or_abort(expectation, timeout_sec: float, clock: Any = time, abort: Optional[Callable[[], bool]] = None):
+    """
+    Wait for an Olympe expectation like expectation.wait(_timeout=...), but
+    poll abort() (battery watchdog) at WATCHDOG_POLL_HZ meanwhile; raises
+    MissionExecutionError as soon as it trips. Stops as soon as the
+    expectation is done, succeeded or failed, and returns it so the caller
+    sees its real outcome.
+    """
+    if abort is None:
+        return expectation.wait(_timeout=timeout_sec)
+    poll_hz = float(os.environ.get("WATCHDOG_POLL_HZ", "10"))
+    FixedRateLoop(poll_hz, clock=clock.perf_counter, sleep=clock.sleep).run(
+        lambda _tick: not expectation.done(), duration_sec=timeout_sec, should_stop=abort
+    )
+    _check_abort(abort)
+    return expectation
+
+
+def _arrival_policy(segments: Tuple[Segment, ...], idx: int, default_policy: str) -> str:
+    """
+    Arrival policy for the move_to at segments[idx].
+    Pass-through is only used when the next segment issues its own target
+    (another move_to, a geometric POI orbit joining its circle, or RTH); the
+    legacy timed orbit needs the drone on position, and landing or the end of
+    the mission needs a full hover. A segment can force it with "hover": true.
+    """
+    if default_policy == "hover" or segments[idx].hover:
+        return "hover"
+    nxt = segments[idx + 1] if idx + 1 < len(segments) else None
+    if isinstance(nxt, (MoveTo, ReturnToHome)):
+        return default_policy
+    if isinstance(nxt, PoiInspection):
+        if nxt.geometric:
+            return default_policy
+        return "arrive"
+    return "hover"
+
+
+def _acceptance_radius(segment: MoveTo, max_horizontal_speed: float) -> float:
+    """Pass-through acceptance radius: explicit, else scaled with the commanded speed."""
+    if segment.acceptance_radius is not None:
+        return segment.acceptance_radius
+    min_radius = float(os.environ.get("PASS_THROUGH_MIN_RADIUS_M", "3.0"))
+    lookahead_sec = float(os.environ.get("PASS_THROUGH_LOOKAHEAD_SEC", "0.6"))
+    return max(min_radius, max_horizontal_speed * lookahead_sec)
+
+
 def _segment_move_to(
     drone,
     extended_move_to,
     FlyingStateChanged,
-    segment: Dict[str, Any],
+    PositionChanged,
+    AltitudeChanged,
+    segment: MoveTo,
     move_timeout_sec: float,
-) -> None:
-    lat = float(segment.get("latitude"))
-    lon = float(segment.get("longitude"))
-    alt = float(segment.get("altitude"))
-    max_horizontal_speed = float(segment.get("max_horizontal_speed", 15.0))
-    max_vertical_speed = float(segment.get("max_vertical_speed", 2.0))
-    max_yaw_rotation_speed = float(segment.get("max_yaw_rotation_speed", 1.0))
+    arrival: str = "hover",
+    clock: Any = time,
+    abort: Optional[Callable[[], bool]] = None,
+) -> Dict[str, Any]:
+    """
+    Fly to a GPS target with extended_move_to.
+    With arrival="pass_through", the move is not awaited: live position
+    telemetry is polled and the segment ends once the drone is within the
+    acceptance radius of the target in 3D, so the next target is issued
+    without decelerating. Without a relative altitude (AltitudeChanged) the
+    vertical error is unknown and the move is awaited as with "arrive".
+    abort() (battery watchdog) is polled while waiting, whatever the policy.
+    Returns segment details for the report.
+    """
+    lat, lon, alt = segment.latitude, segment.longitude, segment.altitude
+    max_horizontal_speed = segment.max_horizontal_speed
+    max_vertical_speed = segment.max_vertical_speed
+    max_yaw_rotation_speed = segment.max_yaw_rotation_speed
     logger.info(
-        f"Segment: move_to lat={lat:.6f} lon={lon:.6f} alt={alt} hs={max_horizontal_speed} vs={max_vertical_speed} yaw={max_yaw_rotation_speed}"
+        f"Segment: move_to lat={lat:.6f} lon={lon:.6f} alt={alt} hs={max_horizontal_speed} vs={max_vertical_speed} yaw={max_yaw_rotation_speed} arrival={arrival}"
     )
-    result = drone(
+    move = drone(
         extended_move_to(
             latitude=lat,
             longitude=lon,
@@ -178,11 +334,48 @@ def _segment_move_to(
             max_vertical_speed=max_vertical_speed,
             max_yaw_rotation_speed=max_yaw_rotation_speed,
         )
-    ).wait(_timeout=move_timeout_sec)
+    )
+    if arrival == "pass_through":
+        radius = _acceptance_radius(segment, max_horizontal_speed)
+        poll_hz = float(os.environ.get("PASS_THROUGH_POLL_HZ", "10"))
+        state = {"distance": None, "done": False}
+
+        def _poll(_tick: int) -> bool:
+            pos = _get_position(drone, PositionChanged)
+            # PositionChanged altitude is AMSL, the target's is above takeoff: use AltitudeChanged
+            rel_alt = _get_relative_altitude(drone, AltitudeChanged)
+            if pos is not None and rel_alt is not None:
+                state["distance"] = math.hypot(haversine_m(lat, lon, pos[0], pos[1]), rel_alt - alt)
+                if state["distance"] <= radius:
+                    return False
+            if move.done():
+                # Move completed (or failed) before telemetry confirmed the radius
+                state["done"] = True
+                return False
+            return True
+
+        FixedRateLoop(poll_hz, clock=clock.perf_counter, sleep=clock.sleep).run(
+            _poll, duration_sec=move_timeout_sec, should_stop=abort
+        )
+        _check_abort(abort)
+        if state["done"] and not move.success():
+            raise MissionExecutionError(f"Move_to failed: {move.explain()}")
+        distance = state["distance"]
+        if not state["done"] and (distance is None or distance > radius):
+            raise MissionExecutionError(f"Move_to did not reach acceptance radius ({radius:.1f}m) in time")
+        logger.info(f"Passing through waypoint at {distance if distance is not None else 0.0:.1f}m (radius {radius:.1f}m)")
+        return {
+            "arrival": arrival,
+            "acceptance_radius_m": round(radius, 2),
+            "arrival_distance_m": round(distance, 2) if distance is not None else None,
+        }
+    result = _wait_or_abort(move, move_timeout_sec, clock, abort)
     if not result.success():
         raise MissionExecutionError(f"Move_to failed: {result.explain()}")
-    # Wait for hover for stability
-    drone(FlyingStateChanged(state="hovering")).wait(_timeout=move_timeout_sec)
+    if arrival == "hover":
+        # Wait for hover for stability
+        _wait_or_abort(drone(FlyingStateChanged(state="hovering")), move_timeout_sec, clock, abort)
+    return {"arrival": arrival}
 
 
 def _segment_poi_inspection(
@@ -191,15 +384,20 @@ def _segment_poi_inspection(
     StopPilotedPOI,
     PCMD,
     PilotedPOI,
-    segment: Dict[str, Any],
+    segment: PoiInspection,
     command_rate_hz: float,
-) -> None:
-    poi_name = segment.get("poi_name", "unknown")
-    lat = float(segment.get("latitude"))
-    lon = float(segment.get("longitude"))
-    alt = float(segment.get("altitude"))
-    rotation_duration = float(segment.get("rotation_duration", 30.0))
-    roll_rate = int(segment.get("roll_rate", 50))
+    clock: Any = time,
+    abort: Optional[Callable[[], bool]] = None,
+) -> Dict[str, Any]:
+    """
+    Legacy timed orbit: StartPilotedPOIV2 + a constant roll_rate PCMD stream
+    held for rotation_duration seconds.
+    Returns segment details for the report (PCMD control loop statistics).
+    """
+    poi_name = segment.poi_name
+    lat, lon, alt = segment.latitude, segment.longitude, segment.altitude
+    rotation_duration = segment.rotation_duration
+    roll_rate = segment.roll_rate
     logger.info(
         f"Segment: poi_inspection name={poi_name} lat={lat:.6f} lon={lon:.6f} alt={alt} duration={rotation_duration}s roll_rate={roll_rate}"
     )
@@ -209,7 +407,7 @@ def _segment_poi_inspection(
     ).wait(_timeout=5)
     if not result.success():
         raise MissionExecutionError(f"StartPilotedPOIV2 failed: {result.explain()}")
-    time.sleep(1.0)
+    clock.sleep(1.0)
     # Optional: observe POI state
     try:
         poi_state = drone.get_state(PilotedPOI)
@@ -217,24 +415,138 @@ def _segment_poi_inspection(
             logger.info(f"POI state: {poi_state}")
     except Exception:
         logger.warning("POI state unavailable")
-    # Orbit by constant roll
+    # Orbit by constant roll, PCMD stream paced on absolute deadlines
     total_steps = max(1, int(rotation_duration * command_rate_hz))
-    sleep_dt = 1.0 / command_rate_hz
-    for _ in range(total_steps):
-        drone(PCMD(1, roll_rate, 0, 0, 0, timestampAndSeqNum=0))
-        time.sleep(sleep_dt)
+    loop = FixedRateLoop(command_rate_hz, clock=clock.perf_counter, sleep=clock.sleep)
+    loop_stats = loop.run(
+        lambda _tick: drone(PCMD(1, roll_rate, 0, 0, 0, timestampAndSeqNum=0)),
+        max_ticks=total_steps,
+        should_stop=abort,
+    )
+    logger.info(
+        f"PCMD loop: {loop_stats['achieved_rate_hz']:.2f}/{loop_stats['target_rate_hz']:.2f} Hz, "
+        f"max jitter {loop_stats['max_jitter_ms']:.1f} ms, overruns {loop_stats['overruns']}"
+    )
     # Stop movement and POI mode
     drone(PCMD(0, 0, 0, 0, 0, timestampAndSeqNum=0))
     try:
         drone(StopPilotedPOI()).wait(_timeout=5)
     except Exception as exc:
         logger.warning(f"StopPilotedPOI warning: {exc}")
+    _check_abort(abort)
+    return {"control_loop": loop_stats}
 
 
-def _segment_return_to_home(drone, timeout_sec: float) -> None:
+def _segment_poi_orbit(
+    drone,
+    extended_move_to,
+    StartPilotedPOIV2,
+    StopPilotedPOI,
+    PCMD,
+    PositionChanged,
+    segment: PoiInspection,
+    command_rate_hz: float,
+    move_timeout_sec: float,
+    clock: Any = time,
+    abort: Optional[Callable[[], bool]] = None,
+) -> Dict[str, Any]:
+    """
+    Geometric orbit: fly to the orbit circle, then roll around the POI until
+    the bearing POI -> drone has covered sweep_angle degrees.
+    The planned duration (arc length / ground speed) is only used as a fallback
+    when no position telemetry is available, and bounds the orbit as a timeout.
+    Returns segment details for the report (orbit plan/result, control loop stats).
+    """
+    poi_name = segment.poi_name
+    lat, lon, alt = segment.latitude, segment.longitude, segment.altitude
+    plan = plan_orbit(segment.orbit_radius, segment.sweep_angle, segment.ground_speed)
+    logger.info(
+        f"Segment: poi_inspection name={poi_name} lat={lat:.6f} lon={lon:.6f} alt={alt} "
+        f"radius={plan.radius_m}m sweep={plan.sweep_deg}deg speed={plan.ground_speed_mps:.1f}m/s "
+        f"roll={plan.roll_percent}% planned={plan.duration_sec:.1f}s"
+    )
+    # Join the orbit circle on the side the drone is already on (south if unknown)
+    entry_tolerance_m = float(os.environ.get("ORBIT_ENTRY_TOLERANCE_M", "2.0"))
+    position = _get_position(drone, PositionChanged)
+    entry_bearing = 180.0
+    distance = None
+    if position is not None:
+        distance = haversine_m(lat, lon, position[0], position[1])
+        if distance > 1.0:
+            entry_bearing = bearing_deg(lat, lon, position[0], position[1])
+    if distance is None or abs(distance - plan.radius_m) > entry_tolerance_m:
+        entry_lat, entry_lon = destination_point(lat, lon, entry_bearing, plan.radius_m)
+        logger.info(f"Joining orbit circle at bearing {entry_bearing:.0f}deg ({entry_lat:.6f}, {entry_lon:.6f})")
+        move = drone(
+            extended_move_to(
+                latitude=entry_lat,
+                longitude=entry_lon,
+                altitude=alt,
+                orientation_mode="to_target",
+                heading=0.0,
+                max_horizontal_speed=segment.max_horizontal_speed,
+                max_vertical_speed=segment.max_vertical_speed,
+                max_yaw_rotation_speed=segment.max_yaw_rotation_speed,
+            )
+        )
+        result = _wait_or_abort(move, move_timeout_sec, clock, abort)
+        if not result.success():
+            raise MissionExecutionError(f"Move to orbit entry failed: {result.explain()}")
+    # Start POI mode
+    result = drone(
+        StartPilotedPOIV2(latitude=lat, longitude=lon, altitude=alt, mode="locked_gimbal")
+    ).wait(_timeout=5)
+    if not result.success():
+        raise MissionExecutionError(f"StartPilotedPOIV2 failed: {result.explain()}")
+    clock.sleep(1.0)
+    tracker = SweepTracker()
+    fallback_ticks = max(1, int(plan.duration_sec * command_rate_hz))
+    outcome = {"terminated_by": "timeout", "tracked": False}
+
+    def _orbit_tick(tick: int) -> bool:
+        pitch = 0
+        pos = _get_position(drone, PositionChanged)
+        if pos is not None:
+            outcome["tracked"] = True
+            if tracker.update(bearing_deg(lat, lon, pos[0], pos[1])) >= plan.sweep_deg:
+                outcome["terminated_by"] = "sweep"
+                return False
+            pitch = radius_hold_pitch(haversine_m(lat, lon, pos[0], pos[1]), plan.radius_m)
+        elif not outcome["tracked"] and tick >= fallback_ticks:
+            # No telemetry at all: fall back to the planned duration
+            outcome["terminated_by"] = "duration"
+            return False
+        drone(PCMD(1, plan.roll_percent, pitch, 0, 0, timestampAndSeqNum=0))
+        return True
+
+    loop_stats = FixedRateLoop(command_rate_hz, clock=clock.perf_counter, sleep=clock.sleep).run(
+        _orbit_tick, duration_sec=plan.timeout_sec, should_stop=abort
+    )
+    # Stop movement and POI mode
+    drone(PCMD(0, 0, 0, 0, 0, timestampAndSeqNum=0))
+    try:
+        drone(StopPilotedPOI()).wait(_timeout=5)
+    except Exception as exc:
+        logger.warning(f"StopPilotedPOI warning: {exc}")
+    _check_abort(abort)
+    if outcome["terminated_by"] == "timeout":
+        logger.warning(f"Orbit timed out after sweeping {abs(tracker.swept_deg):.0f}/{plan.sweep_deg:.0f}deg")
+    orbit = plan.as_dict()
+    orbit["swept_deg"] = round(abs(tracker.swept_deg), 1)
+    orbit["terminated_by"] = outcome["terminated_by"]
+    logger.info(
+        f"Orbit done: swept {orbit['swept_deg']}deg in {loop_stats['duration_sec']:.1f}s "
+        f"({orbit['terminated_by']}), PCMD {loop_stats['achieved_rate_hz']:.2f} Hz"
+    )
+    return {"orbit": orbit, "control_loop": loop_stats}
+
+
+def _segment_return_to_home(
+    drone, rth, NavigateHome, timeout_sec: float, clock: Any = time, ending_behavior: str = "landing"
+) -> None:
     """
     Return to home. Based on poi_inspection.py approach:
-    - Set ending_behavior to landing if supported
+    - Set ending_behavior (landing, or hovering above home) if supported
     - Start RTH
     - Wait for completion
     Note: With ending_behavior='landing', RTH will land automatically
@@ -243,12 +555,13 @@ def _segment_return_to_home(drone, timeout_sec: float) -> None:
     rth_timeout_sec = float(os.environ.get("RTH_TIMEOUT_SEC", "300"))
     
     try:
-        from olympe.messages import rth  # type: ignore
+        if rth is None:
+            raise MissionExecutionError("rth messages unavailable")
         # Try to set ending behavior first
         try:
             if hasattr(rth, "set_ending_behavior"):
-                drone(rth.set_ending_behavior(ending_behavior="landing")).wait(_timeout=timeout_sec)
-                logger.info("RTH ending behavior set to 'landing'")
+                drone(rth.set_ending_behavior(ending_behavior=ending_behavior)).wait(_timeout=timeout_sec)
+                logger.info(f"RTH ending behavior set to '{ending_behavior}'")
         except Exception as e:
             logger.info(f"Could not set RTH ending behavior: {e}")
         
@@ -269,7 +582,6 @@ def _segment_return_to_home(drone, timeout_sec: float) -> None:
     except Exception as e:
         # Fallback to NavigateHome
         logger.info(f"rth API not available ({e}); fallback to NavigateHome")
-        from olympe.messages.ardrone3.Piloting import NavigateHome  # type: ignore
         # NavigateHome also might not need 'start' parameter
         try:
             if not drone(NavigateHome(start=1)).wait(_timeout=timeout_sec).success():
@@ -278,7 +590,69 @@ def _segment_return_to_home(drone, timeout_sec: float) -> None:
             logger.info("NavigateHome(start=1) failed, trying NavigateHome() without parameters")
             if not drone(NavigateHome()).wait(_timeout=timeout_sec).success():
                 raise MissionExecutionError("Failed to start NavigateHome")
-        time.sleep(5.0)
+        clock.sleep(5.0)
+
+
+def _upload_flight_plan(drone_ip: str, plan: FlightPlan, timeout_sec: float) -> str:
+    """
+    Upload a waypoint file to the drone's flight plan endpoint.
+    Returns the flight plan uid to pass to Mavlink Start.
+    """
+    import requests
+
+    headers = {
+        "Accept": "application/json, text/javascript, text/plain */*; q=0.01",
+        "X-Requested-With": "XMLHttpRequest",
+        "Content-type": "application/octet-stream",
+    }
+    try:
+        resp = requests.put(
+            url=f"http://{drone_ip}/api/v1/upload/flightplan",
+            headers=headers,
+            data=plan.to_waypoint_file().encode("utf-8"),
+            timeout=timeout_sec,
+        )
+        resp.raise_for_status()
+        return str(resp.json())
+    except Exception as exc:
+        raise FlightPlanError(f"Flight plan upload failed: {exc}") from exc
+
+
+def _start_flight_plan(drone, MavlinkStart, MavlinkFilePlayingStateChanged, uid: str, timeout_sec: float) -> None:
+    """Start an uploaded flight plan. Raises FlightPlanError if the drone does not start playing it."""
+    logger.info(f"Starting onboard flight plan {uid}")
+    if not drone(MavlinkStart(filepath=uid, type="flightPlan")).wait(_timeout=timeout_sec).success():
+        raise FlightPlanError("Mavlink Start command failed")
+    if not drone(MavlinkFilePlayingStateChanged(state="playing")).wait(_timeout=timeout_sec):
+        raise FlightPlanError("Flight plan did not start playing")
+
+
+def _wait_flight_plan(
+    drone,
+    MavlinkStop,
+    MavlinkFilePlayingStateChanged,
+    FlyingStateChanged,
+    timeout_sec: float,
+    clock: Any = time,
+    abort: Optional[Callable[[], bool]] = None,
+) -> None:
+    """
+    Wait until the flight plan stops playing and the drone has landed.
+    When abort() (battery watchdog) trips meanwhile, the plan is stopped and
+    MissionExecutionError raised, so the executor's safety RTH takes over.
+    """
+    fp_timeout_sec = float(os.environ.get("FLIGHT_PLAN_TIMEOUT_SEC", "1800"))
+    try:
+        stopped = _wait_or_abort(drone(MavlinkFilePlayingStateChanged(state="stopped")), fp_timeout_sec, clock, abort)
+    except MissionExecutionError:
+        logger.warning("Stopping onboard flight plan: battery reserve reached")
+        if not drone(MavlinkStop()).wait(_timeout=timeout_sec).success():
+            logger.warning("Mavlink Stop command did not return success")
+        raise
+    if not stopped:
+        raise MissionExecutionError("Flight plan did not complete in time")
+    if not drone(FlyingStateChanged(state="landed")).wait(_timeout=timeout_sec * 2):
+        logger.warning("Flight plan stopped but landing not confirmed within timeout")
 
 
 def _segment_land(drone, Landing, FlyingStateChanged, timeout_sec: float) -> None:
@@ -290,9 +664,8 @@ def _segment_land(drone, Landing, FlyingStateChanged, timeout_sec: float) -> Non
     logger.info("Segment: land")
     
     # Check current state before attempting landing
-    from olympe.messages.ardrone3.PilotingState import FlyingStateChanged as FSC  # type: ignore
     try:
-        current_state = drone.get_state(FSC)
+        current_state = drone.get_state(FlyingStateChanged)
         if current_state:
             state_value = current_state.get("state") if isinstance(current_state, dict) else None
             state_str = str(state_value).split(".")[-1] if state_value else None
@@ -324,13 +697,37 @@ def _segment_land(drone, Landing, FlyingStateChanged, timeout_sec: float) -> Non
         logger.warning("Landing status not confirmed within timeout")
 
 
-def execute_mission(mission_dsl: Dict[str, Any], dry_run: bool = False) -> Dict[str, Any]:
+def execute_mission(
+    mission_dsl: Dict[str, Any],
+    dry_run: bool = False,
+    execution_mode: Optional[str] = None,
+    drone_ip: Optional[str] = None,
+    drone_id: Optional[str] = None,
+    on_telemetry: Optional[Callable[[TelemetryRecord], None]] = None,
+) -> Dict[str, Any]:
     """
     Execute a mission DSL on a Parrot drone using Olympe.
+
+    drone_ip selects the aircraft (default: env DRONE_IP); the fleet
+    dispatcher passes the IP of the drone the mission was assigned to.
+    on_telemetry, if given, receives downsampled TelemetryRecords (tagged
+    with drone_id and the current segment index) while the drone is connected.
+    Non dry-run missions are recorded by the flight recorder (telemetry at
+    FLIGHT_RECORDER_RATE_HZ + segment events); report["flight_log"] is the
+    path of the recorded .flight archive.
+    When safety.minBatteryPercent is set, a battery watchdog aborts the
+    mission (-> RTH + land) once the charge projected after returning home
+    falls below it; its state is reported under report["battery_watchdog"].
+
+    execution_mode (default: env MISSION_EXECUTION_MODE, else "segments"):
+    - "segments": one Olympe command round trip per DSL segment
+    - "flight_plan": compile the mission into one onboard MAVLink flight plan
+      and let the drone fly it continuously; falls back to "segments" if the
+      plan cannot be compiled, uploaded or started.
     Returns an execution report with status and per-segment results.
     """
-    # Import Olympe symbols
-    symbols = _import_olympe()
+    # Import backend (Olympe or simulator) symbols
+    symbols = _import_backend()
     Drone = symbols["Drone"]
     TakeOff = symbols["TakeOff"]
     Landing = symbols["Landing"]
@@ -340,80 +737,164 @@ def execute_mission(mission_dsl: Dict[str, Any], dry_run: bool = False) -> Dict[
     PCMD = symbols["PCMD"]
     FlyingStateChanged = symbols["FlyingStateChanged"]
     PilotedPOI = symbols["PilotedPOI"]
+    PositionChanged = symbols["PositionChanged"]
+    AltitudeChanged = symbols["AltitudeChanged"]
     extended_move_to = symbols["extended_move_to"]
+    MavlinkStart = symbols["MavlinkStart"]
+    MavlinkStop = symbols["MavlinkStop"]
+    MavlinkFilePlayingStateChanged = symbols["MavlinkFilePlayingStateChanged"]
     set_mode = symbols["set_mode"]
     oa_mode = symbols["oa_mode"]
+    rth = symbols["rth"]
+    clock = symbols["clock"]
+    upload_flight_plan = symbols["upload_flight_plan"]
     # Timeouts and params
     timeout_sec = float(os.environ.get("TIMEOUT_SEC", "25"))
     move_timeout_sec = float(os.environ.get("MOVE_TIMEOUT_SEC", "120"))
     command_rate_hz = float(os.environ.get("COMMAND_RATE_HZ", "20"))
-    # Validate mission and extract segments
-    segments, safety = _validate_mission_dsl(mission_dsl)
-    geofence = safety.get("geofence", {}) if isinstance(safety, dict) else {}
-    geofence_enabled = bool(geofence.get("enabled", False))
-    max_altitude_m = float(safety.get("maxAltitudeMeters", 80.0)) if isinstance(safety, dict) else None
-    min_battery_percent = safety.get("minBatteryPercent") if isinstance(safety, dict) else None
+    arrival_policy = os.environ.get("MOVE_ARRIVAL_POLICY", "hover").strip().lower()
+    if arrival_policy not in ARRIVAL_POLICIES:
+        raise MissionExecutionError(f"Unknown move arrival policy: {arrival_policy}")
+    # Validate and compile the mission (typed segments, geofence applied)
+    mission = _compile_mission(mission_dsl)
+    segments = mission.segments
+    min_battery_percent = mission.safety.min_battery_percent
+    mode = (execution_mode or os.environ.get("MISSION_EXECUTION_MODE", "segments")).strip().lower()
+    if mode not in ("segments", "flight_plan"):
+        raise MissionExecutionError(f"Unknown execution mode: {mode}")
     # Prepare execution report
     report: Dict[str, Any] = {
         "status": "pending",
+        "execution_mode": mode,
         "executed_segments": [],
         "failed_segment": None,
         "errors": [],
     }
-    drone = Drone(os.environ.get("DRONE_IP", "10.202.0.1"))
+    drone_ip = drone_ip or os.environ.get("DRONE_IP", "10.202.0.1")
+    drone = Drone(drone_ip)
     connected = False
     airborne = False
+    telemetry: Optional[TelemetryCollector] = None
+    watchdog: Optional[BatteryWatchdog] = None
+    recorder = None if dry_run else _open_flight_recorder(mission_dsl, drone_id or drone_ip, clock)
     try:
         if dry_run:
             logger.info("[DRY RUN] Skipping Olympe connection and commands")
         else:
+            _record_event(recorder, "connect")
             _connect_and_prepare(drone, FlyingStateChanged, set_mode, oa_mode, timeout_sec)
             connected = True
+            sinks = []
+            if on_telemetry is not None:
+                sinks.append((on_telemetry, None))
+            if recorder is not None:
+                recorder_rate_hz = float(os.environ.get("FLIGHT_RECORDER_RATE_HZ", DEFAULT_RECORDER_RATE_HZ))
+                sinks.append((recorder.record_telemetry, recorder_rate_hz))
+            if sinks:
+                telemetry = TelemetryCollector(
+                    drone, drone_id or drone_ip, sinks[0][0], mission_dsl.get("missionId"),
+                    rate_hz=sinks[0][1], clock=clock,
+                )
+                for publish, rate_hz in sinks[1:]:
+                    telemetry.add_sink(publish, rate_hz)
+                telemetry.start()
+            if min_battery_percent is not None:
+                watchdog = BatteryWatchdog(
+                    drone, min_battery_percent, clock=clock,
+                    on_trip=lambda _status: _record_event(recorder, "battery_reserve"),
+                )
+                watchdog.start()
+        if mode == "flight_plan":
+            try:
+                position = None if dry_run else _get_position(drone, PositionChanged)
+                plan = compile_flight_plan(mission.to_dsl_segments(), position[:2] if position else None)
+                logger.info(f"Compiled flight plan: {len(plan.items)} items for {len(segments)} segments")
+                report["flight_plan"] = {"items": len(plan.items)}
+                if dry_run:
+                    logger.info("[DRY RUN] flight plan upload and start skipped")
+                else:
+                    uid = upload_flight_plan(drone_ip, plan, timeout_sec)
+                    report["flight_plan"]["uid"] = uid
+                    start_ts = clock.time()
+                    _record_event(recorder, "flight_plan_start")
+                    _start_flight_plan(drone, MavlinkStart, MavlinkFilePlayingStateChanged, uid, timeout_sec)
+                    airborne = True
+                    _wait_flight_plan(
+                        drone, MavlinkStop, MavlinkFilePlayingStateChanged, FlyingStateChanged, timeout_sec, clock,
+                        watchdog.is_tripped if watchdog is not None else None,
+                    )
+                    airborne = False
+                    report["flight_plan"]["elapsed_ms"] = (clock.time() - start_ts) * 1000.0
+                    _record_event(recorder, "flight_plan_end")
+                report["executed_segments"].append(
+                    {"index": len(segments) - 1, "type": "flight_plan", "elapsed_ms": report["flight_plan"].get("elapsed_ms", 0.0)}
+                )
+                report["status"] = "completed"
+                return report
+            except FlightPlanError as exc:
+                logger.warning(f"Flight plan mode unavailable ({exc}); falling back to segment-by-segment mode")
+                report["execution_mode"] = "segments"
+                report["fallback_reason"] = str(exc)
+                _record_event(recorder, "flight_plan_fallback")
+                report.pop("flight_plan", None)
+        abort = watchdog.is_tripped if watchdog is not None else None
         for idx, segment in enumerate(segments):
-            seg_type = str(segment.get("type", "")).strip()
-            if not seg_type:
-                raise MissionExecutionError(f"Segment {idx} missing 'type'")
-            # Geofence altitude clamp for relevant segments
-            if geofence_enabled and max_altitude_m is not None:
-                if seg_type in ("move_to", "poi_inspection") and "altitude" in segment:
-                    original_alt = float(segment["altitude"])
-                    clamped_alt = _apply_geofence_altitude(original_alt, max_altitude_m)
-                    if clamped_alt != original_alt:
-                        logger.warning(f"Clamping altitude from {original_alt}m to {clamped_alt}m due to geofence")
-                        segment = dict(segment)
-                        segment["altitude"] = clamped_alt
-            start_ts = time.time()
+            seg_type = segment.type
+            start_ts = clock.time()
+            details: Dict[str, Any] = {}
+            if telemetry is not None:
+                telemetry.segment = idx
+            if watchdog is not None and watchdog.tripped and seg_type not in ("return_to_home", "land"):
+                raise MissionExecutionError(watchdog.reason)
+            _record_event(recorder, f"segment_start:{seg_type}", idx)
             if seg_type == "takeoff":
                 if dry_run:
                     logger.info("[DRY RUN] takeoff")
                 else:
-                    _segment_takeoff(drone, TakeOff, FlyingStateChanged, timeout_sec)
+                    _segment_takeoff(drone, TakeOff, FlyingStateChanged, segment.max_wait_sec or timeout_sec)
                     airborne = True
             elif seg_type == "move_to":
                 if dry_run:
                     logger.info(f"[DRY RUN] move_to: {segment}")
                 else:
-                    _segment_move_to(drone, extended_move_to, FlyingStateChanged, segment, move_timeout_sec)
+                    details = _segment_move_to(
+                        drone, extended_move_to, FlyingStateChanged, PositionChanged, AltitudeChanged, segment,
+                        move_timeout_sec, _arrival_policy(segments, idx, arrival_policy), clock, abort,
+                    )
             elif seg_type == "poi_inspection":
                 if dry_run:
                     logger.info(f"[DRY RUN] poi_inspection: {segment}")
+                elif segment.geometric:
+                    details = _segment_poi_orbit(
+                        drone, extended_move_to, StartPilotedPOIV2, StopPilotedPOI, PCMD, PositionChanged,
+                        segment, command_rate_hz, move_timeout_sec, clock, abort,
+                    )
                 else:
-                    _segment_poi_inspection(drone, StartPilotedPOIV2, StopPilotedPOI, PCMD, PilotedPOI, segment, command_rate_hz)
+                    details = _segment_poi_inspection(
+                        drone, StartPilotedPOIV2, StopPilotedPOI, PCMD, PilotedPOI, segment, command_rate_hz, clock,
+                        abort,
+                    )
             elif seg_type == "return_to_home":
                 if dry_run:
                     logger.info("[DRY RUN] return_to_home")
                 else:
-                    _segment_return_to_home(drone, timeout_sec)
+                    # Without ending_behavior the drone lands, as with "landing"
+                    _segment_return_to_home(drone, rth, NavigateHome, timeout_sec, clock, segment.ending_behavior or "landing")
+                    if segment.ending_behavior != "hovering":
+                        # RTH lands (e.g. land folded into it by the peephole optimizer): confirm the landing
+                        _segment_land(drone, Landing, FlyingStateChanged, timeout_sec)
+                        airborne = False
             elif seg_type == "land":
                 if dry_run:
                     logger.info("[DRY RUN] land")
                 else:
                     _segment_land(drone, Landing, FlyingStateChanged, timeout_sec)
                     airborne = False
-            else:
-                raise MissionExecutionError(f"Unsupported segment type: {seg_type}")
-            elapsed_ms = (time.time() - start_ts) * 1000.0
-            report["executed_segments"].append({"index": idx, "type": seg_type, "elapsed_ms": elapsed_ms})
+            elapsed_ms = (clock.time() - start_ts) * 1000.0
+            seg_report: Dict[str, Any] = {"index": idx, "type": seg_type, "elapsed_ms": elapsed_ms}
+            seg_report.update(details)
+            report["executed_segments"].append(seg_report)
+            _record_event(recorder, f"segment_end:{seg_type}", idx)
         report["status"] = "completed"
         return report
     except Exception as exc:
@@ -421,22 +902,40 @@ def execute_mission(mission_dsl: Dict[str, Any], dry_run: bool = False) -> Dict[
         report["status"] = "error"
         report["failed_segment"] = report["executed_segments"][-1]["index"] + 1 if report["executed_segments"] else 0
         report["errors"].append(str(exc))
+        _record_event(recorder, "error", report["failed_segment"])
         # Safety: attempt RTH + land if airborne
         try:
             if not dry_run and connected and airborne:
                 logger.warning("Safety: Attempting Return-To-Home and Landing after failure")
+                _record_event(recorder, "safety_rth")
                 try:
-                    _segment_return_to_home(drone, timeout_sec)
+                    _segment_return_to_home(drone, rth, NavigateHome, timeout_sec, clock)
                 except Exception as rth_exc:
                     logger.warning(f"RTH attempt failed: {rth_exc}")
                 try:
-                    _segment_land(drone, Landing, symbols["FlyingStateChanged"], timeout_sec)
+                    _segment_land(drone, Landing, FlyingStateChanged, timeout_sec)
                 except Exception as land_exc:
                     logger.warning(f"Landing attempt failed: {land_exc}")
         except Exception:
             pass
         return report
     finally:
+        if telemetry is not None:
+            telemetry.stop()
+            report["telemetry"] = {
+                "events_received": telemetry.events_received,
+                "records_published": telemetry.records_published,
+            }
+        if watchdog is not None:
+            watchdog.stop()
+            report["battery_watchdog"] = watchdog.status()
+        if recorder is not None:
+            try:
+                _record_event(recorder, f"mission_end:{report['status']}")
+                report["flight_log"] = recorder.path
+                recorder.close(report)
+            except Exception as exc:
+                logger.warning(f"Flight recorder close failed: {exc}")
         if not dry_run and connected:
             try:
                 drone.disconnect()
@@ -445,30 +944,31 @@ def execute_mission(mission_dsl: Dict[str, Any], dry_run: bool = False) -> Dict[
                 pass
 
 
-def get_drone_identity(timeout_sec: float = 10.0) -> Dict[str, Any]:
+def get_drone_identity(drone_id: Optional[str] = None) -> Dict[str, Any]:
     """
-    Best-effort retrieval of a drone identity using Olympe.
-    Returns a dict with at least 'id' and 'ip'. If richer metadata is available,
-    includes 'model' as well.
+    Identity of a fleet drone (default: first drone of the fleet registry).
+    Returns a dict with at least 'id' and 'ip'.
     """
-    ip = os.environ.get("DRONE_IP", "10.202.0.1")
-    # Simplified for hackathon: return a fixed identity without contacting the drone
-    return {"id": "drone_1", "ip": ip}
+    from fleet import get_fleet_dispatcher
+
+    registry = get_fleet_dispatcher().registry
+    drone = registry.get(drone_id) if drone_id else registry.drones()[0]
+    return drone.identity()
 
 
-def check_olympe_ready(timeout_sec: float = 10.0) -> Tuple[bool, str]:
+def check_olympe_ready(timeout_sec: float = 10.0, drone_ip: Optional[str] = None) -> Tuple[bool, str]:
     """
     Quick readiness probe: attempts to connect and fetch a basic state.
     Returns (ready, reason).
     """
     try:
-        symbols = _import_olympe()
+        symbols = _import_backend()
         Drone = symbols["Drone"]
         FlyingStateChanged = symbols["FlyingStateChanged"]
     except Exception as exc:
         return False, f"Olympe import failed: {exc}"
     
-    ip = os.environ.get("DRONE_IP", "10.202.0.1")
+    ip = drone_ip or os.environ.get("DRONE_IP", "10.202.0.1")
     drone = Drone(ip)
     try:
         if not bool(drone.connect()):
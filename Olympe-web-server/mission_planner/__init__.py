@@ -0,0 +1 @@
+"""Mission planning passes: geometry, ordering and optimization of mission DSL segments."""
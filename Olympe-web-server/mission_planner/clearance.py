@@ -0,0 +1,223 @@
+"""
+Obstacle clearance - check mission legs against the map's obstacles.
+
+The map's "obstacles" (written by add_obstacle_to_map) are a ground point
+(coordinates, altitude_meters as the base) with a height_meters. Each one is
+modeled as a vertical shape from its base to base + height:
+
+- a box when width_meters (east-west) and length_meters (north-south) are
+  given, rotated by heading_degrees (clockwise from north) if present;
+- otherwise a cylinder of radius_meters (DEFAULT_OBSTACLE_RADIUS_M when the
+  map gives no footprint).
+
+Shapes are inflated by the clearance margin (CLEARANCE_MARGIN_M) on every
+side. ObstacleField loads them once into NumPy arrays (local ENU meters);
+check() takes all mission legs (mission_planner.legs), pairs them with the
+obstacles whose inflated bounding box they overlap, and computes for every
+pair at once the part of the leg inside the shape: a quadratic for cylinders,
+slabs for boxes, intersected with the obstacle's altitude band. The result is
+the first conflict along each leg.
+"""
+
+import math
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from geodesy import from_local_enu, to_local_enu
+from mission_planner.estimator import FlightModel
+from mission_planner.legs import MapCache, altitude_interval, map_key, map_origin, mission_legs
+
+DEFAULT_CLEARANCE_MARGIN_M = 5.0
+DEFAULT_OBSTACLE_RADIUS_M = 5.0
+_EPS = 1e-9
+
+
+def _clearance_margin(margin_m: Optional[float]) -> float:
+    if margin_m is not None:
+        return float(margin_m)
+    return float(os.environ.get("CLEARANCE_MARGIN_M", DEFAULT_CLEARANCE_MARGIN_M))
+
+
+class ObstacleField:
+    """Obstacles of one map as arrays of inflated cylinders and boxes."""
+
+    def __init__(self, world_map: Dict[str, Any], margin_m: Optional[float] = None, model: Optional[FlightModel] = None):
+        self.origin = map_origin(world_map)
+        self.margin_m = _clearance_margin(margin_m)
+        self.model = model or FlightModel.from_env()
+        obstacles = [o for o in world_map.get("obstacles") or [] if isinstance(o, dict)]
+        self.names: List[str] = []
+        self.types: List[str] = []
+        rows = []
+        for obstacle in obstacles:
+            name = str(obstacle.get("name", "unnamed"))
+            coords = obstacle.get("coordinates") or {}
+            try:
+                lat, lon = float(coords["latitude"]), float(coords["longitude"])
+                base = float(coords.get("altitude_meters", 0.0))
+                height = float(obstacle["height_meters"])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Obstacle '{name}': needs coordinates and height_meters") from None
+            if obstacle.get("width_meters") is not None and obstacle.get("length_meters") is not None:
+                half_x, half_y = float(obstacle["width_meters"]) / 2.0, float(obstacle["length_meters"]) / 2.0
+                heading = math.radians(float(obstacle.get("heading_degrees", 0.0)))
+                box = 1.0
+            else:
+                half_x = half_y = float(obstacle.get("radius_meters", DEFAULT_OBSTACLE_RADIUS_M))
+                heading, box = 0.0, 0.0
+            rows.append((lat, lon, base, base + height, half_x, half_y, heading, box))
+            self.names.append(name)
+            self.types.append(str(obstacle.get("type", "obstacle")))
+        data = np.asarray(rows, dtype=np.float64).reshape(-1, 8)
+        self.x, self.y = to_local_enu(data[:, 0], data[:, 1], *self.origin)
+        m = self.margin_m
+        self.bottom, self.top = data[:, 2] - m, data[:, 3] + m
+        self.half_x, self.half_y = data[:, 4] + m, data[:, 5] + m
+        # Box frame: x along heading + 90 deg (width), y along heading (length)
+        self.cos, self.sin = np.cos(data[:, 6]), np.sin(data[:, 6])
+        self.is_box = data[:, 7] > 0.5
+        reach = np.where(self.is_box, np.hypot(self.half_x, self.half_y), self.half_x)
+        self.bbox = np.stack([self.x - reach, self.y - reach, self.x + reach, self.y + reach], axis=1)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _cylinder_spans(self, a: np.ndarray, b: np.ndarray, k: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Leg parameter interval inside each (leg, cylinder k) pair's circle."""
+        d = b - a
+        fx, fy = a[:, 0] - self.x[k], a[:, 1] - self.y[k]
+        qa = d[:, 0] ** 2 + d[:, 1] ** 2
+        qb = 2.0 * (fx * d[:, 0] + fy * d[:, 1])
+        qc = fx ** 2 + fy ** 2 - self.half_x[k] ** 2
+        point = qa < _EPS
+        disc = qb ** 2 - 4.0 * qa * qc
+        with np.errstate(divide="ignore", invalid="ignore"):
+            root = np.sqrt(np.maximum(disc, 0.0))
+            t1, t2 = (-qb - root) / (2.0 * qa), (-qb + root) / (2.0 * qa)
+        lo = np.where(point, np.where(qc < 0.0, 0.0, 1.0), np.where(disc > 0.0, t1, 1.0))
+        hi = np.where(point, np.where(qc < 0.0, 1.0, 0.0), np.where(disc > 0.0, t2, 0.0))
+        return np.clip(lo, 0.0, 1.0), np.clip(hi, 0.0, 1.0)
+
+    def _box_spans(self, a: np.ndarray, b: np.ndarray, k: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Leg parameter interval inside each (leg, box k) pair's rectangle (slab method)."""
+        cos, sin = self.cos[k], self.sin[k]
+        lo, hi = np.zeros(len(k)), np.ones(len(k))
+        rel = a - np.stack([self.x[k], self.y[k]], axis=1)
+        d = b - a
+        for p, v, half in (
+            (rel[:, 0] * cos - rel[:, 1] * sin, d[:, 0] * cos - d[:, 1] * sin, self.half_x[k]),
+            (rel[:, 0] * sin + rel[:, 1] * cos, d[:, 0] * sin + d[:, 1] * cos, self.half_y[k]),
+        ):
+            still = np.abs(v) < _EPS
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t1, t2 = (-half - p) / v, (half - p) / v
+            inside = np.abs(p) < half
+            lo = np.maximum(lo, np.where(still, np.where(inside, 0.0, 1.0), np.minimum(t1, t2)))
+            hi = np.minimum(hi, np.where(still, np.where(inside, 1.0, 0.0), np.maximum(t1, t2)))
+        return lo, hi
+
+    def first_conflicts(self, a3: np.ndarray, b3: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        For each leg (M, 3) -> (M, 3): index of the first obstacle hit along the
+        leg and the leg parameter t where it is entered (-1 / NaN when clear).
+        """
+        first_t = np.full(len(a3), np.nan)
+        first_k = np.full(len(a3), -1, dtype=np.int64)
+        if not len(self) or not len(a3):
+            return first_k, first_t
+        lo_xy, hi_xy = np.minimum(a3[:, :2], b3[:, :2]), np.maximum(a3[:, :2], b3[:, :2])
+        overlap = (
+            (hi_xy[:, None, 0] >= self.bbox[None, :, 0]) & (lo_xy[:, None, 0] <= self.bbox[None, :, 2])
+            & (hi_xy[:, None, 1] >= self.bbox[None, :, 1]) & (lo_xy[:, None, 1] <= self.bbox[None, :, 3])
+            & (np.maximum(a3[:, None, 2], b3[:, None, 2]) >= self.bottom[None, :])
+            & (np.minimum(a3[:, None, 2], b3[:, None, 2]) < self.top[None, :])
+        )
+        legs, k = np.nonzero(overlap)
+        if not len(legs):
+            return first_k, first_t
+        a, b = a3[legs, :2], b3[legs, :2]
+        lo, hi = self._cylinder_spans(a, b, k)
+        box = self.is_box[k]
+        if box.any():
+            box_lo, box_hi = self._box_spans(a[box], b[box], k[box])
+            lo[box], hi[box] = box_lo, box_hi
+        z_lo, z_hi = altitude_interval(a3[legs, 2], b3[legs, 2], self.bottom[k], self.top[k])
+        lo, hi = np.maximum(lo, z_lo), np.minimum(hi, z_hi)
+        hit = (hi - lo > _EPS) | ((hi >= lo) & (np.hypot(*(b - a).T) < _EPS) & (b3[legs, 2] == a3[legs, 2]))
+        legs, k, lo = legs[hit], k[hit], lo[hit]
+        # First conflict per leg: sort by (leg, t) and keep the first row of each leg
+        order = np.lexsort((lo, legs))
+        legs, k, lo = legs[order], k[order], lo[order]
+        keep = np.ones(len(legs), dtype=bool)
+        keep[1:] = legs[1:] != legs[:-1]
+        first_k[legs[keep]], first_t[legs[keep]] = k[keep], lo[keep]
+        return first_k, first_t
+
+    def check(
+        self, segments: List[Dict[str, Any]], start_position: Optional[Tuple[float, float]] = None
+    ) -> List[Dict[str, Any]]:
+        """First conflict of each leg of the mission, in flight order."""
+        a3, b3, owner = mission_legs(segments, self.origin, start_position, self.model)
+        first_k, first_t = self.first_conflicts(a3, b3)
+        conflicts = []
+        for leg in np.nonzero(first_k >= 0)[0]:
+            k, t = int(first_k[leg]), float(first_t[leg])
+            point = a3[leg] + t * (b3[leg] - a3[leg])
+            lat, lon = from_local_enu(point[0], point[1], *self.origin)
+            idx = int(owner[leg])
+            conflicts.append({
+                "segment": idx,
+                "type": str(segments[idx].get("type", "")),
+                "leg": int(leg),
+                "obstacle": self.names[k],
+                "obstacle_type": self.types[k],
+                "shape": "box" if self.is_box[k] else "cylinder",
+                "latitude": float(lat),
+                "longitude": float(lon),
+                "altitude": round(float(point[2]), 2),
+                "along_m": round(t * float(np.linalg.norm(b3[leg] - a3[leg])), 1),
+            })
+        return conflicts
+
+
+_FIELDS: Dict[str, ObstacleField] = MapCache()
+
+
+def get_obstacle_field(world_map: Dict[str, Any]) -> ObstacleField:
+    """Obstacle field for a map and the current margin, built once (cached by content hash)."""
+    margin = _clearance_margin(None)
+    key = map_key(world_map, ("obstacles", "starting_position"), margin)
+    field = _FIELDS.get(key)
+    if field is None:
+        field = _FIELDS[key] = ObstacleField(world_map, margin)
+    return field
+
+
+def format_conflict(conflict: Dict[str, Any]) -> str:
+    return (
+        f"segment {conflict['segment']} ({conflict['type']}) hits {conflict['obstacle_type']} '{conflict['obstacle']}' "
+        f"after {conflict['along_m']:g} m at ({conflict['latitude']:.6f}, {conflict['longitude']:.6f}, {conflict['altitude']:g} m)"
+    )
+
+
+def check_mission_clearance(
+    mission_dsl: Dict[str, Any],
+    world_map: Dict[str, Any],
+    start_position: Optional[Tuple[float, float]] = None,
+) -> Dict[str, Any]:
+    """Mission-level wrapper: returns a copy with the report under "clearance" (ok, conflicts, compute_us)."""
+    t0 = time.perf_counter_ns()
+    field = get_obstacle_field(world_map)
+    conflicts = field.check(list(mission_dsl.get("segments") or []), start_position)
+    checked = dict(mission_dsl)
+    checked["clearance"] = {
+        "ok": not conflicts,
+        "obstacles": len(field),
+        "margin_m": field.margin_m,
+        "conflicts": conflicts,
+        "compute_us": round((time.perf_counter_ns() - t0) / 1000.0, 1),
+    }
+    return checked
@@ -0,0 +1,273 @@
+"""
+Compiled mission - typed, immutable representation of a mission DSL.
+
+compile_mission() validates a mission DSL once, up front: every segment is
+parsed into a `__slots__` object with its types checked and defaults
+resolved, unknown segment types and out-of-range values are rejected with
+the offending segment index, and the geofence altitude ceiling is applied.
+The executor consumes these objects directly, so an invalid mission fails
+before connecting to the drone and the segment loop does no parsing.
+
+Segments are read-only; to_dict() gives back the equivalent DSL segment
+(for the flight plan compiler and reports).
+"""
+
+import logging
+import math
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from mission_planner.orbit import (
+    DEFAULT_GROUND_SPEED_MPS,
+    DEFAULT_ORBIT_RADIUS_M,
+    DEFAULT_SWEEP_DEG,
+    is_geometric_orbit,
+    orbit_radius_key,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_HORIZONTAL_SPEED = 15.0
+DEFAULT_MAX_VERTICAL_SPEED = 2.0
+DEFAULT_MAX_YAW_ROTATION_SPEED = 1.0
+DEFAULT_MAX_ALTITUDE_M = 80.0
+# Geofence floor, avoids ground scrape
+MIN_GEOFENCE_ALTITUDE_M = 1.0
+DEFAULT_ROTATION_DURATION_SEC = 30.0
+DEFAULT_ROLL_RATE = 50
+
+
+class MissionCompileError(ValueError):
+    """Invalid mission DSL (message names the offending segment)."""
+
+
+class _Frozen:
+    __slots__ = ()
+
+    def __init__(self, **values: Any):
+        for name in self._fields():
+            object.__setattr__(self, name, values[name])
+
+    @classmethod
+    def _fields(cls) -> Tuple[str, ...]:
+        return tuple(name for klass in reversed(cls.__mro__) for name in getattr(klass, "__slots__", ()))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other: Any) -> bool:
+        return type(self) is type(other) and all(getattr(self, n) == getattr(other, n) for n in self._fields())
+
+    def __hash__(self) -> int:
+        return hash((type(self),) + tuple(getattr(self, n) for n in self._fields()))
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{n}={getattr(self, n)!r}" for n in self._fields())
+        return f"{type(self).__name__}({values})"
+
+
+class Segment(_Frozen):
+    """Base of all compiled segments: `type` is the DSL type name, index the position in the mission."""
+
+    __slots__ = ("index",)
+    type = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        values = {n: getattr(self, n) for n in self._fields() if n != "index"}
+        return {"type": self.type, **{k: v for k, v in values.items() if v is not None}}
+
+
+class Takeoff(Segment):
+    __slots__ = ("max_wait_sec",)
+    type = "takeoff"
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self.max_wait_sec is None:
+            return {"type": self.type}
+        return {"type": self.type, "constraints": {"maxWaitSec": self.max_wait_sec}}
+
+
+class MoveTo(Segment):
+    __slots__ = (
+        "latitude",
+        "longitude",
+        "altitude",
+        "max_horizontal_speed",
+        "max_vertical_speed",
+        "max_yaw_rotation_speed",
+        "hover",
+        "acceptance_radius",
+    )
+    type = "move_to"
+
+
+class PoiInspection(Segment):
+    """
+    POI inspection. geometric=True: orbit planner (orbit_radius, sweep_angle,
+    ground_speed); False: legacy timed orbit (rotation_duration, roll_rate).
+    """
+
+    __slots__ = (
+        "poi_name",
+        "latitude",
+        "longitude",
+        "altitude",
+        "geometric",
+        "orbit_radius",
+        "sweep_angle",
+        "ground_speed",
+        "rotation_duration",
+        "roll_rate",
+        "max_horizontal_speed",
+        "max_vertical_speed",
+        "max_yaw_rotation_speed",
+    )
+    type = "poi_inspection"
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = super().to_dict()
+        del data["geometric"]
+        if self.geometric:
+            data.pop("rotation_duration", None)
+            data.pop("roll_rate", None)
+        return data
+
+
+class ReturnToHome(Segment):
+    __slots__ = ("ending_behavior",)
+    type = "return_to_home"
+
+
+class Land(Segment):
+    __slots__ = ()
+    type = "land"
+
+
+class SafetyConfig(_Frozen):
+    __slots__ = ("geofence_enabled", "max_altitude_m", "min_battery_percent")
+
+
+class CompiledMission(_Frozen):
+    """A validated mission: id, typed segments (tuple) and safety settings."""
+
+    __slots__ = ("mission_id", "segments", "safety")
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    def __iter__(self) -> Iterator[Segment]:
+        return iter(self.segments)
+
+    def to_dsl_segments(self) -> List[Dict[str, Any]]:
+        return [segment.to_dict() for segment in self.segments]
+
+
+def _number(raw: Dict[str, Any], key: str, idx: int, default: Optional[float] = None, positive: bool = False,
+            low: Optional[float] = None, high: Optional[float] = None) -> Optional[float]:
+    value = raw.get(key, default)
+    if value is None:
+        if default is None and key in raw:
+            raise MissionCompileError(f"Segment {idx} ({raw.get('type')}): '{key}' is null")
+        return default
+    if isinstance(value, bool):
+        raise MissionCompileError(f"Segment {idx} ({raw.get('type')}): '{key}' must be a number, got {value!r}")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise MissionCompileError(f"Segment {idx} ({raw.get('type')}): '{key}' must be a number, got {value!r}") from None
+    if not math.isfinite(number):
+        raise MissionCompileError(f"Segment {idx} ({raw.get('type')}): '{key}' must be finite")
+    if positive and number <= 0:
+        raise MissionCompileError(f"Segment {idx} ({raw.get('type')}): '{key}' must be > 0, got {number}")
+    if (low is not None and number < low) or (high is not None and number > high):
+        raise MissionCompileError(f"Segment {idx} ({raw.get('type')}): '{key}' out of range [{low}, {high}]: {number}")
+    return number
+
+
+def _required(raw: Dict[str, Any], key: str, idx: int, **bounds: Any) -> float:
+    if key not in raw:
+        raise MissionCompileError(f"Segment {idx} ({raw.get('type')}): missing '{key}'")
+    return _number(raw, key, idx, **bounds)
+
+
+def _position(raw: Dict[str, Any], idx: int, safety: SafetyConfig) -> Dict[str, float]:
+    altitude = _required(raw, "altitude", idx)
+    if safety.geofence_enabled and safety.max_altitude_m is not None:
+        clamped = min(max(altitude, MIN_GEOFENCE_ALTITUDE_M), safety.max_altitude_m)
+        if clamped != altitude:
+            logger.warning(f"Clamping altitude from {altitude}m to {clamped}m due to geofence")
+            altitude = clamped
+    return {
+        "latitude": _required(raw, "latitude", idx, low=-90.0, high=90.0),
+        "longitude": _required(raw, "longitude", idx, low=-180.0, high=180.0),
+        "altitude": altitude,
+    }
+
+
+def _speeds(raw: Dict[str, Any], idx: int) -> Dict[str, float]:
+    return {
+        "max_horizontal_speed": _number(raw, "max_horizontal_speed", idx, DEFAULT_MAX_HORIZONTAL_SPEED, positive=True),
+        "max_vertical_speed": _number(raw, "max_vertical_speed", idx, DEFAULT_MAX_VERTICAL_SPEED, positive=True),
+        "max_yaw_rotation_speed": _number(raw, "max_yaw_rotation_speed", idx, DEFAULT_MAX_YAW_ROTATION_SPEED, positive=True),
+    }
+
+
+def _compile_segment(raw: Any, idx: int, safety: SafetyConfig) -> Segment:
+    if not isinstance(raw, dict):
+        raise MissionCompileError(f"Segment {idx} must be an object")
+    seg_type = str(raw.get("type", "")).strip()
+    if not seg_type:
+        raise MissionCompileError(f"Segment {idx} missing 'type'")
+    if seg_type == "takeoff":
+        constraints = raw.get("constraints") if isinstance(raw.get("constraints"), dict) else {}
+        return Takeoff(index=idx, max_wait_sec=_number(constraints, "maxWaitSec", idx, positive=True))
+    if seg_type == "move_to":
+        return MoveTo(
+            index=idx,
+            **_position(raw, idx, safety),
+            **_speeds(raw, idx),
+            hover=bool(raw.get("hover", False)),
+            acceptance_radius=_number(raw, "acceptance_radius", idx, positive=True),
+        )
+    if seg_type == "poi_inspection":
+        return PoiInspection(
+            index=idx,
+            poi_name=str(raw.get("poi_name", "unknown")),
+            **_position(raw, idx, safety),
+            geometric=is_geometric_orbit(raw),
+            orbit_radius=_number(raw, orbit_radius_key(raw), idx, DEFAULT_ORBIT_RADIUS_M, positive=True),
+            sweep_angle=_number(raw, "sweep_angle", idx, DEFAULT_SWEEP_DEG, positive=True),
+            ground_speed=_number(raw, "ground_speed", idx, DEFAULT_GROUND_SPEED_MPS, positive=True),
+            rotation_duration=_number(raw, "rotation_duration", idx, DEFAULT_ROTATION_DURATION_SEC, positive=True),
+            roll_rate=int(_number(raw, "roll_rate", idx, DEFAULT_ROLL_RATE, low=-100, high=100)),
+            **_speeds(raw, idx),
+        )
+    if seg_type == "return_to_home":
+        ending = raw.get("ending_behavior")
+        if ending not in (None, "landing", "hovering"):
+            raise MissionCompileError(f"Segment {idx} (return_to_home): unknown ending_behavior {ending!r}")
+        return ReturnToHome(index=idx, ending_behavior=ending)
+    if seg_type == "land":
+        return Land(index=idx)
+    raise MissionCompileError(f"Segment {idx}: unsupported segment type '{seg_type}'")
+
+
+def compile_mission(mission_dsl: Dict[str, Any]) -> CompiledMission:
+    """Validate and compile a mission DSL. Raises MissionCompileError."""
+    if not isinstance(mission_dsl, dict):
+        raise MissionCompileError("Mission DSL must be a JSON object")
+    raw_segments = mission_dsl.get("segments")
+    if not isinstance(raw_segments, list) or not raw_segments:
+        raise MissionCompileError("Mission DSL must contain a non-empty 'segments' list")
+    raw_safety = mission_dsl.get("safety") if isinstance(mission_dsl.get("safety"), dict) else {}
+    geofence = raw_safety.get("geofence") if isinstance(raw_safety.get("geofence"), dict) else {}
+    min_battery = raw_safety.get("minBatteryPercent")
+    try:
+        safety = SafetyConfig(
+            geofence_enabled=bool(geofence.get("enabled", False)),
+            max_altitude_m=float(raw_safety.get("maxAltitudeMeters", DEFAULT_MAX_ALTITUDE_M)),
+            min_battery_percent=float(min_battery) if min_battery is not None else None,
+        )
+    except (TypeError, ValueError) as exc:
+        raise MissionCompileError(f"Invalid safety settings: {exc}") from None
+    segments = tuple(_compile_segment(raw, idx, safety) for idx, raw in enumerate(raw_segments))
+    return CompiledMission(mission_id=mission_dsl.get("missionId"), segments=segments, safety=safety)
@@ -0,0 +1,234 @@
+"""
+Mission estimator - pre-flight duration and battery use of a mission DSL.
+
+Walks the segments from the map's starting position with a simple kinematic
+model (transit at the commanded horizontal/vertical speeds plus an
+acceleration overhead per stop, orbits from the orbit planner, fixed takeoff
+and landing times) and a linear power model (battery percent per minute in
+hover/cruise, plus an extra cost while climbing). Everything is closed-form,
+so a mission is estimated in microseconds; the compute time is reported.
+
+The model is configurable with ESTIMATOR_* environment variables (see
+FlightModel.from_env). check_battery() compares the projected remaining
+charge with safety.minBatteryPercent.
+"""
+
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from geodesy import haversine_m
+from mission_planner.orbit import is_geometric_orbit, orbit_parameters, plan_orbit
+
+Position = Tuple[float, float, float]
+
+
+@dataclass(frozen=True)
+class FlightModel:
+    """Speeds, fixed times and power draw used by the estimator."""
+
+    horizontal_speed_mps: float = 15.0
+    vertical_speed_mps: float = 2.0
+    acceleration_mps2: float = 2.0
+    takeoff_sec: float = 5.0
+    takeoff_altitude_m: float = 1.0
+    landing_speed_mps: float = 0.7
+    rth_speed_mps: float = 10.0
+    rth_altitude_m: float = 30.0
+    poi_setup_sec: float = 1.0
+    hover_percent_per_min: float = 4.0
+    cruise_percent_per_min: float = 4.5
+    climb_percent_per_min: float = 3.0
+
+    @classmethod
+    def from_env(cls) -> "FlightModel":
+        """Defaults overridden by ESTIMATOR_<FIELD> variables (e.g. ESTIMATOR_HOVER_PERCENT_PER_MIN)."""
+        overrides = {}
+        for name in cls.__dataclass_fields__:
+            value = os.environ.get(f"ESTIMATOR_{name.upper()}")
+            if value is not None:
+                overrides[name] = float(value)
+        return cls(**overrides)
+
+
+@dataclass
+class SegmentEstimate:
+    index: int
+    type: str
+    duration_sec: float
+    distance_m: float
+    energy_percent: float
+
+
+@dataclass
+class MissionEstimate:
+    segments: List[SegmentEstimate] = field(default_factory=list)
+    compute_us: float = 0.0
+
+    @property
+    def duration_sec(self) -> float:
+        return sum(seg.duration_sec for seg in self.segments)
+
+    @property
+    def distance_m(self) -> float:
+        return sum(seg.distance_m for seg in self.segments)
+
+    @property
+    def energy_percent(self) -> float:
+        return sum(seg.energy_percent for seg in self.segments)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "duration_sec": round(self.duration_sec, 1),
+            "distance_m": round(self.distance_m, 1),
+            "energy_percent": round(self.energy_percent, 2),
+            "compute_us": round(self.compute_us, 1),
+            "segments": [
+                {
+                    **asdict(seg),
+                    "duration_sec": round(seg.duration_sec, 2),
+                    "distance_m": round(seg.distance_m, 1),
+                    "energy_percent": round(seg.energy_percent, 3),
+                }
+                for seg in self.segments
+            ],
+        }
+
+
+def _move(model: FlightModel, horizontal: float, vertical: float, speed: float, vspeed: float) -> Tuple[float, float, float]:
+    """(duration, distance, climb duration) of a straight move, with one accelerate/decelerate cycle."""
+    duration = max(horizontal / speed, abs(vertical) / vspeed)
+    if horizontal > 0.0:
+        duration += speed / model.acceleration_mps2
+    return duration, horizontal + abs(vertical), max(0.0, vertical) / vspeed
+
+
+def _transit(model: FlightModel, start: Position, end: Position, speed: float, vspeed: float) -> Tuple[float, float, float]:
+    return _move(model, haversine_m(start[0], start[1], end[0], end[1]), end[2] - start[2], speed, vspeed)
+
+
+def _return_home(
+    model: FlightModel, position: Position, home: Position, landing: bool
+) -> Tuple[float, float, float, Position]:
+    """(duration, distance, climb duration, end position) of RTH: climb to RTH altitude, fly home, optionally land."""
+    speed, vspeed = model.rth_speed_mps, model.vertical_speed_mps
+    cruise_alt = max(position[2], model.rth_altitude_m)
+    top = (position[0], position[1], cruise_alt)
+    up_sec, up_m, climb = _transit(model, position, top, speed, vspeed)
+    over_sec, over_m, _ = _transit(model, top, (home[0], home[1], cruise_alt), speed, vspeed)
+    duration, distance = up_sec + over_sec, up_m + over_m
+    if not landing:
+        return duration, distance, climb, (home[0], home[1], cruise_alt)
+    return duration + cruise_alt / model.landing_speed_mps, distance + cruise_alt, climb, (home[0], home[1], 0.0)
+
+
+def return_home_energy_percent(
+    position: Position, home: Tuple[float, float], model: Optional[FlightModel] = None
+) -> float:
+    """Battery percent needed to return home and land from position (lat, lon, altitude above home)."""
+    model = model or FlightModel.from_env()
+    duration, _, climb, _ = _return_home(model, position, (home[0], home[1], 0.0), landing=True)
+    return duration * model.cruise_percent_per_min / 60.0 + climb * model.climb_percent_per_min / 60.0
+
+
+def estimate_mission(
+    segments: List[Dict[str, Any]],
+    start_position: Optional[Tuple[float, float]] = None,
+    model: Optional[FlightModel] = None,
+) -> MissionEstimate:
+    """
+    Per-segment duration/distance/energy of a mission flown from start_position
+    (lat, lon; also the return_to_home target). Segments without usable
+    coordinates, or flown before any position is known, count time only.
+    """
+    t0 = time.perf_counter_ns()
+    model = model or FlightModel.from_env()
+    hover_rate = model.hover_percent_per_min / 60.0
+    cruise_rate = model.cruise_percent_per_min / 60.0
+    climb_rate = model.climb_percent_per_min / 60.0
+    home: Optional[Position] = (start_position[0], start_position[1], 0.0) if start_position else None
+    position = home
+    estimate = MissionEstimate()
+    for idx, segment in enumerate(segments):
+        seg_type = str(segment.get("type", "")).strip()
+        duration = distance = climb = 0.0
+        cruise = True
+        if seg_type == "takeoff":
+            duration, distance, climb = model.takeoff_sec, model.takeoff_altitude_m, model.takeoff_sec
+            cruise = False
+            if position is not None:
+                position = (position[0], position[1], model.takeoff_altitude_m)
+        elif seg_type in ("move_to", "poi_inspection"):
+            try:
+                target = (float(segment["latitude"]), float(segment["longitude"]), float(segment["altitude"]))
+            except (KeyError, TypeError, ValueError):
+                target = None
+            speed = float(segment.get("max_horizontal_speed", model.horizontal_speed_mps))
+            vspeed = float(segment.get("max_vertical_speed", model.vertical_speed_mps))
+            if seg_type == "move_to":
+                if target is not None and position is not None:
+                    duration, distance, climb = _transit(model, position, target, speed, vspeed)
+                position = target or position
+            else:
+                duration = model.poi_setup_sec
+                if is_geometric_orbit(segment):
+                    plan = plan_orbit(*orbit_parameters(segment))
+                    if target is not None and position is not None:
+                        # Join the orbit circle from the current position
+                        gap = abs(haversine_m(position[0], position[1], target[0], target[1]) - plan.radius_m)
+                        join_sec, distance, climb = _move(model, gap, target[2] - position[2], speed, vspeed)
+                        duration += join_sec
+                    duration += plan.duration_sec
+                    distance += plan.arc_length_m
+                else:
+                    duration += float(segment.get("rotation_duration", 30.0))
+                position = target or position
+        elif seg_type == "return_to_home":
+            if position is not None and home is not None:
+                # The executor sets "landing" unless hovering is requested
+                landing = segment.get("ending_behavior") != "hovering"
+                duration, distance, climb, position = _return_home(model, position, home, landing)
+        elif seg_type == "land":
+            cruise = False
+            if position is not None:
+                duration = distance = position[2]
+                duration /= model.landing_speed_mps
+                position = (position[0], position[1], 0.0)
+        energy = duration * (cruise_rate if cruise else hover_rate) + climb * climb_rate
+        estimate.segments.append(SegmentEstimate(idx, seg_type, duration, distance, energy))
+    estimate.compute_us = (time.perf_counter_ns() - t0) / 1000.0
+    return estimate
+
+
+def min_battery_percent(mission_dsl: Dict[str, Any]) -> Optional[float]:
+    safety = mission_dsl.get("safety")
+    value = safety.get("minBatteryPercent") if isinstance(safety, dict) else None
+    return float(value) if value is not None else None
+
+
+def check_battery(
+    energy_percent: float,
+    battery_percent: Optional[float],
+    reserve_percent: Optional[float],
+) -> Dict[str, Any]:
+    """Projected end-of-mission charge vs the reserve (unknown battery is assumed full)."""
+    start = 100.0 if battery_percent is None else float(battery_percent)
+    projected = start - energy_percent
+    return {
+        "battery_percent": start,
+        "energy_percent": round(energy_percent, 2),
+        "projected_percent": round(projected, 2),
+        "reserve_percent": reserve_percent,
+        "ok": reserve_percent is None or projected >= reserve_percent,
+    }
+
+
+def estimate_mission_dsl(mission_dsl: Dict[str, Any], start_position: Optional[Tuple[float, float]] = None) -> Dict[str, Any]:
+    """Mission-level wrapper: returns a copy with the estimate (and full-battery check) under "estimate"."""
+    estimate = estimate_mission(list(mission_dsl.get("segments") or []), start_position)
+    report = estimate.as_dict()
+    report["battery"] = check_battery(estimate.energy_percent, None, min_battery_percent(mission_dsl))
+    estimated = dict(mission_dsl)
+    estimated["estimate"] = report
+    return estimated
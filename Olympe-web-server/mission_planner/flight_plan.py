@@ -0,0 +1,155 @@
+"""
+Flight plan compiler - turn a mission DSL into a single onboard MAVLink flight plan.
+
+In segment mode every move_to is a ground-station round trip followed by a
+hover wait. Compiling the whole mission into one QGC WPL 110 waypoint file lets
+the drone fly it continuously once uploaded (see mission_executor flight_plan
+mode). POI inspections become a region-of-interest + waypoint ring.
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from geodesy import bearing_deg, haversine_m
+from mission_planner.orbit import orbit_parameters, orbit_waypoints
+
+# MAVLink commands supported by Parrot flight plans
+MAV_CMD_NAV_WAYPOINT = 16
+MAV_CMD_NAV_RETURN_TO_LAUNCH = 20
+MAV_CMD_NAV_LAND = 21
+MAV_CMD_NAV_TAKEOFF = 22
+MAV_CMD_DO_CHANGE_SPEED = 178
+MAV_CMD_DO_SET_ROI = 201
+MAV_ROI_NONE = 0
+MAV_ROI_LOCATION = 3
+# Altitudes relative to the takeoff point
+MAV_FRAME_GLOBAL_RELATIVE_ALT = 3
+
+DEFAULT_TAKEOFF_ALTITUDE_M = 10.0
+
+
+class FlightPlanError(Exception):
+    pass
+
+
+@dataclass
+class MissionItem:
+    command: int
+    params: Tuple[float, float, float, float] = (0.0, 0.0, 0.0, 0.0)
+    latitude: float = 0.0
+    longitude: float = 0.0
+    altitude: float = 0.0
+    frame: int = MAV_FRAME_GLOBAL_RELATIVE_ALT
+
+
+@dataclass
+class FlightPlan:
+    """Compiled flight plan: MAVLink items plus the first item index of each DSL segment."""
+
+    items: List[MissionItem] = field(default_factory=list)
+    segment_items: List[int] = field(default_factory=list)
+
+    def to_waypoint_file(self) -> str:
+        """Serialize to the QGC WPL 110 text format accepted by the drone."""
+        lines = ["QGC WPL 110"]
+        for idx, item in enumerate(self.items):
+            p1, p2, p3, p4 = item.params
+            lines.append(
+                "\t".join(
+                    [
+                        str(idx),
+                        "1" if idx == 0 else "0",
+                        str(item.frame),
+                        str(item.command),
+                        f"{p1:g}",
+                        f"{p2:g}",
+                        f"{p3:g}",
+                        f"{p4:g}",
+                        f"{item.latitude:.8f}",
+                        f"{item.longitude:.8f}",
+                        f"{item.altitude:.2f}",
+                        "1",
+                    ]
+                )
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _speed_item(speed: float) -> MissionItem:
+    # param1: speed type (1 = ground speed), param2: m/s, param3: -1 = unchanged throttle
+    return MissionItem(MAV_CMD_DO_CHANGE_SPEED, (1.0, speed, -1.0, 0.0))
+
+
+def compile_flight_plan(
+    segments: List[Dict[str, Any]],
+    start_position: Optional[Tuple[float, float]] = None,
+    acceptance_radius_m: Optional[float] = None,
+) -> FlightPlan:
+    """
+    Compile mission DSL segments into a FlightPlan.
+
+    start_position (lat, lon) seeds the orbit entry bearing of a first POI
+    inspection; later orbits start on the side of the previous waypoint.
+    Raises FlightPlanError for segments that cannot be expressed onboard.
+    """
+    if acceptance_radius_m is None:
+        acceptance_radius_m = float(os.environ.get("FLIGHT_PLAN_ACCEPTANCE_RADIUS_M", "3.0"))
+    plan = FlightPlan()
+    items = plan.items
+    last_position = start_position
+    current_speed: Optional[float] = None
+    rth_emitted = False
+    for idx, segment in enumerate(segments):
+        seg_type = str(segment.get("type", "")).strip()
+        plan.segment_items.append(len(items))
+        if seg_type == "takeoff":
+            items.append(MissionItem(MAV_CMD_NAV_TAKEOFF, altitude=DEFAULT_TAKEOFF_ALTITUDE_M))
+        elif seg_type == "move_to":
+            lat = float(segment["latitude"])
+            lon = float(segment["longitude"])
+            alt = float(segment["altitude"])
+            speed = float(segment.get("max_horizontal_speed", 15.0))
+            if speed != current_speed:
+                items.append(_speed_item(speed))
+                current_speed = speed
+            # param1: hold time (s), param2: acceptance radius (m)
+            items.append(
+                MissionItem(MAV_CMD_NAV_WAYPOINT, (0.0, acceptance_radius_m, 0.0, 0.0), lat, lon, alt)
+            )
+            last_position = (lat, lon)
+        elif seg_type == "poi_inspection":
+            poi_lat = float(segment["latitude"])
+            poi_lon = float(segment["longitude"])
+            alt = float(segment["altitude"])
+            radius, sweep, speed = orbit_parameters(segment)
+            start_bearing = 180.0
+            if last_position is not None and haversine_m(poi_lat, poi_lon, *last_position) > 1.0:
+                start_bearing = bearing_deg(poi_lat, poi_lon, *last_position)
+            items.append(MissionItem(MAV_CMD_DO_SET_ROI, (float(MAV_ROI_LOCATION), 0.0, 0.0, 0.0), poi_lat, poi_lon, alt))
+            ring = orbit_waypoints(poi_lat, poi_lon, radius, sweep, start_bearing)
+            # Reach the ring at transit speed, then orbit at inspection speed
+            items.append(MissionItem(MAV_CMD_NAV_WAYPOINT, (0.0, acceptance_radius_m, 0.0, 0.0), ring[0][0], ring[0][1], alt))
+            items.append(_speed_item(speed))
+            current_speed = speed
+            for lat, lon in ring[1:]:
+                items.append(MissionItem(MAV_CMD_NAV_WAYPOINT, (0.0, acceptance_radius_m, 0.0, 0.0), lat, lon, alt))
+            items.append(MissionItem(MAV_CMD_DO_SET_ROI, (float(MAV_ROI_NONE), 0.0, 0.0, 0.0)))
+            last_position = ring[-1]
+        elif seg_type == "return_to_home":
+            # RTL ends with a landing at the takeoff point
+            items.append(MissionItem(MAV_CMD_NAV_RETURN_TO_LAUNCH))
+            rth_emitted = True
+        elif seg_type == "land":
+            if rth_emitted:
+                continue
+            if last_position is None:
+                raise FlightPlanError(f"Segment {idx}: land without a known position")
+            items.append(MissionItem(MAV_CMD_NAV_LAND, latitude=last_position[0], longitude=last_position[1], altitude=0.0))
+        else:
+            raise FlightPlanError(f"Segment {idx}: unsupported type '{seg_type}' for flight plan mode")
+    if not items:
+        raise FlightPlanError("Flight plan is empty")
+    if items[0].command != MAV_CMD_NAV_TAKEOFF:
+        raise FlightPlanError("Flight plan must start with a takeoff segment")
+    return plan
@@ -0,0 +1,419 @@
+"""
+Geofence engine - check mission paths against the map's boundaries.
+
+The map's "boundaries" (written by archive/core/world_map/add_to_map.py) are
+polygons or circles with an optional altitude band:
+
+- geofence: the allowed flight area; leaving it, or flying above its
+  max_altitude_meters, is a violation.
+- no_fly_zone: forbidden between min_altitude_meters (default 0) and
+  max_altitude_meters (default: no ceiling).
+- restricted: same volume rule, but the mission may fly over it, e.g.
+  "Obstacle Box 1", a 0-15 m box.
+
+A circle is given by its center (first coordinate) and radius_meters, or a
+second coordinate on the circle.
+
+GeofenceEngine loads the boundaries once, projects them to local ENU meters
+around the map's starting position and indexes their bounding boxes in a
+uniform grid. check() turns a mission into straight 3D legs
+(mission_planner.legs: takeoff climb, each move_to / POI target, the orbit
+circle, RTH climb and transit, landing) and tests all legs against their
+candidate zones in bulk with NumPy: edge crossings give the exact part of
+each leg inside a zone, which is then intersected with the zone's altitude
+band.
+
+repair() raises waypoints above restricted zones (ceiling + margin, within
+the mission's max altitude), inserts a vertical climb before a leg that would
+enter such a zone from below, and lowers waypoints above a geofence ceiling.
+Anything else (no-fly zones, leaving the geofence, landing or taking off in a
+zone) is not repairable: the caller rejects the mission.
+"""
+
+import math
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from geodesy import from_local_enu, haversine_m, to_local_enu
+from mission_planner.compiled import DEFAULT_MAX_ALTITUDE_M
+from mission_planner.estimator import FlightModel
+from mission_planner.legs import MapCache, altitude_interval, map_key, map_origin, mission_legs
+
+DEFAULT_VERTICAL_MARGIN_M = 2.0
+DEFAULT_GRID_CELLS = 32
+MAX_REPAIR_PASSES = 8
+_EPS = 1e-9
+
+ZONE_TYPES = ("geofence", "no_fly_zone", "restricted")
+
+
+@dataclass(frozen=True, eq=False)
+class Zone:
+    """One boundary in local ENU meters: a polygon (N, 2) or a circle (center, radius)."""
+
+    name: str
+    kind: str
+    min_altitude_m: float
+    max_altitude_m: float
+    bbox: Tuple[float, float, float, float]
+    polygon: Optional[np.ndarray] = None
+    center: Optional[Tuple[float, float]] = None
+    radius_m: float = 0.0
+
+    def contains(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Horizontal containment of points (even-odd rule for polygons)."""
+        if self.polygon is None:
+            return (x - self.center[0]) ** 2 + (y - self.center[1]) ** 2 < self.radius_m ** 2
+        vx, vy = self.polygon[:, 0], self.polygon[:, 1]
+        wx, wy = np.roll(vx, -1), np.roll(vy, -1)
+        px, py = x[:, None], y[:, None]
+        straddles = (vy <= py) != (wy <= py)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cross_x = vx + (py - vy) * (wx - vx) / (wy - vy)
+        return np.count_nonzero(straddles & (px < cross_x), axis=1) % 2 == 1
+
+    def crossings(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Leg parameters t in (0, 1) where legs a -> b (M, 2) cross the boundary; NaN padded (M, K)."""
+        d = b - a
+        if self.polygon is None:
+            f = a - np.asarray(self.center)
+            qa = np.einsum("ij,ij->i", d, d)
+            qb = 2.0 * np.einsum("ij,ij->i", f, d)
+            qc = np.einsum("ij,ij->i", f, f) - self.radius_m ** 2
+            disc = qb ** 2 - 4.0 * qa * qc
+            with np.errstate(divide="ignore", invalid="ignore"):
+                root = np.sqrt(disc)
+                t = np.stack([(-qb - root) / (2.0 * qa), (-qb + root) / (2.0 * qa)], axis=1)
+        else:
+            v = self.polygon
+            e = np.roll(v, -1, axis=0) - v
+            denom = d[:, None, 0] * e[None, :, 1] - d[:, None, 1] * e[None, :, 0]
+            rx = v[None, :, 0] - a[:, None, 0]
+            ry = v[None, :, 1] - a[:, None, 1]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t = (rx * e[None, :, 1] - ry * e[None, :, 0]) / denom
+                u = (rx * d[:, None, 1] - ry * d[:, None, 0]) / denom
+            t = np.where((u >= 0.0) & (u <= 1.0), t, np.nan)
+        return np.where((t > 0.0) & (t < 1.0), t, np.nan)
+
+
+class _GridIndex:
+    """Uniform grid over zone bounding boxes: cell -> zone ids."""
+
+    def __init__(self, zones: Sequence[Zone], cells: int = DEFAULT_GRID_CELLS):
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        if not zones:
+            self.origin, self.size, self.extent = (0.0, 0.0), 1.0, (0, 0)
+            return
+        boxes = np.array([zone.bbox for zone in zones])
+        x0, y0 = boxes[:, 0].min(), boxes[:, 1].min()
+        span = max(boxes[:, 2].max() - x0, boxes[:, 3].max() - y0, 1.0)
+        self.origin, self.size = (x0, y0), span / cells
+        self.extent = (cells, cells)
+        for zone_id, box in enumerate(boxes):
+            (i0, j0), (i1, j1) = self._cell(box[0], box[1]), self._cell(box[2], box[3])
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    self._cells.setdefault((i, j), []).append(zone_id)
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        i = int((x - self.origin[0]) // self.size)
+        j = int((y - self.origin[1]) // self.size)
+        return min(max(i, 0), self.extent[0]), min(max(j, 0), self.extent[1])
+
+    def query(self, xmin: float, ymin: float, xmax: float, ymax: float) -> Set[int]:
+        """Ids of zones whose cells overlap the box (candidates, to be checked exactly)."""
+        (i0, j0), (i1, j1) = self._cell(xmin, ymin), self._cell(xmax, ymax)
+        found: Set[int] = set()
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                found.update(self._cells.get((i, j), ()))
+        return found
+
+
+def _float(value: Any, default: float) -> float:
+    return default if value is None else float(value)
+
+
+class GeofenceEngine:
+    """Boundaries of one map, projected and indexed once; check() and repair() missions against them."""
+
+    def __init__(self, world_map: Dict[str, Any], model: Optional[FlightModel] = None):
+        self.origin = map_origin(world_map)
+        self.default_max_altitude_m = _float(world_map.get("default_max_altitude_meters"), DEFAULT_MAX_ALTITUDE_M)
+        self.model = model or FlightModel.from_env()
+        zones = [self._load_zone(boundary) for boundary in world_map.get("boundaries") or []]
+        self.geofences = [zone for zone in zones if zone.kind == "geofence"]
+        self.zones = [zone for zone in zones if zone.kind != "geofence"]
+        self.index = _GridIndex(self.zones)
+
+    def _load_zone(self, boundary: Dict[str, Any]) -> Zone:
+        name = str(boundary.get("name", "unnamed"))
+        kind = str(boundary.get("type", "geofence"))
+        if kind not in ZONE_TYPES:
+            raise ValueError(f"Boundary '{name}': unknown type {kind!r}")
+        coords = np.asarray(boundary.get("coordinates") or [], dtype=np.float64).reshape(-1, 2)
+        x, y = to_local_enu(coords[:, 0], coords[:, 1], *self.origin)
+        band = (
+            _float(boundary.get("min_altitude_meters"), 0.0) if kind != "geofence" else -math.inf,
+            _float(boundary.get("max_altitude_meters"), math.inf),
+        )
+        if boundary.get("boundary_type", "polygon") == "circle":
+            if len(coords) == 0:
+                raise ValueError(f"Boundary '{name}': circle without a center")
+            if boundary.get("radius_meters") is not None:
+                radius = float(boundary["radius_meters"])
+            elif len(coords) >= 2:
+                radius = haversine_m(coords[0, 0], coords[0, 1], coords[1, 0], coords[1, 1])
+            else:
+                raise ValueError(f"Boundary '{name}': circle needs radius_meters or a point on the circle")
+            bbox = (x[0] - radius, y[0] - radius, x[0] + radius, y[0] + radius)
+            return Zone(name, kind, *band, bbox=bbox, center=(float(x[0]), float(y[0])), radius_m=radius)
+        if len(coords) < 3:
+            raise ValueError(f"Boundary '{name}': polygon needs at least 3 coordinates")
+        bbox = (x.min(), y.min(), x.max(), y.max())
+        return Zone(name, kind, *band, bbox=bbox, polygon=np.stack([x, y], axis=1))
+
+    # ------------------------------------------------------------------ legs
+
+    def legs(
+        self, segments: List[Dict[str, Any]], start_position: Optional[Tuple[float, float]] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Straight 3D legs (ENU x, y, altitude) flown by the segments:
+        (starts (M, 3), ends (M, 3), segment index (M,)).
+        """
+        return mission_legs(segments, self.origin, start_position, self.model)
+
+    # ----------------------------------------------------------------- check
+
+    @staticmethod
+    def _spans(zones: Sequence[Zone], a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Breakpoints t (M, K + 2) and, per sub-interval (M, K + 1), whether it lies inside any zone."""
+        m = len(a)
+        parts = [np.zeros((m, 1))] + [zone.crossings(a, b) for zone in zones] + [np.ones((m, 1))]
+        t = np.sort(np.concatenate(parts, axis=1), axis=1)
+        t = np.where(np.isnan(t), 1.0, t)
+        mid = (t[:, :-1] + t[:, 1:]) / 2.0
+        px = a[:, None, 0] + mid * (b[:, None, 0] - a[:, None, 0])
+        py = a[:, None, 1] + mid * (b[:, None, 1] - a[:, None, 1])
+        inside = np.zeros(mid.size, dtype=bool)
+        for zone in zones:
+            inside |= zone.contains(px.ravel(), py.ravel())
+        inside = inside.reshape(mid.shape)
+        return t, inside
+
+    @staticmethod
+    def _first_hit(t: np.ndarray, spans: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        """Per leg, the first t both inside a span and within the [lo, hi] band (NaN if none)."""
+        start = np.maximum(t[:, :-1], lo[:, None])
+        end = np.minimum(t[:, 1:], hi[:, None])
+        hit = spans & (end - start > _EPS)
+        first = np.where(hit, start, np.inf).min(axis=1)
+        return np.where(np.isfinite(first), first, np.nan)
+
+    def hits(self, a3: np.ndarray, b3: np.ndarray) -> List[Tuple[int, float, Zone, str]]:
+        """All (leg, entry t, zone, reason) violations of legs a3 -> b3 (M, 3), first entry per leg and zone."""
+        if not len(a3):
+            return []
+        a, b = a3[:, :2], b3[:, :2]
+        hits: List[Tuple[int, float, Zone, str]] = []
+
+        def collect(leg_ids: np.ndarray, first: np.ndarray, zone: Zone, reason: str) -> None:
+            for leg_id, t in zip(leg_ids, first):
+                if not np.isnan(t):
+                    hits.append((int(leg_id), float(t), zone, reason))
+
+        # Forbidden volumes: only the legs whose box overlaps the zone's grid cells
+        lo_xy, hi_xy = np.minimum(a, b), np.maximum(a, b)
+        candidates: Dict[int, List[int]] = {}
+        for leg_id in range(len(a3)):
+            for zone_id in self.index.query(*lo_xy[leg_id], *hi_xy[leg_id]):
+                candidates.setdefault(zone_id, []).append(leg_id)
+        for zone_id, leg_ids in candidates.items():
+            zone, ids = self.zones[zone_id], np.asarray(leg_ids)
+            box = zone.bbox
+            ids = ids[(hi_xy[ids, 0] >= box[0]) & (lo_xy[ids, 0] <= box[2]) & (hi_xy[ids, 1] >= box[1]) & (lo_xy[ids, 1] <= box[3])]
+            if not len(ids):
+                continue
+            t, spans = self._spans([zone], a[ids], b[ids])
+            lo, hi = altitude_interval(a3[ids, 2], b3[ids, 2], zone.min_altitude_m, zone.max_altitude_m)
+            collect(ids, self._first_hit(t, spans, lo, hi), zone, f"enters {zone.kind}")
+
+        if self.geofences:
+            # Outside every geofence (the allowed area is their union)
+            t, spans = self._spans(self.geofences, a, b)
+            first = self._first_hit(t, ~spans, np.zeros(len(a3)), np.ones(len(a3)))
+            ids = np.arange(len(a3))
+            collect(ids, first, self.geofences[0], "leaves the geofence")
+            for zone in self.geofences:
+                if math.isfinite(zone.max_altitude_m):
+                    t, spans = self._spans([zone], a, b)
+                    lo, hi = altitude_interval(a3[:, 2], b3[:, 2], zone.max_altitude_m + _EPS, math.inf)
+                    collect(ids, self._first_hit(t, spans, lo, hi), zone, "above geofence ceiling")
+        return hits
+
+    def check(
+        self,
+        segments: List[Dict[str, Any]],
+        start_position: Optional[Tuple[float, float]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Violations of the mission's path, first one per (segment, zone), in segment order."""
+        a3, b3, owner = self.legs(segments, start_position)
+        hits = self.hits(a3, b3)
+        zero_length = np.hypot(*(b3[:, :2] - a3[:, :2]).T) < _EPS
+        violations: Dict[Tuple[int, str, str], Dict[str, Any]] = {}
+        for leg_id, t, zone, reason in sorted(hits, key=lambda hit: (owner[hit[0]], hit[0], hit[1])):
+            idx = int(owner[leg_id])
+            key = (idx, zone.name, reason)
+            if key in violations:
+                continue
+            point = a3[leg_id] + t * (b3[leg_id] - a3[leg_id])
+            lat, lon = from_local_enu(point[0], point[1], *self.origin)
+            start_lat, start_lon = from_local_enu(a3[leg_id, 0], a3[leg_id, 1], *self.origin)
+            violations[key] = {
+                "segment": idx,
+                "type": str(segments[idx].get("type", "")),
+                "zone": zone.name,
+                "zone_type": zone.kind,
+                "reason": reason,
+                "latitude": float(lat),
+                "longitude": float(lon),
+                "altitude": round(float(point[2]), 2),
+                "leg_start": [float(start_lat), float(start_lon), float(a3[leg_id, 2])],
+                "vertical": bool(zero_length[leg_id]),
+                "_zone": zone,
+            }
+        return list(violations.values())
+
+    # ---------------------------------------------------------------- repair
+
+    def repair(
+        self,
+        segments: List[Dict[str, Any]],
+        start_position: Optional[Tuple[float, float]] = None,
+        max_altitude_m: Optional[float] = None,
+        margin_m: Optional[float] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Fix what can be fixed by changing altitudes or adding a climb.
+        Returns (segments, repairs, remaining violations); the input is not modified.
+        """
+        ceiling = self.default_max_altitude_m if max_altitude_m is None else float(max_altitude_m)
+        margin = float(
+            margin_m if margin_m is not None else os.environ.get("GEOFENCE_VERTICAL_MARGIN_M", DEFAULT_VERTICAL_MARGIN_M)
+        )
+        segments = [dict(segment) for segment in segments]
+        repairs: List[Dict[str, Any]] = []
+        violations = self.check(segments, start_position)
+        for _ in range(MAX_REPAIR_PASSES):
+            changed = False
+            inserts: List[Tuple[int, Dict[str, Any]]] = []
+            fixed: Set[int] = set()
+            for violation in violations:
+                idx, zone = violation["segment"], violation["_zone"]
+                segment = segments[idx]
+                if idx in fixed or segment.get("type") not in ("move_to", "poi_inspection") or violation["vertical"]:
+                    continue
+                altitude = float(segment["altitude"])
+                if violation["reason"] == "above geofence ceiling":
+                    target = zone.max_altitude_m
+                    if altitude > target:
+                        segment["altitude"] = target
+                        repairs.append(self._repair("lower_altitude", idx, zone, altitude, target))
+                        fixed.add(idx)
+                        changed = True
+                    continue
+                if zone.kind != "restricted" or not math.isfinite(zone.max_altitude_m):
+                    continue
+                safe = zone.max_altitude_m + margin
+                if safe > ceiling:
+                    continue
+                if altitude < safe:
+                    segment["altitude"] = safe
+                    repairs.append(self._repair("raise_altitude", idx, zone, altitude, safe))
+                    fixed.add(idx)
+                    changed = True
+                elif violation["leg_start"][2] < safe:
+                    # Target is above the zone: climb vertically before flying over it
+                    # (hover: the executor must not pass through the climb and start the leg low)
+                    lat, lon, start_alt = violation["leg_start"]
+                    climb = {"type": "move_to", "latitude": lat, "longitude": lon, "altitude": safe, "hover": True}
+                    for key in ("max_horizontal_speed", "max_vertical_speed", "max_yaw_rotation_speed"):
+                        if key in segment:
+                            climb[key] = segment[key]
+                    inserts.append((idx, climb))
+                    repairs.append(self._repair("insert_climb", idx, zone, start_alt, safe))
+                    fixed.add(idx)
+                    changed = True
+            for idx, climb in sorted(inserts, key=lambda item: -item[0]):
+                segments.insert(idx, climb)
+            if not changed:
+                break
+            violations = self.check(segments, start_position)
+        return segments, repairs, violations
+
+    @staticmethod
+    def _repair(rule: str, idx: int, zone: Zone, before: float, after: float) -> Dict[str, Any]:
+        return {"rule": rule, "segment": idx, "zone": zone.name, "altitude_before": round(before, 2), "altitude_after": round(after, 2)}
+
+
+_ENGINES: Dict[str, GeofenceEngine] = MapCache()
+
+
+def get_geofence_engine(world_map: Dict[str, Any]) -> GeofenceEngine:
+    """Engine for a map, built once per distinct boundaries/origin (cached by content hash)."""
+    key = map_key(world_map, ("boundaries", "starting_position", "default_max_altitude_meters"))
+    engine = _ENGINES.get(key)
+    if engine is None:
+        engine = _ENGINES[key] = GeofenceEngine(world_map)
+    return engine
+
+
+def format_violation(violation: Dict[str, Any]) -> str:
+    return (
+        f"segment {violation['segment']} ({violation['type']}) {violation['reason']} '{violation['zone']}' "
+        f"at ({violation['latitude']:.6f}, {violation['longitude']:.6f}, {violation['altitude']:g} m)"
+    )
+
+
+def check_mission_geofence(
+    mission_dsl: Dict[str, Any],
+    world_map: Dict[str, Any],
+    start_position: Optional[Tuple[float, float]] = None,
+    repair: bool = True,
+) -> Dict[str, Any]:
+    """
+    Mission-level wrapper: returns a copy with (possibly repaired) segments and
+    the report under "geofence" (ok, repairs, violations, compute_us). Missions
+    with safety.geofence.enabled false are not checked.
+    """
+    t0 = time.perf_counter_ns()
+    safety = mission_dsl.get("safety") if isinstance(mission_dsl.get("safety"), dict) else {}
+    geofence = safety.get("geofence") if isinstance(safety.get("geofence"), dict) else {}
+    checked = dict(mission_dsl)
+    if not geofence.get("enabled", False):
+        checked["geofence"] = {"ok": True, "checked": False, "repairs": [], "violations": []}
+        return checked
+    engine = get_geofence_engine(world_map)
+    segments = list(mission_dsl.get("segments") or [])
+    if repair:
+        segments, repairs, violations = engine.repair(segments, start_position, safety.get("maxAltitudeMeters"))
+    else:
+        repairs, violations = [], engine.check(segments, start_position)
+    checked["segments"] = segments
+    checked["geofence"] = {
+        "ok": not violations,
+        "checked": True,
+        "zones": len(engine.zones) + len(engine.geofences),
+        "repairs": repairs,
+        "violations": [
+            {key: value for key, value in violation.items() if not key.startswith("_")} for violation in violations
+        ],
+        "compute_us": round((time.perf_counter_ns() - t0) / 1000.0, 1),
+    }
+    return checked
@@ -0,0 +1,182 @@
+"""
+Mission legs - the straight 3D legs a mission DSL flies, in local ENU meters.
+
+Shared by the path checkers (geofence, obstacle clearance): every segment is
+turned into the straight legs the drone flies, starting from the map's
+starting position: takeoff climb, each move_to / POI target, the POI orbit
+(as a polygon circumscribing the whole circle, whatever the sweep), the RTH
+climb and transit at the RTH altitude (see the estimator's FlightModel), and
+the landing descent. Coordinates are (east, north, altitude) around origin.
+"""
+
+import hashlib
+import json
+import math
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from geodesy import to_local_enu
+from mission_planner.estimator import FlightModel
+from mission_planner.orbit import orbit_parameters
+
+# Sides of the polygon circumscribing an orbit circle
+ORBIT_SIDES = 16
+# Structures kept per map by the planners' caches (MapCache)
+DEFAULT_MAP_CACHE_SIZE = 8
+
+
+def map_origin(world_map: Dict[str, Any]) -> Tuple[float, float]:
+    """ENU origin of a map: its starting position, else the first boundary vertex."""
+    coords = (world_map.get("starting_position") or {}).get("coordinates") or {}
+    if "latitude" in coords and "longitude" in coords:
+        return float(coords["latitude"]), float(coords["longitude"])
+    for boundary in world_map.get("boundaries") or []:
+        if boundary.get("coordinates"):
+            return float(boundary["coordinates"][0][0]), float(boundary["coordinates"][0][1])
+    return 0.0, 0.0
+
+
+def section_hash(value: Any) -> str:
+    """Content hash of one map section (any JSON value)."""
+    return hashlib.sha1(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def map_key(world_map: Dict[str, Any], sections: Tuple[str, ...], *extra: Any) -> str:
+    """
+    Cache key of the structures built from some sections of a map plus extra
+    parameters. Compiled maps (mission_planner.map_compiler) carry their
+    section hashes, so keying them does not decode their features.
+    """
+    known = getattr(world_map, "section_hashes", None) or {}
+    digests = [known.get(name) or section_hash(world_map.get(name)) for name in sections]
+    return hashlib.sha1(json.dumps([digests, list(extra)], sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class MapCache(OrderedDict):
+    """
+    Structures built per map_key(), the least recently used dropped beyond
+    `size` entries (MAP_CACHE_SIZE by default): with tiled maps
+    (mission_planner.map_tiles) every mission region is another map.
+    """
+
+    def __init__(self, size: Optional[int] = None):
+        super().__init__()
+        self.size = size
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        size = self.size if self.size is not None else int(os.environ.get("MAP_CACHE_SIZE", DEFAULT_MAP_CACHE_SIZE))
+        while len(self) > max(1, size):
+            self.popitem(last=False)
+
+
+def mission_legs(
+    segments: List[Dict[str, Any]],
+    origin: Tuple[float, float],
+    start_position: Optional[Tuple[float, float]] = None,
+    model: Optional[FlightModel] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Legs (ENU x, y, altitude) flown by the segments: (starts (M, 3), ends (M, 3),
+    segment index (M,)). Without start_position, legs begin at the first waypoint.
+    """
+    starts: List[Tuple[float, float, float]] = []
+    ends: List[Tuple[float, float, float]] = []
+    owner: List[int] = []
+    model = model or FlightModel.from_env()
+    start = start_position or origin
+    hx, hy = to_local_enu(start[0], start[1], *origin)
+    home = (float(hx), float(hy), 0.0)
+    position: Optional[Tuple[float, float, float]] = home if start_position else None
+
+    def leg(idx: int, end: Tuple[float, float, float]) -> None:
+        if position is not None:
+            starts.append(position)
+            ends.append(end)
+            owner.append(idx)
+
+    for idx, segment in enumerate(segments):
+        seg_type = str(segment.get("type", "")).strip()
+        if seg_type == "takeoff":
+            if position is not None:
+                target = (position[0], position[1], model.takeoff_altitude_m)
+                leg(idx, target)
+                position = target
+        elif seg_type in ("move_to", "poi_inspection"):
+            try:
+                lat, lon, alt = float(segment["latitude"]), float(segment["longitude"]), float(segment["altitude"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            x, y = to_local_enu(lat, lon, *origin)
+            target = (float(x), float(y), alt)
+            leg(idx, target)
+            position = target
+            if seg_type == "poi_inspection":
+                # Whole orbit circle (circumscribed polygon), whatever the sweep
+                radius = orbit_parameters(segment)[0] / math.cos(math.pi / ORBIT_SIDES)
+                angles = np.linspace(0.0, 2.0 * math.pi, ORBIT_SIDES + 1)
+                ring = [(target[0] + radius * math.cos(a), target[1] + radius * math.sin(a), alt) for a in angles]
+                starts.extend(ring[:-1])
+                ends.extend(ring[1:])
+                owner.extend([idx] * ORBIT_SIDES)
+        elif seg_type == "return_to_home":
+            if position is not None:
+                cruise = max(position[2], model.rth_altitude_m)
+                top = (position[0], position[1], cruise)
+                leg(idx, top)
+                position = (home[0], home[1], cruise)
+                starts.append(top)
+                ends.append(position)
+                owner.append(idx)
+                if segment.get("ending_behavior") != "hovering":
+                    leg(idx, (home[0], home[1], 0.0))
+                    position = (home[0], home[1], 0.0)
+        elif seg_type == "land":
+            if position is not None:
+                target = (position[0], position[1], 0.0)
+                leg(idx, target)
+                position = target
+    return (
+        np.asarray(starts, dtype=np.float64).reshape(-1, 3),
+        np.asarray(ends, dtype=np.float64).reshape(-1, 3),
+        np.asarray(owner, dtype=np.int64),
+    )
+
+
+def altitude_interval(
+    za: np.ndarray, zb: np.ndarray, low: Any, high: Any
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Leg parameter interval [lo, hi] (within [0, 1]) where the altitude, linear
+    from za to zb, is within [low, high); lo > hi when never. Broadcasts.
+    """
+    dz = zb - za
+    flat = np.abs(dz) < 1e-9
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_low, t_high = (low - za) / dz, (high - za) / dz
+    lo = np.clip(np.where(flat, 0.0, np.minimum(t_low, t_high)), 0.0, 1.0)
+    hi = np.clip(np.where(flat, 1.0, np.maximum(t_low, t_high)), 0.0, 1.0)
+    in_band = (za >= low) & (za < high)
+    return np.where(flat & ~in_band, 1.0, lo), np.where(flat & ~in_band, 0.0, hi)
+
+
+def polygon_edge_distances(px: np.ndarray, py: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """Distance from points (P,) to the closest edge of a closed polygon (N, 2)."""
+    v, w = polygon, np.roll(polygon, -1, axis=0)
+    e = w - v
+    length2 = np.maximum((e ** 2).sum(axis=1), 1e-12)
+    t = ((px[:, None] - v[None, :, 0]) * e[None, :, 0] + (py[:, None] - v[None, :, 1]) * e[None, :, 1]) / length2
+    t = np.clip(t, 0.0, 1.0)
+    dx = px[:, None] - (v[None, :, 0] + t * e[None, :, 0])
+    dy = py[:, None] - (v[None, :, 1] + t * e[None, :, 1])
+    return np.sqrt(dx ** 2 + dy ** 2).min(axis=1)
@@ -0,0 +1,315 @@
+"""
+Map compiler - world map JSON to a memory-mapped binary map.
+
+json.load of a large map on every start (and every reload) costs time and
+memory proportional to the map. The JSON stays the source of truth; the
+compiler turns it into one binary file:
+
+    MAGIC | header length (uint64, little endian) | header JSON | arrays
+
+Arrays start on 64-byte boundaries and are memory-mapped back as NumPy views:
+
+- feature columns, in spatial-index order (points of interest, obstacles,
+  boundaries): kind, latitude, longitude and the string ids of the name, the
+  type, the normalized name (lookups) and the feature's own JSON;
+- a string table (UTF-8 bytes and their offsets);
+- the prebuilt spatial index (mission_planner.spatial_index, state()).
+
+The header holds the array directory, the map's other top-level keys
+(starting position, calibration, ...) and the content hash of each feature
+section, which the planners' caches key on (mission_planner.legs.map_key).
+
+load_map() hashes the JSON bytes and memory-maps `<hash>.map` from the cache
+directory (VOXEL_CACHE_DIR, shared with the voxel grids), compiling it on a
+miss: an edited map has another hash, so a stale file is never read. The
+CompiledMap it returns reads like the map's dict but decodes a feature only
+when it is accessed.
+
+Run `python -m mission_planner.map_compiler [map.json]` to precompile a map.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import struct
+import sys
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from mission_planner.legs import MapCache, section_hash
+from mission_planner.spatial_index import KINDS, Feature, SpatialIndex, boundary_zones, normalize_name
+from mission_planner.storage import write_atomic
+from mission_planner.voxel_grid import default_cache_dir
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MAGIC = b"OLYMAP\r\n"
+MAP_SUFFIX = ".map"
+ALIGN = 64
+# Top-level keys holding features, in spatial-index order
+SECTIONS = ("points_of_interest", "obstacles", "boundaries")
+# SpatialIndex.state() arrays stored as "index.<name>" (kinds is feature.kind)
+INDEX_ARRAYS = ("x", "y", "radius", "bbox", "cell_keys", "cell_starts", "cell_ids")
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGN) * ALIGN
+
+
+class _StringTable:
+    """Deduplicated strings, stored as concatenated UTF-8 bytes plus offsets."""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._chunks: List[bytes] = []
+
+    def add(self, text: str) -> int:
+        sid = self._ids.get(text)
+        if sid is None:
+            sid = self._ids[text] = len(self._chunks)
+            self._chunks.append(text.encode("utf-8"))
+        return sid
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        offsets = np.zeros(len(self._chunks) + 1, dtype=np.int64)
+        np.cumsum([len(chunk) for chunk in self._chunks], out=offsets[1:])
+        return np.frombuffer(b"".join(self._chunks), dtype=np.uint8), offsets
+
+
+def compile_map(world_map: Dict[str, Any], path: str, source_hash: Optional[str] = None) -> None:
+    """Write the compiled form of a map dict to `path` (atomically)."""
+    index = SpatialIndex(world_map)
+    strings = _StringTable()
+    features = index.features
+    arrays: Dict[str, np.ndarray] = {
+        "feature.kind": index.kinds,
+        "feature.latitude": np.array([f.latitude for f in features], dtype=np.float64),
+        "feature.longitude": np.array([f.longitude for f in features], dtype=np.float64),
+        "feature.name": np.array([strings.add(f.name) for f in features], dtype=np.int64),
+        "feature.type": np.array([strings.add(f.type) for f in features], dtype=np.int64),
+        "feature.key": np.array([strings.add(normalize_name(f.name)) for f in features], dtype=np.int64),
+        "feature.json": np.array(
+            [strings.add(json.dumps(f.data, ensure_ascii=False, separators=(",", ":"))) for f in features], dtype=np.int64
+        ),
+    }
+    state = index.state()
+    arrays.update({"index." + name: state[name] for name in INDEX_ARRAYS})
+    arrays["strings.data"], arrays["strings.offsets"] = strings.arrays()
+
+    sections, start = {}, 0
+    for name in SECTIONS:
+        entries = world_map.get(name)
+        count = len(entries) if isinstance(entries, list) else 0
+        if isinstance(entries, list):
+            sections[name] = [start, start + count]
+        start += count
+    header: Dict[str, Any] = {
+        "version": FORMAT_VERSION,
+        "source_hash": source_hash,
+        "keys": list(world_map),
+        "meta": {key: value for key, value in world_map.items() if key not in sections},
+        "sections": sections,
+        "section_hashes": {name: section_hash(world_map.get(name)) for name in SECTIONS},
+        "index": {name: state[name] for name in ("origin", "cell_m", "n_points", "extent")},
+        "arrays": {},
+    }
+    offset = 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        header["arrays"][name] = [array.dtype.str, list(array.shape), offset]
+        offset += array.nbytes
+    head = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    base = _align(len(MAGIC) + 8 + len(head))
+
+    def write(f) -> None:
+        f.write(MAGIC + struct.pack("<Q", len(head)) + head)
+        for name, array in arrays.items():
+            f.write(b"\0" * (base + header["arrays"][name][2] - f.tell()))
+            f.write(np.ascontiguousarray(array).tobytes())
+
+    write_atomic(path, write)
+
+
+class MapSection(Sequence):
+    """One feature list of a compiled map; an item is decoded when accessed."""
+
+    def __init__(self, compiled: "CompiledMap", start: int, stop: int):
+        self._map, self._start, self._stop = compiled, start, stop
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._map.item(self._start + i)
+
+
+class _Features(Sequence):
+    """Spatial-index features of a compiled map, built on access."""
+
+    def __init__(self, compiled: "CompiledMap"):
+        self._map = compiled
+        self._cache: Dict[int, Feature] = {}
+
+    def __len__(self) -> int:
+        return len(self._map.arrays["feature.kind"])
+
+    def __getitem__(self, fid):
+        fid = int(fid)
+        feature = self._cache.get(fid)
+        if feature is None:
+            if not 0 <= fid < len(self):
+                raise IndexError(fid)
+            a, string = self._map.arrays, self._map.string
+            feature = self._cache[fid] = Feature(
+                string(a["feature.name"][fid]), KINDS[a["feature.kind"][fid]], string(a["feature.type"][fid]),
+                float(a["feature.latitude"][fid]), float(a["feature.longitude"][fid]), self._map.item(fid),
+            )
+        return feature
+
+    @property
+    def name_keys(self) -> List[str]:
+        """Normalized names (spatial_index.normalize_name), decoded in one pass."""
+        return self._map.strings(self._map.arrays["feature.key"])
+
+
+class CompiledMap(Mapping):
+    """Read-only view of a compiled map that reads like the map's dict."""
+
+    def __init__(self, header: Dict[str, Any], arrays: Dict[str, np.ndarray], path: Optional[str] = None):
+        self.header, self.arrays, self.path = header, arrays, path
+        self.source_hash: Optional[str] = header.get("source_hash")
+        self.section_hashes: Dict[str, str] = header["section_hashes"]
+        self._sections = {name: MapSection(self, *span) for name, span in header["sections"].items()}
+        self._items: Dict[int, Dict[str, Any]] = {}
+        self._index: Optional[SpatialIndex] = None
+
+    def __getitem__(self, key: str) -> Any:
+        section = self._sections.get(key)
+        return section if section is not None else self.header["meta"][key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.header["keys"])
+
+    def __len__(self) -> int:
+        return len(self.header["keys"])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays.values())
+
+    def string(self, sid: int) -> str:
+        offsets = self.arrays["strings.offsets"]
+        return bytes(self.arrays["strings.data"][offsets[sid]:offsets[sid + 1]]).decode("utf-8")
+
+    def strings(self, sids: np.ndarray) -> List[str]:
+        data, offsets = bytes(self.arrays["strings.data"]), self.arrays["strings.offsets"].tolist()
+        return [data[offsets[sid]:offsets[sid + 1]].decode("utf-8") for sid in np.asarray(sids).tolist()]
+
+    def item(self, fid: int) -> Dict[str, Any]:
+        """JSON entry of feature `fid` (spatial-index order), decoded once."""
+        item = self._items.get(fid)
+        if item is None:
+            item = self._items[fid] = json.loads(self.string(self.arrays["feature.json"][fid]))
+        return item
+
+    def spatial_index(self) -> SpatialIndex:
+        """The prebuilt spatial index, over memory-mapped arrays and lazily built features."""
+        if self._index is None:
+            state = dict(self.header["index"], kinds=self.arrays["feature.kind"])
+            state.update({name: self.arrays["index." + name] for name in INDEX_ARRAYS})
+            self._index = SpatialIndex.from_state(state, _Features(self), boundary_zones(self))
+        return self._index
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The map as a plain dict (decodes every feature)."""
+        return {key: list(value) if isinstance(value, MapSection) else value for key, value in self.items()}
+
+
+def load_compiled_map(path: str) -> Optional[CompiledMap]:
+    """Memory-map a compiled map, None when missing, truncated or of another format version."""
+    try:
+        buf = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(buf[:len(MAGIC)]) != MAGIC:
+            return None
+        size = struct.unpack("<Q", bytes(buf[len(MAGIC):len(MAGIC) + 8]))[0]
+        header = json.loads(bytes(buf[len(MAGIC) + 8:len(MAGIC) + 8 + size]).decode("utf-8"))
+        if header.get("version") != FORMAT_VERSION:
+            return None
+        base = _align(len(MAGIC) + 8 + size)
+        arrays = {}
+        for name, (dtype, shape, offset) in header["arrays"].items():
+            dtype = np.dtype(dtype)
+            start = base + offset
+            arrays[name] = buf[start:start + dtype.itemsize * int(np.prod(shape))].view(dtype).reshape(shape)
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+    return CompiledMap(header, arrays, path)
+
+
+_MAPS: Dict[str, CompiledMap] = MapCache()
+
+
+def load_map(path: str, cache_dir: Optional[str] = "") -> Mapping:
+    """
+    World map at `path`: memory-mapped from `<content hash>.map` in the cache
+    directory (VOXEL_CACHE_DIR by default), compiled there first when missing.
+    A plain dict when caching is disabled or the map cannot be compiled.
+    Raises OSError / json.JSONDecodeError like reading the JSON would.
+    """
+    with open(path, "rb") as f:
+        source = f.read()
+    source_hash = hashlib.sha1(source).hexdigest()
+    directory = default_cache_dir() if cache_dir == "" else cache_dir
+    if not directory:
+        return json.loads(source)
+    target = os.path.join(directory, source_hash + MAP_SUFFIX)
+    compiled = _MAPS.get(target)
+    if compiled is not None:
+        return compiled
+    compiled = load_compiled_map(target)
+    if compiled is None:
+        world_map = json.loads(source)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            compile_map(world_map, target, source_hash)
+        except (OSError, KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Cannot compile map {path}, using the JSON: {e}")
+            return world_map
+        compiled = load_compiled_map(target)
+        if compiled is None:
+            return world_map
+    _MAPS[target] = compiled
+    return compiled
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compile a world map into its cached binary form")
+    default_map = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "maps", "industrial_city.json")
+    parser.add_argument("map", nargs="?", default=default_map, help="World map JSON")
+    args = parser.parse_args(argv)
+    world_map = load_map(args.map)
+    if not isinstance(world_map, CompiledMap):
+        print("Map caching is disabled (VOXEL_CACHE_DIR is empty)", file=sys.stderr)
+        return 1
+    print(json.dumps({
+        "path": world_map.path,
+        "source_hash": world_map.source_hash,
+        "bytes": world_map.nbytes,
+        "features": {name: len(world_map[name]) for name in SECTIONS if name in world_map},
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""
+Map tiles - large operating areas as fixed tiles loaded on demand.
+
+build_tile_store() splits a world map into square tiles of tile_m meters in
+local ENU around the map's starting position (mission_planner.legs.map_origin):
+tile (i, j) covers east [i*tile_m, (i+1)*tile_m), north likewise. Each
+feature is written to every tile its bounding box overlaps (a POI is a point,
+an obstacle a disk of its footprint radius, a boundary its polygon or
+circle, as in mission_planner.spatial_index), with its position in the
+source map so that features spanning several tiles are merged once:
+
+    <store>/manifest.json      tile size, origin, the map's other top-level
+                               keys (starting position, calibration, ...)
+                               and the features count of every tile
+    <store>/tiles/<i>_<j>.json features of one tile
+
+A TileStore reads the manifest only; tiles are loaded when a query touches
+them and kept in an LRU cache of MAP_TILE_CACHE tiles, so memory is bounded
+by the cache, not the map. Queries return an ordinary world map dict holding
+the features of the touched tiles, for the geofence/clearance checks and the
+path planner:
+
+- mission_map(mission_dsl): tiles touched by the mission's legs (takeoff,
+  waypoints, POI orbits, RTH) plus MAP_TILE_MARGIN_M for detours;
+- around(lat, lon): tiles around a position (the server's
+  GET /fleet/{drone_id}/map serves those around a drone);
+- in_bbox(south, west, north, east): tiles overlapping a lat/lon box.
+
+The server uses the store in MAP_TILES_DIR when set (get_tile_store()). Each
+mission gets its own region map, so the path planner keeps their voxel grids
+in memory (bounded by MAP_CACHE_SIZE) instead of VOXEL_CACHE_DIR.
+
+Run `python -m mission_planner.map_tiles map.json store_dir` to build a store.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from geodesy import to_local_enu
+from mission_planner.legs import MapCache, map_origin, mission_legs
+from mission_planner.spatial_index import SpatialIndex
+from mission_planner.storage import write_atomic
+
+FORMAT_VERSION = 1
+DEFAULT_TILE_M = 500.0
+DEFAULT_TILE_CACHE = 64
+# Distance kept around a mission's legs, so detours see the features next to them
+DEFAULT_TILE_MARGIN_M = 200.0
+MANIFEST = "manifest.json"
+TILES_DIR = "tiles"
+# Top-level keys holding features, in spatial-index order
+SECTIONS = ("points_of_interest", "obstacles", "boundaries")
+
+Tile = Tuple[int, int]
+
+
+def _tile_file(tile: Tile) -> str:
+    return os.path.join(TILES_DIR, f"{tile[0]}_{tile[1]}.json")
+
+
+def _write_json(path: str, payload: Dict[str, Any]) -> None:
+    write_atomic(path, lambda f: f.write(json.dumps(payload, ensure_ascii=False).encode("utf-8")))
+
+
+def build_tile_store(world_map: Dict[str, Any], directory: str, tile_m: float = DEFAULT_TILE_M) -> Dict[str, Any]:
+    """Write the tiles of a map and its manifest (last) under `directory`; returns the manifest."""
+    tile_m = float(tile_m)
+    index = SpatialIndex(world_map)
+    sections = [name for name in SECTIONS if isinstance(world_map.get(name), list)]
+    # Feature -> (section, position in the section), in spatial-index order
+    owners = [(name, k) for name in SECTIONS for k in range(len(world_map.get(name) or []))]
+    i0, j0 = np.floor(index.bbox[:, 0] / tile_m).astype(int), np.floor(index.bbox[:, 1] / tile_m).astype(int)
+    i1, j1 = np.floor(index.bbox[:, 2] / tile_m).astype(int), np.floor(index.bbox[:, 3] / tile_m).astype(int)
+    tiles: Dict[Tile, Dict[str, Any]] = {}
+    for fid, feature in enumerate(index.features):
+        section, position = owners[fid]
+        for i in range(i0[fid], i1[fid] + 1):
+            for j in range(j0[fid], j1[fid] + 1):
+                content = tiles.setdefault((i, j), {"ids": {name: [] for name in sections}, **{name: [] for name in sections}})
+                content["ids"][section].append(position)
+                content[section].append(feature.data)
+
+    os.makedirs(os.path.join(directory, TILES_DIR), exist_ok=True)
+    for tile, content in tiles.items():
+        _write_json(os.path.join(directory, _tile_file(tile)), content)
+    manifest = {
+        "version": FORMAT_VERSION,
+        "tile_m": tile_m,
+        "origin": list(index.origin),
+        "keys": list(world_map),
+        "meta": {key: value for key, value in world_map.items() if key not in sections},
+        "sections": sections,
+        "tiles": {f"{i}_{j}": {name: len(content[name]) for name in sections} for (i, j), content in sorted(tiles.items())},
+    }
+    _write_json(os.path.join(directory, MANIFEST), manifest)
+    # Tiles of a previous build that are no longer listed
+    for name in os.listdir(os.path.join(directory, TILES_DIR)):
+        if name.endswith(".json") and name[:-5] not in manifest["tiles"]:
+            os.unlink(os.path.join(directory, TILES_DIR, name))
+    return manifest
+
+
+class TileStore:
+    """Tiles of one store directory, loaded on demand through an LRU cache."""
+
+    def __init__(self, directory: str, cache_tiles: Optional[int] = None):
+        self.directory = directory
+        self.cache_tiles = int(cache_tiles if cache_tiles is not None else os.environ.get("MAP_TILE_CACHE", DEFAULT_TILE_CACHE))
+        self.loads = 0
+        self.hits = 0
+        self._mtime = None
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """Re-read the manifest if the store was rebuilt (drops cached tiles); True when it was."""
+        mtime = os.stat(os.path.join(self.directory, MANIFEST)).st_mtime_ns
+        if mtime == self._mtime:
+            return False
+        with open(os.path.join(self.directory, MANIFEST), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported tile store version {manifest.get('version')} in {self.directory}")
+        self.manifest, self._mtime = manifest, mtime
+        self.tile_m = float(manifest["tile_m"])
+        self.origin = (float(manifest["origin"][0]), float(manifest["origin"][1]))
+        self.tiles = {tuple(int(v) for v in key.split("_")): counts for key, counts in manifest["tiles"].items()}
+        self._cache = MapCache(self.cache_tiles)
+        return True
+
+    @property
+    def cached_tiles(self) -> List[Tile]:
+        """Tiles in memory, least recently used first."""
+        return list(self._cache)
+
+    def tile(self, tile: Tile) -> Optional[Dict[str, Any]]:
+        """Content of one tile (None when it holds no feature)."""
+        if tile not in self.tiles:
+            return None
+        content = self._cache.get(tile)
+        if content is not None:
+            self.hits += 1
+            return content
+        with open(os.path.join(self.directory, _tile_file(tile)), "r", encoding="utf-8") as f:
+            content = self._cache[tile] = json.load(f)
+        self.loads += 1
+        return content
+
+    def tiles_in(self, xmin: float, ymin: float, xmax: float, ymax: float) -> List[Tile]:
+        """Stored tiles overlapping a local ENU box."""
+        i0, i1 = math.floor(xmin / self.tile_m), math.floor(xmax / self.tile_m)
+        j0, j1 = math.floor(ymin / self.tile_m), math.floor(ymax / self.tile_m)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self.tiles):
+            return sorted(t for t in self.tiles if i0 <= t[0] <= i1 and j0 <= t[1] <= j1)
+        return [(i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1) if (i, j) in self.tiles]
+
+    def region(self, xmin: float, ymin: float, xmax: float, ymax: float) -> Dict[str, Any]:
+        """World map dict with the features of every tile overlapping a local ENU box, in map order."""
+        merged: Dict[str, Dict[int, Dict[str, Any]]] = {name: {} for name in self.manifest["sections"]}
+        for tile in self.tiles_in(xmin, ymin, xmax, ymax):
+            content = self.tile(tile)
+            for name, found in merged.items():
+                found.update(zip(content["ids"][name], content[name]))
+        world_map = {}
+        for key in self.manifest["keys"]:
+            found = merged.get(key)
+            world_map[key] = [found[k] for k in sorted(found)] if found is not None else self.manifest["meta"][key]
+        return world_map
+
+    def in_bbox(self, south: float, west: float, north: float, east: float) -> Dict[str, Any]:
+        """Map of the tiles overlapping a lat/lon box."""
+        (xmin, xmax), (ymin, ymax) = to_local_enu(np.array([south, north]), np.array([west, east]), *self.origin)
+        return self.region(float(xmin), float(ymin), float(xmax), float(ymax))
+
+    def around(self, lat: float, lon: float, radius_m: Optional[float] = None) -> Dict[str, Any]:
+        """Map of the tiles within radius_m (MAP_TILE_MARGIN_M by default) of a position."""
+        radius = _margin(radius_m)
+        x, y = (float(v) for v in to_local_enu(lat, lon, *self.origin))
+        return self.region(x - radius, y - radius, x + radius, y + radius)
+
+    def mission_map(
+        self,
+        mission_dsl: Dict[str, Any],
+        start_position: Optional[Tuple[float, float]] = None,
+        margin_m: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Map of the tiles touched by a mission's legs, widened by margin_m (MAP_TILE_MARGIN_M by default)."""
+        starts, ends, _ = mission_legs(mission_dsl.get("segments") or [], self.origin, start_position)
+        points = np.concatenate([starts[:, :2], ends[:, :2]])
+        if start_position is not None:
+            points = np.vstack([points, np.column_stack(to_local_enu(start_position[0], start_position[1], *self.origin))])
+        if points.size == 0:
+            return self.region(0.0, 0.0, -1.0, -1.0)
+        margin = _margin(margin_m)
+        (xmin, ymin), (xmax, ymax) = points.min(axis=0), points.max(axis=0)
+        return self.region(float(xmin) - margin, float(ymin) - margin, float(xmax) + margin, float(ymax) + margin)
+
+
+def _margin(margin_m: Optional[float]) -> float:
+    return float(margin_m if margin_m is not None else os.environ.get("MAP_TILE_MARGIN_M", DEFAULT_TILE_MARGIN_M))
+
+
+_STORES: Dict[str, TileStore] = {}
+
+
+def get_tile_store(directory: Optional[str] = None) -> Optional[TileStore]:
+    """Shared store of a directory (MAP_TILES_DIR by default), None when tiling is off."""
+    directory = directory if directory is not None else os.environ.get("MAP_TILES_DIR", "").strip()
+    if not directory:
+        return None
+    store = _STORES.get(directory)
+    if store is None:
+        store = _STORES[directory] = TileStore(directory)
+    else:
+        store.refresh()
+    return store
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Split a world map into a tile store")
+    parser.add_argument("map", help="World map JSON")
+    parser.add_argument("directory", help="Tile store directory")
+    parser.add_argument("--tile-m", type=float, default=DEFAULT_TILE_M, help="Tile side in meters")
+    args = parser.parse_args(argv)
+    with open(args.map, "r", encoding="utf-8") as f:
+        world_map = json.load(f)
+    manifest = build_tile_store(world_map, args.directory, args.tile_m)
+    print(json.dumps({
+        "directory": args.directory,
+        "tile_m": manifest["tile_m"],
+        "tiles": len(manifest["tiles"]),
+        "features": {name: len(world_map.get(name) or []) for name in manifest["sections"]},
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
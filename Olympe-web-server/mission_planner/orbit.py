@@ -0,0 +1,161 @@
+"""
+Orbit planner - closed-form POI orbit from radius, sweep angle and ground speed.
+
+With StartPilotedPOIV2 the drone keeps facing the POI, so a lateral (roll)
+PCMD makes it circle around it. Instead of holding a roll rate for a fixed
+duration, the orbit is planned geometrically (arc length / ground speed) and
+terminated by tracking the bearing POI -> drone until the requested sweep is
+covered. The planned duration only serves as a fallback and a timeout bound.
+"""
+
+import math
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from geodesy import angle_diff_deg, destination_array
+
+# Ground speed reached with a 100% roll command in POI mode (m/s)
+DEFAULT_FULL_ROLL_SPEED_MPS = 12.0
+DEFAULT_ORBIT_RADIUS_M = 15.0
+DEFAULT_SWEEP_DEG = 360.0
+DEFAULT_GROUND_SPEED_MPS = 3.0
+# Orbit radius keys of a poi_inspection segment, current name first (offset_distance: legacy)
+ORBIT_RADIUS_KEYS = ("orbit_radius", "offset_distance")
+# Proportional gain (pitch % per meter of radius error) holding the orbit radius
+RADIUS_HOLD_GAIN = 4.0
+RADIUS_HOLD_MAX_PITCH = 20
+
+
+@dataclass(frozen=True)
+class OrbitPlan:
+    """Geometric orbit parameters and the PCMD command that realises them."""
+
+    radius_m: float
+    sweep_deg: float
+    ground_speed_mps: float
+    roll_percent: int
+    duration_sec: float
+    timeout_sec: float
+
+    @property
+    def arc_length_m(self) -> float:
+        return self.radius_m * math.radians(self.sweep_deg)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "radius_m": round(self.radius_m, 2),
+            "sweep_deg": round(self.sweep_deg, 1),
+            "ground_speed_mps": round(self.ground_speed_mps, 2),
+            "roll_percent": self.roll_percent,
+            "planned_duration_sec": round(self.duration_sec, 2),
+            "arc_length_m": round(self.arc_length_m, 1),
+        }
+
+
+def is_geometric_orbit(segment: Mapping[str, Any]) -> bool:
+    """
+    Whether a poi_inspection segment is flown by the orbit planner: it must
+    set sweep_angle, orbit_radius or ground_speed. Segments without them, or
+    with rotation_duration and no sweep_angle, fly the legacy timed orbit.
+    """
+    if "sweep_angle" in segment:
+        return True
+    if "rotation_duration" in segment:
+        return False
+    return "orbit_radius" in segment or "ground_speed" in segment
+
+
+def orbit_radius_key(segment: Mapping[str, Any]) -> str:
+    """Key holding the orbit radius of a poi_inspection segment (orbit_radius when neither is set)."""
+    return next((key for key in ORBIT_RADIUS_KEYS if key in segment), ORBIT_RADIUS_KEYS[0])
+
+
+def orbit_parameters(segment: Mapping[str, Any]) -> Tuple[float, float, float]:
+    """(radius m, sweep deg, ground speed m/s) of a poi_inspection segment, defaults filled in."""
+    return (
+        float(segment.get(orbit_radius_key(segment), DEFAULT_ORBIT_RADIUS_M)),
+        float(segment.get("sweep_angle", DEFAULT_SWEEP_DEG)),
+        float(segment.get("ground_speed", DEFAULT_GROUND_SPEED_MPS)),
+    )
+
+
+def plan_orbit(
+    radius_m: float,
+    sweep_deg: float = DEFAULT_SWEEP_DEG,
+    ground_speed_mps: float = DEFAULT_GROUND_SPEED_MPS,
+    full_roll_speed_mps: Optional[float] = None,
+) -> OrbitPlan:
+    """
+    Compute roll command and nominal duration for an orbit.
+
+    The roll percentage is derived from the requested ground speed, linearly
+    scaled against full_roll_speed_mps (env ORBIT_FULL_ROLL_SPEED_MPS). The
+    speed actually flown is the one produced by the rounded roll command.
+    """
+    if radius_m <= 0:
+        raise ValueError(f"Orbit radius must be > 0 (got {radius_m})")
+    if sweep_deg <= 0:
+        raise ValueError(f"Orbit sweep angle must be > 0 (got {sweep_deg})")
+    if ground_speed_mps <= 0:
+        raise ValueError(f"Orbit ground speed must be > 0 (got {ground_speed_mps})")
+    if full_roll_speed_mps is None:
+        full_roll_speed_mps = float(os.environ.get("ORBIT_FULL_ROLL_SPEED_MPS", DEFAULT_FULL_ROLL_SPEED_MPS))
+    roll_percent = int(round(100.0 * ground_speed_mps / full_roll_speed_mps))
+    roll_percent = max(1, min(100, roll_percent))
+    effective_speed = full_roll_speed_mps * roll_percent / 100.0
+    duration = radius_m * math.radians(sweep_deg) / effective_speed
+    timeout_factor = float(os.environ.get("ORBIT_TIMEOUT_FACTOR", "2.0"))
+    return OrbitPlan(
+        radius_m=float(radius_m),
+        sweep_deg=float(sweep_deg),
+        ground_speed_mps=effective_speed,
+        roll_percent=roll_percent,
+        duration_sec=duration,
+        timeout_sec=duration * timeout_factor,
+    )
+
+
+def radius_hold_pitch(distance_m: float, radius_m: float) -> int:
+    """
+    Pitch command (%) keeping the drone on the orbit circle.
+    Positive pitch flies forward, i.e. towards the POI the drone is facing.
+    """
+    pitch = RADIUS_HOLD_GAIN * (distance_m - radius_m)
+    return int(max(-RADIUS_HOLD_MAX_PITCH, min(RADIUS_HOLD_MAX_PITCH, round(pitch))))
+
+
+class SweepTracker:
+    """Accumulate the angle swept by the bearing POI -> drone, unwrapping across 0/360."""
+
+    def __init__(self):
+        self._last: Optional[float] = None
+        self.swept_deg = 0.0
+
+    def update(self, bearing_deg: float) -> float:
+        if self._last is not None:
+            self.swept_deg += angle_diff_deg(bearing_deg, self._last)
+        self._last = bearing_deg
+        return abs(self.swept_deg)
+
+
+def orbit_waypoints(
+    lat: float,
+    lon: float,
+    radius_m: float,
+    sweep_deg: float = DEFAULT_SWEEP_DEG,
+    start_bearing_deg: float = 180.0,
+    max_spacing_m: float = 10.0,
+) -> List[Tuple[float, float]]:
+    """
+    Waypoint ring approximating an orbit around (lat, lon), starting at
+    start_bearing_deg and sweeping counter-clockwise (same direction as a
+    positive roll in POI mode). Chord length is bounded by max_spacing_m.
+    """
+    arc = radius_m * math.radians(sweep_deg)
+    steps = max(4, int(math.ceil(arc / max_spacing_m)))
+    bearings = (start_bearing_deg - sweep_deg * np.arange(steps + 1) / steps) % 360.0
+    lats, lons = destination_array(lat, lon, bearings, radius_m)
+    return list(zip(lats.tolist(), lons.tolist()))
@@ -0,0 +1,302 @@
+"""
+Path planner - route move_to legs around obstacles instead of over them.
+
+A move_to whose straight leg conflicts with the map (obstacles from
+mission_planner.clearance, no-fly/restricted zones and geofences from
+mission_planner.geofence) is replaced by a safe route: climb (if needed) to a
+cruise level, follow waypoints at that level, then descend onto the target.
+The waypoints ending the climb and starting the descent are inserted with
+"hover": true, so the executor flies those vertical legs as planned instead
+of passing through them.
+
+Candidate levels are the leg's own altitude and, above it, the top of each
+obstacle (plus its clearance margin) and zone ceiling (plus the vertical
+margin), rounded up to a voxel layer boundary, up to the mission's max
+altitude. For each level the planner runs A* over that altitude's layer of
+the map's voxel grid (mission_planner.voxel_grid; 8-connected, octile
+heuristic), shortens the cell path by line of sight, and checks the result
+against the exact checkers. The route taking the least time (horizontal
+distance at the leg's speed plus the extra climb and descent) wins, so a
+short detour at low altitude beats climbing over a tall obstacle and vice
+versa. Levels are tried in increasing order and the search stops once the
+climb alone costs more than the best route found.
+
+The voxel grid is compiled once per map content (and memory-mapped from its
+cache file, unless cache_dir is None), and planners are cached per map
+content (get_path_planner).
+"""
+
+import heapq
+import math
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from geodesy import from_local_enu
+from mission_planner.clearance import get_obstacle_field
+from mission_planner.estimator import FlightModel
+from mission_planner.geofence import DEFAULT_VERTICAL_MARGIN_M, get_geofence_engine
+from mission_planner.legs import MapCache, map_key, map_origin, mission_legs
+from mission_planner.voxel_grid import get_voxel_grid
+
+MAX_LEVELS = 8
+_SQRT2 = math.sqrt(2.0)
+
+Point = Tuple[float, float]
+
+
+class PathPlanner:
+    """Occupancy grids of one map, by altitude level, and A* routes over them."""
+
+    def __init__(self, world_map: Dict[str, Any], model: Optional[FlightModel] = None, cache_dir: Optional[str] = ""):
+        self.origin = map_origin(world_map)
+        self.geofence = get_geofence_engine(world_map)
+        self.obstacles = get_obstacle_field(world_map)
+        self.voxels = get_voxel_grid(world_map, cache_dir)
+        self.model = model or FlightModel.from_env()
+        self.vertical_margin_m = float(os.environ.get("GEOFENCE_VERTICAL_MARGIN_M", DEFAULT_VERTICAL_MARGIN_M))
+        self.resolution_m = self.voxels.resolution_m
+        self.x0, self.y0 = self.voxels.x0, self.voxels.y0
+        self.nx, self.ny = self.voxels.nx, self.voxels.ny
+
+    def layer(self, level: float) -> np.ndarray:
+        """Blocked cells (ny, nx) of the voxel layer flown at level."""
+        return self.voxels.layer(level)
+
+    def _level(self, altitude: float) -> float:
+        """Lowest voxel layer boundary at or above altitude (a level entirely clear of a band ending there)."""
+        dz = self.voxels.vertical_resolution_m
+        return math.ceil(altitude / dz - 1e-9) * dz
+
+    # ----------------------------------------------------------------- search
+
+    def _cell(self, x: float, y: float) -> Optional[Tuple[int, int]]:
+        i = int((x - self.x0) // self.resolution_m)
+        j = int((y - self.y0) // self.resolution_m)
+        return (j, i) if 0 <= i < self.nx and 0 <= j < self.ny else None
+
+    def _visible(self, blocked: np.ndarray, a: Point, b: Point) -> bool:
+        """Straight line a -> b crosses no blocked cell (sampled every quarter cell)."""
+        steps = max(int(math.hypot(b[0] - a[0], b[1] - a[1]) / (self.resolution_m / 4.0)), 1)
+        t = np.linspace(0.0, 1.0, steps + 1)
+        i = ((a[0] + t * (b[0] - a[0]) - self.x0) // self.resolution_m).astype(int)
+        j = ((a[1] + t * (b[1] - a[1]) - self.y0) // self.resolution_m).astype(int)
+        if i.min() < 0 or j.min() < 0 or i.max() >= self.nx or j.max() >= self.ny:
+            return False
+        return not blocked[j, i].any()
+
+    def _astar(self, blocked: np.ndarray, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        if blocked[start] or blocked[goal]:
+            return None
+        gj, gi = goal
+        g = {start: 0.0}
+        came: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        heap = [(0.0, start)]
+        done = set()
+        while heap:
+            _, node = heapq.heappop(heap)
+            if node == goal:
+                path = [node]
+                while node in came:
+                    node = came[node]
+                    path.append(node)
+                return path[::-1]
+            if node in done:
+                continue
+            done.add(node)
+            j, i = node
+            for dj in (-1, 0, 1):
+                for di in (-1, 0, 1):
+                    if not dj and not di:
+                        continue
+                    nj, ni = j + dj, i + di
+                    if not (0 <= nj < self.ny and 0 <= ni < self.nx) or blocked[nj, ni]:
+                        continue
+                    # No corner cutting between two blocked cells
+                    if dj and di and (blocked[j, ni] or blocked[nj, i]):
+                        continue
+                    cost = g[node] + (_SQRT2 if dj and di else 1.0)
+                    if cost < g.get((nj, ni), math.inf):
+                        g[(nj, ni)] = cost
+                        came[(nj, ni)] = node
+                        dx, dy = abs(ni - gi), abs(nj - gj)
+                        heapq.heappush(heap, (cost + max(dx, dy) + (_SQRT2 - 1.0) * min(dx, dy), (nj, ni)))
+        return None
+
+    def _route_2d(self, level: float, a: Point, b: Point) -> Optional[List[Point]]:
+        """Waypoints a, ..., b at one altitude level, or None when no route exists."""
+        blocked = self.layer(level)
+        if self._visible(blocked, a, b):
+            return [a, b]
+        start, goal = self._cell(*a), self._cell(*b)
+        if start is None or goal is None:
+            return None
+        cells = self._astar(blocked, start, goal)
+        if cells is None:
+            return None
+        res = self.resolution_m
+        points = [a] + [(self.x0 + (i + 0.5) * res, self.y0 + (j + 0.5) * res) for j, i in cells[1:-1]] + [b]
+        # Line-of-sight shortening: jump to the farthest visible point
+        route, k = [a], 0
+        while k < len(points) - 1:
+            nxt = len(points) - 1
+            while nxt > k + 1 and not self._visible(blocked, points[k], points[nxt]):
+                nxt -= 1
+            route.append(points[nxt])
+            k = nxt
+        return route
+
+    def _clear(self, legs: List[Tuple[Tuple[float, float, float], Tuple[float, float, float]]]) -> bool:
+        a3 = np.asarray([leg[0] for leg in legs], dtype=np.float64).reshape(-1, 3)
+        b3 = np.asarray([leg[1] for leg in legs], dtype=np.float64).reshape(-1, 3)
+        first_k, _ = self.obstacles.first_conflicts(a3, b3)
+        return not (first_k >= 0).any() and not self.geofence.hits(a3, b3)
+
+    def route(
+        self,
+        start: Tuple[float, float, float],
+        target: Tuple[float, float, float],
+        max_altitude_m: Optional[float] = None,
+        speed: Optional[float] = None,
+        vspeed: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Fastest safe route start -> target (ENU x, y, altitude), or None when the
+        direct leg is already clear or no route exists. Returns level_m,
+        waypoints (x, y at the level, excluding start and target) and lengths.
+        """
+        if self._clear([(start, target)]):
+            return None
+        ceiling = self.geofence.default_max_altitude_m if max_altitude_m is None else float(max_altitude_m)
+        speed = speed or self.model.horizontal_speed_mps
+        vspeed = vspeed or self.model.vertical_speed_mps
+        base = max(start[2], target[2])
+        levels = {base}
+        levels.update(self._level(float(top)) for top in self.obstacles.top if top > base)
+        levels.update(
+            self._level(zone.max_altitude_m + self.vertical_margin_m)
+            for zone in self.geofence.zones
+            if math.isfinite(zone.max_altitude_m) and zone.max_altitude_m + self.vertical_margin_m > base
+        )
+        direct = math.hypot(target[0] - start[0], target[1] - start[1])
+        best: Optional[Dict[str, Any]] = None
+        for level in sorted(level for level in levels if level <= ceiling)[:MAX_LEVELS]:
+            climb = (level - start[2]) + (level - target[2])
+            if best is not None and direct / speed + climb / vspeed >= best["time_sec"]:
+                break
+            route = self._route_2d(level, (start[0], start[1]), (target[0], target[1]))
+            if route is None:
+                continue
+            points = [start] + [(x, y, level) for x, y in route] + [target]
+            points = [p for n, p in enumerate(points) if n == 0 or p != points[n - 1]]
+            legs = list(zip(points[:-1], points[1:]))
+            if not self._clear(legs):
+                continue
+            horizontal = sum(math.hypot(q[0] - p[0], q[1] - p[1]) for p, q in legs)
+            time_sec = horizontal / speed + climb / vspeed
+            if best is None or time_sec < best["time_sec"]:
+                best = {
+                    "level_m": float(level),
+                    "waypoints": points[1:-1],
+                    "direct_m": direct,
+                    "route_m": horizontal,
+                    "time_sec": time_sec,
+                }
+        return best
+
+
+_PLANNERS: Dict[str, PathPlanner] = MapCache()
+
+
+def get_path_planner(world_map: Dict[str, Any], cache_dir: Optional[str] = "") -> PathPlanner:
+    """
+    Planner for a map, built once per map content (its altitude slices are
+    cached inside); cache_dir is the voxel grid cache (get_voxel_grid).
+    """
+    key = map_key(
+        world_map,
+        ("obstacles", "boundaries", "points_of_interest", "starting_position", "default_max_altitude_meters"),
+        *[os.environ.get(name) for name in (
+            "VOXEL_RESOLUTION_M", "VOXEL_VERTICAL_RESOLUTION_M", "CLEARANCE_MARGIN_M", "GEOFENCE_VERTICAL_MARGIN_M",
+        )],
+    )
+    planner = _PLANNERS.get(key)
+    if planner is None:
+        planner = _PLANNERS[key] = PathPlanner(world_map, cache_dir=cache_dir)
+    return planner
+
+
+def plan_segments(
+    segments: List[Dict[str, Any]],
+    planner: PathPlanner,
+    start_position: Optional[Tuple[float, float]] = None,
+    max_altitude_m: Optional[float] = None,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Replace conflicting move_to legs with planned routes.
+    Returns (segments, changes); the input list is not modified.
+    """
+    a3, b3, owner = mission_legs(segments, planner.origin, start_position, planner.model)
+    first_leg = {int(idx): leg for leg, idx in reversed(list(enumerate(owner)))}
+    planned: List[Dict[str, Any]] = []
+    changes: List[Dict[str, Any]] = []
+    for idx, segment in enumerate(segments):
+        leg = first_leg.get(idx)
+        if str(segment.get("type", "")).strip() != "move_to" or leg is None:
+            planned.append(segment)
+            continue
+        route = planner.route(
+            tuple(a3[leg]), tuple(b3[leg]), max_altitude_m,
+            segment.get("max_horizontal_speed"), segment.get("max_vertical_speed"),
+        )
+        if route is None:
+            planned.append(segment)
+            continue
+        speeds = {k: segment[k] for k in ("max_horizontal_speed", "max_vertical_speed", "max_yaw_rotation_speed") if k in segment}
+        points = [tuple(a3[leg])] + list(route["waypoints"]) + [tuple(b3[leg])]
+        for k, (x, y, z) in enumerate(route["waypoints"], 1):
+            lat, lon = from_local_enu(x, y, *planner.origin)
+            waypoint = {"type": "move_to", "latitude": float(lat), "longitude": float(lon), "altitude": float(z), **speeds}
+            # End of the climb / top of the descent: the drone must stop there, or it cuts the corner
+            if any((p[0], p[1]) == (x, y) for p in (points[k - 1], points[k + 1])):
+                waypoint["hover"] = True
+            planned.append(waypoint)
+        planned.append(segment)
+        changes.append({
+            "segment": idx,
+            "level_m": round(route["level_m"], 1),
+            "waypoints": len(route["waypoints"]),
+            "direct_m": round(route["direct_m"], 1),
+            "route_m": round(route["route_m"], 1),
+        })
+    return planned, changes
+
+
+def plan_mission_paths(
+    mission_dsl: Dict[str, Any],
+    world_map: Dict[str, Any],
+    start_position: Optional[Tuple[float, float]] = None,
+    cache_dir: Optional[str] = "",
+) -> Dict[str, Any]:
+    """
+    Mission-level wrapper: returns a copy with planned segments and the report
+    under optimizations.path_planner. cache_dir is the voxel grid cache
+    (VOXEL_CACHE_DIR by default, None to keep the grid in memory only).
+    """
+    t0 = time.perf_counter_ns()
+    safety = mission_dsl.get("safety") if isinstance(mission_dsl.get("safety"), dict) else {}
+    planner = get_path_planner(world_map, cache_dir)
+    segments, changes = plan_segments(
+        list(mission_dsl.get("segments") or []), planner, start_position, safety.get("maxAltitudeMeters")
+    )
+    planned = dict(mission_dsl)
+    planned["segments"] = segments
+    report = {
+        "rerouted_legs": len(changes),
+        "changes": changes,
+        "compute_us": round((time.perf_counter_ns() - t0) / 1000.0, 1),
+    }
+    planned["optimizations"] = dict(mission_dsl.get("optimizations") or {}, path_planner=report)
+    return planned
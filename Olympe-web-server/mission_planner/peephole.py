@@ -0,0 +1,169 @@
+"""
+Peephole optimizer - remove redundant steps from mission DSL segments.
+
+LLM-generated missions often contain steps that cost flight time without
+changing what the drone does. Each rule looks at a window of two adjacent
+segments and merges, drops or rewrites them:
+
+- duplicate_move_to: a move_to followed by another move_to to (nearly) the
+  same point; only the second target is flown (no stop at the first one).
+- move_to_poi_center: a move_to to the center of the POI that a geometric
+  orbit inspects next; the orbit joins its own circle, so flying to the
+  center first means crossing the radius twice.
+- rth_lands: return_to_home followed by land; RTH is flown with the landing
+  ending behavior and confirms the landing itself.
+
+Rules are applied until no window changes. Every change is recorded as a
+diff entry (original segment indices, before/after segments) so it can be
+reported back to the operator.
+"""
+
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from geodesy import haversine_m
+from mission_planner.orbit import is_geometric_orbit
+
+DEFAULT_MERGE_DISTANCE_M = 2.0
+DEFAULT_MERGE_ALTITUDE_M = 1.0
+
+# (original index, segment)
+_Item = Tuple[int, Dict[str, Any]]
+
+
+def _type(segment: Dict[str, Any]) -> str:
+    return str(segment.get("type", "")).strip()
+
+
+def _same_point(a: Dict[str, Any], b: Dict[str, Any], distance_m: float, altitude_m: Optional[float]) -> bool:
+    try:
+        horizontal = haversine_m(float(a["latitude"]), float(a["longitude"]), float(b["latitude"]), float(b["longitude"]))
+        vertical = abs(float(a.get("altitude", 0.0)) - float(b.get("altitude", 0.0)))
+    except (KeyError, TypeError, ValueError):
+        return False
+    return horizontal <= distance_m and (altitude_m is None or vertical <= altitude_m)
+
+
+def _rule_duplicate_move_to(a: Dict[str, Any], b: Dict[str, Any], params: Dict[str, float]):
+    if _type(a) != "move_to" or _type(b) != "move_to":
+        return None
+    if not _same_point(a, b, params["distance_m"], params["altitude_m"]):
+        return None
+    merged = dict(b)
+    if a.get("hover") and not b.get("hover"):
+        merged["hover"] = True
+    return [merged], "merged into the next move_to (same point)"
+
+
+def _rule_move_to_poi_center(a: Dict[str, Any], b: Dict[str, Any], params: Dict[str, float]):
+    if _type(a) != "move_to" or _type(b) != "poi_inspection" or not is_geometric_orbit(b):
+        return None
+    if a.get("hover") or not _same_point(a, b, params["distance_m"], None):
+        return None
+    inspection = dict(b)
+    for key in ("max_horizontal_speed", "max_vertical_speed", "max_yaw_rotation_speed"):
+        if key in a and key not in inspection:
+            inspection[key] = a[key]
+    return [inspection], "dropped: the orbit joins its circle directly"
+
+
+def _rule_rth_lands(a: Dict[str, Any], b: Dict[str, Any], params: Dict[str, float]):
+    if _type(a) != "return_to_home" or _type(b) != "land":
+        return None
+    return [dict(a, ending_behavior="landing")], "land folded into return_to_home (ending behavior: landing)"
+
+
+RULES = (
+    ("duplicate_move_to", _rule_duplicate_move_to),
+    ("move_to_poi_center", _rule_move_to_poi_center),
+    ("rth_lands", _rule_rth_lands),
+)
+
+
+def optimize_segments(
+    segments: List[Dict[str, Any]],
+    merge_distance_m: Optional[float] = None,
+    merge_altitude_m: Optional[float] = None,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Apply the peephole rules until a fixpoint.
+    Returns (segments, diff); the input list is not modified.
+    """
+    params = {
+        "distance_m": float(
+            merge_distance_m if merge_distance_m is not None
+            else os.environ.get("PEEPHOLE_MERGE_DISTANCE_M", DEFAULT_MERGE_DISTANCE_M)
+        ),
+        "altitude_m": float(
+            merge_altitude_m if merge_altitude_m is not None
+            else os.environ.get("PEEPHOLE_MERGE_ALTITUDE_M", DEFAULT_MERGE_ALTITUDE_M)
+        ),
+    }
+    items: List[_Item] = list(enumerate(segments))
+    diff: List[Dict[str, Any]] = []
+    changed = True
+    while changed:
+        changed = False
+        i = 0
+        while i + 1 < len(items):
+            (ia, a), (ib, b) = items[i], items[i + 1]
+            for name, rule in RULES:
+                outcome = rule(a, b, params)
+                if outcome is None:
+                    continue
+                replacement, reason = outcome
+                diff.append({
+                    "rule": name,
+                    "indices": [ia, ib],
+                    "before": [a, b],
+                    "after": replacement,
+                    "reason": reason,
+                })
+                # The surviving segment keeps the index of the segment it replaces
+                items[i:i + 2] = [(ib if _type(seg) == _type(b) else ia, seg) for seg in replacement]
+                changed = True
+                break
+            else:
+                i += 1
+    return [segment for _, segment in items], diff
+
+
+def describe_segment(segment: Dict[str, Any]) -> str:
+    """One-line human description of a segment (for diffs shown to the operator)."""
+    seg_type = _type(segment)
+    text = seg_type
+    if "poi_name" in segment:
+        text += f" {segment['poi_name']}"
+    if "latitude" in segment and "longitude" in segment:
+        try:
+            text += f" ({float(segment['latitude']):.6f}, {float(segment['longitude']):.6f}"
+            text += f", {float(segment['altitude']):g} m)" if "altitude" in segment else ")"
+        except (TypeError, ValueError):
+            pass
+    if segment.get("ending_behavior"):
+        text += f" ending={segment['ending_behavior']}"
+    return text
+
+
+def format_diff(diff: List[Dict[str, Any]]) -> List[str]:
+    """Diff entries as -/+ lines, one block per change."""
+    lines: List[str] = []
+    for change in diff:
+        lines.append(f"@@ segments {change['indices'][0]}-{change['indices'][1]}: {change['rule']} ({change['reason']})")
+        lines.extend(f"- {describe_segment(seg)}" for seg in change["before"])
+        lines.extend(f"+ {describe_segment(seg)}" for seg in change["after"])
+    return lines
+
+
+def optimize_mission_segments(mission_dsl: Dict[str, Any]) -> Dict[str, Any]:
+    """Mission-level wrapper: returns a copy with optimized segments and the diff under optimizations.peephole."""
+    segments, diff = optimize_segments(list(mission_dsl.get("segments") or []))
+    optimized = dict(mission_dsl)
+    optimized["segments"] = segments
+    report = {
+        "removed_segments": len(mission_dsl.get("segments") or []) - len(segments),
+        "changes": [{k: change[k] for k in ("rule", "indices", "reason")} for change in diff],
+        "diff": format_diff(diff),
+    }
+    optimized["optimizations"] = dict(mission_dsl.get("optimizations") or {}, peephole=report)
+    return optimized
@@ -0,0 +1,302 @@
+"""
+Spatial index - nearest / radius / bounding-box queries over a map's features.
+
+Points of interest, obstacles and boundaries are projected once to local ENU
+meters around the map's starting position (mission_planner.legs.map_origin)
+and hashed into a uniform grid of square cells: each feature is listed in
+every cell its bounding box overlaps (a POI is a point, an obstacle a disk of
+its footprint radius, a boundary its polygon or circle). Queries only look at
+the cells they can reach and measure exact distances to the candidates with
+NumPy:
+
+- nearest(lat, lon, k): the k closest features, searching rings of cells
+  outward until no unseen feature can be closer;
+- within(lat, lon, radius_m): every feature within a radius;
+- in_bbox(south, west, north, east): every feature overlapping a lat/lon box.
+
+Distances are to the feature's shape: 0 inside a boundary or an obstacle's
+footprint. lookup(name) replaces exact name matching: case, accents,
+punctuation and spacing are ignored, and a close misspelling still matches.
+
+The grid is stored as flat arrays (sorted cell keys, CSR offsets, feature ids)
+so that state() can be saved with a compiled map and memory-mapped back.
+"""
+
+import difflib
+import math
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from geodesy import from_local_enu, to_local_enu
+from mission_planner.clearance import DEFAULT_OBSTACLE_RADIUS_M
+from mission_planner.geofence import get_geofence_engine
+from mission_planner.legs import MapCache, map_key, map_origin, polygon_edge_distances
+
+DEFAULT_CELL_M = 50.0
+# Feature kinds, in index order (points, then boundaries); stored as their position
+KINDS = ("poi", "obstacle", "boundary")
+# Similarity (difflib ratio) a misspelled name needs to match a feature
+NAME_MATCH_CUTOFF = 0.8
+
+
+@dataclass(frozen=True, eq=False)
+class Feature:
+    """One map feature; `data` is its entry in the map JSON."""
+
+    name: str
+    kind: str
+    type: str
+    latitude: float
+    longitude: float
+    data: Dict[str, Any] = field(repr=False)
+
+
+def normalize_name(name: str) -> str:
+    """Name key for lookups: lowercase ASCII words separated by single spaces."""
+    text = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def _cell_keys(ci: np.ndarray, cj: np.ndarray) -> np.ndarray:
+    """One sortable int64 per grid cell, ordered by (i, j)."""
+    return (np.asarray(ci, dtype=np.int64) << 32) + (np.asarray(cj, dtype=np.int64) + (1 << 31))
+
+
+def boundary_zones(world_map: Dict[str, Any]) -> List[Any]:
+    """The geofence engine's projected zone of each map boundary, in map order."""
+    engine = get_geofence_engine(world_map)
+    geofences, zones = iter(engine.geofences), iter(engine.zones)
+    return [
+        next(geofences if boundary.get("type", "geofence") == "geofence" else zones)
+        for boundary in world_map.get("boundaries") or []
+    ]
+
+
+def _obstacle_radius(obstacle: Dict[str, Any]) -> float:
+    if obstacle.get("width_meters") is not None and obstacle.get("length_meters") is not None:
+        return math.hypot(float(obstacle["width_meters"]), float(obstacle["length_meters"])) / 2.0
+    return float(obstacle.get("radius_meters") or DEFAULT_OBSTACLE_RADIUS_M)
+
+
+class SpatialIndex:
+    """Features of one map, projected and grid-hashed once."""
+
+    def __init__(self, world_map: Dict[str, Any], cell_m: float = DEFAULT_CELL_M):
+        self.origin = map_origin(world_map)
+        self.cell_m = float(cell_m)
+        self.features: Sequence[Feature] = []
+        x: List[float] = []
+        y: List[float] = []
+        radius: List[float] = []
+        for kind, entries in (("poi", world_map.get("points_of_interest")), ("obstacle", world_map.get("obstacles"))):
+            entries = entries or []
+            lat = np.array([float(e["coordinates"]["latitude"]) for e in entries])
+            lon = np.array([float(e["coordinates"]["longitude"]) for e in entries])
+            px, py = to_local_enu(lat, lon, *self.origin)
+            for entry, la, lo in zip(entries, lat, lon):
+                self.features.append(Feature(str(entry.get("name", "unnamed")), kind, str(entry.get("type", kind)), float(la), float(lo), entry))
+            x.extend(px.tolist())
+            y.extend(py.tolist())
+            radius.extend(0.0 if kind == "poi" else _obstacle_radius(e) for e in entries)
+        self.n_points = len(self.features)
+        self.x, self.y, self.radius = np.array(x), np.array(y), np.array(radius)
+
+        # Boundaries keep the geofence engine's projected shapes
+        self.zones = boundary_zones(world_map)
+        for boundary, zone in zip(world_map.get("boundaries") or [], self.zones):
+            lat, lon = from_local_enu((zone.bbox[0] + zone.bbox[2]) / 2.0, (zone.bbox[1] + zone.bbox[3]) / 2.0, *self.origin)
+            self.features.append(Feature(zone.name, "boundary", zone.kind, float(lat), float(lon), boundary))
+
+        self.kinds = np.array([KINDS.index(feature.kind) for feature in self.features], dtype=np.int8)
+        boxes = np.column_stack([self.x - self.radius, self.y - self.radius, self.x + self.radius, self.y + self.radius])
+        if self.zones:
+            boxes = np.concatenate([boxes.reshape(-1, 4), np.array([zone.bbox for zone in self.zones])])
+        self.bbox = boxes.reshape(-1, 4)
+        self._hash(self.bbox)
+        self._names: Optional[Dict[str, List[int]]] = None
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], features: Sequence[Feature], zones: List[Any]) -> "SpatialIndex":
+        """
+        Index rebuilt from state() arrays (e.g. memory-mapped) without
+        re-projecting or re-hashing; features may be a lazy sequence.
+        """
+        index = cls.__new__(cls)
+        index.origin = tuple(float(v) for v in state["origin"])
+        index.cell_m = float(state["cell_m"])
+        index.n_points = int(state["n_points"])
+        index.features, index.zones = features, zones
+        index.x, index.y, index.radius = state["x"], state["y"], state["radius"]
+        index.kinds, index.bbox = state["kinds"], state["bbox"]
+        index._keys, index._starts, index._ids = state["cell_keys"], state["cell_starts"], state["cell_ids"]
+        index._extent = tuple(int(v) for v in state["extent"])
+        index._names = None
+        return index
+
+    def state(self) -> Dict[str, Any]:
+        """Everything from_state() needs besides the features and zones (NumPy arrays and scalars)."""
+        return {
+            "origin": list(self.origin), "cell_m": self.cell_m, "n_points": self.n_points, "extent": list(self._extent),
+            "x": self.x, "y": self.y, "radius": self.radius, "kinds": self.kinds, "bbox": self.bbox,
+            "cell_keys": self._keys, "cell_starts": self._starts, "cell_ids": self._ids,
+        }
+
+    def __len__(self) -> int:
+        return len(self.features)
+
+    # ------------------------------------------------------------------ grid
+
+    def _cell(self, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return np.floor(np.asarray(x) / self.cell_m).astype(np.int64), np.floor(np.asarray(y) / self.cell_m).astype(np.int64)
+
+    def _hash(self, boxes: np.ndarray) -> None:
+        """
+        Cell -> ids of the features whose bounding box overlaps it, as sorted
+        cell keys and the ids of cell k at _ids[_starts[k]:_starts[k + 1]].
+        """
+        i0, j0 = self._cell(boxes[:, 0], boxes[:, 1])
+        i1, j1 = self._cell(boxes[:, 2], boxes[:, 3])
+        single = (i0 == i1) & (j0 == j1)
+        ids, ci, cj = [np.flatnonzero(single)], [i0[single]], [j0[single]]
+        for fid in np.flatnonzero(~single):
+            ii, jj = np.meshgrid(np.arange(i0[fid], i1[fid] + 1), np.arange(j0[fid], j1[fid] + 1), indexing="ij")
+            ids.append(np.full(ii.size, fid))
+            ci.append(ii.ravel())
+            cj.append(jj.ravel())
+        ids, ci, cj = np.concatenate(ids).astype(np.int64), np.concatenate(ci), np.concatenate(cj)
+        self._extent = (int(ci.min()), int(cj.min()), int(ci.max()), int(cj.max())) if ids.size else (0, 0, -1, -1)
+        keys = _cell_keys(ci, cj)
+        order = np.lexsort((ids, keys))
+        keys, self._ids = keys[order], ids[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if keys.size else np.empty(0, dtype=np.int64)
+        self._keys = keys[starts]
+        self._starts = np.r_[starts, keys.size].astype(np.int64)
+
+    def _gather(self, cells: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+        keys = _cell_keys(*cells)
+        if keys.size == 0 or self._keys.size == 0:
+            return np.empty(0, dtype=np.int64)
+        slots = np.minimum(np.searchsorted(self._keys, keys), self._keys.size - 1)
+        slots = slots[self._keys[slots] == keys]
+        parts = [self._ids[self._starts[k]:self._starts[k + 1]] for k in slots]
+        return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+
+    def _box_cells(self, xmin: float, ymin: float, xmax: float, ymax: float) -> Tuple[np.ndarray, np.ndarray]:
+        (i0, i1), (j0, j1) = self._cell([xmin, xmax], [ymin, ymax])
+        i0, j0 = max(i0, self._extent[0]), max(j0, self._extent[1])
+        i1, j1 = min(i1, self._extent[2]), min(j1, self._extent[3])
+        ii, jj = np.meshgrid(np.arange(i0, i1 + 1), np.arange(j0, j1 + 1), indexing="ij")
+        return ii.ravel(), jj.ravel()
+
+    @staticmethod
+    def _ring(ci: int, cj: int, r: int) -> Tuple[np.ndarray, np.ndarray]:
+        if r == 0:
+            return np.array([ci]), np.array([cj])
+        side = np.arange(-r, r + 1)
+        inner = side[1:-1]
+        return (
+            np.concatenate([ci + side, ci + side, np.full(inner.size, ci - r), np.full(inner.size, ci + r)]),
+            np.concatenate([np.full(side.size, cj - r), np.full(side.size, cj + r), cj + inner, cj + inner]),
+        )
+
+    # ------------------------------------------------------------- distances
+
+    def _filter(self, ids: np.ndarray, kinds: Optional[Sequence[str]]) -> np.ndarray:
+        if kinds is None or ids.size == 0:
+            return ids
+        return ids[np.isin(self.kinds[ids], [KINDS.index(kind) for kind in kinds])]
+
+    def _distances(self, ids: np.ndarray, x: float, y: float) -> np.ndarray:
+        """Meters from (x, y) to each feature's shape (0 inside)."""
+        d = np.empty(ids.size)
+        points = ids < self.n_points
+        p = ids[points]
+        d[points] = np.maximum(np.hypot(self.x[p] - x, self.y[p] - y) - self.radius[p], 0.0)
+        for slot in np.flatnonzero(~points):
+            zone = self.zones[ids[slot] - self.n_points]
+            if zone.contains(np.array([x]), np.array([y]))[0]:
+                d[slot] = 0.0
+            elif zone.polygon is None:
+                d[slot] = math.hypot(x - zone.center[0], y - zone.center[1]) - zone.radius_m
+            else:
+                d[slot] = polygon_edge_distances(np.array([x]), np.array([y]), zone.polygon)[0]
+        return d
+
+    def _ranked(self, ids: np.ndarray, d: np.ndarray) -> List[Tuple[float, Feature]]:
+        order = np.lexsort((ids, d))
+        return [(float(d[o]), self.features[ids[o]]) for o in order]
+
+    # --------------------------------------------------------------- queries
+
+    def nearest(self, lat: float, lon: float, k: int = 1, kinds: Optional[Sequence[str]] = None) -> List[Tuple[float, Feature]]:
+        """The k features closest to a point, as (distance_m, feature) nearest first."""
+        if k <= 0 or self._keys.size == 0:
+            return []
+        x, y = (float(v) for v in to_local_enu(lat, lon, *self.origin))
+        ci, cj = (int(v) for v in self._cell(x, y))
+        x0, y0, x1, y1 = self._extent
+        last = max(abs(ci - x0), abs(ci - x1), abs(cj - y0), abs(cj - y1))
+        first = max(x0 - ci, ci - x1, y0 - cj, cj - y1, 0)
+        seen = np.zeros(len(self.features), dtype=bool)
+        ids, d = np.empty(0, dtype=np.int64), np.empty(0)
+        for r in range(first, last + 1):
+            new = self._filter(self._gather(self._ring(ci, cj, r)), kinds)
+            new = new[~seen[new]]
+            seen[new] = True
+            ids, d = np.concatenate([ids, new]), np.concatenate([d, self._distances(new, x, y)])
+            # Everything within r cells of the query's cell has been seen
+            if np.count_nonzero(d <= r * self.cell_m) >= k:
+                break
+        return self._ranked(ids, d)[:k]
+
+    def within(self, lat: float, lon: float, radius_m: float, kinds: Optional[Sequence[str]] = None) -> List[Tuple[float, Feature]]:
+        """Features within radius_m of a point, as (distance_m, feature) nearest first."""
+        x, y = (float(v) for v in to_local_enu(lat, lon, *self.origin))
+        ids = self._filter(self._gather(self._box_cells(x - radius_m, y - radius_m, x + radius_m, y + radius_m)), kinds)
+        d = self._distances(ids, x, y)
+        keep = d <= radius_m
+        return self._ranked(ids[keep], d[keep])
+
+    def in_bbox(self, south: float, west: float, north: float, east: float, kinds: Optional[Sequence[str]] = None) -> List[Feature]:
+        """Features whose bounding box overlaps a lat/lon box, in map order."""
+        (xmin, xmax), (ymin, ymax) = to_local_enu(np.array([south, north]), np.array([west, east]), *self.origin)
+        ids = self._filter(self._gather(self._box_cells(xmin, ymin, xmax, ymax)), kinds)
+        box = self.bbox[ids]
+        keep = (box[:, 0] <= xmax) & (box[:, 2] >= xmin) & (box[:, 1] <= ymax) & (box[:, 3] >= ymin)
+        return [self.features[fid] for fid in ids[keep]]
+
+    def lookup(self, name: str, kinds: Optional[Sequence[str]] = None, fuzzy: bool = True) -> Optional[Feature]:
+        """Feature by name, ignoring case/accents/punctuation; close misspellings match too unless fuzzy=False."""
+        if self._names is None:
+            keys = getattr(self.features, "name_keys", None)
+            self._names = {}
+            for fid, key in enumerate(keys if keys is not None else (normalize_name(f.name) for f in self.features)):
+                self._names.setdefault(key, []).append(fid)
+
+        def matching(key: str) -> List[int]:
+            return [fid for fid in self._names.get(key, ()) if kinds is None or KINDS[self.kinds[fid]] in kinds]
+
+        found = matching(normalize_name(name))
+        if not found and fuzzy:
+            keys = [key for key in self._names if matching(key)]
+            close = difflib.get_close_matches(normalize_name(name), keys, n=1, cutoff=NAME_MATCH_CUTOFF)
+            found = matching(close[0]) if close else []
+        return self.features[found[0]] if found else None
+
+
+_INDEXES: Dict[str, SpatialIndex] = MapCache()
+
+
+def get_spatial_index(world_map: Dict[str, Any]) -> SpatialIndex:
+    """Index for a map, built once per distinct features/origin (cached by content hash)."""
+    key = map_key(world_map, ("points_of_interest", "obstacles", "boundaries", "starting_position"))
+    index = _INDEXES.get(key)
+    if index is None:
+        # Compiled maps ship their index prebuilt (mission_planner.map_compiler)
+        prebuilt = getattr(world_map, "spatial_index", None)
+        index = _INDEXES[key] = prebuilt() if prebuilt else SpatialIndex(world_map)
+    return index
@@ -0,0 +1,38 @@
+"""
+Storage - atomic writes of the planners' on-disk artifacts, and the per-user
+directories they default to (outside the source tree).
+
+Voxel grids (mission_planner.voxel_grid), compiled maps
+(mission_planner.map_compiler) and map tiles (mission_planner.map_tiles) are
+written to a temporary file in the target directory and renamed over the
+target, so concurrent readers see either the previous file or the complete
+new one, never a partial write.
+"""
+
+import os
+import tempfile
+from typing import BinaryIO, Callable
+
+APP_DIR_NAME = "olympe-web-server"
+# XDG base directory of each kind of per-user data: (environment variable, default under ~)
+_USER_BASE_DIRS = {"cache": ("XDG_CACHE_HOME", ".cache"), "data": ("XDG_DATA_HOME", os.path.join(".local", "share"))}
+
+
+def user_dir(name: str, kind: str = "cache") -> str:
+    """`<XDG base dir>/olympe-web-server/<name>`: ~/.cache for kind="cache", ~/.local/share for "data"."""
+    variable, default = _USER_BASE_DIRS[kind]
+    base = os.environ.get(variable) or os.path.join(os.path.expanduser("~"), default)
+    return os.path.join(base, APP_DIR_NAME, name)
+
+
+def write_atomic(path: str, write: Callable[[BinaryIO], None]) -> None:
+    """Write `path` atomically: write(f) fills a binary temp file renamed over it."""
+    directory = os.path.dirname(path)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
@@ -0,0 +1,211 @@
+"""
+Visit order optimizer - reorder POI inspections to shorten multi-target missions.
+
+The LLM emits `move_to` / `poi_inspection` pairs in whatever order it likes.
+Each poi_inspection together with the move_to segments leading to it forms an
+inspection group; consecutive groups (a "run", delimited by takeoff, RTH,
+land or stray move_to segments, which never move) are reordered to minimize
+the path length from the position preceding the run to the segment following
+it (home when the run is followed by return_to_home, open path otherwise).
+
+Distances come from one vectorized haversine matrix per run. Small runs are
+solved exactly (Held-Karp dynamic programming); larger ones with nearest
+neighbor + 2-opt. The original order is kept unless the new one is shorter.
+"""
+
+import itertools
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from geodesy import haversine_matrix
+
+# Runs up to this many groups are solved exactly (O(n^2 2^n))
+DEFAULT_EXACT_MAX_GROUPS = 8
+# Improvements below this are not worth reordering the operator's mission
+MIN_SAVING_M = 1.0
+
+Position = Tuple[float, float]
+
+
+def _position(segment: Dict[str, Any]) -> Optional[Position]:
+    try:
+        return float(segment["latitude"]), float(segment["longitude"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _path_length(dist: np.ndarray, path: Sequence[int]) -> float:
+    return float(sum(dist[a, b] for a, b in zip(path, path[1:])))
+
+
+def _solve_exact(dist: np.ndarray, n: int, end: Optional[int]) -> List[int]:
+    """Held-Karp over nodes 1..n, from node 0 to node `end` (open path if None)."""
+    # best[(mask, last)] = (length, previous node)
+    best: Dict[Tuple[int, int], Tuple[float, int]] = {}
+    for k in range(1, n + 1):
+        best[(1 << k, k)] = (float(dist[0, k]), 0)
+    for size in range(2, n + 1):
+        for subset in itertools.combinations(range(1, n + 1), size):
+            mask = sum(1 << k for k in subset)
+            for k in subset:
+                prev_mask = mask & ~(1 << k)
+                best[(mask, k)] = min(
+                    (best[(prev_mask, j)][0] + float(dist[j, k]), j) for j in subset if j != k
+                )
+    full = sum(1 << k for k in range(1, n + 1))
+    closing = (lambda k: float(dist[k, end])) if end is not None else (lambda k: 0.0)
+    last = min(range(1, n + 1), key=lambda k: best[(full, k)][0] + closing(k))
+    order = []
+    mask = full
+    while last != 0:
+        order.append(last)
+        mask, last = mask & ~(1 << last), best[(mask, last)][1]
+    return order[::-1]
+
+
+def _solve_heuristic(dist: np.ndarray, n: int, end: Optional[int]) -> List[int]:
+    """Nearest neighbor from node 0, then 2-opt until no improving reversal remains."""
+    remaining = set(range(1, n + 1))
+    order = []
+    current = 0
+    while remaining:
+        current = min(remaining, key=lambda k: dist[current, k])
+        order.append(current)
+        remaining.remove(current)
+
+    path = [0] + order + ([end] if end is not None else [])
+    last_movable = n  # path[1..n] are the groups
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, last_movable):
+            for j in range(i + 1, last_movable + 1):
+                a, b = path[i - 1], path[i]
+                c = path[j]
+                before = dist[a, b]
+                after = dist[a, c]
+                if j + 1 < len(path):
+                    d = path[j + 1]
+                    before += dist[c, d]
+                    after += dist[b, d]
+                if after < before - 1e-9:
+                    path[i:j + 1] = path[i:j + 1][::-1]
+                    improved = True
+    return path[1:n + 1]
+
+
+def _split(segments: List[Dict[str, Any]]) -> List[Any]:
+    """
+    Split segments into fixed segments and runs of inspection groups.
+    Returns a list whose items are either a segment dict (fixed) or a list of
+    groups (each group a list of segments ending with a poi_inspection).
+    """
+    items: List[Any] = []
+    pending: List[Dict[str, Any]] = []
+    for segment in segments:
+        seg_type = str(segment.get("type", "")).strip()
+        if seg_type == "move_to":
+            pending.append(segment)
+            continue
+        if seg_type == "poi_inspection" and _position(segment) is not None:
+            group = pending + [segment]
+            pending = []
+            if items and isinstance(items[-1], list):
+                items[-1].append(group)
+            else:
+                items.append([group])
+            continue
+        items.extend(pending)
+        pending = []
+        items.append(segment)
+    items.extend(pending)
+    return items
+
+
+def optimize_visit_order(
+    segments: List[Dict[str, Any]],
+    start_position: Optional[Position] = None,
+    exact_max_groups: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Reorder inspection groups to minimize the flown distance.
+
+    start_position (lat, lon) is where the drone takes off (and where
+    return_to_home goes back to). Returns (segments, report); the input list
+    is not modified. report["order"] lists the input indices of the
+    poi_inspection segments in visiting order (poi_name is often unset).
+    """
+    if exact_max_groups is None:
+        exact_max_groups = int(os.environ.get("VISIT_ORDER_EXACT_MAX", DEFAULT_EXACT_MAX_GROUPS))
+    items = _split(segments)
+    index = {id(segment): i for i, segment in enumerate(segments)}
+    result: List[Dict[str, Any]] = []
+    report: Dict[str, Any] = {"method": "none", "groups": 0, "original_m": 0.0, "optimized_m": 0.0}
+    methods = set()
+    position = start_position
+    for i, item in enumerate(items):
+        if not isinstance(item, list):
+            result.append(item)
+            position = _position(item) or position
+            if str(item.get("type", "")).strip() == "return_to_home":
+                position = start_position
+            continue
+        groups = item
+        report["groups"] += len(groups)
+        following = items[i + 1] if i + 1 < len(items) else None
+        end = None
+        if isinstance(following, dict):
+            if str(following.get("type", "")).strip() == "return_to_home":
+                end = start_position
+            else:
+                end = _position(following)
+        order = list(range(len(groups)))
+        if position is not None and len(groups) > 1:
+            points = [position] + [_position(group[-1]) for group in groups] + ([end] if end else [])
+            lats, lons = np.array(points).T
+            dist = haversine_matrix(lats, lons)
+            n = len(groups)
+            end_node = n + 1 if end else None
+            tail = [end_node] if end_node is not None else []
+            original = _path_length(dist, [0] + list(range(1, n + 1)) + tail)
+            if n <= exact_max_groups:
+                candidate, method = _solve_exact(dist, n, end_node), "exact"
+            else:
+                candidate, method = _solve_heuristic(dist, n, end_node), "nearest_neighbor_2opt"
+            optimized = _path_length(dist, [0] + candidate + tail)
+            methods.add(method)
+            if optimized < original - MIN_SAVING_M:
+                order = [k - 1 for k in candidate]
+            else:
+                optimized = original
+            report["original_m"] += original
+            report["optimized_m"] += optimized
+        for k in order:
+            result.extend(groups[k])
+        position = _position(groups[order[-1]][-1])
+
+    if methods:
+        report["method"] = "+".join(sorted(methods))
+    saved = report["original_m"] - report["optimized_m"]
+    report.update(
+        original_m=round(report["original_m"], 1),
+        optimized_m=round(report["optimized_m"], 1),
+        saved_m=round(saved, 1),
+        saved_percent=round(100.0 * saved / report["original_m"], 1) if report["original_m"] > 0 else 0.0,
+        order=[index[id(seg)] for seg in result if str(seg.get("type", "")).strip() == "poi_inspection"],
+        reordered=saved > 0.0,
+    )
+    return result, report
+
+
+def optimize_mission_visit_order(
+    mission_dsl: Dict[str, Any], start_position: Optional[Position] = None
+) -> Dict[str, Any]:
+    """Mission-level wrapper: returns a copy with reordered segments and the report under optimizations.visit_order."""
+    segments, report = optimize_visit_order(list(mission_dsl.get("segments") or []), start_position)
+    optimized = dict(mission_dsl)
+    optimized["segments"] = segments
+    optimized["optimizations"] = dict(mission_dsl.get("optimizations") or {}, visit_order=report)
+    return optimized
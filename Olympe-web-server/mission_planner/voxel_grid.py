@@ -0,0 +1,298 @@
+"""
+Voxel grid - the world map compiled into a bit-packed 3D occupancy grid.
+
+compile_voxel_grid() rasterizes the map once: obstacles (inflated by the
+clearance margin, mission_planner.clearance), no-fly/restricted zones within
+their altitude band, and everything outside the geofences or above their
+ceiling (mission_planner.geofence). A voxel is occupied when any point of it
+may be: shapes are also inflated by half a cell diagonal, and a voxel is
+occupied when its altitude interval overlaps the shape's band. Voxel (k, j, i)
+covers east [x0 + i*res, x0 + (i+1)*res), north likewise from y0, altitude
+[k*dz, (k+1)*dz) above the takeoff point; the grid spans the map's features
+plus padding, from the ground to the map's max altitude.
+
+Occupancy bits are packed along east (np.packbits, little bit order): 80 m x
+2 km x 2 km at 5 m x 1 m is 1.6 MB. get_voxel_grid() caches the packed array
+as `<map hash>.voxels.npy` (plus a JSON header) under VOXEL_CACHE_DIR
+(default: ~/.cache/olympe-web-server/map_cache) and memory-maps it, so a map is compiled once per content and resolution; set
+VOXEL_CACHE_DIR to an empty string to keep grids in memory only.
+
+Point queries are a byte load and a shift (O(1)); march() tests many legs at
+once by sampling them every quarter voxel. Points outside the grid count as
+occupied.
+
+Run `python -m mission_planner.voxel_grid [map.json]` to precompile a map.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from geodesy import to_local_enu
+from mission_planner.clearance import get_obstacle_field
+from mission_planner.geofence import get_geofence_engine
+from mission_planner.legs import MapCache, map_key, map_origin, polygon_edge_distances
+from mission_planner.storage import user_dir, write_atomic
+
+FORMAT_VERSION = 1
+DEFAULT_RESOLUTION_M = 5.0
+DEFAULT_VERTICAL_RESOLUTION_M = 1.0
+# Free space kept around the map's features so routes can go around the outermost ones
+GRID_PADDING_M = 100.0
+VOXEL_SUFFIX = ".voxels"
+_SQRT2 = math.sqrt(2.0)
+
+
+def default_cache_dir() -> Optional[str]:
+    """Cache directory from VOXEL_CACHE_DIR, None when caching is disabled."""
+    directory = os.environ.get("VOXEL_CACHE_DIR")
+    if directory is None:
+        return user_dir("map_cache")
+    return directory.strip() or None
+
+
+def _near(zone, px: np.ndarray, py: np.ndarray, distance: float) -> np.ndarray:
+    if zone.polygon is None:
+        return np.abs(np.hypot(px - zone.center[0], py - zone.center[1]) - zone.radius_m) < distance
+    return polygon_edge_distances(px, py, zone.polygon) < distance
+
+
+class VoxelGrid:
+    """Packed occupancy bits (nz, ny, ceil(nx / 8)) and the grid geometry."""
+
+    def __init__(self, bits: np.ndarray, header: Dict[str, Any]):
+        self.bits = bits
+        self.header = header
+        self.origin = tuple(header["origin"])
+        self.x0, self.y0 = header["x0"], header["y0"]
+        self.resolution_m = header["resolution_m"]
+        self.vertical_resolution_m = header["vertical_resolution_m"]
+        self.nx, self.ny, self.nz = header["nx"], header["ny"], header["nz"]
+        self._layers: Dict[int, np.ndarray] = {}
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.bits.nbytes)
+
+    def _index(self, x: np.ndarray, y: np.ndarray, z: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        i = np.floor((np.asarray(x, dtype=np.float64) - self.x0) / self.resolution_m).astype(np.int64)
+        j = np.floor((np.asarray(y, dtype=np.float64) - self.y0) / self.resolution_m).astype(np.int64)
+        k = np.floor(np.asarray(z, dtype=np.float64) / self.vertical_resolution_m).astype(np.int64)
+        inside = (i >= 0) & (i < self.nx) & (j >= 0) & (j < self.ny) & (k >= 0) & (k < self.nz)
+        return np.where(inside, i, 0), np.where(inside, j, 0), np.where(inside, k, 0), inside
+
+    def occupied_enu(self, x: Any, y: Any, z: Any) -> np.ndarray:
+        """Occupancy of points in local ENU meters (vectorized; outside the grid is occupied)."""
+        i, j, k, inside = self._index(x, y, z)
+        bit = (self.bits[k, j, i >> 3] >> (i & 7).astype(np.uint8)) & 1
+        return ~inside | (bit == 1)
+
+    def occupied(self, lat: float, lon: float, altitude: float) -> bool:
+        """Occupancy of one GPS point (altitude above takeoff)."""
+        x, y = to_local_enu(lat, lon, *self.origin)
+        return bool(self.occupied_enu(x, y, altitude))
+
+    def layer(self, altitude: float) -> np.ndarray:
+        """Unpacked occupancy (ny, nx) of the voxel layer containing altitude (cached)."""
+        k = int(math.floor(altitude / self.vertical_resolution_m + 1e-9))
+        if not 0 <= k < self.nz:
+            return np.ones((self.ny, self.nx), dtype=bool)
+        if k not in self._layers:
+            self._layers[k] = np.unpackbits(self.bits[k], axis=-1, count=self.nx, bitorder="little").astype(bool)
+        return self._layers[k]
+
+    def march(self, a3: np.ndarray, b3: np.ndarray) -> np.ndarray:
+        """
+        First occupied point along each leg a3 -> b3 (M, 3), as the leg
+        parameter t (NaN when the leg is free), sampled every quarter voxel.
+        """
+        a3, b3 = np.atleast_2d(a3).astype(np.float64), np.atleast_2d(b3).astype(np.float64)
+        d = b3 - a3
+        cells = np.abs(d) / np.array([self.resolution_m, self.resolution_m, self.vertical_resolution_m])
+        steps = np.maximum(np.ceil(cells.max(axis=1) * 4.0).astype(np.int64), 1)
+        leg = np.repeat(np.arange(len(a3)), steps + 1)
+        start = np.repeat(np.cumsum(steps + 1) - (steps + 1), steps + 1)
+        t = (np.arange(len(leg)) - start) / steps[leg]
+        points = a3[leg] + t[:, None] * d[leg]
+        hit = self.occupied_enu(points[:, 0], points[:, 1], points[:, 2])
+        first = np.full(len(a3), np.nan)
+        hit_legs, hit_t = leg[hit], t[hit]
+        # Samples are in leg order then t order: the first hit of a leg comes first
+        unique, where = np.unique(hit_legs, return_index=True)
+        first[unique] = hit_t[where]
+        return first
+
+
+def _extent(world_map: Dict[str, Any], origin: Tuple[float, float], field, engine) -> np.ndarray:
+    boxes: List[Tuple[float, float, float, float]] = [(0.0, 0.0, 0.0, 0.0)]
+    boxes.extend(tuple(box) for box in field.bbox)
+    boxes.extend(zone.bbox for zone in engine.zones + engine.geofences)
+    for poi in world_map.get("points_of_interest") or []:
+        coords = poi.get("coordinates") or {}
+        if "latitude" in coords and "longitude" in coords:
+            x, y = to_local_enu(float(coords["latitude"]), float(coords["longitude"]), *origin)
+            boxes.append((float(x), float(y), float(x), float(y)))
+    return np.asarray(boxes, dtype=np.float64)
+
+
+def _band_layers(bottom: float, top: float, dz: float, nz: int) -> slice:
+    """Voxel layers whose altitude interval overlaps [bottom, top)."""
+    k0 = int(math.floor(max(bottom, 0.0) / dz))
+    k1 = min(int(math.ceil(top / dz)) if math.isfinite(top) else nz, nz)
+    return slice(k0, max(k0, k1))
+
+
+def compile_voxel_grid(
+    world_map: Dict[str, Any],
+    resolution_m: Optional[float] = None,
+    vertical_resolution_m: Optional[float] = None,
+) -> VoxelGrid:
+    """Rasterize a map's obstacles and boundaries into an in-memory VoxelGrid."""
+    t0 = time.perf_counter_ns()
+    res, dz = _resolutions(resolution_m, vertical_resolution_m)
+    origin = map_origin(world_map)
+    field = get_obstacle_field(world_map)
+    engine = get_geofence_engine(world_map)
+    boxes = _extent(world_map, origin, field, engine)
+    x0 = float(boxes[:, 0].min() - GRID_PADDING_M)
+    y0 = float(boxes[:, 1].min() - GRID_PADDING_M)
+    nx = int(math.ceil((boxes[:, 2].max() + GRID_PADDING_M - x0) / res))
+    ny = int(math.ceil((boxes[:, 3].max() + GRID_PADDING_M - y0) / res))
+    nz = int(math.ceil(engine.default_max_altitude_m / dz)) + 1
+    cx = x0 + (np.arange(nx) + 0.5) * res
+    cy = y0 + (np.arange(ny) + 0.5) * res
+    pad = res * _SQRT2 / 2.0
+    occupied = np.zeros((nz, ny, nx), dtype=bool)
+
+    def window(bbox) -> Tuple[slice, slice]:
+        i0, i1 = max(int((bbox[0] - pad - x0) // res), 0), min(int((bbox[2] + pad - x0) // res) + 1, nx)
+        j0, j1 = max(int((bbox[1] - pad - y0) // res), 0), min(int((bbox[3] + pad - y0) // res) + 1, ny)
+        return slice(j0, max(j0, j1)), slice(i0, max(i0, i1))
+
+    for k in range(len(field)):
+        rows, cols = window(field.bbox[k])
+        gx, gy = np.meshgrid(cx[cols] - field.x[k], cy[rows] - field.y[k])
+        if field.is_box[k]:
+            u = gx * field.cos[k] - gy * field.sin[k]
+            v = gx * field.sin[k] + gy * field.cos[k]
+            footprint = (np.abs(u) < field.half_x[k] + pad) & (np.abs(v) < field.half_y[k] + pad)
+        else:
+            footprint = np.hypot(gx, gy) < field.half_x[k] + pad
+        occupied[_band_layers(field.bottom[k], field.top[k], dz, nz), rows, cols] |= footprint
+    for zone in engine.zones:
+        rows, cols = window(zone.bbox)
+        gx, gy = (a.ravel() for a in np.meshgrid(cx[cols], cy[rows]))
+        shape = (rows.stop - rows.start, cols.stop - cols.start)
+        footprint = (zone.contains(gx, gy) | _near(zone, gx, gy, pad)).reshape(shape)
+        occupied[_band_layers(zone.min_altitude_m, zone.max_altitude_m, dz, nz), rows, cols] |= footprint
+    if engine.geofences:
+        gx, gy = (a.ravel() for a in np.meshgrid(cx, cy))
+        allowed = np.zeros((nz, ny * nx), dtype=bool)
+        for zone in engine.geofences:
+            inside = zone.contains(gx, gy) & ~_near(zone, gx, gy, pad)
+            # Only layers entirely below the ceiling are allowed
+            top = int(math.floor(zone.max_altitude_m / dz)) if math.isfinite(zone.max_altitude_m) else nz
+            allowed[:max(0, min(top, nz))] |= inside
+        occupied |= ~allowed.reshape(occupied.shape)
+    bits = np.packbits(occupied, axis=-1, bitorder="little")
+    header = {
+        "version": FORMAT_VERSION,
+        "origin": list(origin),
+        "x0": x0,
+        "y0": y0,
+        "resolution_m": res,
+        "vertical_resolution_m": dz,
+        "nx": nx,
+        "ny": ny,
+        "nz": nz,
+        "occupied_voxels": int(occupied.sum()),
+        "compile_ms": round((time.perf_counter_ns() - t0) / 1e6, 1),
+    }
+    return VoxelGrid(bits, header)
+
+
+def _resolutions(resolution_m: Optional[float], vertical_resolution_m: Optional[float]) -> Tuple[float, float]:
+    res = float(resolution_m if resolution_m is not None else os.environ.get("VOXEL_RESOLUTION_M", DEFAULT_RESOLUTION_M))
+    dz = float(
+        vertical_resolution_m if vertical_resolution_m is not None
+        else os.environ.get("VOXEL_VERTICAL_RESOLUTION_M", DEFAULT_VERTICAL_RESOLUTION_M)
+    )
+    return res, dz
+
+
+def map_hash(world_map: Dict[str, Any], resolution_m: Optional[float] = None, vertical_resolution_m: Optional[float] = None) -> str:
+    """Content hash of a map and everything its grid depends on (margins, resolutions, format)."""
+    res, dz = _resolutions(resolution_m, vertical_resolution_m)
+    return map_key(
+        world_map,
+        ("obstacles", "boundaries", "points_of_interest", "starting_position", "default_max_altitude_meters"),
+        FORMAT_VERSION, res, dz, [os.environ.get(name) for name in ("CLEARANCE_MARGIN_M",)],
+    )
+
+
+def save_voxel_grid(grid: VoxelGrid, path: str) -> None:
+    """Write `<path>.npy` (packed bits) then `<path>.json` (header), each atomically."""
+    write_atomic(path + ".npy", lambda f: np.save(f, np.ascontiguousarray(grid.bits)))
+    write_atomic(path + ".json", lambda f: f.write(json.dumps(grid.header, indent=2).encode("utf-8")))
+
+
+def load_voxel_grid(path: str) -> Optional[VoxelGrid]:
+    """Memory-map a saved grid, None when missing, partial or of another format version."""
+    try:
+        with open(path + ".json", "r", encoding="utf-8") as f:
+            header = json.load(f)
+        if header.get("version") != FORMAT_VERSION:
+            return None
+        bits = np.load(path + ".npy", mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if bits.shape != (header["nz"], header["ny"], (header["nx"] + 7) // 8):
+        return None
+    return VoxelGrid(bits, header)
+
+
+_GRIDS: Dict[str, VoxelGrid] = MapCache()
+
+
+def get_voxel_grid(world_map: Dict[str, Any], cache_dir: Optional[str] = "") -> VoxelGrid:
+    """
+    Grid of a map: from memory, else memory-mapped from the cache directory
+    (VOXEL_CACHE_DIR by default), else compiled and saved there.
+    """
+    key = map_hash(world_map)
+    grid = _GRIDS.get(key)
+    if grid is not None:
+        return grid
+    directory = default_cache_dir() if cache_dir == "" else cache_dir
+    path = os.path.join(directory, key + VOXEL_SUFFIX) if directory else None
+    grid = load_voxel_grid(path) if path else None
+    if grid is None:
+        grid = compile_voxel_grid(world_map)
+        if path:
+            os.makedirs(directory, exist_ok=True)
+            save_voxel_grid(grid, path)
+            grid = load_voxel_grid(path) or grid
+    _GRIDS[key] = grid
+    return grid
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compile a world map into its cached voxel grid")
+    default_map = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "maps", "industrial_city.json")
+    parser.add_argument("map", nargs="?", default=default_map, help="World map JSON")
+    args = parser.parse_args(argv)
+    with open(args.map, "r", encoding="utf-8") as f:
+        world_map = json.load(f)
+    grid = get_voxel_grid(world_map)
+    print(json.dumps({"hash": map_hash(world_map), "bytes": grid.nbytes, "cache_dir": default_cache_dir(), **grid.header}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
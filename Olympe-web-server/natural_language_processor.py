@@ -4,8 +4,12 @@ import json
 import os
 import logging
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Mapping, Optional
 from api_clients.mistral_socket import get_mistral_socket
+from geodesy import haversine_m
+from mission_planner.legs import map_origin
+from mission_planner.map_compiler import load_map
+from mission_planner.spatial_index import SpatialIndex, get_spatial_index
 
 logger = logging.getLogger(__name__)
 
@@ -30,13 +34,13 @@ class NaturalLanguageProcessor:
 			poi_file_path = repo_root / "maps" / "industrial_city.json"
 		
 		self.poi_data = self._load_poi_data(str(poi_file_path))
+		self.spatial_index = self._build_spatial_index()
 		self.system_prompt = self._build_system_prompt()
 	
-	def _load_poi_data(self, file_path: str) -> Dict[str, Any]:
-		"""Load points of interest from JSON file."""
+	def _load_poi_data(self, file_path: str) -> Mapping[str, Any]:
+		"""Load the map from its JSON file, memory-mapped from its compiled form (mission_planner.map_compiler)."""
 		try:
-			with open(file_path, 'r', encoding='utf-8') as f:
-				return json.load(f)
+			return load_map(file_path)
 		except FileNotFoundError:
 			logger.error(f"POI file not found: {file_path}")
 			return {}
@@ -44,6 +48,16 @@ class NaturalLanguageProcessor:
 			logger.error(f"Invalid JSON in POI file: {file_path}")
 			return {}
 	
+	def _build_spatial_index(self) -> Optional[SpatialIndex]:
+		"""Spatial index over the map features (POI lookups by name and distance), None if the map is unusable."""
+		if not self.poi_data:
+			return None
+		try:
+			return get_spatial_index(self.poi_data)
+		except (KeyError, TypeError, ValueError) as e:
+			logger.error(f"Cannot index map features: {e}")
+			return None
+	
 	def _build_system_prompt(self) -> str:
 		"""Build the system prompt with POI information and available actions."""
 		poi_list = self._format_poi_list()
@@ -53,7 +67,7 @@ class NaturalLanguageProcessor:
 Actions (use ONLY these):
 - takeoff: {"type":"takeoff","constraints":{"maxWaitSec":20}}
 - move_to: {"type":"move_to","latitude":48.88,"longitude":2.37,"altitude":30,"max_horizontal_speed":15,"max_vertical_speed":2,"max_yaw_rotation_speed":1}
-- poi_inspection: {"type":"poi_inspection","poi_name":"NAME","latitude":LAT,"longitude":LON,"altitude":30,"rotation_duration":30,"roll_rate":50,"offset_distance":15}
+- poi_inspection: {"type":"poi_inspection","poi_name":"NAME","latitude":LAT,"longitude":LON,"altitude":30,"orbit_radius":15,"sweep_angle":360,"ground_speed":3}
 - return_to_home: {"type":"return_to_home"}
 - land: {"type":"land"}
 
@@ -77,6 +91,7 @@ Rules:
 9. For optimal POI inspection, position drone at 30m altitude with good viewing angle
 10. IMPORTANT: Respect user's request exactly - if they say "a building" (singular), visit ONLY ONE POI, not all
 11. If user says "all" or "buildings" (plural), visit all POIs. Otherwise select ONE appropriate POI
+12. POIs are listed nearest first from the takeoff point: "the nearest" one is the first that fits the request
 """
 		
 		return system_prompt
@@ -88,14 +103,72 @@ Rules:
 		if not self.poi_data or "points_of_interest" not in self.poi_data:
 			return "No points of interest available."
 		
-		for poi in self.poi_data["points_of_interest"]:
+		pois = [(None, poi) for poi in self.poi_data["points_of_interest"]]
+		if self.spatial_index is not None:
+			# Nearest first, capped so huge maps keep a bounded prompt
+			max_pois = int(os.getenv("NLP_PROMPT_MAX_POIS", "50"))
+			ranked = self.spatial_index.nearest(*map_origin(self.poi_data), k=max_pois, kinds=("poi",))
+			pois = [(distance, feature.data) for distance, feature in ranked]
+		
+		for distance, poi in pois:
 			poi_list += f"\n- {poi.get('name', 'Unknown')}: {poi.get('description', 'No description')}"
 			if "coordinates" in poi:
 				coords = poi["coordinates"]
 				poi_list += f" (Latitude: {coords.get('latitude')}, Longitude: {coords.get('longitude')}, Altitude: {coords.get('altitude_meters')}m)"
+			if distance is not None:
+				poi_list += f" [{distance:.0f}m from takeoff]"
 		
 		return poi_list
 	
+	def _resolve_pois(self, mission_dsl: Dict[str, Any]) -> Dict[str, Any]:
+		"""
+		Snap poi_inspection segments to the map's POIs: by exact name (case,
+		accents and punctuation ignored), else the POI nearest to the segment's
+		coordinates within POI_SNAP_RADIUS_M. A misspelled name is only trusted
+		when that nearest POI is the one it matches; a close name far from the
+		segment is rejected (ValueError) rather than moving the inspection.
+		The map's name and coordinates replace the model's, on the segment and
+		on the move_to leading to it.
+		"""
+		if self.spatial_index is None:
+			return mission_dsl
+		snap_radius = float(os.getenv("POI_SNAP_RADIUS_M", "30"))
+		segments = mission_dsl.get("segments") or []
+		for idx, segment in enumerate(segments):
+			if not isinstance(segment, dict) or segment.get("type") != "poi_inspection":
+				continue
+			name = str(segment.get("poi_name", ""))
+			position = None
+			try:
+				position = (float(segment["latitude"]), float(segment["longitude"]))
+			except (KeyError, TypeError, ValueError):
+				pass
+			feature = self.spatial_index.lookup(name, kinds=("poi",), fuzzy=False)
+			if feature is None:
+				near = self.spatial_index.within(*position, snap_radius, kinds=("poi",)) if position else []
+				feature = near[0][1] if near else None
+				named = self.spatial_index.lookup(name, kinds=("poi",)) if name else None
+				if named is not None and (feature is None or named.name != feature.name):
+					raise ValueError(
+						f"poi_inspection target '{name}' resembles map POI '{named.name}' "
+						f"but is not within {snap_radius:.0f}m of it"
+					)
+			if feature is None:
+				logger.warning(f"poi_inspection target not found in map: {segment.get('poi_name')}")
+				continue
+			if segment.get("poi_name") != feature.name:
+				logger.info(f"poi_inspection target '{segment.get('poi_name')}' resolved to map POI '{feature.name}'")
+			leading = segments[idx - 1] if idx > 0 else None
+			if position and isinstance(leading, dict) and leading.get("type") == "move_to":
+				try:
+					at_target = haversine_m(float(leading["latitude"]), float(leading["longitude"]), *position) <= snap_radius
+				except (KeyError, TypeError, ValueError):
+					at_target = False
+				if at_target:
+					leading.update(latitude=feature.latitude, longitude=feature.longitude)
+			segment.update(poi_name=feature.name, latitude=feature.latitude, longitude=feature.longitude)
+		return mission_dsl
+	
 	async def process_user_message(self, user_message: str) -> Dict[str, Any]:
 		"""
 		Process a user message and return a drone mission DSL.
@@ -203,7 +276,7 @@ Rules:
 			# Parse the JSON response
 			try:
 				normalized = self._extract_json_from_text(response_text)
-				mission_dsl = json.loads(normalized)
+				mission_dsl = self._resolve_pois(json.loads(normalized))
 				logger.info(f"Successfully parsed mission DSL")
 				
 				# Add the understanding to the mission DSL
@@ -0,0 +1,117 @@
+"""
+Fixed-rate control loop - drift-free periodic scheduling for command streams.
+
+Piloting commands such as PCMD must be sent at a steady rate. Sleeping a fixed
+period after each send lets command latency, GIL contention and sleep
+overshoot accumulate, so the real rate silently drops. This loop schedules
+every tick against an absolute deadline (start + k * period) instead, and
+records jitter/overrun statistics so the achieved rate can be reported.
+"""
+
+import math
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class FixedRateLoop:
+    """
+    Run a callback at a fixed rate using absolute deadlines.
+
+    The tick callback receives the tick index and may return False to stop
+    the loop early. When a tick overruns by more than a whole period, the
+    missed deadlines are skipped (counted as overruns) rather than replayed
+    in a burst.
+    """
+
+    def __init__(
+        self,
+        rate_hz: float,
+        clock: Callable[[], float] = time.perf_counter,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate_hz <= 0:
+            raise ValueError(f"rate_hz must be > 0 (got {rate_hz})")
+        self.rate_hz = float(rate_hz)
+        self.period = 1.0 / self.rate_hz
+        self._clock = clock
+        self._sleep = sleep
+
+    def run(
+        self,
+        tick: Callable[[int], Optional[bool]],
+        max_ticks: Optional[int] = None,
+        duration_sec: Optional[float] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run ticks until max_ticks / duration_sec is reached, tick() returns
+        False, or should_stop() returns True.
+        Returns loop statistics (see _stats).
+        """
+        if max_ticks is None and duration_sec is None and should_stop is None:
+            raise ValueError("FixedRateLoop.run needs max_ticks, duration_sec or should_stop")
+        period = self.period
+        clock = self._clock
+        start = clock()
+        end = start + duration_sec if duration_sec is not None else math.inf
+        next_deadline = start
+        ticks = 0
+        overruns = 0
+        max_jitter = 0.0
+        jitter_sum = 0.0
+        first_tick_ts = last_tick_ts = start
+        while True:
+            if max_ticks is not None and ticks >= max_ticks:
+                break
+            if next_deadline >= end:
+                break
+            if should_stop is not None and should_stop():
+                break
+            now = clock()
+            delay = next_deadline - now
+            if delay > 0:
+                self._sleep(delay)
+                now = clock()
+            # Lateness of this tick relative to its scheduled deadline
+            jitter = max(0.0, now - next_deadline)
+            jitter_sum += jitter
+            if jitter > max_jitter:
+                max_jitter = jitter
+            if ticks == 0:
+                first_tick_ts = now
+            last_tick_ts = now
+            keep_going = tick(ticks)
+            ticks += 1
+            if keep_going is False:
+                break
+            next_deadline += period
+            now = clock()
+            if now - next_deadline > period:
+                # Tick ran past one or more deadlines: resynchronize on the grid
+                missed = int((now - next_deadline) // period)
+                overruns += missed
+                next_deadline += missed * period
+        elapsed = clock() - start
+        span = last_tick_ts - first_tick_ts
+        return self._stats(ticks, elapsed, span, max_jitter, jitter_sum, overruns)
+
+    def _stats(
+        self,
+        ticks: int,
+        elapsed: float,
+        span: float,
+        max_jitter: float,
+        jitter_sum: float,
+        overruns: int,
+    ) -> Dict[str, Any]:
+        # Achieved rate is measured between the first and last tick
+        achieved = (ticks - 1) / span if ticks > 1 and span > 0 else 0.0
+        return {
+            "target_rate_hz": round(self.rate_hz, 3),
+            "achieved_rate_hz": round(achieved, 3),
+            "ticks": ticks,
+            "duration_sec": round(elapsed, 4),
+            "max_jitter_ms": round(max_jitter * 1000.0, 3),
+            "mean_jitter_ms": round((jitter_sum / ticks) * 1000.0, 3) if ticks else 0.0,
+            "overruns": overruns,
+        }
@@ -0,0 +1,620 @@
+"""
+Simulated Drone - pure-Python kinematic stand-in for the Olympe calls used by the executor.
+
+Selected with DRONE_BACKEND=sim. Implements connect/disconnect, get_state and
+the `drone(message).wait(_timeout=...)` expectation protocol for TakeOff,
+extended_move_to, PCMD, piloted POI, RTH, Landing, Mavlink flight plans and
+the state messages the executor waits on (FlyingStateChanged, PositionChanged,
+rth.state, MavlinkFilePlayingStateChanged, ...). drone.subscribe() delivers
+the state events a real drone streams (position, speed, altitude, attitude
+at EVENT_RATE_HZ; battery and flying state on change).
+
+Time is virtual: every sleep/wait advances a SimClock, which integrates the
+kinematic model. SIM_TIME_FACTOR scales virtual time against wall time
+(e.g. 10 = ten times faster than real time); 0 (default) never sleeps for
+real, so a full mission runs in milliseconds - suitable for CI and for
+benchmarking executor changes.
+"""
+
+import itertools
+import math
+import os
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from geodesy import EARTH_RADIUS_M, bearing_deg, haversine_m
+
+# Industrial City starting position (maps/industrial_city.json)
+DEFAULT_HOME = (48.87991994804089, 2.369160096117185)
+
+TAKEOFF_ALTITUDE_M = 1.0
+TAKEOFF_SPEED_MPS = 1.0
+LANDING_SPEED_MPS = 0.7
+ACCELERATION_MPS2 = 3.0
+# Ground speed at 100% roll/pitch, matches the orbit planner default
+FULL_TILT_SPEED_MPS = 12.0
+MAX_YAW_RATE_DPS = 90.0
+PCMD_WATCHDOG_SEC = 0.5
+RTH_SPEED_MPS = 10.0
+RTH_MIN_ALTITUDE_M = 30.0
+ARRIVAL_TOLERANCE_M = 0.5
+# Battery model (% per second): hover base drain + drag term on ground speed
+BATTERY_HOVER_DRAIN = 0.035
+BATTERY_SPEED_DRAIN = 0.004
+INTEGRATION_STEP_SEC = 0.05
+WAIT_STEP_SEC = 0.1
+# Rate of the periodic state events (PositionChanged, SpeedChanged, ...)
+EVENT_RATE_HZ = 5.0
+
+_SUCCESS = "success"
+_PENDING = "pending"
+_FAILED = "failed"
+
+
+class SimClock:
+    """
+    Virtual clock shared by a simulated drone and the executor.
+    sleep(dt) advances virtual time (integrating the model); with
+    time_factor > 0 it also sleeps dt / time_factor of wall time.
+    """
+
+    def __init__(self, time_factor: float = 0.0, start: Optional[float] = None):
+        self.time_factor = float(time_factor)
+        self._now = time.time() if start is None else float(start)
+        self._listeners: List[Callable[[float], None]] = []
+
+    def add_listener(self, listener: Callable[[float], None]) -> None:
+        self._listeners.append(listener)
+
+    def time(self) -> float:
+        return self._now
+
+    perf_counter = time
+    monotonic = time
+
+    def sleep(self, dt: float) -> None:
+        if dt <= 0:
+            return
+        if self.time_factor > 0:
+            time.sleep(dt / self.time_factor)
+        remaining = dt
+        while remaining > 1e-9:
+            step = min(INTEGRATION_STEP_SEC, remaining)
+            self._now += step
+            remaining -= step
+            for listener in self._listeners:
+                listener(step)
+
+
+class SimMessage:
+    """Olympe-like message: positional or keyword arguments, plus `_`-prefixed expectation options."""
+
+    name = "message"
+    fields: Tuple[str, ...] = ()
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self.args: Dict[str, Any] = dict(zip(self.fields, args))
+        self.options: Dict[str, Any] = {}
+        for key, value in kwargs.items():
+            if key.startswith("_"):
+                self.options[key] = value
+            else:
+                self.args[key] = value
+
+    def __repr__(self) -> str:
+        return f"{self.name}({self.args})"
+
+
+def _message(name: str, *fields: str) -> type:
+    return type(name, (SimMessage,), {"name": name, "fields": fields})
+
+
+TakeOff = _message("TakeOff")
+Landing = _message("Landing")
+NavigateHome = _message("NavigateHome", "start")
+StartPilotedPOIV2 = _message("StartPilotedPOIV2", "latitude", "longitude", "altitude", "mode")
+StopPilotedPOI = _message("StopPilotedPOI")
+PCMD = _message("PCMD", "flag", "roll", "pitch", "yaw", "gaz", "timestampAndSeqNum")
+FlyingStateChanged = _message("FlyingStateChanged", "state")
+PilotedPOI = _message("PilotedPOI", "latitude", "longitude", "altitude", "status")
+PositionChanged = _message("PositionChanged", "latitude", "longitude", "altitude")
+SpeedChanged = _message("SpeedChanged", "speedX", "speedY", "speedZ")
+AltitudeChanged = _message("AltitudeChanged", "altitude")
+AttitudeChanged = _message("AttitudeChanged", "roll", "pitch", "yaw")
+BatteryStateChanged = _message("BatteryStateChanged", "percent")
+extended_move_to = _message(
+    "extended_move_to",
+    "latitude", "longitude", "altitude", "orientation_mode", "heading",
+    "max_horizontal_speed", "max_vertical_speed", "max_yaw_rotation_speed",
+)
+set_mode = _message("set_mode", "mode")
+MavlinkStart = _message("MavlinkStart", "filepath", "type")
+MavlinkStop = _message("MavlinkStop")
+MavlinkFilePlayingStateChanged = _message("MavlinkFilePlayingStateChanged", "filepath", "state", "type")
+rth = SimpleNamespace(
+    set_ending_behavior=_message("set_ending_behavior", "ending_behavior"),
+    return_to_home=_message("return_to_home", "start"),
+    state=_message("state", "state", "reason"),
+)
+oa_mode = SimpleNamespace(disabled="disabled", standard="standard")
+
+
+class SimExpectation:
+    """Result of `drone(message)`: mirrors the Olympe expectation methods used by the executor."""
+
+    def __init__(self, drone: "SimulatedDrone", message: SimMessage, poll: Callable[[], str]):
+        self._drone = drone
+        self._message = message
+        self._poll = poll
+        self._status = _PENDING
+        self._timedout = False
+
+    def _update(self) -> str:
+        if self._status == _PENDING:
+            self._status = self._poll()
+        return self._status
+
+    def wait(self, _timeout: Optional[float] = None) -> "SimExpectation":
+        clock = self._drone.clock
+        timeout = _timeout if _timeout is not None else self._message.options.get("_timeout", 10.0)
+        deadline = clock.time() + float(timeout)
+        while self._update() == _PENDING:
+            remaining = deadline - clock.time()
+            if remaining <= 0:
+                self._timedout = True
+                break
+            clock.sleep(min(WAIT_STEP_SEC, remaining))
+        return self
+
+    def done(self) -> bool:
+        return self._update() != _PENDING
+
+    def success(self) -> bool:
+        return self._update() == _SUCCESS
+
+    def timedout(self) -> bool:
+        return self._timedout
+
+    def explain(self) -> str:
+        if self._status == _FAILED:
+            return f"{self._message!r} failed"
+        if self._timedout:
+            return f"{self._message!r} timed out"
+        return f"{self._message!r} {self._status}"
+
+    def __bool__(self) -> bool:
+        return self.success()
+
+
+class SimulatedDrone:
+    """Kinematic point-mass drone with flying-state, RTH and flight plan logic."""
+
+    def __init__(
+        self,
+        ip: str,
+        clock: SimClock,
+        home: Tuple[float, float] = DEFAULT_HOME,
+        battery_percent: float = 100.0,
+        flight_plans: Optional[Dict[str, str]] = None,
+    ):
+        self.ip = ip
+        self.clock = clock
+        self.home = home
+        self.lat, self.lon = home
+        self.alt = 0.0
+        self.v_east = self.v_north = self.v_up = 0.0
+        self.heading = 0.0
+        self.battery = float(battery_percent)
+        self.flying_state = "landed"
+        self.connected = False
+        self.command_log: List[Tuple[float, str]] = []
+        self._flight_plans = flight_plans if flight_plans is not None else {}
+        self._move: Optional[Dict[str, Any]] = None
+        self._pcmd: Optional[Tuple[float, float, float, float, float]] = None
+        self._poi: Optional[Tuple[float, float, float]] = None
+        self._rth_state = {"state": "available", "reason": "none"}
+        self._rth_ending = "landing"
+        self._mavlink_state = "stopped"
+        self._plan_items: List[List[float]] = []
+        self._plan_step: Optional[Dict[str, Any]] = None
+        self._plan_speed = 10.0
+        self._subscribers: List[Callable[..., None]] = []
+        self._next_event = clock.time()
+        self._published: Dict[str, Any] = {}
+        clock.add_listener(self._advance)
+
+    # ------------------------------------------------------------------
+    # Olympe Drone API
+    # ------------------------------------------------------------------
+
+    def connect(self, **_kwargs: Any) -> bool:
+        self.connected = True
+        return True
+
+    def disconnect(self) -> bool:
+        self.connected = False
+        return True
+
+    def subscribe(self, callback: Callable[..., None]) -> Callable[..., None]:
+        """Olympe-like event subscription: callback(event, controller) with event.message / event.args."""
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, subscriber: Callable[..., None]) -> None:
+        self._subscribers.remove(subscriber)
+
+    def get_state(self, message_type: type) -> Dict[str, Any]:
+        name = message_type.name
+        if name == "FlyingStateChanged":
+            return {"state": self.flying_state}
+        if name == "PositionChanged":
+            return {"latitude": self.lat, "longitude": self.lon, "altitude": self.alt}
+        if name == "AltitudeChanged":
+            return {"altitude": self.alt}
+        if name == "AttitudeChanged":
+            return {"roll": 0.0, "pitch": 0.0, "yaw": math.radians(self.heading)}
+        if name == "SpeedChanged":
+            # Olympe convention: NED frame
+            return {"speedX": self.v_north, "speedY": self.v_east, "speedZ": -self.v_up}
+        if name == "BatteryStateChanged":
+            return {"percent": int(self.battery)}
+        if name == "PilotedPOI":
+            if self._poi is None:
+                return {"latitude": 0.0, "longitude": 0.0, "altitude": 0.0, "status": "AVAILABLE"}
+            return {"latitude": self._poi[0], "longitude": self._poi[1], "altitude": self._poi[2], "status": "RUNNING"}
+        if name == "state":
+            return dict(self._rth_state)
+        if name == "MavlinkFilePlayingStateChanged":
+            return {"state": self._mavlink_state}
+        raise KeyError(f"State {name} not available in simulator")
+
+    def __call__(self, message: SimMessage) -> SimExpectation:
+        self.command_log.append((self.clock.time(), message.name))
+        handler = getattr(self, f"_on_{message.name}", None)
+        if handler is None:
+            raise KeyError(f"Message {message.name} not supported by simulator")
+        return SimExpectation(self, message, handler(message))
+
+    # ------------------------------------------------------------------
+    # Message handlers: each returns a poll function for the expectation
+    # ------------------------------------------------------------------
+
+    def _state_matches(self, message: SimMessage, state: Dict[str, Any]) -> Callable[[], str]:
+        if message.options.get("_policy") == "check":
+            return lambda: _SUCCESS
+        expected = message.args
+        return lambda: _SUCCESS if all(state().get(k) == v for k, v in expected.items()) else _PENDING
+
+    def _on_FlyingStateChanged(self, message: SimMessage) -> Callable[[], str]:
+        return self._state_matches(message, lambda: {"state": self.flying_state})
+
+    def _on_state(self, message: SimMessage) -> Callable[[], str]:
+        return self._state_matches(message, lambda: self._rth_state)
+
+    def _on_MavlinkFilePlayingStateChanged(self, message: SimMessage) -> Callable[[], str]:
+        return self._state_matches(message, lambda: {"state": self._mavlink_state})
+
+    def _on_set_mode(self, message: SimMessage) -> Callable[[], str]:
+        return lambda: _SUCCESS
+
+    def _on_TakeOff(self, message: SimMessage) -> Callable[[], str]:
+        if self.flying_state != "landed":
+            return lambda: _FAILED
+        self.flying_state = "takingoff"
+        return lambda: _SUCCESS
+
+    def _on_Landing(self, message: SimMessage) -> Callable[[], str]:
+        if self.flying_state in ("landed", "landing"):
+            return lambda: _SUCCESS
+        self._start_landing()
+        return lambda: _SUCCESS
+
+    def _on_extended_move_to(self, message: SimMessage) -> Callable[[], str]:
+        if self.flying_state not in ("hovering", "flying"):
+            return lambda: _FAILED
+        args = message.args
+        move = self._start_move(
+            float(args["latitude"]),
+            float(args["longitude"]),
+            float(args["altitude"]),
+            float(args.get("max_horizontal_speed", 15.0)),
+            float(args.get("max_vertical_speed", 2.0)),
+        )
+        return lambda: {"done": _SUCCESS, "cancelled": _FAILED}.get(move["status"], _PENDING)
+
+    def _on_PCMD(self, message: SimMessage) -> Callable[[], str]:
+        args = message.args
+        if int(args.get("flag", 0)):
+            self._cancel_move()
+            self._pcmd = (
+                float(args.get("roll", 0)),
+                float(args.get("pitch", 0)),
+                float(args.get("yaw", 0)),
+                float(args.get("gaz", 0)),
+                self.clock.time() + PCMD_WATCHDOG_SEC,
+            )
+        else:
+            self._pcmd = None
+        return lambda: _SUCCESS
+
+    def _on_StartPilotedPOIV2(self, message: SimMessage) -> Callable[[], str]:
+        if self.flying_state not in ("hovering", "flying"):
+            return lambda: _FAILED
+        args = message.args
+        self._poi = (float(args["latitude"]), float(args["longitude"]), float(args["altitude"]))
+        return lambda: _SUCCESS
+
+    def _on_StopPilotedPOI(self, message: SimMessage) -> Callable[[], str]:
+        self._poi = None
+        return lambda: _SUCCESS
+
+    def _on_set_ending_behavior(self, message: SimMessage) -> Callable[[], str]:
+        self._rth_ending = str(message.args.get("ending_behavior", "landing"))
+        return lambda: _SUCCESS
+
+    def _on_return_to_home(self, message: SimMessage) -> Callable[[], str]:
+        if self.flying_state not in ("hovering", "flying"):
+            return lambda: _FAILED
+        self._start_rth()
+        return lambda: _SUCCESS
+
+    def _on_NavigateHome(self, message: SimMessage) -> Callable[[], str]:
+        if not int(message.args.get("start", 1)):
+            self._cancel_move()
+            return lambda: _SUCCESS
+        return self._on_return_to_home(message)
+
+    def _on_MavlinkStart(self, message: SimMessage) -> Callable[[], str]:
+        text = self._flight_plans.get(str(message.args.get("filepath")))
+        if text is None or self._mavlink_state == "playing":
+            return lambda: _FAILED
+        self._plan_items = _parse_waypoint_file(text)
+        self._plan_step = None
+        self._mavlink_state = "playing"
+        return lambda: _SUCCESS
+
+    def _on_MavlinkStop(self, message: SimMessage) -> Callable[[], str]:
+        if self._mavlink_state != "playing":
+            return lambda: _FAILED
+        # The drone stops where it is (hovering), like on a real abort
+        self._plan_items = []
+        self._plan_step = None
+        self._mavlink_state = "stopped"
+        self._cancel_move()
+        return lambda: _SUCCESS
+
+    # ------------------------------------------------------------------
+    # Kinematic model
+    # ------------------------------------------------------------------
+
+    def _start_move(self, lat: float, lon: float, alt: float, hs: float, vs: float, kind: str = "move") -> Dict[str, Any]:
+        self._cancel_move()
+        self._pcmd = None
+        self._move = {"lat": lat, "lon": lon, "alt": alt, "hs": hs, "vs": vs, "kind": kind,
+                      "accept_m": ARRIVAL_TOLERANCE_M, "status": "running"}
+        self.flying_state = "flying"
+        return self._move
+
+    def _cancel_move(self) -> None:
+        if self._move is not None and self._move["status"] == "running":
+            self._move["status"] = "cancelled"
+            if self._move["kind"] == "rth":
+                self._rth_state = {"state": "available", "reason": "user_requested"}
+        self._move = None
+
+    def _start_rth(self) -> None:
+        alt = max(self.alt, RTH_MIN_ALTITUDE_M)
+        self._start_move(self.home[0], self.home[1], alt, RTH_SPEED_MPS, 3.0, kind="rth")
+        self._rth_state = {"state": "in_progress", "reason": "user_requested"}
+
+    def _start_landing(self) -> None:
+        self._cancel_move()
+        self._pcmd = None
+        self.flying_state = "landing"
+
+    def _offset(self, d_east: float, d_north: float) -> None:
+        self.lat += math.degrees(d_north / EARTH_RADIUS_M)
+        self.lon += math.degrees(d_east / (EARTH_RADIUS_M * math.cos(math.radians(self.lat))))
+
+    def _advance(self, dt: float) -> None:
+        if self._mavlink_state == "playing":
+            self._play_flight_plan()
+        state = self.flying_state
+        if state == "landed":
+            return
+        if state == "takingoff":
+            self.alt += TAKEOFF_SPEED_MPS * dt
+            if self.alt >= TAKEOFF_ALTITUDE_M:
+                self.alt = TAKEOFF_ALTITUDE_M
+                self.flying_state = "hovering"
+        elif state == "landing":
+            self.v_east = self.v_north = 0.0
+            self.v_up = -LANDING_SPEED_MPS
+            self.alt = max(0.0, self.alt - LANDING_SPEED_MPS * dt)
+            if self.alt <= 0.0:
+                self.v_up = 0.0
+                self.flying_state = "landed"
+        else:
+            self._fly(dt)
+        speed = math.hypot(self.v_east, self.v_north)
+        self.battery = max(0.0, self.battery - (BATTERY_HOVER_DRAIN + BATTERY_SPEED_DRAIN * speed) * dt)
+        if self._subscribers:
+            self._emit_events()
+
+    def _emit(self, message_type: type, args: Dict[str, Any]) -> None:
+        event = SimpleNamespace(message=message_type, args=args)
+        for callback in list(self._subscribers):
+            callback(event, self)
+
+    def _emit_events(self) -> None:
+        # On-change events
+        for message_type in (FlyingStateChanged, BatteryStateChanged):
+            args = self.get_state(message_type)
+            if self._published.get(message_type.name) != args:
+                self._published[message_type.name] = args
+                self._emit(message_type, args)
+        # Periodic events
+        now = self.clock.time()
+        if now + 1e-9 < self._next_event:
+            return
+        self._next_event = now + 1.0 / EVENT_RATE_HZ
+        for message_type in (PositionChanged, SpeedChanged, AltitudeChanged, AttitudeChanged):
+            self._emit(message_type, self.get_state(message_type))
+
+    def _desired_velocity(self, dt: float) -> Tuple[float, float, float]:
+        now = self.clock.time()
+        if self._pcmd is not None:
+            roll, pitch, yaw, gaz, expires = self._pcmd
+            if now > expires:
+                self._pcmd = None
+                return 0.0, 0.0, 0.0
+            if self._poi is None:
+                self.heading = (self.heading + MAX_YAW_RATE_DPS * yaw / 100.0 * dt) % 360.0
+            h = math.radians(self.heading)
+            forward = FULL_TILT_SPEED_MPS * pitch / 100.0
+            right = FULL_TILT_SPEED_MPS * roll / 100.0
+            v_east = forward * math.sin(h) + right * math.cos(h)
+            v_north = forward * math.cos(h) - right * math.sin(h)
+            return v_east, v_north, 2.0 * gaz / 100.0
+        move = self._move
+        if move is None:
+            return 0.0, 0.0, 0.0
+        dist = haversine_m(self.lat, self.lon, move["lat"], move["lon"])
+        dz = move["alt"] - self.alt
+        if dist <= move["accept_m"] and abs(dz) <= move["accept_m"]:
+            self._finish_move()
+            return 0.0, 0.0, 0.0
+        v_h = min(move["hs"], math.sqrt(2.0 * ACCELERATION_MPS2 * dist)) if dist > 1e-3 else 0.0
+        brg = math.radians(bearing_deg(self.lat, self.lon, move["lat"], move["lon"]))
+        v_z = math.copysign(min(move["vs"], math.sqrt(2.0 * ACCELERATION_MPS2 * abs(dz))), dz)
+        if self._poi is None and dist > 1.0:
+            self.heading = math.degrees(brg) % 360.0
+        return v_h * math.sin(brg), v_h * math.cos(brg), v_z
+
+    def _fly(self, dt: float) -> None:
+        d_east, d_north, d_up = self._desired_velocity(dt)
+        max_dv = ACCELERATION_MPS2 * dt
+        self.v_east += max(-max_dv, min(max_dv, d_east - self.v_east))
+        self.v_north += max(-max_dv, min(max_dv, d_north - self.v_north))
+        self.v_up += max(-max_dv, min(max_dv, d_up - self.v_up))
+        self._offset(self.v_east * dt, self.v_north * dt)
+        self.alt = max(0.0, self.alt + self.v_up * dt)
+        if self._poi is not None:
+            self.heading = bearing_deg(self.lat, self.lon, self._poi[0], self._poi[1])
+        moving = math.hypot(self.v_east, self.v_north) > 0.2 or abs(self.v_up) > 0.2
+        if self._move is None and self._pcmd is None and not moving:
+            self.flying_state = "hovering"
+        elif self.flying_state == "hovering" and (moving or self._move is not None):
+            self.flying_state = "flying"
+
+    def _finish_move(self) -> None:
+        move = self._move
+        move["status"] = "done"
+        self._move = None
+        if move["kind"] == "rth":
+            self._rth_state = {"state": "available", "reason": "finished"}
+            if self._rth_ending == "landing":
+                self._start_landing()
+
+    # ------------------------------------------------------------------
+    # Onboard flight plan player (subset of MAVLink used by the compiler)
+    # ------------------------------------------------------------------
+
+    def _play_flight_plan(self) -> None:
+        step = self._plan_step
+        if step is not None and not self._plan_step_done(step):
+            return
+        if not self._plan_items:
+            if self.flying_state == "landed":
+                self._mavlink_state = "stopped"
+                self._plan_step = None
+            return
+        _idx, _cur, _frame, command, p1, p2, _p3, _p4, lat, lon, alt, _auto = self._plan_items.pop(0)
+        command = int(command)
+        step = {"command": command}
+        if command == 22:  # NAV_TAKEOFF
+            if self.flying_state == "landed":
+                self.flying_state = "takingoff"
+            step["alt"] = alt
+        elif command == 16:  # NAV_WAYPOINT
+            step["move"] = self._start_move(lat, lon, alt, self._plan_speed, 2.0)
+            step["move"]["accept_m"] = max(ARRIVAL_TOLERANCE_M, p2)
+        elif command == 178:  # DO_CHANGE_SPEED
+            self._plan_speed = p2
+        elif command == 201:  # DO_SET_ROI
+            self._poi = (lat, lon, alt) if int(p1) == 3 else None
+        elif command == 20:  # NAV_RETURN_TO_LAUNCH
+            self._start_rth()
+        elif command == 21:  # NAV_LAND
+            self._start_landing()
+        self._plan_step = step
+
+    def _plan_step_done(self, step: Dict[str, Any]) -> bool:
+        command = step["command"]
+        if command == 22:
+            if self.flying_state == "hovering" and "move" not in step and step["alt"] > self.alt + ARRIVAL_TOLERANCE_M:
+                step["move"] = self._start_move(self.lat, self.lon, step["alt"], 2.0, 2.0)
+            move = step.get("move")
+            return move is not None and move["status"] != "running"
+        if command == 16:
+            return step["move"]["status"] != "running"
+        if command in (20, 21):
+            return self.flying_state == "landed"
+        return True
+
+
+def _parse_waypoint_file(text: str) -> List[List[float]]:
+    """Parse a QGC WPL 110 waypoint file into rows of floats."""
+    lines = [line for line in text.strip().splitlines() if line.strip()]
+    if not lines or not lines[0].startswith("QGC WPL"):
+        raise ValueError("Not a QGC WPL waypoint file")
+    return [[float(v) for v in line.split("\t")] for line in lines[1:]]
+
+
+def sim_symbols() -> Dict[str, Any]:
+    """
+    Backend symbol table, same keys as mission_executor._import_olympe().
+    A fresh SimClock is created per call so concurrent missions never share
+    virtual time; "Drone" builds simulated drones bound to that clock.
+    """
+    time_factor = float(os.environ.get("SIM_TIME_FACTOR", "0"))
+    home = (
+        float(os.environ.get("SIM_HOME_LAT", DEFAULT_HOME[0])),
+        float(os.environ.get("SIM_HOME_LON", DEFAULT_HOME[1])),
+    )
+    battery = float(os.environ.get("SIM_BATTERY_PERCENT", "100"))
+    clock = SimClock(time_factor)
+    flight_plans: Dict[str, str] = {}
+    uid_counter = itertools.count(1)
+
+    def _drone(ip: str) -> SimulatedDrone:
+        return SimulatedDrone(ip, clock, home=home, battery_percent=battery, flight_plans=flight_plans)
+
+    def _upload_flight_plan(drone_ip: str, plan: Any, timeout_sec: float) -> str:
+        uid = f"sim-plan-{next(uid_counter)}"
+        flight_plans[uid] = plan.to_waypoint_file()
+        return uid
+
+    return {
+        "Drone": _drone,
+        "TakeOff": TakeOff,
+        "Landing": Landing,
+        "NavigateHome": NavigateHome,
+        "StartPilotedPOIV2": StartPilotedPOIV2,
+        "StopPilotedPOI": StopPilotedPOI,
+        "PCMD": PCMD,
+        "FlyingStateChanged": FlyingStateChanged,
+        "PilotedPOI": PilotedPOI,
+        "PositionChanged": PositionChanged,
+        "AltitudeChanged": AltitudeChanged,
+        "extended_move_to": extended_move_to,
+        "MavlinkStart": MavlinkStart,
+        "MavlinkStop": MavlinkStop,
+        "MavlinkFilePlayingStateChanged": MavlinkFilePlayingStateChanged,
+        "set_mode": set_mode,
+        "oa_mode": oa_mode,
+        "rth": rth,
+        "clock": clock,
+        "upload_flight_plan": _upload_flight_plan,
+    }
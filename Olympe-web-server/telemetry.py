@@ -0,0 +1,209 @@
+"""
+Telemetry - live drone state stream during missions.
+
+A TelemetryCollector subscribes once to the drone's event stream
+(drone.subscribe) and folds the relevant state events (position, speed,
+altitude, attitude, battery, flying state) into its latest-state fields.
+Each sink (publish callback + rate) gets a fixed-schema TelemetryRecord when
+an event reaches its next publication deadline (spaced 1 / rate_hz apart,
+env TELEMETRY_RATE_HZ for the main sink), so every downstream rate stays
+bounded whatever the drone's event rate. Flying state transitions are always
+published. Several consumers (UI stream, flight recorder) share one
+subscription through add_sink().
+
+Publishing happens on the event path, with no extra thread or polling.
+"""
+
+import logging
+import math
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TELEMETRY_RATE_HZ = 2.0
+# Olympe reports 500.0 for latitude/longitude/altitude until a GPS fix is available
+_NO_FIX = 500.0
+
+
+class TelemetryRecord:
+    """Compact fixed-schema telemetry sample."""
+
+    __slots__ = (
+        "drone_id",
+        "mission_id",
+        "t",
+        "segment",
+        "state",
+        "latitude",
+        "longitude",
+        "altitude",
+        "ground_speed",
+        "vertical_speed",
+        "heading",
+        "battery_percent",
+    )
+
+    FIELDS = __slots__
+
+    def __init__(self, **values: Any):
+        for name in self.__slots__:
+            setattr(self, name, values.get(name))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _state_name(value: Any) -> Optional[str]:
+    # Olympe enums print as "FlyingStateChanged_State.hovering"
+    return str(value).split(".")[-1] if value is not None else None
+
+
+class TelemetryCollector:
+    """
+    Subscribe to one drone's state events and publish downsampled records.
+
+    publish(record) is called from the drone event thread and must not block.
+    clock is the backend clock (time module or simulator clock).
+    """
+
+    def __init__(
+        self,
+        drone,
+        drone_id: str,
+        publish: Callable[[TelemetryRecord], None],
+        mission_id: Optional[str] = None,
+        rate_hz: Optional[float] = None,
+        clock: Any = time,
+    ):
+        if rate_hz is None:
+            rate_hz = float(os.environ.get("TELEMETRY_RATE_HZ", DEFAULT_TELEMETRY_RATE_HZ))
+        self._drone = drone
+        self._clock = clock
+        self._sinks: List[List[Any]] = []
+        self._subscription = None
+        self.drone_id = drone_id
+        self.mission_id = mission_id
+        self.segment: Optional[int] = None
+        self.state: Optional[str] = None
+        self.latitude: Optional[float] = None
+        self.longitude: Optional[float] = None
+        self.altitude: Optional[float] = None
+        self.ground_speed: Optional[float] = None
+        self.vertical_speed: Optional[float] = None
+        self.heading: Optional[float] = None
+        self.battery_percent: Optional[float] = None
+        self.events_received = 0
+        self.records_published = 0
+        self._handlers = {
+            "PositionChanged": self._on_position,
+            "SpeedChanged": self._on_speed,
+            "AltitudeChanged": self._on_altitude,
+            "AttitudeChanged": self._on_attitude,
+            "BatteryStateChanged": self._on_battery,
+            "FlyingStateChanged": self._on_flying_state,
+        }
+        self.add_sink(publish, rate_hz)
+
+    def add_sink(self, publish: Callable[[TelemetryRecord], None], rate_hz: float) -> None:
+        """Publish records to another consumer at its own rate."""
+        if rate_hz <= 0:
+            raise ValueError(f"Telemetry rate must be > 0 (got {rate_hz})")
+        # [publish, period, next deadline]
+        self._sinks.append([publish, 1.0 / rate_hz, -math.inf])
+
+    def start(self) -> None:
+        if self._subscription is None:
+            self._subscription = self._drone.subscribe(self._on_event)
+
+    def stop(self) -> None:
+        if self._subscription is not None:
+            try:
+                self._drone.unsubscribe(self._subscription)
+            except Exception as exc:
+                logger.warning(f"Telemetry unsubscribe failed: {exc}")
+            self._subscription = None
+
+    def __enter__(self) -> "TelemetryCollector":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def snapshot(self) -> TelemetryRecord:
+        return TelemetryRecord(
+            drone_id=self.drone_id,
+            mission_id=self.mission_id,
+            t=self._clock.time(),
+            segment=self.segment,
+            state=self.state,
+            latitude=self.latitude,
+            longitude=self.longitude,
+            altitude=self.altitude,
+            ground_speed=self.ground_speed,
+            vertical_speed=self.vertical_speed,
+            heading=self.heading,
+            battery_percent=self.battery_percent,
+        )
+
+    def _on_event(self, event, controller=None) -> None:
+        handler = self._handlers.get(getattr(event.message, "name", ""))
+        if handler is None:
+            return
+        self.events_received += 1
+        try:
+            force = handler(event.args)
+        except Exception as exc:
+            logger.debug(f"Malformed telemetry event {event.message.name}: {exc}")
+            return
+        now = self._clock.time()
+        record = None
+        for sink in self._sinks:
+            publish, period, next_publish = sink
+            due = now >= next_publish
+            if due:
+                # Absolute deadlines: the published rate does not alias on the event rate
+                next_publish += period
+                sink[2] = next_publish if next_publish > now else now + period
+            if not (due or force):
+                continue
+            if record is None:
+                record = self.snapshot()
+                self.records_published += 1
+            try:
+                publish(record)
+            except Exception as exc:
+                logger.warning(f"Telemetry publish failed: {exc}")
+
+    def _on_position(self, args: Dict[str, Any]) -> bool:
+        lat, lon = float(args["latitude"]), float(args["longitude"])
+        if lat == _NO_FIX or lon == _NO_FIX:
+            return False
+        self.latitude, self.longitude = lat, lon
+        return False
+
+    def _on_speed(self, args: Dict[str, Any]) -> bool:
+        # NED frame: speedX north, speedY east, speedZ down
+        self.ground_speed = math.hypot(float(args["speedX"]), float(args["speedY"]))
+        self.vertical_speed = -float(args["speedZ"])
+        return False
+
+    def _on_altitude(self, args: Dict[str, Any]) -> bool:
+        self.altitude = float(args["altitude"])
+        return False
+
+    def _on_attitude(self, args: Dict[str, Any]) -> bool:
+        self.heading = math.degrees(float(args["yaw"])) % 360.0
+        return False
+
+    def _on_battery(self, args: Dict[str, Any]) -> bool:
+        self.battery_percent = float(args["percent"])
+        return False
+
+    def _on_flying_state(self, args: Dict[str, Any]) -> bool:
+        state = _state_name(args.get("state"))
+        changed = state != self.state
+        self.state = state
+        return changed
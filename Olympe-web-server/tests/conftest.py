@@ -0,0 +1,109 @@
+"""
+Fixtures et helpers partagés par les tests.
+
+Les helpers de carte et de mission (HOME, at, poi, build_map, move_to, build_mission)
+construisent des cartes et des missions synthétiques autour d'un point de
+départ fixe, en mètres ENU locaux; les tests les importent depuis
+tests.conftest. La fixture sim_track vole une mission sur le simulateur et
+relève la trajectoire du drone.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Tuple
+
+import pytest
+
+from geodesy import from_local_enu, to_local_enu
+
+MAP_FILE = Path(__file__).resolve().parents[2] / "maps" / "industrial_city.json"
+HOME = (48.8799, 2.3691)
+LAND = ({"type": "land"},)
+RTH_LAND = ({"type": "return_to_home"}, {"type": "land"})
+
+
+def at(east: float, north: float) -> Tuple[float, float]:
+    """(lat, lon) du point à east/north mètres de HOME."""
+    lat, lon = from_local_enu(east, north, *HOME)
+    return float(lat), float(lon)
+
+
+def local(lat: float, lon: float) -> Tuple[float, float]:
+    """(east, north) en mètres d'une position par rapport à HOME."""
+    x, y = to_local_enu(lat, lon, *HOME)
+    return float(x), float(y)
+
+
+def poi(name: str, east: float, north: float, **extra: Any) -> Dict[str, Any]:
+    """Point d'intérêt au sol à east/north mètres de HOME."""
+    lat, lon = at(east, north)
+    return {"name": name, "type": "structure", "coordinates": {"latitude": lat, "longitude": lon, "altitude_meters": 0.0},
+            **extra}
+
+
+def build_map(pois: Iterable = (), obstacles: Iterable = (), boundaries: Iterable = (), **extra: Any) -> Dict[str, Any]:
+    """Carte dont le départ est HOME."""
+    return {"starting_position": {"coordinates": {"latitude": HOME[0], "longitude": HOME[1]}},
+            "points_of_interest": list(pois), "obstacles": list(obstacles), "boundaries": list(boundaries), **extra}
+
+
+def move_to(point: Tuple[float, float], altitude: float, **extra: Any) -> Dict[str, Any]:
+    return {"type": "move_to", "latitude": point[0], "longitude": point[1], "altitude": altitude, **extra}
+
+
+def build_mission(*segments: Dict[str, Any], ending: Tuple[Dict[str, Any], ...] = LAND, **fields: Any) -> Dict[str, Any]:
+    """Mission DSL: décollage, segments, puis ending (atterrissage par défaut)."""
+    return {"missionId": "test", "segments": [{"type": "takeoff"}, *segments, *ending], **fields}
+
+
+@pytest.fixture
+def industrial_city():
+    """Carte Industrial City (maps/industrial_city.json)."""
+    with open(MAP_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(autouse=True)
+def flight_recorder_dir(tmp_path, monkeypatch):
+    """Les vols enregistrés pendant les tests vont dans un répertoire temporaire."""
+    directory = tmp_path / "flight_logs"
+    monkeypatch.setenv("FLIGHT_RECORDER_DIR", str(directory))
+    return directory
+
+
+@pytest.fixture(autouse=True)
+def voxel_cache_dir(tmp_path, monkeypatch):
+    """Les grilles voxel compilées pendant les tests vont dans un répertoire temporaire."""
+    directory = tmp_path / "map_cache"
+    monkeypatch.setenv("VOXEL_CACHE_DIR", str(directory))
+    return directory
+
+
+@pytest.fixture
+def sim_track(monkeypatch):
+    """
+    Backend simulé parti de HOME: la position (east, north, altitude) du drone
+    est relevée à chaque pas d'intégration pendant execute_mission.
+    """
+    import mission_executor
+    from simulated_drone import sim_symbols
+
+    monkeypatch.setenv("SIM_TIME_FACTOR", "0")
+    monkeypatch.setenv("SIM_HOME_LAT", str(HOME[0]))
+    monkeypatch.setenv("SIM_HOME_LON", str(HOME[1]))
+    track = []
+
+    def _backend():
+        symbols = sim_symbols()
+        make = symbols["Drone"]
+
+        def _drone(ip):
+            drone = make(ip)
+            drone.clock.add_listener(lambda _dt: track.append((*local(drone.lat, drone.lon), drone.alt)))
+            return drone
+
+        symbols["Drone"] = _drone
+        return symbols
+
+    monkeypatch.setattr(mission_executor, "_import_backend", _backend)
+    return track
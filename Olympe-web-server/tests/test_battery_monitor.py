@@ -0,0 +1,152 @@
+"""
+Tests unitaires pour le watchdog batterie en vol (battery_monitor).
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import mission_executor
+from battery_monitor import BatteryWatchdog
+from geodesy import destination_point, haversine_m
+from mission_executor import execute_mission
+from mission_planner.estimator import FlightModel, return_home_energy_percent
+from simulated_drone import DEFAULT_HOME, sim_symbols
+
+
+class FakeDrone:
+    def __init__(self):
+        self.callbacks = []
+
+    def subscribe(self, callback):
+        self.callbacks.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        self.callbacks.remove(callback)
+
+    def emit(self, name, **args):
+        for callback in self.callbacks:
+            callback(SimpleNamespace(message=SimpleNamespace(name=name), args=args), self)
+
+
+def test_watchdog_trips_on_projected_charge():
+    drone, trips = FakeDrone(), []
+    model = FlightModel()
+    with BatteryWatchdog(drone, 25.0, model=model, on_trip=trips.append) as watchdog:
+        drone.emit("PositionChanged", latitude=500.0, longitude=500.0, altitude=500.0)  # pas de fix
+        drone.emit("BatteryStateChanged", percent=40)
+        assert watchdog.home is None and watchdog.required_percent == 0.0
+        drone.emit("PositionChanged", latitude=DEFAULT_HOME[0], longitude=DEFAULT_HOME[1], altitude=0.0)
+        assert watchdog.home == DEFAULT_HOME
+        far = destination_point(*DEFAULT_HOME, 90.0, 3000.0)
+        drone.emit("AltitudeChanged", altitude=30.0)
+        drone.emit("PositionChanged", latitude=far[0], longitude=far[1], altitude=65.0)
+        required = return_home_energy_percent((far[0], far[1], 30.0), DEFAULT_HOME, model)
+        assert watchdog.required_percent == required
+        # 40% restants, mais la batterie projetée au retour passe sous 25%
+        assert 40 - required < 25
+        assert watchdog.tripped and len(trips) == 1
+        assert "reserve 25%" in watchdog.reason
+        drone.emit("BatteryStateChanged", percent=39)  # déclenché une seule fois
+        assert len(trips) == 1
+    assert drone.callbacks == []
+    assert watchdog.status()["tripped"] is True
+
+
+def test_watchdog_aborts_mission_to_rth_on_simulator(monkeypatch):
+    monkeypatch.setenv("DRONE_BACKEND", "sim")
+    monkeypatch.setenv("SIM_TIME_FACTOR", "0")
+    monkeypatch.setenv("SIM_BATTERY_PERCENT", "35")
+    lat, lon = DEFAULT_HOME
+    far = destination_point(lat, lon, 0.0, 4000.0)
+    mission = {
+        "missionId": "battery-test",
+        "segments": [
+            {"type": "takeoff"},
+            {"type": "move_to", "latitude": far[0], "longitude": far[1], "altitude": 20, "max_horizontal_speed": 10},
+            {"type": "move_to", "latitude": lat, "longitude": lon, "altitude": 20, "max_horizontal_speed": 10},
+            {"type": "land"},
+        ],
+        "safety": {"minBatteryPercent": 25},
+    }
+    report = execute_mission(mission, drone_id="sim_1")
+    assert report["status"] == "error"
+    assert report["failed_segment"] == 1
+    assert "battery reserve" in report["errors"][0]
+    watchdog = report["battery_watchdog"]
+    assert watchdog["tripped"] is True
+    assert watchdog["battery_percent"] > 25 and watchdog["required_percent"] > 0  # déclenché avant la réserve brute
+
+
+def test_watchdog_idle_without_reserve_breach(monkeypatch):
+    monkeypatch.setenv("DRONE_BACKEND", "sim")
+    monkeypatch.setenv("SIM_TIME_FACTOR", "0")
+    lat, lon = DEFAULT_HOME
+    mission = {
+        "missionId": "battery-ok",
+        "segments": [
+            {"type": "takeoff"},
+            {"type": "move_to", "latitude": lat + 0.001, "longitude": lon, "altitude": 20, "max_horizontal_speed": 10},
+            {"type": "return_to_home"},
+            {"type": "land"},
+        ],
+        "safety": {"minBatteryPercent": 25},
+    }
+    report = execute_mission(mission, drone_id="sim_1")
+    assert report["status"] == "completed", report["errors"]
+    assert report["battery_watchdog"]["tripped"] is False
+    assert report["battery_watchdog"]["min_projected_percent"] > 90
+
+
+@pytest.fixture
+def sim_drones(monkeypatch):
+    """Backend simulé dont les drones créés par l'exécuteur restent inspectables."""
+    monkeypatch.setenv("SIM_TIME_FACTOR", "0")
+    monkeypatch.setenv("SIM_BATTERY_PERCENT", "35")
+    drones = []
+
+    def _backend():
+        symbols = sim_symbols()
+        make = symbols["Drone"]
+        symbols["Drone"] = lambda ip: drones.append(make(ip)) or drones[-1]
+        return symbols
+
+    monkeypatch.setattr(mission_executor, "_import_backend", _backend)
+    return drones
+
+
+def _far_mission():
+    far = destination_point(*DEFAULT_HOME, 0.0, 4000.0)
+    return {
+        "missionId": "battery-wait",
+        "segments": [
+            {"type": "takeoff"},
+            {"type": "move_to", "latitude": far[0], "longitude": far[1], "altitude": 20, "max_horizontal_speed": 10},
+            {"type": "return_to_home"},
+            {"type": "land"},
+        ],
+        "safety": {"minBatteryPercent": 25},
+    }
+
+
+def test_watchdog_interrupts_arrive_move(sim_drones, monkeypatch):
+    monkeypatch.setenv("MOVE_ARRIVAL_POLICY", "arrive")
+    monkeypatch.setenv("MOVE_TIMEOUT_SEC", "1000")
+    report = execute_mission(_far_mission(), drone_id="sim_1")
+    assert report["status"] == "error" and report["failed_segment"] == 1
+    assert "battery reserve" in report["errors"][0]
+    # Déplacement interrompu au déclenchement, puis RTH de sécurité jusqu'au sol
+    drone = sim_drones[0]
+    assert drone.flying_state == "landed" and haversine_m(drone.lat, drone.lon, *DEFAULT_HOME) < 5.0
+    assert drone.battery > 15.0
+
+
+def test_watchdog_stops_flight_plan_and_returns_home(sim_drones):
+    report = execute_mission(_far_mission(), execution_mode="flight_plan", drone_id="sim_1")
+    assert report["status"] == "error" and report["execution_mode"] == "flight_plan"
+    assert "battery reserve" in report["errors"][0]
+    drone = sim_drones[0]
+    commands = [name for _, name in drone.command_log]
+    assert commands.index("MavlinkStop") < commands.index("return_to_home")
+    assert drone.flying_state == "landed" and haversine_m(drone.lat, drone.lon, *DEFAULT_HOME) < 5.0
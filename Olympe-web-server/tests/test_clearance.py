@@ -0,0 +1,86 @@
+"""
+Tests unitaires pour le contrôle de distance aux obstacles (mission_planner.clearance).
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from geodesy import to_local_enu
+from mission_planner.clearance import ObstacleField, check_mission_clearance
+from tests.conftest import HOME, at, build_map, build_mission, move_to
+
+
+def _obstacle(name, east, north, height, **shape):
+    lat, lon = at(east, north)
+    return {"name": name, "type": "building", "height_meters": height,
+            "coordinates": {"latitude": lat, "longitude": lon, "altitude_meters": 0.0}, **shape}
+
+
+def _segments(*targets):
+    """Segments d'une mission passant par des points (east, north, altitude)."""
+    return build_mission(*(move_to(at(e, n), alt) for e, n, alt in targets))["segments"]
+
+
+def test_cylinder_first_conflict_per_leg():
+    # Deux tours sur le trajet: seul le premier conflit du tronçon est rapporté
+    field = ObstacleField(build_map(obstacles=[
+        _obstacle("Far", 0.0, 150.0, 30.0, radius_meters=5.0),
+        _obstacle("Near", 0.0, 80.0, 30.0, radius_meters=5.0),
+    ]), margin_m=2.0)
+    conflicts = field.check(_segments((0.0, 0.0, 20.0), (0.0, 200.0, 20.0)), HOME)
+    assert [(c["segment"], c["obstacle"], c["shape"]) for c in conflicts] == [(2, "Near", "cylinder")]
+    assert conflicts[0]["along_m"] == pytest.approx(73.0, abs=0.1)  # 80 m - (5 m + 2 m de marge)
+    # Au-dessus du sommet + marge: dégagé
+    assert field.check(_segments((0.0, 0.0, 33.0), (0.0, 200.0, 33.0)), HOME) == []
+    # À côté (hors rayon + marge): dégagé
+    assert field.check(_segments((8.0, 0.0, 20.0), (8.0, 200.0, 20.0)), HOME) == []
+
+
+def test_rotated_box_and_descent():
+    box = _obstacle("Hangar", 50.0, 0.0, 12.0, width_meters=40.0, length_meters=10.0, heading_degrees=90.0)
+    field = ObstacleField(build_map(obstacles=[box]), margin_m=1.0)
+    # Cap 90°: la longueur (10 m) est est-ouest, la largeur (40 m) nord-sud
+    assert field.check(_segments((0.0, 15.0, 5.0), (100.0, 15.0, 5.0)), HOME)[0]["along_m"] == pytest.approx(44.0)
+    assert field.check(_segments((0.0, 22.0, 5.0), (100.0, 22.0, 5.0)), HOME) == []
+    # Atterrissage sur le toit: la descente verticale entre dans la marge
+    conflicts = field.check(_segments((0.0, 0.0, 20.0), (50.0, 0.0, 20.0)), HOME)
+    assert [(c["type"], c["altitude"]) for c in conflicts] == [("land", 13.0)]
+
+
+def test_mission_wrapper_and_empty_map():
+    checked = check_mission_clearance(build_mission(move_to(at(0.0, 100.0), 20.0)), build_map(), HOME)
+    assert checked["clearance"]["ok"] and checked["clearance"]["obstacles"] == 0
+    tower = _obstacle("Tower", 0.0, 50.0, 40.0)
+    report = check_mission_clearance(build_mission(move_to(at(0.0, 100.0), 20.0)), build_map(obstacles=[tower]), HOME)["clearance"]
+    assert not report["ok"] and report["conflicts"][0]["obstacle"] == "Tower"
+
+
+def test_thousands_of_obstacles_match_brute_force():
+    rng = np.random.default_rng(7)
+    obstacles = [
+        _obstacle(f"O{i}", float(e), float(n), float(h), radius_meters=float(r))
+        for i, (e, n, h, r) in enumerate(zip(rng.uniform(-1000, 1000, 3000), rng.uniform(-1000, 1000, 3000),
+                                              rng.uniform(5, 60, 3000), rng.uniform(2, 10, 3000)))
+    ]
+    field = ObstacleField(build_map(obstacles=obstacles), margin_m=0.0)
+    targets = [(float(e), float(n), 25.0) for e, n in zip(rng.uniform(-900, 900, 15), rng.uniform(-900, 900, 15))]
+    segments = _segments(*targets)
+    start = time.perf_counter()
+    conflicts = field.check(segments, HOME)
+    assert time.perf_counter() - start < 1.0
+    # Référence: échantillonnage fin de chaque tronçon horizontal à 25 m
+    x, y = to_local_enu(np.array([o["coordinates"]["latitude"] for o in obstacles]),
+                        np.array([o["coordinates"]["longitude"] for o in obstacles]), *HOME)
+    tall = np.array([o["height_meters"] for o in obstacles]) > 25.0
+    radius = np.array([o["radius_meters"] for o in obstacles])
+    x, y, radius = x[tall], y[tall], radius[tall]
+    expected = set()
+    for idx in range(2, len(targets) + 1):
+        (e0, n0, _), (e1, n1, _) = targets[idx - 2], targets[idx - 1]
+        t = np.linspace(0.0, 1.0, 2000)[:, None]
+        if (np.hypot(e0 + t * (e1 - e0) - x, n0 + t * (n1 - n0) - y) < radius).any():
+            expected.add(idx)
+    # Le segment 1 (montée en diagonale depuis le départ) n'est pas dans la référence
+    assert {c["segment"] for c in conflicts if c["segment"] >= 2 and c["type"] == "move_to"} == expected
@@ -0,0 +1,88 @@
+"""
+Tests unitaires pour la compilation typée du DSL de mission (mission_planner.compiled).
+"""
+
+import pytest
+
+from mission_executor import MissionExecutionError, execute_mission
+from mission_planner.compiled import (
+    MissionCompileError,
+    MoveTo,
+    PoiInspection,
+    ReturnToHome,
+    Takeoff,
+    compile_mission,
+)
+
+MISSION = {
+    "missionId": "compiled",
+    "segments": [
+        {"type": "takeoff", "constraints": {"maxWaitSec": 20}},
+        {"type": "move_to", "latitude": 48.88, "longitude": 2.37, "altitude": "120"},
+        {"type": "poi_inspection", "poi_name": "Tower", "latitude": 48.881, "longitude": 2.371, "altitude": 0.2,
+         "orbit_radius": 12},
+        {"type": "poi_inspection", "latitude": 48.881, "longitude": 2.371, "altitude": 30, "rotation_duration": 10},
+        {"type": "return_to_home", "ending_behavior": "landing"},
+    ],
+    "safety": {"geofence": {"enabled": True}, "maxAltitudeMeters": 80, "minBatteryPercent": 25},
+}
+
+
+def test_segments_are_typed_with_defaults_and_geofence():
+    mission = compile_mission(MISSION)
+    takeoff, move, orbit, legacy, rth = mission.segments
+    assert isinstance(takeoff, Takeoff) and takeoff.max_wait_sec == 20.0
+    assert isinstance(move, MoveTo)
+    assert move.altitude == 80.0  # plafond du geofence
+    assert (move.max_horizontal_speed, move.max_vertical_speed, move.hover) == (15.0, 2.0, False)
+    assert isinstance(orbit, PoiInspection) and orbit.geometric
+    assert orbit.altitude == 1.0 and orbit.orbit_radius == 12.0 and orbit.sweep_angle == 360.0
+    assert not legacy.geometric and legacy.rotation_duration == 10.0 and legacy.poi_name == "unknown"
+    assert isinstance(rth, ReturnToHome) and rth.ending_behavior == "landing"
+    assert mission.safety.min_battery_percent == 25.0
+    assert [s.index for s in mission] == list(range(5))
+    # Sérialisation inverse pour le compilateur de plan de vol
+    dsl = mission.to_dsl_segments()
+    assert dsl[0] == {"type": "takeoff", "constraints": {"maxWaitSec": 20.0}}
+    assert dsl[1]["altitude"] == 80.0 and "acceptance_radius" not in dsl[1]
+    assert "rotation_duration" not in dsl[2] and dsl[3]["rotation_duration"] == 10.0
+    assert compile_mission({"segments": dsl}).segments[2] == orbit
+
+
+def test_segments_are_immutable():
+    move = compile_mission(MISSION).segments[1]
+    with pytest.raises(AttributeError):
+        move.altitude = 10.0
+    with pytest.raises(AttributeError):
+        move.extra = 1
+    assert not hasattr(move, "__dict__")
+
+
+@pytest.mark.parametrize(
+    "segment, message",
+    [
+        ({"type": "orbit"}, "unsupported segment type 'orbit'"),
+        ({"type": "move_to", "latitude": 48.0, "altitude": 20}, "missing 'longitude'"),
+        ({"type": "move_to", "latitude": 95.0, "longitude": 2.0, "altitude": 20}, "out of range"),
+        ({"type": "move_to", "latitude": 48.0, "longitude": 2.0, "altitude": "high"}, "must be a number"),
+        ({"type": "move_to", "latitude": 48.0, "longitude": 2.0, "altitude": 20, "max_horizontal_speed": 0}, "> 0"),
+        ({"type": "return_to_home", "ending_behavior": "crash"}, "ending_behavior"),
+        ({}, "missing 'type'"),
+    ],
+)
+def test_invalid_segments_are_rejected_with_index(segment, message):
+    with pytest.raises(MissionCompileError, match="Segment 1") as exc:
+        compile_mission({"segments": [{"type": "takeoff"}, segment]})
+    assert message in str(exc.value)
+
+
+def test_invalid_mission_fails_before_connecting(monkeypatch):
+    monkeypatch.setenv("DRONE_BACKEND", "sim")
+    import simulated_drone
+
+    def _no_connect(*args, **kwargs):
+        raise AssertionError("drone must not be created for an invalid mission")
+
+    monkeypatch.setattr(simulated_drone.SimulatedDrone, "connect", _no_connect)
+    with pytest.raises(MissionExecutionError, match="Invalid mission: Segment 1"):
+        execute_mission({"segments": [{"type": "takeoff"}, {"type": "loiter"}]})
@@ -0,0 +1,83 @@
+"""
+Tests unitaires pour l'estimateur pré-vol de durée et de batterie (mission_planner.estimator).
+"""
+
+import pytest
+
+from geodesy import destination_point
+from mission_planner.estimator import FlightModel, check_battery, estimate_mission, estimate_mission_dsl
+from mission_planner.orbit import plan_orbit
+from tests.conftest import HOME
+
+MODEL = FlightModel(acceleration_mps2=1e9)  # sans surcoût d'accélération: durées exactes
+
+
+def test_move_to_duration_and_energy():
+    target = destination_point(*HOME, 90.0, 300.0)
+    segments = [
+        {"type": "takeoff"},
+        {"type": "move_to", "latitude": target[0], "longitude": target[1], "altitude": 21, "max_horizontal_speed": 10},
+        {"type": "land"},
+    ]
+    estimate = estimate_mission(segments, HOME, MODEL)
+    takeoff, move, land = estimate.segments
+    assert takeoff.duration_sec == MODEL.takeoff_sec
+    assert move.duration_sec == pytest.approx(30.0)  # 300 m à 10 m/s (montée de 20 m en 10 s incluse)
+    assert move.distance_m == pytest.approx(320.0, abs=0.1)
+    assert land.duration_sec == pytest.approx(21 / MODEL.landing_speed_mps)
+    expected = move.duration_sec * MODEL.cruise_percent_per_min / 60 + 10.0 * MODEL.climb_percent_per_min / 60
+    assert move.energy_percent == pytest.approx(expected)
+    assert estimate.duration_sec == pytest.approx(sum(s.duration_sec for s in estimate.segments))
+    assert estimate.compute_us > 0
+
+
+def test_orbit_and_rth_with_landing():
+    poi = destination_point(*HOME, 0.0, 200.0)
+    segments = [
+        {"type": "takeoff"},
+        {"type": "poi_inspection", "latitude": poi[0], "longitude": poi[1], "altitude": 1.0, "orbit_radius": 20,
+         "sweep_angle": 180, "ground_speed": 3, "max_horizontal_speed": 9},
+        {"type": "return_to_home", "ending_behavior": "landing"},
+    ]
+    estimate = estimate_mission(segments, HOME, MODEL)
+    orbit = plan_orbit(20, 180, 3)
+    assert estimate.segments[1].duration_sec == pytest.approx(MODEL.poi_setup_sec + 180 / 9 + orbit.duration_sec)
+    rth = estimate.segments[2]
+    # montée à l'altitude RTH, retour depuis le POI (fin d'orbite approchée par le centre), puis descente
+    assert rth.distance_m == pytest.approx(29 + 200 + 30, abs=0.5)
+
+
+def test_rth_lands_unless_hovering():
+    poi = destination_point(*HOME, 0.0, 200.0)
+    move = {"type": "move_to", "latitude": poi[0], "longitude": poi[1], "altitude": 40}
+    durations = [
+        estimate_mission([{"type": "takeoff"}, move, dict({"type": "return_to_home"}, **ending)], HOME, MODEL)
+        .segments[2].duration_sec
+        for ending in ({}, {"ending_behavior": "landing"}, {"ending_behavior": "hovering"})
+    ]
+    # Sans ending_behavior, le drone atterrit (comportement envoyé par l'exécuteur)
+    assert durations[0] == durations[1] == pytest.approx(durations[2] + 40 / MODEL.landing_speed_mps)
+
+
+def test_battery_check_and_mission_wrapper():
+    assert check_battery(30.0, None, 25)["ok"] is True
+    assert check_battery(30.0, 50.0, 25) == {
+        "battery_percent": 50.0, "energy_percent": 30.0, "projected_percent": 20.0, "reserve_percent": 25, "ok": False,
+    }
+    far = destination_point(*HOME, 0.0, 20000.0)
+    mission = {
+        "segments": [{"type": "takeoff"}, {"type": "move_to", "latitude": far[0], "longitude": far[1], "altitude": 30,
+                                           "max_horizontal_speed": 2}, {"type": "return_to_home"}, {"type": "land"}],
+        "safety": {"minBatteryPercent": 25},
+    }
+    estimated = estimate_mission_dsl(mission, HOME)
+    assert "estimate" not in mission
+    assert len(estimated["estimate"]["segments"]) == 4
+    assert estimated["estimate"]["battery"]["ok"] is False
+
+
+def test_model_from_env(monkeypatch):
+    monkeypatch.setenv("ESTIMATOR_HOVER_PERCENT_PER_MIN", "6")
+    assert FlightModel.from_env().hover_percent_per_min == 6.0
+    estimate = estimate_mission([{"type": "takeoff"}], HOME, FlightModel.from_env())
+    assert estimate.segments[0].energy_percent > estimate_mission([{"type": "takeoff"}], HOME, MODEL).segments[0].energy_percent
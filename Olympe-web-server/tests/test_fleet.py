@@ -0,0 +1,174 @@
+"""
+Tests unitaires pour le registre de flotte et le dispatcher multi-drones (fleet).
+"""
+
+import threading
+
+import pytest
+
+from fleet import (
+    STATUS_IDLE,
+    STATUS_OFFLINE,
+    DroneRecord,
+    FleetDispatcher,
+    FleetError,
+    FleetRegistry,
+    select_drone,
+)
+
+SITE = (48.8790, 2.3680)
+
+
+def _mission(lat=SITE[0], lon=SITE[1], min_battery=None, capabilities=None):
+    mission = {
+        "segments": [
+            {"type": "takeoff"},
+            {"type": "move_to", "latitude": lat, "longitude": lon, "altitude": 20},
+            {"type": "land"},
+        ],
+        "safety": {"minBatteryPercent": min_battery} if min_battery is not None else {},
+    }
+    if capabilities:
+        mission["requiredCapabilities"] = capabilities
+    return mission
+
+
+def _fleet():
+    return [
+        DroneRecord("far", "10.0.0.1", home=(SITE[0] + 0.01, SITE[1]), battery_percent=90),
+        DroneRecord("near", "10.0.0.2", home=(SITE[0] + 0.001, SITE[1]), battery_percent=60),
+        DroneRecord("thermal", "10.0.0.3", capabilities=("thermal",), home=(SITE[0] + 0.005, SITE[1])),
+    ]
+
+
+def test_select_nearest_idle_drone():
+    drones = _fleet()
+    assert select_drone(drones, _mission()).id == "near"
+    drones[1].status = "busy"
+    assert select_drone(drones, _mission()).id == "thermal"
+
+
+def test_select_respects_battery_and_capabilities():
+    drones = _fleet()
+    assert select_drone(drones, _mission(min_battery=70)).id == "thermal"  # batterie inconnue acceptée
+    assert select_drone(drones, _mission(capabilities=["thermal"])).id == "thermal"
+    assert select_drone(drones, _mission(capabilities=["lidar"])) is None
+    # L'énergie estimée de la mission est déduite avant de comparer à la réserve
+    mission = dict(_mission(min_battery=25), estimate={"energy_percent": 40.0})
+    drones[2].battery_percent = 50
+    assert select_drone(drones, mission).id == "far"  # 90 - 40 >= 25, 60 - 40 < 25
+
+
+def test_registry_from_env(monkeypatch):
+    monkeypatch.delenv("FLEET_CONFIG", raising=False)
+    monkeypatch.setenv("FLEET_DRONES", "a=10.0.0.1, b=10.0.0.2")
+    registry = FleetRegistry.from_env()
+    assert [d.identity() for d in registry.drones()] == [
+        {"id": "a", "ip": "10.0.0.1"},
+        {"id": "b", "ip": "10.0.0.2"},
+    ]
+    with pytest.raises(FleetError):
+        FleetRegistry([DroneRecord("a", "1"), DroneRecord("a", "2")])
+
+
+def test_missions_run_in_parallel_on_distinct_drones():
+    registry = FleetRegistry(_fleet()[:2])
+    barrier = threading.Barrier(2, timeout=5)
+    assigned = []
+
+    def executor(mission, drone, on_telemetry):
+        assigned.append(drone.id)
+        barrier.wait()  # bloque si les missions étaient sérialisées
+        return {"status": "completed"}
+
+    dispatcher = FleetDispatcher(registry, executor=executor, ready_check=None, assign_timeout_sec=5)
+    futures = [dispatcher.submit(f"m{i}", _mission()) for i in range(2)]
+    reports = [f.result(timeout=10) for f in futures]
+    dispatcher.shutdown()
+    assert sorted(r["drone_id"] for r in reports) == ["far", "near"]
+    assert all(d.status == STATUS_IDLE for d in registry.drones())
+    usage = registry.utilization()["drones"]
+    assert usage["near"]["missions_completed"] == 1
+    assert usage["far"]["missions_completed"] == 1
+
+
+def test_queued_mission_waits_for_released_drone():
+    registry = FleetRegistry([DroneRecord("solo", "10.0.0.1")])
+    order = []
+    dispatcher = FleetDispatcher(
+        registry,
+        executor=lambda mission, drone, on_telemetry: order.append(mission["segments"][1]["latitude"]) or {"status": "completed"},
+        ready_check=None,
+        assign_timeout_sec=5,
+    )
+    futures = [dispatcher.submit(f"m{i}", _mission(lat=SITE[0] + i)) for i in range(3)]
+    assert [f.result(timeout=10)["drone_id"] for f in futures] == ["solo"] * 3
+    dispatcher.shutdown()
+    assert order == [SITE[0], SITE[0] + 1, SITE[0] + 2]
+
+
+def test_unready_drone_is_skipped_then_blocked():
+    registry = FleetRegistry(_fleet()[:2])
+    dispatcher = FleetDispatcher(
+        registry,
+        executor=lambda mission, drone, on_telemetry: {"status": "completed"},
+        ready_check=lambda drone: (drone.id == "far", "no link"),
+        assign_timeout_sec=5,
+    )
+    report = dispatcher.submit("m1", _mission()).result(timeout=10)
+    assert report["drone_id"] == "far"
+    assert registry.get("near").status == STATUS_OFFLINE
+
+    dispatcher._ready_check = lambda drone: (False, "no link")
+    report = dispatcher.submit("m2", _mission()).result(timeout=10)
+    dispatcher.shutdown()
+    assert report["status"] == "blocked"
+
+
+def test_dispatcher_runs_simulated_missions(monkeypatch):
+    monkeypatch.setenv("DRONE_BACKEND", "sim")
+    monkeypatch.setenv("SIM_TIME_FACTOR", "0")
+    registry = FleetRegistry([DroneRecord("sim_1", "sim-1"), DroneRecord("sim_2", "sim-2")])
+    dispatcher = FleetDispatcher(registry, assign_timeout_sec=30)
+    records = []
+    futures = [dispatcher.submit(f"m{i}", _mission(), on_telemetry=records.append) for i in range(4)]
+    reports = [f.result(timeout=60) for f in futures]
+    dispatcher.shutdown()
+    assert all(r["status"] == "completed" for r in reports), [r.get("errors") for r in reports]
+    usage = registry.utilization()["drones"]
+    assert sum(d["missions_completed"] for d in usage.values()) == 4
+    # La télémétrie met à jour batterie et position connues de la flotte
+    assert {r.drone_id for r in records} == {"sim_1", "sim_2"}
+    assert all(d.battery_percent is not None and d.position is not None for d in registry.drones())
+
+
+def test_queued_mission_takes_drone_no_earlier_mission_can_fly():
+    registry = FleetRegistry(_fleet()[1:])
+    release = threading.Event()
+    order = []
+
+    def executor(mission, drone, on_telemetry):
+        order.append((mission["segments"][1]["latitude"], drone.id))
+        if drone.id == "thermal":
+            release.wait(timeout=5)
+        return {"status": "completed"}
+
+    dispatcher = FleetDispatcher(registry, executor=executor, ready_check=None, assign_timeout_sec=5)
+    thermal = [dispatcher.submit(f"t{i}", _mission(lat=SITE[0] + i, capabilities=["thermal"])) for i in range(2)]
+    # t1 attend le drone thermique; la mission suivante prend "near" sans attendre t1
+    plain = dispatcher.submit("p", _mission(lat=SITE[0] + 5)).result(timeout=5)
+    assert plain["drone_id"] == "near" and order[-1] == (SITE[0] + 5, "near")
+    release.set()
+    assert [f.result(timeout=10)["drone_id"] for f in thermal] == ["thermal", "thermal"]
+    dispatcher.shutdown()
+
+
+def test_queued_mission_leaves_drone_to_earlier_eligible_mission():
+    registry = FleetRegistry([DroneRecord("solo", "10.0.0.1")])
+    dispatcher = FleetDispatcher(registry, ready_check=None, assign_timeout_sec=0.05)
+    dispatcher._queue = [("m0", _mission()), ("m1", _mission())]
+    # m0, en tête de file, pourrait voler "solo": m1 n'y touche pas
+    assert dispatcher._acquire("m1", _mission()) == (None, "Timed out waiting for an available drone")
+    assert dispatcher._queue == [("m0", _mission())]
+    assert dispatcher._acquire("m0", _mission())[0].id == "solo"
+    dispatcher.shutdown()
@@ -0,0 +1,47 @@
+"""
+Tests unitaires pour le compilateur de plan de vol MAVLink (mission_planner.flight_plan).
+"""
+
+import pytest
+
+from mission_planner.flight_plan import (
+    MAV_CMD_DO_SET_ROI,
+    MAV_CMD_NAV_LAND,
+    MAV_CMD_NAV_RETURN_TO_LAUNCH,
+    MAV_CMD_NAV_TAKEOFF,
+    MAV_CMD_NAV_WAYPOINT,
+    FlightPlanError,
+    compile_flight_plan,
+)
+
+MISSION = [
+    {"type": "takeoff"},
+    {"type": "move_to", "latitude": 48.8788, "longitude": 2.3681, "altitude": 30, "max_horizontal_speed": 10},
+    {"type": "poi_inspection", "poi_name": "Board", "latitude": 48.8788, "longitude": 2.3681,
+     "altitude": 30, "orbit_radius": 15, "sweep_angle": 180},
+    {"type": "return_to_home"},
+    {"type": "land"},
+]
+
+
+def test_compile_mission_to_waypoint_file():
+    plan = compile_flight_plan(MISSION, start_position=(48.8799, 2.3691))
+    commands = [item.command for item in plan.items]
+    assert commands[0] == MAV_CMD_NAV_TAKEOFF
+    assert commands[-1] == MAV_CMD_NAV_RETURN_TO_LAUNCH
+    # RTL atterrit déjà: pas de NAV_LAND en double
+    assert MAV_CMD_NAV_LAND not in commands
+    assert commands.count(MAV_CMD_DO_SET_ROI) == 2
+    assert commands.count(MAV_CMD_NAV_WAYPOINT) >= 5
+    assert len(plan.segment_items) == len(MISSION)
+
+    lines = plan.to_waypoint_file().splitlines()
+    assert lines[0] == "QGC WPL 110"
+    assert len(lines) == len(plan.items) + 1
+    first = lines[1].split("\t")
+    assert first[1] == "1" and first[3] == str(MAV_CMD_NAV_TAKEOFF)
+
+
+def test_unsupported_segment_is_rejected():
+    with pytest.raises(FlightPlanError):
+        compile_flight_plan([{"type": "takeoff"}, {"type": "loiter"}])
@@ -0,0 +1,122 @@
+"""
+Tests unitaires pour l'enregistreur de vol colonnaire (flight_recorder).
+"""
+
+import math
+import threading
+import zipfile
+
+import numpy as np
+import pytest
+
+import flight_recorder
+from flight_recorder import FlightRecorder, default_recorder_dir, list_flights, load_flight
+from mission_executor import execute_mission
+from mission_planner.voxel_grid import default_cache_dir
+from simulated_drone import DEFAULT_HOME
+from telemetry import TelemetryRecord
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+def _record(t, i, state="flying"):
+    return TelemetryRecord(
+        drone_id="d1", t=t, segment=i // 100, state=state, latitude=48.0 + i * 1e-6, longitude=2.0,
+        altitude=20.0, ground_speed=5.0, vertical_speed=0.0, heading=90.0, battery_percent=None,
+    )
+
+
+def test_chunks_roundtrip_in_one_archive(tmp_path):
+    clock = FakeClock()
+    recorder = FlightRecorder(str(tmp_path), {"missionId": "m/1", "segments": []}, "d1", chunk_rows=64, clock=clock)
+    for i in range(300):
+        clock.now = 1000.0 + i * 0.1
+        recorder.record_telemetry(_record(clock.now, i))
+        if i % 100 == 0:
+            recorder.record_event("segment_start:move_to", i // 100)
+    path = recorder.close({"status": "completed"})
+    with pytest.raises(ValueError):
+        recorder.record_event("late")
+
+    with zipfile.ZipFile(path) as archive:
+        assert sum(1 for n in archive.namelist() if n.endswith("/t.npy")) == 5  # 303 lignes / 64
+    log = load_flight(path)
+    assert len(log) == 303
+    assert log.report == {"status": "completed"}
+    assert log.index["mission_id"] == "m/1"
+    telemetry = log.telemetry()
+    assert telemetry["latitude"].dtype == np.float64
+    assert np.all(np.diff(telemetry["t"]) > 0)
+    assert telemetry["latitude"][-1] == pytest.approx(48.0 + 299e-6)
+    assert math.isnan(telemetry["battery_percent"][0])
+    assert set(log.states()) == {"flying"}
+    events = log.events()
+    assert [e["segment"] for e in events] == [0, 1, 2]
+    assert events[0]["name"] == "segment_start:move_to"
+
+
+def test_full_chunks_are_written_by_the_writer_thread(tmp_path, monkeypatch):
+    writers = []
+    zip_file = zipfile.ZipFile
+
+    def tracking_zip(path, mode="r", *args, **kwargs):
+        writers.append((mode, threading.current_thread()))
+        return zip_file(path, mode, *args, **kwargs)
+
+    monkeypatch.setattr(flight_recorder.zipfile, "ZipFile", tracking_zip)
+    recorder = FlightRecorder(str(tmp_path), {"segments": []}, "d1", chunk_rows=16, clock=FakeClock())
+    for i in range(100):
+        recorder.record_telemetry(_record(i * 0.1, i))
+    path = recorder.close()
+    main = threading.current_thread()
+    # Sur le thread appelant: seulement la création de l'archive et l'index de close()
+    assert [mode for mode, thread in writers if thread is main] == ["w", "a"]
+    assert sum(1 for _, thread in writers if thread is not main) == 7  # 100 lignes / 16
+    assert len(load_flight(path)) == 100
+
+
+def test_default_directories_outside_the_source_tree(tmp_path, monkeypatch):
+    monkeypatch.delenv("FLIGHT_RECORDER_DIR")
+    monkeypatch.delenv("VOXEL_CACHE_DIR")
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    assert default_recorder_dir() == str(tmp_path / "data" / "olympe-web-server" / "flight_logs")
+    assert default_cache_dir() == str(tmp_path / "cache" / "olympe-web-server" / "map_cache")
+    monkeypatch.delenv("XDG_DATA_HOME")
+    monkeypatch.setenv("HOME", str(tmp_path))
+    assert default_recorder_dir() == str(tmp_path / ".local" / "share" / "olympe-web-server" / "flight_logs")
+
+
+def test_executor_records_simulated_mission(flight_recorder_dir, monkeypatch):
+    lat, lon = DEFAULT_HOME
+    mission = {
+        "missionId": "recorded",
+        "segments": [
+            {"type": "takeoff"},
+            {"type": "move_to", "latitude": lat + 0.001, "longitude": lon, "altitude": 20, "max_horizontal_speed": 10},
+            {"type": "land"},
+        ],
+    }
+    monkeypatch.setenv("DRONE_BACKEND", "sim")
+    report = execute_mission(mission)
+    assert report["status"] == "completed", report["errors"]
+    flights = list_flights(str(flight_recorder_dir), mission_id="recorded")
+    assert [f["path"] for f in flights] == [report["flight_log"]]
+    log = load_flight(report["flight_log"])
+    assert log.mission_dsl == mission
+    assert log.report["status"] == "completed"
+    names = [e["name"] for e in log.events()]
+    assert names[0] == "connect"
+    assert names[-1] == "mission_end:completed"
+    assert names.count("segment_end:move_to") == 1
+    # Limité par le débit d'évènements du simulateur (5 Hz) sous FLIGHT_RECORDER_RATE_HZ=10
+    telemetry = log.telemetry()
+    duration = telemetry["t"][-1] - telemetry["t"][0]
+    assert len(telemetry["t"]) >= duration * 4
+    assert log.states()[-1] == "landed"
@@ -0,0 +1,91 @@
+"""
+Tests unitaires pour l'outil de rejeu de vol (flight_replay).
+"""
+
+import json
+
+import pytest
+
+import flight_replay
+from flight_recorder import load_flight
+from flight_replay import (
+    EXIT_CONFIG_ERROR,
+    EXIT_REGRESSION,
+    EXIT_SUCCESS,
+    compare_timings,
+    main,
+    replay_flight,
+    segment_timings,
+    timings_from_report,
+)
+from mission_executor import execute_mission
+from simulated_drone import DEFAULT_HOME
+
+LAT, LON = DEFAULT_HOME
+
+
+@pytest.fixture
+def recorded_flight(monkeypatch):
+    """Vol enregistré sur le simulateur en pass_through (rejoué avec la même politique)."""
+    monkeypatch.setenv("MOVE_ARRIVAL_POLICY", "pass_through")
+    mission = {
+        "missionId": "replay-me",
+        "segments": [
+            {"type": "takeoff"},
+            {"type": "move_to", "latitude": LAT + 0.001, "longitude": LON, "altitude": 20, "max_horizontal_speed": 10},
+            {"type": "move_to", "latitude": LAT + 0.001, "longitude": LON + 0.001, "altitude": 20,
+             "max_horizontal_speed": 10},
+            {"type": "return_to_home"},
+            {"type": "land"},
+        ],
+    }
+    with monkeypatch.context() as m:
+        m.setenv("DRONE_BACKEND", "sim")
+        report = execute_mission(mission)
+    assert report["status"] == "completed", report["errors"]
+    return report["flight_log"]
+
+
+def test_segment_timings_match_report(recorded_flight):
+    log = load_flight(recorded_flight)
+    timings = segment_timings(log)
+    assert [t["type"] for t in timings] == ["takeoff", "move_to", "move_to", "return_to_home", "land"]
+    for timing, seg in zip(timings, log.report["executed_segments"]):
+        assert timing["duration_sec"] == pytest.approx(seg["elapsed_ms"] / 1000.0, abs=0.01)
+
+
+def test_replay_reproduces_and_what_if(recorded_flight):
+    log = load_flight(recorded_flight)
+    recorded = segment_timings(log)
+
+    same = replay_flight(log)
+    assert same["status"] == "completed"
+    assert "flight_log" not in same  # le rejeu n'est pas enregistré par défaut
+    rows = compare_timings(recorded, timings_from_report(same))
+    assert all(abs(r["delta_sec"]) < 0.5 for r in rows)
+
+    # What-if: arrêt stationnaire sur chaque waypoint
+    hover = replay_flight(log, overrides={"MOVE_ARRIVAL_POLICY": "hover"})
+    rows = compare_timings(recorded, timings_from_report(hover))
+    assert rows[1]["type"] == "move_to" and rows[1]["delta_sec"] > 0
+
+
+def test_cli_exit_codes(recorded_flight, capsys):
+    assert main([recorded_flight, "--max-regression-pct", "5"]) == EXIT_SUCCESS
+    assert main([recorded_flight, "--set", "MOVE_ARRIVAL_POLICY=hover", "--max-regression-pct", "5"]) == EXIT_REGRESSION
+    capsys.readouterr()
+    assert main([recorded_flight, "--json"]) == EXIT_SUCCESS
+    output = json.loads(capsys.readouterr().out)
+    assert output["status"] == "completed"
+    assert len(output["segments"]) == 5
+    # Erreurs de configuration: code 125, le commit est ignoré par `git bisect run`
+    assert main([recorded_flight, "--set", "NOT_A_PAIR"]) == EXIT_CONFIG_ERROR == 125
+
+
+def test_cli_skips_commit_when_replay_cannot_run(recorded_flight, monkeypatch):
+    def broken(*args, **kwargs):
+        raise ImportError("simulated_drone")
+
+    monkeypatch.setattr(flight_replay, "replay_flight", broken)
+    assert main([recorded_flight]) == EXIT_CONFIG_ERROR
+    assert main(["missing.flight"]) == EXIT_CONFIG_ERROR
@@ -0,0 +1,34 @@
+"""
+Tests unitaires pour les helpers géodésiques partagés (geodesy).
+"""
+
+import numpy as np
+import pytest
+
+from geodesy import (
+    bearing_array, bearing_deg, destination_array, destination_point, haversine_array, haversine_m, haversine_matrix,
+)
+from tests.conftest import HOME
+
+
+def test_haversine_matrix_matches_scalar():
+    lats = np.array([48.87, 48.88, 48.90])
+    lons = np.array([2.36, 2.37, 2.35])
+    dist = haversine_matrix(lats, lons)
+    assert dist.shape == (3, 3)
+    assert dist[0, 2] == pytest.approx(haversine_m(48.87, 2.36, 48.90, 2.35))
+    assert np.allclose(dist, dist.T)
+    assert haversine_matrix(lats[:1], lons[:1], lats, lons).shape == (1, 3)
+
+
+def test_array_variants_match_scalar():
+    rng = np.random.default_rng(5)
+    lat, lon = rng.uniform(48.8, 48.9, 200), rng.uniform(2.3, 2.4, 200)
+    bearing, dist = rng.uniform(0, 360, 200), rng.uniform(0, 2000, 200)
+    lat2, lon2 = destination_array(lat, lon, bearing, dist)
+    for i in range(0, 200, 20):
+        assert (lat2[i], lon2[i]) == pytest.approx(destination_point(lat[i], lon[i], bearing[i], dist[i]), abs=1e-12)
+        assert bearing_array(lat[i], lon[i], lat2[i], lon2[i]) == pytest.approx(bearing_deg(lat[i], lon[i], lat2[i], lon2[i]))
+    assert np.allclose(haversine_array(lat, lon, lat2, lon2), dist)
+    # Diffusion: un point contre plusieurs
+    assert haversine_array(HOME[0], HOME[1], lat, lon).shape == (200,)
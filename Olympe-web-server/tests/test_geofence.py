@@ -0,0 +1,132 @@
+"""
+Tests unitaires pour le moteur de geofence (mission_planner.geofence).
+"""
+
+import pytest
+
+from geodesy import destination_point
+from mission_executor import execute_mission
+from mission_planner.geofence import GeofenceEngine, check_mission_geofence, get_geofence_engine
+from tests.conftest import HOME, RTH_LAND, at, build_map, build_mission, local, move_to
+
+
+def _square(center, half_m):
+    """Carré (lat, lon) de demi-côté half_m autour de center."""
+    x, y = local(*center)
+    corners = [(x - half_m, y - half_m), (x + half_m, y - half_m), (x + half_m, y + half_m), (x - half_m, y + half_m)]
+    return [list(at(cx, cy)) for cx, cy in corners]
+
+
+def _map(*boundaries):
+    return build_map(boundaries=boundaries, default_max_altitude_meters=80)
+
+
+def _mission(*segments, enabled=True):
+    return build_mission(*segments, ending=RTH_LAND, missionId="geofence-test",
+                   safety={"geofence": {"enabled": enabled}, "maxAltitudeMeters": 80})
+
+
+BOX_CENTER = destination_point(*HOME, 180.0, 200.0)
+BOX = {"name": "Box", "type": "restricted", "boundary_type": "polygon",
+       "coordinates": _square(BOX_CENTER, 50.0), "max_altitude_meters": 15.0}
+
+
+def test_leg_crossing_zone_is_detected_between_waypoints():
+    # Les deux points sont hors de la zone: seul le segment droit la traverse
+    beyond = destination_point(*HOME, 180.0, 400.0)
+    engine = GeofenceEngine(_map(BOX))
+    violations = engine.check(_mission(move_to(beyond, 10))["segments"], HOME)
+    assert [(v["segment"], v["zone"]) for v in violations] == [(1, "Box")]
+    # Point d'entrée: bord nord de la boîte, 150 m au sud du départ
+    x, y = local(violations[0]["latitude"], violations[0]["longitude"])
+    assert y == pytest.approx(-150.0, abs=0.5) and abs(x) < 0.5
+    # Montée en diagonale de 1 m à 10 m: entre dans la boîte à 4.4 m
+    assert violations[0]["altitude"] == pytest.approx(1.0 + 9.0 * 150.0 / 400.0, abs=0.1)
+    # Montée verticale puis survol au-dessus du plafond: rien à signaler
+    assert engine.check(_mission(move_to(HOME, 20), move_to(beyond, 20))["segments"], HOME) == []
+
+
+def test_circle_and_no_fly_zone_are_not_repaired():
+    circle = {"name": "Tower", "type": "no_fly_zone", "boundary_type": "circle",
+              "coordinates": [list(BOX_CENTER)], "radius_meters": 30.0}
+    checked = check_mission_geofence(_mission(move_to(BOX_CENTER, 60)), _map(circle), HOME)
+    report = checked["geofence"]
+    assert not report["ok"] and report["repairs"] == []
+    # Aller (segment 1) et retour RTH depuis la zone (segment 2)
+    assert {v["segment"] for v in report["violations"]} == {1, 2}
+    # Zone limitée en altitude: survol autorisé au-dessus de max_altitude_meters
+    low = dict(circle, max_altitude_meters=40.0)
+    assert check_mission_geofence(_mission(move_to(BOX_CENTER, 60)), _map(low), HOME)["geofence"]["ok"]
+
+
+def test_restricted_zone_repaired_by_altitude_and_climb():
+    mission = _mission(
+        move_to(BOX_CENTER, 10),
+        {"type": "poi_inspection", "poi_name": "Board", "latitude": BOX_CENTER[0], "longitude": BOX_CENTER[1], "altitude": 20},
+    )
+    checked = check_mission_geofence(mission, _map(BOX), HOME)
+    report = checked["geofence"]
+    assert report["ok"], report["violations"]
+    assert [r["rule"] for r in report["repairs"]] == ["raise_altitude", "insert_climb"]
+    types = [s["type"] for s in checked["segments"]]
+    assert types == ["takeoff", "move_to", "move_to", "poi_inspection", "return_to_home", "land"]
+    climb, target = checked["segments"][1], checked["segments"][2]
+    assert (climb["latitude"], climb["longitude"], climb["altitude"]) == pytest.approx((HOME[0], HOME[1], 17.0))
+    assert climb["hover"] is True
+    assert target["altitude"] == 17.0
+    assert mission["segments"][1]["altitude"] == 10  # entrée non modifiée
+    # Plafond de mission trop bas pour survoler: refus
+    mission["safety"]["maxAltitudeMeters"] = 16
+    assert not check_mission_geofence(mission, _map(BOX), HOME)["geofence"]["ok"]
+
+
+def test_inserted_climb_is_flown_before_crossing(sim_track, monkeypatch):
+    # Zone restreinte 0-15 m à 10 m au sud du départ, montée lente; passage en pass_through
+    monkeypatch.setenv("MOVE_ARRIVAL_POLICY", "pass_through")
+    near = {"name": "Near Box", "type": "restricted", "boundary_type": "polygon",
+            "coordinates": _square(at(0.0, -60.0), 50.0), "max_altitude_meters": 15.0}
+    mission = _mission(move_to(at(0.0, -400.0), 20, max_horizontal_speed=15, max_vertical_speed=1))
+    checked = check_mission_geofence(mission, _map(near), HOME)
+    assert checked["geofence"]["ok"] and [r["rule"] for r in checked["geofence"]["repairs"]] == ["insert_climb"]
+    report = execute_mission(checked, execution_mode="segments")
+    assert report["status"] == "completed", report["errors"]
+    # Dans l'emprise de la zone, le drone vole au-dessus de son plafond
+    inside = [alt for east, north, alt in sim_track if abs(east) <= 50.0 and -110.0 <= north <= -10.0]
+    assert inside and min(inside) > 15.0
+
+
+def test_geofence_area_and_ceiling():
+    area = {"name": "Site", "type": "geofence", "boundary_type": "polygon",
+            "coordinates": _square(HOME, 300.0), "max_altitude_meters": 50.0}
+    inside = destination_point(*HOME, 90.0, 200.0)
+    outside = destination_point(*HOME, 90.0, 500.0)
+    engine = GeofenceEngine(_map(area))
+    assert engine.check(_mission(move_to(inside, 30))["segments"], HOME) == []
+    violations = engine.check(_mission(move_to(outside, 30))["segments"], HOME)
+    assert [(v["segment"], v["reason"]) for v in violations] == [(1, "leaves the geofence"), (2, "leaves the geofence")]
+    checked = check_mission_geofence(_mission(move_to(inside, 70)), _map(area), HOME)
+    assert checked["geofence"]["ok"]
+    assert checked["geofence"]["repairs"][0]["rule"] == "lower_altitude"
+    assert checked["segments"][1]["altitude"] == 50.0
+
+
+def test_disabled_geofence_and_engine_cache():
+    world_map = _map(BOX)
+    checked = check_mission_geofence(_mission(move_to(BOX_CENTER, 10), enabled=False), world_map, HOME)
+    assert checked["geofence"] == {"ok": True, "checked": False, "repairs": [], "violations": []}
+    assert get_geofence_engine(world_map) is get_geofence_engine(dict(world_map))
+
+
+def test_many_zones_checked_in_bulk():
+    # 400 zones en grille: seules les zones proches du trajet sont testées exactement
+    zones = []
+    for i in range(20):
+        for j in range(20):
+            center = at(-1000.0 + 100.0 * i, -1000.0 + 100.0 * j)
+            zones.append({"name": f"Z{i}-{j}", "type": "no_fly_zone", "boundary_type": "polygon",
+                          "coordinates": _square(center, 10.0), "max_altitude_meters": 30.0})
+    engine = GeofenceEngine(_map(*zones))
+    assert len(engine.index.query(-5.0, -5.0, 5.0, 5.0)) < 10
+    target = at(0.0, -1000.0)
+    violations = engine.check(_mission(move_to(target, 20))["segments"], HOME)
+    assert {v["zone"] for v in violations} == {f"Z10-{j}" for j in range(11)}
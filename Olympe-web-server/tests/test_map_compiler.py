@@ -0,0 +1,84 @@
+"""
+Tests unitaires pour le compilateur de cartes binaires (mission_planner.map_compiler).
+"""
+
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+import mission_planner.map_compiler as map_compiler
+from mission_planner.clearance import check_mission_clearance
+from mission_planner.geofence import get_geofence_engine
+from mission_planner.legs import map_key
+from mission_planner.map_compiler import CompiledMap, load_compiled_map, load_map
+from mission_planner.path_planner import plan_mission_paths
+from mission_planner.spatial_index import SpatialIndex, get_spatial_index
+from tests.conftest import HOME, MAP_FILE, at, build_map, build_mission, move_to, poi
+
+
+def test_industrial_city_round_trip_and_prebuilt_index(industrial_city, voxel_cache_dir):
+    world_map = industrial_city
+    compiled = load_map(str(MAP_FILE))
+    assert isinstance(compiled, CompiledMap)
+    assert list(voxel_cache_dir.glob("*.map")) == [voxel_cache_dir / f"{compiled.source_hash}.map"]
+    # Même contenu que le JSON, clés dans le même ordre
+    assert compiled.to_dict() == world_map and list(compiled) == list(world_map)
+    assert compiled["points_of_interest"][-1] == world_map["points_of_interest"][-1]
+    assert compiled.get("calibration") == world_map["calibration"]
+    # Rechargement: même objet en mémoire, sinon fichier mappé sans recompiler
+    assert load_map(str(MAP_FILE)) is compiled
+    map_compiler._MAPS.clear()
+    reloaded = load_map(str(MAP_FILE))
+    assert reloaded is not compiled and isinstance(reloaded.arrays["index.x"], np.memmap)
+    # Les caches des planificateurs reconnaissent la carte compilée comme le JSON
+    sections = ("points_of_interest", "obstacles", "boundaries", "starting_position")
+    assert map_key(reloaded, sections) == map_key(world_map, sections)
+    assert get_geofence_engine(reloaded) is get_geofence_engine(world_map)
+    index, reference = reloaded.spatial_index(), SpatialIndex(world_map)
+    start = world_map["starting_position"]["coordinates"]
+    assert [(round(d, 6), f.name) for d, f in index.nearest(start["latitude"], start["longitude"], k=4)] == \
+        [(round(d, 6), f.name) for d, f in reference.nearest(start["latitude"], start["longitude"], k=4)]
+    assert index.lookup("ventilaton pipes").data == world_map["points_of_interest"][
+        [p["name"] for p in world_map["points_of_interest"]].index("Ventilation Pipes")]
+
+
+def test_edit_invalidates_and_corrupt_file_is_recompiled(tmp_path, voxel_cache_dir, monkeypatch):
+    path = tmp_path / "site.json"
+    shutil.copy(MAP_FILE, path)
+    first = load_map(str(path))
+    world_map = first.to_dict()
+    world_map["points_of_interest"].append(poi("Nouveau Mât", 30.0, 40.0))
+    path.write_text(json.dumps(world_map, indent=2, ensure_ascii=False), encoding="utf-8")
+    monkeypatch.setenv("MAP_CACHE_SIZE", "1")
+    edited = load_map(str(path))
+    assert edited.source_hash != first.source_hash and len(list(voxel_cache_dir.glob("*.map"))) == 2
+    # Cache LRU borné: seule la dernière carte reste mappée en mémoire
+    assert list(map_compiler._MAPS.values()) == [edited]
+    assert edited["points_of_interest"][-1]["name"] == "Nouveau Mât"
+    assert edited.spatial_index().lookup("nouveau mat").kind == "poi"
+    # Fichier compilé tronqué: ignoré puis réécrit
+    target = Path(edited.path)
+    target.write_bytes(target.read_bytes()[:100])
+    assert load_compiled_map(str(target)) is None
+    map_compiler._MAPS.clear()
+    assert load_map(str(path)).to_dict() == world_map
+    # Cache désactivé: le JSON est lu directement
+    monkeypatch.setenv("VOXEL_CACHE_DIR", "")
+    assert load_map(str(path)) == world_map
+
+
+def test_planners_accept_compiled_map(tmp_path):
+    lat, lon = at(0.0, 100.0)
+    world_map = build_map(obstacles=[{"name": "Wall", "type": "building", "height_meters": 25.0, "width_meters": 60.0,
+                                      "length_meters": 10.0,
+                                      "coordinates": {"latitude": lat, "longitude": lon, "altitude_meters": 0.0}}])
+    path = tmp_path / "wall.json"
+    path.write_text(json.dumps(world_map), encoding="utf-8")
+    compiled = load_map(str(path))
+    mission = build_mission(move_to(at(0.0, 200.0), 10.0))
+    conflicts = check_mission_clearance(mission, compiled, HOME)["clearance"]["conflicts"]
+    assert conflicts and conflicts == check_mission_clearance(mission, world_map, HOME)["clearance"]["conflicts"]
+    assert plan_mission_paths(mission, compiled, HOME)["segments"] == plan_mission_paths(mission, world_map, HOME)["segments"]
+    assert get_spatial_index(compiled) is get_spatial_index(world_map)
@@ -0,0 +1,137 @@
+"""
+Tests unitaires pour le stockage de la carte en tuiles (mission_planner.map_tiles).
+"""
+
+import json
+import os
+from types import SimpleNamespace
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import fastapi_entrypoint
+from fleet import DroneRecord, FleetRegistry
+from mission_planner.clearance import check_mission_clearance
+from mission_planner.geofence import check_mission_geofence
+from mission_planner.legs import MapCache
+from mission_planner.map_tiles import TileStore, build_tile_store, get_tile_store
+from mission_planner.path_planner import plan_mission_paths
+from tests.conftest import HOME, at, build_map, build_mission, local, move_to, poi
+
+
+def _site(n=2000, half_m=3000.0):
+    """Site de 6 km x 6 km: POI et obstacles aléatoires, une zone interdite à cheval sur plusieurs tuiles."""
+    rng = np.random.default_rng(5)
+    points = rng.uniform(-half_m, half_m, (n, 2))
+    pois = [poi(f"P{k}", *p) for k, p in enumerate(points[: n // 2])]
+    obstacles = [dict(poi(f"B{k}", *p), type="building", height_meters=30.0, radius_meters=8.0)
+                 for k, p in enumerate(points[n // 2:])]
+    nfz = {"name": "NFZ", "type": "no_fly_zone", "boundary_type": "circle", "radius_meters": 400.0,
+           "coordinates": [list(at(250.0, 250.0))]}
+    return build_map(pois, obstacles, [nfz], name="Site")
+
+
+def _mission(*targets, altitude=20.0):
+    return build_mission(*(move_to(t, altitude) for t in targets),
+                         ending=({"type": "return_to_home", "ending_behavior": "landing"},))
+
+
+def _local(feature):
+    return local(feature["coordinates"]["latitude"], feature["coordinates"]["longitude"])
+
+
+def test_mission_loads_only_touched_tiles(tmp_path):
+    site = _site()
+    manifest = build_tile_store(site, str(tmp_path), tile_m=500.0)
+    assert len(manifest["tiles"]) >= 144
+    store = TileStore(str(tmp_path), cache_tiles=8)
+    mission = _mission(at(300.0, -200.0), at(600.0, 100.0))
+    region = store.mission_map(mission, HOME, margin_m=100.0)
+    # Boîte des tronçons élargie (-100..700 x -300..200) -> 3 x 2 tuiles sur au moins 144
+    assert store.cached_tiles == [(-1, -1), (-1, 0), (0, -1), (0, 0), (1, -1), (1, 0)] and store.loads == 6
+    assert region["name"] == "Site" and region["boundaries"] == site["boundaries"]
+    names = {p["name"] for p in region["points_of_interest"]}
+    assert 0 < len(names) < len(site["points_of_interest"]) // 10
+    # Toutes les entités de la boîte élargie sont présentes, dans l'ordre de la carte
+    inside = [p["name"] for p in site["points_of_interest"]
+              if -100.0 <= _local(p)[0] <= 700.0 and -300.0 <= _local(p)[1] <= 200.0]
+    assert set(inside) <= names
+    assert [p["name"] for p in region["points_of_interest"]] == sorted(names, key=lambda n: int(n[1:]))
+    # Mêmes verdicts que sur la carte complète
+    for check in (check_mission_clearance, check_mission_geofence):
+        report = check(mission, region, HOME)
+        full = check(mission, site, HOME)
+        key = "clearance" if check is check_mission_clearance else "geofence"
+        assert report[key]["ok"] == full[key]["ok"]
+        assert report[key].get("conflicts", report[key].get("violations")) == full[key].get("conflicts", full[key].get("violations"))
+    # Même mission: tuiles servies par le cache; position lointaine: LRU borné
+    store.mission_map(mission, HOME, margin_m=100.0)
+    assert store.loads == 6 and store.hits == 6
+    store.around(*at(2700.0, 2700.0), radius_m=400.0)
+    assert len(store.cached_tiles) == 8 and (-1, -1) not in store.cached_tiles and (5, 5) in store.cached_tiles
+    # Toutes les tuiles: la carte d'origine
+    assert TileStore(str(tmp_path)).region(-1e6, -1e6, 1e6, 1e6) == site
+
+
+def test_rebuild_refreshes_shared_store(tmp_path, monkeypatch):
+    site = _site(n=200, half_m=900.0)
+    build_tile_store(site, str(tmp_path), tile_m=500.0)
+    monkeypatch.delenv("MAP_TILES_DIR", raising=False)
+    assert get_tile_store() is None
+    monkeypatch.setenv("MAP_TILES_DIR", str(tmp_path))
+    store = get_tile_store()
+    assert store is get_tile_store() and len(store.around(*HOME)["obstacles"]) > 0
+    # Carte réduite au voisinage du départ: les tuiles disparues sont supprimées
+    site["points_of_interest"] = site["points_of_interest"][:3]
+    site["obstacles"] = []
+    site["boundaries"] = []
+    manifest = build_tile_store(site, str(tmp_path), tile_m=500.0)
+    os.utime(tmp_path / "manifest.json", ns=(1, 1))
+    assert get_tile_store() is store and store.cached_tiles == []
+    assert sorted(os.listdir(tmp_path / "tiles")) == sorted(f"{key}.json" for key in manifest["tiles"])
+    assert store.region(-1e6, -1e6, 1e6, 1e6) == site
+    assert json.loads((tmp_path / "manifest.json").read_text(encoding="utf-8"))["meta"]["name"] == "Site"
+
+
+def test_tile_regions_keep_voxel_grids_in_memory(tmp_path, monkeypatch, voxel_cache_dir):
+    site = _site(n=200, half_m=900.0)
+    build_tile_store(site, str(tmp_path / "tiles"), tile_m=500.0)
+    monkeypatch.setenv("MAP_TILES_DIR", str(tmp_path / "tiles"))
+    mission = _mission(at(300.0, -200.0), at(-400.0, 500.0))
+    planned = fastapi_entrypoint._optimize_mission(mission)
+    assert "path_planner" in planned["optimizations"]
+    # Une région par mission: aucune grille écrite dans VOXEL_CACHE_DIR
+    assert not voxel_cache_dir.exists() or list(voxel_cache_dir.iterdir()) == []
+    # Carte complète: grille compilée une fois et gardée sur disque
+    plan_mission_paths(mission, site, HOME)
+    assert len(list(voxel_cache_dir.glob("*.voxels.npy"))) == 1
+
+
+def test_drone_map_endpoint_serves_tiles_around_drone(tmp_path, monkeypatch):
+    site = _site(n=200, half_m=900.0)
+    build_tile_store(site, str(tmp_path), tile_m=500.0)
+    registry = FleetRegistry([DroneRecord(id="d1", ip="10.0.0.1", home=HOME), DroneRecord(id="d2", ip="10.0.0.2")])
+    monkeypatch.setattr(fastapi_entrypoint, "get_fleet_dispatcher", lambda: SimpleNamespace(registry=registry))
+    client = TestClient(fastapi_entrypoint.app)
+    monkeypatch.delenv("MAP_TILES_DIR", raising=False)
+    assert client.get("/fleet/d1/map").status_code == 404
+    monkeypatch.setenv("MAP_TILES_DIR", str(tmp_path))
+    store = get_tile_store()
+    # Sans télémétrie: autour du point de départ; ensuite: dernière position connue
+    body = client.get("/fleet/d1/map", params={"radius_m": 100.0}).json()
+    assert body["position"] == list(HOME) and body["map"] == store.around(*HOME, radius_m=100.0)
+    registry.update_state("d1", 80.0, at(600.0, 600.0))
+    body = client.get("/fleet/d1/map", params={"radius_m": 100.0}).json()
+    assert body["position"] == list(at(600.0, 600.0))
+    assert body["map"] == store.around(*at(600.0, 600.0), radius_m=100.0) != store.around(*HOME, radius_m=100.0)
+    assert client.get("/fleet/d2/map").status_code == 409
+    assert client.get("/fleet/d9/map").status_code == 404
+
+
+def test_map_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setenv("MAP_CACHE_SIZE", "2")
+    cache = MapCache()
+    cache["a"], cache["b"] = 1, 2
+    assert cache.get("a") == 1
+    cache["c"] = 3
+    assert list(cache) == ["a", "c"] and cache.get("b") is None
@@ -0,0 +1,76 @@
+"""
+Tests unitaires pour le recalage des cibles poi_inspection sur la carte (natural_language_processor).
+"""
+
+import copy
+
+import pytest
+
+import natural_language_processor
+from geodesy import destination_point, haversine_m
+from natural_language_processor import NaturalLanguageProcessor
+from tests.conftest import MAP_FILE, build_mission, move_to
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    monkeypatch.setattr(natural_language_processor, "get_mistral_socket", lambda: None)
+    return NaturalLanguageProcessor(str(MAP_FILE))
+
+
+@pytest.fixture
+def pois(industrial_city):
+    return {p["name"]: (p["coordinates"]["latitude"], p["coordinates"]["longitude"])
+            for p in industrial_city["points_of_interest"]}
+
+
+def _inspection(name, point):
+    return build_mission(
+        move_to(point, 30),
+        {"type": "poi_inspection", "poi_name": name, "latitude": point[0], "longitude": point[1], "altitude": 30},
+    )
+
+
+def _target(mission):
+    move, inspection = mission["segments"][1:3]
+    return inspection["poi_name"], (inspection["latitude"], inspection["longitude"]), (move["latitude"], move["longitude"])
+
+
+def test_exact_name_snaps_target_and_leading_move(processor, pois):
+    pipes = pois["Ventilation Pipes"]
+    off = destination_point(*pipes, 90.0, 20.0)
+    name, target, move = _target(processor._resolve_pois(_inspection("ventilation  PIPES", off)))
+    assert name == "Ventilation Pipes" and target == move == pytest.approx(pipes)
+    # Nom exact loin des coordonnées du modèle: le nom fait foi, le move_to ailleurs n'est pas touché
+    mission = _inspection("Ventilation Pipes", destination_point(*pipes, 90.0, 500.0))
+    mission["segments"][1].update(latitude=0.0, longitude=0.0)
+    name, target, move = _target(processor._resolve_pois(mission))
+    assert target == pytest.approx(pipes) and move == (0.0, 0.0)
+
+
+def test_proximity_snaps_and_confirms_misspelled_name(processor, pois):
+    board = pois["Advertising Board"]
+    near = destination_point(*board, 0.0, 10.0)
+    assert _target(processor._resolve_pois(_inspection("Billboard", near)))[0] == "Advertising Board"
+    name, target, move = _target(processor._resolve_pois(_inspection("Advertsing Board", near)))
+    assert name == "Advertising Board" and target == move == pytest.approx(board)
+
+
+def test_close_name_far_from_its_poi_is_rejected(processor, pois):
+    # Carrefour inventé à ~290 m du carrefour au nom voisin: ni déplacé, ni renommé
+    mission = _inspection("Main Ave & Georgia St Junction", (48.8770, 2.3700))
+    before = copy.deepcopy(mission)
+    with pytest.raises(ValueError, match="Main Ave & Francis St Junction"):
+        processor._resolve_pois(mission)
+    assert mission == before
+    # Nom voisin d'un POI, coordonnées sur un autre: rejeté aussi
+    board = pois["Advertising Board"]
+    with pytest.raises(ValueError):
+        processor._resolve_pois(_inspection("Ventilaton Pipes", board))
+
+
+def test_unknown_target_off_map_is_left_unchanged(processor, pois):
+    far = destination_point(*pois["Advertising Board"], 180.0, 2000.0)
+    mission = _inspection("Water Tower", far)
+    name, target, move = _target(processor._resolve_pois(mission))
+    assert name == "Water Tower" and haversine_m(*target, *far) < 1e-6 and move == target
@@ -0,0 +1,70 @@
+"""
+Tests unitaires pour le planificateur d'orbite (mission_planner.orbit).
+"""
+
+import math
+
+import pytest
+
+from geodesy import bearing_deg, destination_point, haversine_m
+from mission_planner.compiled import compile_mission
+from mission_planner.orbit import (
+    SweepTracker,
+    is_geometric_orbit,
+    orbit_parameters,
+    plan_orbit,
+    radius_hold_pitch,
+)
+
+
+def test_plan_orbit_duration_matches_arc_length():
+    plan = plan_orbit(15.0, 360.0, 3.0, full_roll_speed_mps=12.0)
+    assert plan.roll_percent == 25
+    assert plan.ground_speed_mps == pytest.approx(3.0)
+    assert plan.duration_sec == pytest.approx(2 * math.pi * 15.0 / 3.0)
+    assert plan.timeout_sec > plan.duration_sec
+
+
+def test_plan_orbit_rejects_invalid_geometry():
+    with pytest.raises(ValueError):
+        plan_orbit(0.0)
+    with pytest.raises(ValueError):
+        plan_orbit(10.0, sweep_deg=-90.0)
+
+
+def test_sweep_tracker_unwraps_through_north():
+    poi = (48.8788, 2.3681)
+    tracker = SweepTracker()
+    swept = 0.0
+    # Tour de 400° dans le sens anti-horaire en partant du sud
+    for step in range(0, 401, 10):
+        lat, lon = destination_point(poi[0], poi[1], (180.0 - step) % 360.0, 15.0)
+        assert haversine_m(poi[0], poi[1], lat, lon) == pytest.approx(15.0, abs=0.01)
+        swept = tracker.update(bearing_deg(poi[0], poi[1], lat, lon))
+    assert swept == pytest.approx(400.0, abs=0.5)
+
+
+def test_radius_hold_pitch_is_bounded():
+    assert radius_hold_pitch(15.0, 15.0) == 0
+    assert radius_hold_pitch(18.0, 15.0) > 0
+    assert radius_hold_pitch(100.0, 15.0) == 20
+
+
+def test_orbit_rule_shared_with_compiler():
+    segments = [
+        {"type": "poi_inspection", "latitude": 48.88, "longitude": 2.37, "altitude": 20},
+        {"type": "poi_inspection", "latitude": 48.88, "longitude": 2.37, "altitude": 20, "offset_distance": 25,
+         "ground_speed": 5},
+        {"type": "poi_inspection", "latitude": 48.88, "longitude": 2.37, "altitude": 20, "orbit_radius": 10,
+         "offset_distance": 25, "rotation_duration": 30, "sweep_angle": 180},
+        {"type": "poi_inspection", "latitude": 48.88, "longitude": 2.37, "altitude": 20, "rotation_duration": 30},
+        {"type": "poi_inspection", "latitude": 48.88, "longitude": 2.37, "altitude": 20, "offset_distance": 25,
+         "roll_rate": 40},
+    ]
+    assert [orbit_parameters(s) for s in segments[:3]] == [(15.0, 360.0, 3.0), (25.0, 360.0, 5.0), (10.0, 180.0, 3.0)]
+    # Sans sweep_angle, orbit_radius ni ground_speed: orbite minutée historique
+    assert [is_geometric_orbit(s) for s in segments] == [False, True, True, False, False]
+    # Le compilateur applique les mêmes règles
+    compiled = compile_mission({"segments": [{"type": "takeoff"}] + segments}).segments[1:]
+    assert [(c.geometric, c.orbit_radius) for c in compiled] == \
+        [(is_geometric_orbit(s), orbit_parameters(s)[0]) for s in segments]
@@ -0,0 +1,94 @@
+"""
+Tests unitaires pour le planificateur de trajets 3D (mission_planner.path_planner).
+"""
+
+import pytest
+
+from mission_executor import execute_mission
+from mission_planner.clearance import check_mission_clearance
+from mission_planner.geofence import check_mission_geofence
+from mission_planner.path_planner import get_path_planner, plan_mission_paths
+from tests.conftest import HOME, at, build_map, build_mission, move_to
+
+
+def _wall(width, height=25.0, north=100.0):
+    lat, lon = at(0.0, north)
+    return {"name": "Wall", "type": "building", "height_meters": height, "width_meters": width, "length_meters": 10.0,
+            "coordinates": {"latitude": lat, "longitude": lon, "altitude_meters": 0.0}}
+
+
+def _mission(altitude=10.0):
+    return build_mission(
+        move_to(HOME, altitude),
+        move_to(at(0.0, 200.0), altitude, max_horizontal_speed=10),
+        missionId="planner-test",
+        safety={"geofence": {"enabled": True}, "maxAltitudeMeters": 80},
+    )
+
+
+def _is_safe(mission, world_map):
+    return (check_mission_clearance(mission, world_map, HOME)["clearance"]["ok"]
+            and check_mission_geofence(mission, world_map, HOME, repair=False)["geofence"]["ok"])
+
+
+def test_short_wall_detour_at_same_altitude():
+    world_map = build_map(obstacles=[_wall(60.0)])
+    assert not _is_safe(_mission(), world_map)
+    planned = plan_mission_paths(_mission(), world_map, HOME)
+    change = planned["optimizations"]["path_planner"]["changes"][0]
+    assert change["segment"] == 2 and change["level_m"] == 10.0
+    assert 200.0 < change["route_m"] < 240.0
+    inserted = planned["segments"][2:-2]
+    assert len(inserted) == change["waypoints"]
+    assert all(s["altitude"] == 10.0 and s["max_horizontal_speed"] == 10 for s in inserted)
+    assert planned["segments"][-2] == _mission()["segments"][2]
+    assert _is_safe(planned, world_map)
+
+
+def test_wide_wall_climbed_over_at_lowest_level():
+    world_map = build_map(obstacles=[_wall(600.0)])
+    planned = plan_mission_paths(_mission(), world_map, HOME)
+    change = planned["optimizations"]["path_planner"]["changes"][0]
+    # Sommet 25 m + marge de 5 m: niveau le plus bas au-dessus du mur
+    assert change["level_m"] == pytest.approx(30.0)
+    assert [s["altitude"] for s in planned["segments"][1:-1]] == [10.0, 30.0, 30.0, 10.0]
+    # Fin de montée et début de descente: arrêt sur le point
+    assert [s.get("hover", False) for s in planned["segments"][1:-1]] == [False, True, True, False]
+    assert _is_safe(planned, world_map)
+
+
+def test_planned_climb_is_flown_above_the_wall(sim_track, monkeypatch):
+    # Mur de 40 m à 20 m du départ, montée lente; passage en pass_through, le cas le plus serré
+    monkeypatch.setenv("MOVE_ARRIVAL_POLICY", "pass_through")
+    world_map = build_map(obstacles=[_wall(3000.0, height=40.0, north=20.0)])
+    mission = build_mission(move_to(HOME, 10.0),
+                            move_to(at(0.0, 200.0), 10.0, max_horizontal_speed=15, max_vertical_speed=1))
+    planned = plan_mission_paths(mission, world_map, HOME)
+    assert _is_safe(planned, world_map)
+    report = execute_mission(planned, execution_mode="segments")
+    assert report["status"] == "completed", report["errors"]
+    # Au-dessus de l'emprise du mur (10 m de long), le drone est plus haut que lui
+    crossing = [alt for east, north, alt in sim_track if abs(north - 20.0) <= 5.0 and abs(east) <= 1500.0]
+    assert crossing and min(crossing) > 40.0
+
+
+def test_no_fly_zone_detour_and_clear_leg_unchanged():
+    corners = [(-30.0, 80.0), (30.0, 80.0), (30.0, 120.0), (-30.0, 120.0)]
+    zone = {"name": "NFZ", "type": "no_fly_zone", "boundary_type": "polygon", "coordinates": [list(at(*c)) for c in corners]}
+    world_map = build_map(boundaries=[zone])
+    planned = plan_mission_paths(_mission(), world_map, HOME)
+    assert planned["optimizations"]["path_planner"]["rerouted_legs"] == 1
+    assert _is_safe(planned, world_map)
+    # Rien sur le trajet: mission inchangée
+    clear = plan_mission_paths(_mission(), build_map(), HOME)
+    assert clear["segments"] == _mission()["segments"]
+    assert clear["optimizations"]["path_planner"]["rerouted_legs"] == 0
+
+
+def test_planner_and_layers_cached_perbuild_map():
+    world_map = build_map(obstacles=[_wall(60.0)])
+    planner = get_path_planner(world_map)
+    plan_mission_paths(_mission(), world_map, HOME)
+    assert get_path_planner(dict(world_map)) is planner
+    assert 10 in planner.voxels._layers  # couche 10-11 m
+    assert get_path_planner(build_map(obstacles=[_wall(80.0)])) is not planner
@@ -0,0 +1,78 @@
+"""
+Tests unitaires pour l'optimiseur peephole du DSL de mission (mission_planner.peephole).
+"""
+
+from geodesy import destination_point
+from mission_executor import execute_mission
+from mission_planner.peephole import format_diff, optimize_mission_segments, optimize_segments
+from simulated_drone import DEFAULT_HOME
+
+LAT, LON = DEFAULT_HOME
+
+
+def _move(lat, lon, alt=20, **extra):
+    return {"type": "move_to", "latitude": lat, "longitude": lon, "altitude": alt, **extra}
+
+
+def test_duplicate_move_to_are_merged():
+    near = destination_point(LAT, LON, 45.0, 1.0)
+    segments = [{"type": "takeoff"}, _move(LAT, LON, hover=True), _move(*near, max_horizontal_speed=8), {"type": "land"}]
+    optimized, diff = optimize_segments(segments)
+    assert [s["type"] for s in optimized] == ["takeoff", "move_to", "land"]
+    assert optimized[1]["max_horizontal_speed"] == 8 and optimized[1]["hover"] is True
+    assert diff[0]["rule"] == "duplicate_move_to" and diff[0]["indices"] == [1, 2]
+    # Altitude différente ou point éloigné: conservés
+    far = destination_point(LAT, LON, 45.0, 10.0)
+    for other in (_move(LAT, LON, alt=30), _move(*far)):
+        assert optimize_segments([_move(LAT, LON), other])[1] == []
+
+
+def test_move_to_poi_center_dropped_for_geometric_orbit_only():
+    poi = {"type": "poi_inspection", "poi_name": "Tower", "latitude": LAT, "longitude": LON, "altitude": 30,
+           "orbit_radius": 15}
+    optimized, diff = optimize_segments([_move(LAT, LON, max_horizontal_speed=6), poi])
+    assert optimized == [dict(poi, max_horizontal_speed=6)]
+    assert diff[0]["rule"] == "move_to_poi_center"
+    # Orbite minutée historique: la mise en position est nécessaire
+    bare = {key: value for key, value in poi.items() if key != "orbit_radius"}
+    for legacy in (dict(poi, rotation_duration=20), bare):
+        assert optimize_segments([_move(LAT, LON), legacy])[1] == []
+
+
+def test_rth_followed_by_land_and_fixpoint():
+    segments = [
+        {"type": "takeoff"},
+        _move(LAT + 0.001, LON),
+        _move(LAT + 0.001, LON),
+        _move(LAT + 0.001, LON),
+        {"type": "return_to_home"},
+        {"type": "land"},
+    ]
+    optimized, diff = optimize_segments(segments)
+    assert optimized == [segments[0], segments[3], {"type": "return_to_home", "ending_behavior": "landing"}]
+    assert [d["rule"] for d in diff] == ["duplicate_move_to", "duplicate_move_to", "rth_lands"]
+    assert diff[-1]["indices"] == [4, 5]
+    lines = format_diff(diff)
+    assert lines[-4].startswith("@@ segments 4-5: rth_lands")
+    assert lines[-1] == "+ return_to_home ending=landing"
+    assert segments[-1] == {"type": "land"}  # entrée non modifiée
+
+
+def test_optimized_mission_lands_on_simulator(monkeypatch):
+    monkeypatch.setenv("DRONE_BACKEND", "sim")
+    monkeypatch.setenv("SIM_TIME_FACTOR", "0")
+    mission = {
+        "missionId": "peephole-test",
+        "segments": [
+            {"type": "takeoff"},
+            _move(LAT + 0.001, LON, max_horizontal_speed=10),
+            _move(LAT + 0.001, LON, max_horizontal_speed=10),
+            {"type": "return_to_home"},
+            {"type": "land"},
+        ],
+    }
+    optimized = optimize_mission_segments(mission)
+    assert optimized["optimizations"]["peephole"]["removed_segments"] == 2
+    report = execute_mission(optimized, drone_id="sim_1")
+    assert report["status"] == "completed", report["errors"]
+    assert len(report["executed_segments"]) == 3
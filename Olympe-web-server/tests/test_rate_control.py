@@ -0,0 +1,56 @@
+"""
+Tests unitaires pour la boucle à fréquence fixe (rate_control).
+
+Utilise une horloge virtuelle: aucun sleep réel.
+"""
+
+from rate_control import FixedRateLoop
+
+
+class FakeClock:
+    """Horloge virtuelle avec un coût fixe par tick."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, dt: float) -> None:
+        # Simule un dépassement de 1 ms à chaque sleep
+        self.now += dt + 0.001
+
+
+def test_fixed_rate_does_not_drift():
+    clock = FakeClock()
+    loop = FixedRateLoop(20.0, clock=clock.time, sleep=clock.sleep)
+
+    def tick(_i):
+        clock.now += 0.010  # temps d'envoi de la commande
+
+    stats = loop.run(tick, max_ticks=200)
+    assert stats["ticks"] == 200
+    # Les deadlines absolues absorbent le coût d'envoi et l'overshoot du sleep
+    assert abs(stats["achieved_rate_hz"] - 20.0) < 0.05
+    assert stats["max_jitter_ms"] <= 1.5
+    assert stats["overruns"] == 0
+
+
+def test_overrun_skips_missed_deadlines():
+    clock = FakeClock()
+    loop = FixedRateLoop(10.0, clock=clock.time, sleep=clock.sleep)
+
+    def tick(i):
+        if i == 3:
+            clock.now += 0.35  # tick très lent: ~3 périodes manquées
+
+    stats = loop.run(tick, max_ticks=10)
+    assert stats["ticks"] == 10
+    assert stats["overruns"] >= 2
+
+
+def test_tick_can_stop_loop():
+    clock = FakeClock()
+    loop = FixedRateLoop(50.0, clock=clock.time, sleep=clock.sleep)
+    stats = loop.run(lambda i: i < 4, duration_sec=10.0)
+    assert stats["ticks"] == 5
@@ -0,0 +1,216 @@
+"""
+Tests de bout en bout de l'exécuteur de mission sur le backend simulé (DRONE_BACKEND=sim).
+
+Le temps est virtuel: une mission complète s'exécute en quelques millisecondes.
+"""
+
+import pytest
+
+import mission_executor
+from geodesy import haversine_m
+from mission_executor import MissionExecutionError, _segment_move_to, execute_mission
+from mission_planner.compiled import compile_mission
+from simulated_drone import (
+    DEFAULT_HOME,
+    AltitudeChanged,
+    FlyingStateChanged,
+    PositionChanged,
+    SimClock,
+    SimulatedDrone,
+    TakeOff,
+    extended_move_to,
+)
+
+HOME_LAT, HOME_LON = DEFAULT_HOME
+
+MISSION = {
+    "segments": [
+        {"type": "takeoff"},
+        {"type": "move_to", "latitude": HOME_LAT + 0.0005, "longitude": HOME_LON, "altitude": 20,
+         "max_horizontal_speed": 10},
+        {"type": "move_to", "latitude": HOME_LAT + 0.0005, "longitude": HOME_LON + 0.0005, "altitude": 20,
+         "max_horizontal_speed": 10},
+        {"type": "poi_inspection", "latitude": HOME_LAT + 0.0008, "longitude": HOME_LON + 0.0005, "altitude": 20,
+         "orbit_radius": 15, "sweep_angle": 360, "ground_speed": 3},
+        {"type": "return_to_home"},
+        {"type": "land"},
+    ]
+}
+
+
+@pytest.fixture(autouse=True)
+def sim_backend(monkeypatch):
+    monkeypatch.setenv("DRONE_BACKEND", "sim")
+    monkeypatch.setenv("SIM_TIME_FACTOR", "0")
+
+
+def test_segment_mission_completes_on_simulator(monkeypatch):
+    monkeypatch.setenv("MOVE_ARRIVAL_POLICY", "pass_through")
+    report = execute_mission(MISSION, execution_mode="segments")
+    assert report["status"] == "completed", report["errors"]
+    types = [s["type"] for s in report["executed_segments"]]
+    assert types == ["takeoff", "move_to", "move_to", "poi_inspection", "return_to_home", "land"]
+    # Le premier move_to enchaîne sur le suivant sans s'arrêter
+    assert report["executed_segments"][1]["arrival"] == "pass_through"
+    orbit = report["executed_segments"][3]["orbit"]
+    assert orbit["terminated_by"] == "sweep"
+    assert orbit["swept_deg"] >= 360.0
+    # Durée virtuelle cohérente avec la vitesse demandée (94 m à 3 m/s)
+    assert report["executed_segments"][3]["elapsed_ms"] > 30000
+
+
+def test_default_arrival_policy_is_hover():
+    report = execute_mission(MISSION, execution_mode="segments")
+    assert report["status"] == "completed", report["errors"]
+    assert {s["arrival"] for s in report["executed_segments"] if s["type"] == "move_to"} == {"hover"}
+
+
+def test_flight_plan_mission_completes_on_simulator():
+    report = execute_mission(MISSION, execution_mode="flight_plan")
+    assert report["status"] == "completed", report["errors"]
+    assert report["execution_mode"] == "flight_plan"
+    assert "fallback_reason" not in report
+    assert report["flight_plan"]["uid"].startswith("sim-plan-")
+
+
+def test_unknown_backend_is_rejected(monkeypatch):
+    monkeypatch.setenv("DRONE_BACKEND", "gazebo")
+    with pytest.raises(MissionExecutionError, match="Unknown drone backend"):
+        execute_mission(MISSION)
+
+
+def test_simulated_move_reaches_target():
+    clock = SimClock()
+    drone = SimulatedDrone("sim", clock)
+    t0 = clock.time()
+    assert drone(TakeOff()).wait(_timeout=10).success()
+    assert drone(FlyingStateChanged(state="hovering")).wait(_timeout=10)
+    target = (HOME_LAT + 0.001, HOME_LON)
+    move = drone(extended_move_to(latitude=target[0], longitude=target[1], altitude=15,
+                                  orientation_mode=0, heading=0.0, max_horizontal_speed=10,
+                                  max_vertical_speed=2, max_yaw_rotation_speed=45))
+    assert move.wait(_timeout=60).success()
+    assert haversine_m(drone.lat, drone.lon, *target) < 1.0
+    assert abs(drone.alt - 15) < 1.0
+    # ~111 m à 10 m/s, accélération comprise
+    assert 10.0 < clock.time() - t0 < 20.0
+    assert drone.battery < 100.0
+
+
+class AmslDrone(SimulatedDrone):
+    """Position en altitude AMSL, comme le vrai PositionChanged (cible relative au décollage)."""
+
+    def get_state(self, message_type):
+        state = super().get_state(message_type)
+        if message_type.name == "PositionChanged":
+            state = dict(state, altitude=state["altitude"] + 120.0)
+        return state
+
+
+def _flying_drone(drone_class=SimulatedDrone):
+    clock = SimClock()
+    drone = drone_class("sim", clock)
+    assert drone(TakeOff()).wait(_timeout=10).success()
+    assert drone(FlyingStateChanged(state="hovering")).wait(_timeout=10)
+    return clock, drone
+
+
+def _move_segment(lat, lon, altitude):
+    return compile_mission({"segments": [
+        {"type": "takeoff"},
+        {"type": "move_to", "latitude": lat, "longitude": lon, "altitude": altitude, "max_horizontal_speed": 10},
+    ]}).segments[1]
+
+
+def test_pass_through_waits_for_the_climb():
+    clock, drone = _flying_drone()
+    # Montée quasi verticale: à l'horizontale, la cible est atteinte dès l'envoi
+    segment = _move_segment(HOME_LAT + 0.00002, HOME_LON, 40)
+    details = _segment_move_to(drone, extended_move_to, FlyingStateChanged, PositionChanged, AltitudeChanged, segment,
+                               120.0, arrival="pass_through", clock=clock)
+    assert details["arrival_distance_m"] <= details["acceptance_radius_m"]
+    assert abs(drone.alt - 40.0) <= details["acceptance_radius_m"]
+
+
+class NoAltitudeDrone(SimulatedDrone):
+    """Drone sans AltitudeChanged: l'erreur verticale est inconnue."""
+
+    def get_state(self, message_type):
+        if message_type.name == "AltitudeChanged":
+            raise KeyError(message_type.name)
+        return super().get_state(message_type)
+
+
+def test_pass_through_without_relative_altitude_awaits_the_move():
+    clock, drone = _flying_drone(NoAltitudeDrone)
+    segment = _move_segment(HOME_LAT + 0.0005, HOME_LON, 20)
+    details = _segment_move_to(drone, extended_move_to, FlyingStateChanged, PositionChanged, AltitudeChanged, segment,
+                               60.0, arrival="pass_through", clock=clock)
+    assert details["arrival_distance_m"] is None
+    assert haversine_m(drone.lat, drone.lon, HOME_LAT + 0.0005, HOME_LON) < 1.0 and abs(drone.alt - 20.0) < 1.0
+
+
+def test_pass_through_ignores_amsl_altitude_offset():
+    clock, drone = _flying_drone(AmslDrone)
+    segment = _move_segment(HOME_LAT + 0.0005, HOME_LON, 20)
+    details = _segment_move_to(drone, extended_move_to, FlyingStateChanged, PositionChanged, AltitudeChanged, segment,
+                               60.0, arrival="pass_through", clock=clock)
+    # Rayon atteint en 3D (altitude relative), le drone encore en mouvement
+    assert details["arrival_distance_m"] <= details["acceptance_radius_m"]
+    assert drone.flying_state != "hovering"
+
+
+def _cancel_move_after(clock, drone, delay_sec):
+    """Annule le déplacement en cours après delay_sec (comme une reprise en main du pilote)."""
+    deadline = clock.time() + delay_sec
+    clock.add_listener(lambda _dt: drone._cancel_move() if clock.time() >= deadline else None)
+
+
+@pytest.mark.parametrize("arrival", ["arrive", "pass_through"])
+def test_cancelled_move_ends_the_wait(arrival):
+    clock, drone = _flying_drone()
+    segment = _move_segment(HOME_LAT + 0.005, HOME_LON, 20)
+    _cancel_move_after(clock, drone, 5.0)
+    t0 = clock.time()
+    with pytest.raises(MissionExecutionError, match="Move_to failed"):
+        _segment_move_to(drone, extended_move_to, FlyingStateChanged, PositionChanged, AltitudeChanged, segment,
+                         300.0, arrival=arrival, clock=clock, abort=lambda: False)
+    # L'échec est remonté tout de suite, sans attendre le délai de 300 s
+    assert clock.time() - t0 < 10.0
+
+
+def test_rth_ending_behavior_is_honoured(sim_track):
+    away = {"type": "move_to", "latitude": HOME_LAT + 0.0005, "longitude": HOME_LON, "altitude": 20}
+    mission = {"segments": [
+        {"type": "takeoff"},
+        away,
+        # Stationnaire au-dessus du point de départ: le vol peut continuer
+        {"type": "return_to_home", "ending_behavior": "hovering"},
+        away,
+        # Sans ending_behavior, le RTH atterrit
+        {"type": "return_to_home"},
+    ]}
+    report = execute_mission(mission, execution_mode="segments")
+    assert report["status"] == "completed", report["errors"]
+    east, north, alt = sim_track[-1]
+    assert abs(east) < 1.0 and abs(north) < 1.0 and alt < 0.1
+
+
+def test_no_safety_rth_after_folded_landing(monkeypatch):
+    calls = []
+    rth = mission_executor._segment_return_to_home
+    monkeypatch.setattr(mission_executor, "_segment_return_to_home", lambda *a: calls.append(a) or rth(*a))
+
+    def grounded(*args, **kwargs):
+        raise MissionExecutionError("drone on the ground")
+
+    monkeypatch.setattr(mission_executor, "_segment_move_to", grounded)
+    mission = {"segments": [
+        {"type": "takeoff"},
+        {"type": "return_to_home", "ending_behavior": "landing"},
+        {"type": "move_to", "latitude": HOME_LAT, "longitude": HOME_LON, "altitude": 20},
+    ]}
+    report = execute_mission(mission, execution_mode="segments")
+    assert report["status"] == "error" and report["failed_segment"] == 2
+    # Atterri par le RTH: pas de RTH de sécurité
+    assert len(calls) == 1
@@ -0,0 +1,70 @@
+"""
+Tests unitaires pour l'index spatial des éléments de la carte (mission_planner.spatial_index).
+"""
+
+import json
+import time
+
+import numpy as np
+import pytest
+
+from mission_planner.spatial_index import SpatialIndex, get_spatial_index, normalize_name
+from tests.conftest import HOME, at, build_map, poi
+
+
+def test_industrial_city_lookup_and_nearest(industrial_city):
+    world_map = industrial_city
+    index = get_spatial_index(world_map)
+    assert get_spatial_index(json.loads(json.dumps(world_map))) is index
+    # Noms: casse, espaces, ponctuation et petites fautes ignorés
+    assert index.lookup("ventilation  pipes").name == "Ventilation Pipes"
+    assert index.lookup("Ventilaton Pipes").name == "Ventilation Pipes"
+    assert index.lookup("main ave / francis st junction").name == "Main Ave & Francis St Junction"
+    assert index.lookup("Obstacle Box 1", kinds=("poi",)) is None
+    assert normalize_name("  Éole-Tower #2 ") == "eole tower 2"
+    # Le départ est juste au nord de la boîte d'obstacles: c'est l'élément le plus proche
+    start = world_map["starting_position"]["coordinates"]
+    (distance, box), (_, poi) = index.nearest(start["latitude"], start["longitude"], k=2)
+    assert box.kind == "boundary" and box.name == "Obstacle Box 1" and 0.0 < distance < 30.0
+    assert poi.name == "Advertising Board"
+    # Dans la boîte: distance nulle
+    inside = np.asarray(world_map["boundaries"][0]["coordinates"]).mean(axis=0)
+    assert index.within(*inside, 1.0, kinds=("boundary",))[0][0] == 0.0
+
+
+def test_shapes_distances_and_bbox():
+    tower = {"name": "Tower", "type": "building", "height_meters": 40.0, "radius_meters": 10.0,
+             "coordinates": {"latitude": at(100.0, 0.0)[0], "longitude": at(100.0, 0.0)[1], "altitude_meters": 0.0}}
+    circle = {"name": "NFZ", "type": "no_fly_zone", "boundary_type": "circle", "radius_meters": 20.0,
+              "coordinates": [list(at(0.0, 200.0))]}
+    index = SpatialIndex(build_map([poi("A", 0.0, 50.0), poi("B", 0.0, -70.0)], [tower], [circle]), cell_m=25.0)
+    ranked = index.nearest(*HOME, k=4)
+    assert [f.name for _, f in ranked] == ["A", "B", "Tower", "NFZ"]
+    assert [d for d, _ in ranked] == pytest.approx([50.0, 70.0, 90.0, 180.0], abs=0.01)
+    assert [f.name for _, f in index.within(*HOME, 90.5)] == ["A", "B", "Tower"]
+    assert [f.name for _, f in index.within(*HOME, 90.5, kinds=("obstacle",))] == ["Tower"]
+    south, west = at(-10.0, 40.0)
+    north, east = at(10.0, 185.0)
+    assert [f.name for f in index.in_bbox(south, west, north, east)] == ["A", "NFZ"]
+    # Requête loin de la carte: les anneaux partent du bord de la grille
+    assert index.nearest(*at(5000.0, 5000.0), k=1)[0][1].name == "NFZ"
+    assert SpatialIndex(build_map()).nearest(*HOME, k=3) == []
+
+
+def test_tens_of_thousands_of_features_match_brute_force():
+    rng = np.random.default_rng(11)
+    e, n = rng.uniform(-3000, 3000, 30000), rng.uniform(-3000, 3000, 30000)
+    index = SpatialIndex(build_map([poi(f"P{i}", float(x), float(y)) for i, (x, y) in enumerate(zip(e, n))]))
+    queries = rng.uniform(-3500, 3500, (50, 2))
+    start = time.perf_counter()
+    results = [(index.nearest(*at(*q), k=5), index.within(*at(*q), 120.0)) for q in queries]
+    assert time.perf_counter() - start < 1.0
+    for q, (nearest, within) in zip(queries, results):
+        d = np.hypot(e - q[0], n - q[1])
+        order = np.argsort(d)
+        assert [f.name for _, f in nearest] == [f"P{i}" for i in order[:5]]
+        assert {f.name for _, f in within} == {f"P{i}" for i in np.flatnonzero(d <= 120.0)}
+    south, west = at(-500.0, 200.0)
+    north, east = at(-100.0, 900.0)
+    expected = np.flatnonzero((e >= -500.0) & (e <= -100.0) & (n >= 200.0) & (n <= 900.0))
+    assert [f.name for f in index.in_bbox(south, west, north, east)] == [f"P{i}" for i in expected]
@@ -0,0 +1,96 @@
+"""
+Tests unitaires pour le collecteur de télémétrie (telemetry).
+"""
+
+import math
+from types import SimpleNamespace
+
+from mission_executor import execute_mission
+from simulated_drone import DEFAULT_HOME
+from telemetry import TelemetryCollector, TelemetryRecord
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self) -> float:
+        return self.now
+
+
+class FakeDrone:
+    def __init__(self):
+        self.callbacks = []
+
+    def subscribe(self, callback):
+        self.callbacks.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        self.callbacks.remove(callback)
+
+    def emit(self, name, **args):
+        for callback in self.callbacks:
+            callback(SimpleNamespace(message=SimpleNamespace(name=name), args=args), self)
+
+
+def test_records_are_downsampled_to_rate():
+    clock, drone, records = FakeClock(), FakeDrone(), []
+    with TelemetryCollector(drone, "d1", records.append, "m1", rate_hz=2.0, clock=clock):
+        assert len(drone.callbacks) == 1  # une seule souscription
+        for i in range(50):  # 10 s d'évènements à 5 Hz
+            clock.now = i * 0.2
+            drone.emit("PositionChanged", latitude=48.0 + i * 1e-5, longitude=2.0, altitude=20.0)
+    assert drone.callbacks == []
+    assert 19 <= len(records) <= 21
+    assert records[-1].t >= 9.5
+
+
+def test_schema_and_forced_state_change():
+    clock, drone, records = FakeClock(), FakeDrone(), []
+    collector = TelemetryCollector(drone, "d1", records.append, rate_hz=1.0, clock=clock)
+    collector.start()
+    collector.segment = 3
+    drone.emit("SpeedChanged", speedX=3.0, speedY=4.0, speedZ=-1.0)
+    drone.emit("AttitudeChanged", roll=0.0, pitch=0.0, yaw=-math.pi / 2)
+    drone.emit("BatteryStateChanged", percent=87)
+    drone.emit("PositionChanged", latitude=500.0, longitude=500.0, altitude=500.0)  # pas de fix GPS
+    drone.emit("FlyingStateChanged", state="FlyingStateChanged_State.hovering")
+    drone.emit("GpsFixStateChanged", fixed=1)  # ignoré
+    collector.stop()
+    assert len(records) == 2  # premier évènement + changement d'état forcé
+    record = records[-1].as_dict()
+    assert list(record) == list(TelemetryRecord.FIELDS)
+    assert record["state"] == "hovering"
+    assert record["segment"] == 3
+    assert record["ground_speed"] == 5.0
+    assert record["vertical_speed"] == 1.0
+    assert record["heading"] == 270.0
+    assert record["battery_percent"] == 87.0
+    assert record["latitude"] is None
+    assert collector.events_received == 5
+
+
+def test_executor_streams_telemetry_on_simulator(monkeypatch):
+    monkeypatch.setenv("DRONE_BACKEND", "sim")
+    monkeypatch.setenv("SIM_TIME_FACTOR", "0")
+    monkeypatch.setenv("TELEMETRY_RATE_HZ", "1")
+    lat, lon = DEFAULT_HOME
+    mission = {
+        "missionId": "telemetry-test",
+        "segments": [
+            {"type": "takeoff"},
+            {"type": "move_to", "latitude": lat + 0.001, "longitude": lon, "altitude": 20, "max_horizontal_speed": 10},
+            {"type": "land"},
+        ],
+    }
+    records = []
+    report = execute_mission(mission, drone_id="sim_1", on_telemetry=records.append)
+    assert report["status"] == "completed", report["errors"]
+    assert report["telemetry"]["records_published"] >= len(records)
+    assert {r.segment for r in records} >= {0, 1, 2}
+    assert all(r.mission_id == "telemetry-test" and r.drone_id == "sim_1" for r in records)
+    assert records[-1].state == "landed"
+    # ~1 Hz hors changements d'état
+    duration = records[-1].t - records[0].t
+    assert len(records) <= duration * 1.0 + 10
@@ -0,0 +1,117 @@
+"""
+Tests unitaires pour l'optimiseur d'ordre de visite des POI (mission_planner.visit_order).
+"""
+
+import itertools
+import random
+
+import pytest
+
+from geodesy import destination_point, haversine_m
+from mission_planner.visit_order import optimize_mission_visit_order, optimize_visit_order
+from tests.conftest import HOME
+
+
+def _group(name, lat, lon):
+    return [
+        {"type": "move_to", "latitude": lat, "longitude": lon, "altitude": 20, "max_horizontal_speed": 10},
+        {"type": "poi_inspection", "poi_name": name, "latitude": lat, "longitude": lon, "altitude": 20},
+    ]
+
+
+def _mission(points, rth=True):
+    segments = [{"type": "takeoff"}]
+    for name, (lat, lon) in points:
+        segments += _group(name, lat, lon)
+    segments += [{"type": "return_to_home"}, {"type": "land"}] if rth else [{"type": "land"}]
+    return segments
+
+
+def _tour_length(points, rth=True):
+    path = [HOME] + [p for _, p in points] + ([HOME] if rth else [])
+    return sum(haversine_m(*a, *b) for a, b in zip(path, path[1:]))
+
+
+def test_criss_cross_mission_is_reordered_exactly():
+    # Quatre POI sur une ligne, visités dans le désordre
+    points = [(f"P{d}", destination_point(*HOME, 90.0, d)) for d in (400, 100, 300, 200)]
+    mission = _mission(points, rth=False)
+    segments, report = optimize_visit_order(mission, HOME)
+    assert report["method"] == "exact"
+    # Indices des poi_inspection de la mission d'origine, dans l'ordre de visite
+    assert report["order"] == [4, 8, 6, 2]
+    assert [mission[i]["poi_name"] for i in report["order"]] == ["P100", "P200", "P300", "P400"]
+    assert report["saved_m"] > 300
+    assert report["optimized_m"] == pytest.approx(400, abs=1)
+    # Structure conservée: décollage en tête, atterrissage en fin, paires move_to/poi intactes
+    assert segments[0]["type"] == "takeoff"
+    assert segments[-1]["type"] == "land"
+    for i, seg in enumerate(segments):
+        if seg["type"] == "poi_inspection":
+            assert segments[i - 1]["type"] == "move_to"
+            assert segments[i - 1]["latitude"] == seg["latitude"]
+
+
+def test_return_to_home_closes_the_tour():
+    # Aller-retour: l'ordre tient compte du retour au point de départ
+    east = [(f"E{d}", destination_point(*HOME, 90.0, d)) for d in (200, 100)]
+    west = [(f"W{d}", destination_point(*HOME, 270.0, d)) for d in (100, 200)]
+    points = [east[0], west[0], east[1], west[1]]
+    _, report = optimize_visit_order(_mission(points), HOME)
+    assert report["original_m"] == pytest.approx(1200, abs=1)
+    assert report["optimized_m"] == pytest.approx(800, abs=1)
+
+
+def test_order_reported_without_poi_names():
+    # Noms de POI absents (cas courant en sortie NLP): l'ordre reste identifiable
+    points = [(None, destination_point(*HOME, 90.0, d)) for d in (200, 100)]
+    mission = _mission(points, rth=False)
+    for segment in mission:
+        segment.pop("poi_name", None)
+    segments, report = optimize_visit_order(mission, HOME)
+    assert report["order"] == [4, 2]
+    assert [segments[i] for i in (1, 2)] == mission[3:5]
+
+
+def test_exact_solution_is_optimal_open_path():
+    rng = random.Random(3)
+    points = [(f"P{i}", destination_point(*HOME, rng.uniform(0, 360), rng.uniform(50, 800))) for i in range(6)]
+    _, report = optimize_visit_order(_mission(points, rth=False), HOME)
+    best = min(_tour_length(list(p), rth=False) for p in itertools.permutations(points))
+    assert report["optimized_m"] == pytest.approx(best, abs=0.5)
+
+
+def test_large_mission_uses_heuristic_and_improves():
+    rng = random.Random(7)
+    points = [(f"P{i}", destination_point(*HOME, rng.uniform(0, 360), rng.uniform(50, 1500))) for i in range(30)]
+    segments, report = optimize_visit_order(_mission(points), HOME)
+    assert report["method"] == "nearest_neighbor_2opt"
+    assert report["groups"] == 30
+    assert report["optimized_m"] < report["original_m"]
+    assert sorted(report["order"]) == list(range(2, 2 + 2 * len(points), 2))
+    assert len(segments) == len(_mission(points))
+
+
+def test_already_optimal_order_and_barriers_are_kept():
+    points = [(f"P{d}", destination_point(*HOME, 0.0, d)) for d in (100, 200)]
+    segments = _mission(points)
+    optimized, report = optimize_visit_order(segments, HOME)
+    assert optimized == segments
+    assert report["reordered"] is False and report["saved_m"] == 0.0
+
+    # Un segment fixe (RTH) entre deux groupes: ils ne sont pas permutés
+    far, near = destination_point(*HOME, 0.0, 500), destination_point(*HOME, 0.0, 50)
+    segments = [{"type": "takeoff"}, *_group("A", *far), {"type": "return_to_home"}, *_group("B", *near),
+                {"type": "land"}]
+    optimized, _ = optimize_visit_order(segments, HOME)
+    assert optimized == segments
+    assert [s.get("poi_name") for s in optimized if s["type"] == "poi_inspection"] == ["A", "B"]
+
+
+def test_mission_wrapper_attaches_report_without_mutating():
+    points = [(f"P{d}", destination_point(*HOME, 90.0, d)) for d in (300, 100, 200)]
+    mission = {"missionId": "m", "segments": _mission(points, rth=False)}
+    optimized = optimize_mission_visit_order(mission, HOME)
+    assert optimized["optimizations"]["visit_order"]["order"] == [4, 6, 2]
+    assert mission["segments"] == _mission(points, rth=False)
+    assert "optimizations" not in mission
@@ -0,0 +1,86 @@
+"""
+Tests unitaires pour la grille d'occupation voxel compilée depuis la carte (mission_planner.voxel_grid).
+"""
+
+import numpy as np
+import pytest
+
+from geodesy import to_local_enu
+from mission_planner import voxel_grid
+from mission_planner.clearance import ObstacleField
+from mission_planner.geofence import GeofenceEngine
+from mission_planner.voxel_grid import compile_voxel_grid, get_voxel_grid, map_hash
+from tests.conftest import at, build_map
+
+
+@pytest.fixture(autouse=True)
+def clear_grid_cache(monkeypatch):
+    monkeypatch.setattr(voxel_grid, "_GRIDS", {})
+
+
+def test_restricted_box_occupied_below_ceiling(industrial_city):
+    grid = compile_voxel_grid(industrial_city)
+    box = np.asarray(industrial_city["boundaries"][0]["coordinates"])
+    lat, lon = box[:, 0].mean(), box[:, 1].mean()
+    assert grid.occupied(lat, lon, 10.0)
+    assert grid.occupied(lat, lon, 14.5)
+    assert not grid.occupied(lat, lon, 20.0)
+    start = industrial_city["starting_position"]["coordinates"]
+    assert not grid.occupied(start["latitude"] + 0.0005, start["longitude"], 5.0)
+    # Sous le sol et hors de la grille: occupé
+    assert grid.occupied(lat, lon, -1.0)
+    assert grid.occupied(lat + 1.0, lon, 20.0)
+    assert grid.bits.dtype == np.uint8 and grid.bits.shape == (grid.nz, grid.ny, (grid.nx + 7) // 8)
+
+
+def test_cache_file_memory_mapped_and_keyed_by_hash(industrial_city, voxel_cache_dir):
+    grid = get_voxel_grid(industrial_city)
+    key = map_hash(industrial_city)
+    assert (voxel_cache_dir / f"{key}.voxels.npy").exists() and (voxel_cache_dir / f"{key}.voxels.json").exists()
+    assert isinstance(grid.bits, np.memmap)
+    assert get_voxel_grid(industrial_city) is grid
+    # Nouveau processus (cache mémoire vide): relu depuis le fichier, sans recompilation
+    voxel_grid._GRIDS.clear()
+    reloaded = get_voxel_grid(industrial_city)
+    assert reloaded is not grid and reloaded.header == grid.header
+    assert np.array_equal(reloaded.bits, grid.bits)
+    # Carte modifiée: autre clé, autre grille
+    changed = dict(industrial_city, boundaries=[dict(industrial_city["boundaries"][0], max_altitude_meters=30.0)])
+    assert map_hash(changed) != key
+    lat, lon = np.asarray(changed["boundaries"][0]["coordinates"]).mean(axis=0)
+    assert get_voxel_grid(changed).occupied(lat, lon, 20.0)
+
+
+def test_march_finds_first_occupied_point(industrial_city):
+    grid = compile_voxel_grid(industrial_city, vertical_resolution_m=1.0)
+    box = np.asarray(industrial_city["boundaries"][0]["coordinates"])
+    x, y = to_local_enu(box[:, 0], box[:, 1], *grid.origin)
+    north = y.max()
+    a3 = np.array([[x.mean(), north + 60.0, 10.0], [x.mean(), north + 60.0, 20.0]])
+    b3 = np.array([[x.mean(), north - 60.0, 10.0], [x.mean(), north - 60.0, 20.0]])
+    t = grid.march(a3, b3)
+    assert np.isnan(t[1])
+    # Entrée exacte dans la boîte (moteur de geofence): la grille la voit un peu avant, jamais après
+    [(_, exact, _, _)] = GeofenceEngine(industrial_city).hits(a3[:1], b3[:1])
+    assert 0.0 <= (exact - t[0]) * 120.0 <= grid.resolution_m * 1.5
+
+
+def test_grid_is_conservative_for_obstacles():
+    rng = np.random.default_rng(3)
+    obstacles = []
+    for n, (e, nn, h) in enumerate(zip(rng.uniform(-200, 200, 50), rng.uniform(-200, 200, 50), rng.uniform(5, 40, 50))):
+        lat, lon = at(e, nn)
+        shape = {"radius_meters": 4.0} if n % 2 else {"width_meters": 12.0, "length_meters": 6.0, "heading_degrees": 30.0}
+        obstacles.append({"name": f"O{n}", "type": "building", "height_meters": float(h),
+                          "coordinates": {"latitude": lat, "longitude": lon, "altitude_meters": 0.0}, **shape})
+    world_map = build_map(obstacles=obstacles)
+    grid = compile_voxel_grid(world_map)
+    field = ObstacleField(world_map)
+    # Points au hasard: tout point dans un obstacle (marge incluse) est dans un voxel occupé
+    p = np.column_stack([rng.uniform(-220, 220, 20000), rng.uniform(-220, 220, 20000), rng.uniform(0, 50, 20000)])
+    k, _ = field.first_conflicts(p, p)
+    inside = k >= 0
+    assert inside.sum() > 100
+    assert grid.occupied_enu(p[inside, 0], p[inside, 1], p[inside, 2]).all()
+    # ... sans bloquer tout l'espace
+    assert grid.occupied_enu(p[:, 0], p[:, 1], p[:, 2]).mean() < 0.5
@@ -2,14 +2,21 @@
 Simple test to fly to a GPS location (POI) from industrial_city.json.
 
 Safety: Climbs to 35m first to clear all obstacles before navigating horizontally.
+
+POI_NAME selects the target by its exact name (case and accents ignored); a
+misspelled name is refused with the closest match as a suggestion. "nearest"
+picks the POI closest to the map's starting position, not to the drone.
 """
 
 import os
 import sys
-import json
 from pathlib import Path
 from typing import Callable, Tuple, Optional
 
+# Shared geodesy helpers (Olympe-web-server/geodesy.py)
+import server_path  # noqa: F401
+from geodesy import destination_point
+
 
 # Exit codes
 EXIT_SUCCESS = 0
@@ -39,33 +46,58 @@ def with_step(name: str, fn: Callable[[], bool]) -> bool:
         return False
 
 
+def find_project_root() -> Path:
+    """Repository root: the first parent directory holding maps/."""
+    here = Path(__file__).resolve()
+    for parent in here.parents:
+        if (parent / "maps").is_dir():
+            return parent
+    return here.parent.parent.parent
+
+
 def load_poi_from_map(poi_name: str) -> Optional[Tuple[float, float, float]]:
     """
     Load a POI from industrial_city.json by name.
     
+    Names are matched through the web server's spatial index (case and
+    accents ignored). Typos are not accepted: the drone would fly to another
+    POI, so the closest name is only suggested. "nearest" picks the POI
+    closest to the map's starting position (map origin), not to the drone.
+    
     Returns:
         Tuple of (latitude, longitude, altitude_meters) or None if not found
     """
     # Find project root (where maps/ directory is)
-    project_root = Path(__file__).parent.parent.parent
+    project_root = find_project_root()
     map_file = project_root / "maps" / "industrial_city.json"
     
     if not map_file.exists():
         log(f"Map file not found: {map_file}")
         return None
     
-    with open(map_file, "r", encoding="utf-8") as f:
-        world_map = json.load(f)
+    from mission_planner.legs import map_origin
+    from mission_planner.map_compiler import load_map
+    from mission_planner.spatial_index import get_spatial_index
     
-    # Search for POI
-    for poi in world_map.get("points_of_interest", []):
-        if poi["name"].lower() == poi_name.lower():
-            coords = poi["coordinates"]
-            lat = coords["latitude"]
-            lon = coords["longitude"]
-            alt = coords.get("altitude_meters", 0.0)
-            log(f"Found POI '{poi_name}': lat={lat:.8f}, lon={lon:.8f}, alt={alt}m")
-            return (lat, lon, alt)
+    # Search for POI (compiled map: prebuilt index, memory-mapped)
+    world_map = load_map(str(map_file))
+    index = get_spatial_index(world_map)
+    if poi_name.strip().lower() == "nearest":
+        ranked = index.nearest(*map_origin(world_map), k=1, kinds=("poi",))
+        feature = ranked[0][1] if ranked else None
+        log("'nearest' is measured from the map's starting position, not from the drone")
+    else:
+        feature = index.lookup(poi_name, kinds=("poi",), fuzzy=False)
+        if feature is None:
+            close = index.lookup(poi_name, kinds=("poi",))
+            if close is not None:
+                log(f"POI '{poi_name}' not found, did you mean '{close.name}'? Set POI_NAME to the exact name")
+    if feature is not None:
+        lat = feature.latitude
+        lon = feature.longitude
+        alt = feature.data["coordinates"].get("altitude_meters", 0.0)
+        log(f"Found POI '{feature.name}' for '{poi_name}': lat={lat:.8f}, lon={lon:.8f}, alt={alt}m")
+        return (lat, lon, alt)
     
     log(f"POI '{poi_name}' not found in map")
     available = [poi["name"] for poi in world_map.get("points_of_interest", [])]
@@ -217,10 +249,7 @@ def main() -> int:
     def step_goto_poi() -> bool:
         """Move to offset position near the POI for optimal viewing angle."""
         # Calculate offset position (north of the POI)
-        # At latitude ~48.88, 1 degree ≈ 111km, so convert meters to degrees
-        offset_degrees = poi_offset_m / 111000.0
-        offset_lat = target_lat + offset_degrees  # Offset north
-        offset_lon = target_lon  # No longitude offset
+        offset_lat, offset_lon = destination_point(target_lat, target_lon, 0.0, poi_offset_m)
         
         log(f"Navigating to offset position near POI '{poi_name}'...")
         log(f"  POI location: lat={target_lat:.8f}, lon={target_lon:.8f}, alt={target_alt}m")
@@ -1,9 +1,12 @@
 import os
 import sys
 import time
-import math
 from typing import Callable, Optional
 
+# Shared geodesy helpers (Olympe-web-server/geodesy.py)
+import server_path  # noqa: F401
+from geodesy import haversine_m
+
 # Exit codes
 EXIT_SUCCESS = 0
 EXIT_TEST_FAILURE = 1
@@ -507,19 +510,6 @@ def main() -> int:
         # Radius in meters to consider "at home"
         home_radius_m = float(os.environ.get("RTH_HOME_RADIUS_M", "5.0"))
 
-        def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-            r = 6371000.0
-            dlat = math.radians(lat2 - lat1)
-            dlon = math.radians(lon2 - lon1)
-            a = (
-                math.sin(dlat / 2) ** 2
-                + math.cos(math.radians(lat1))
-                * math.cos(math.radians(lat2))
-                * math.sin(dlon / 2) ** 2
-            )
-            c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-            return r * c
-
         # Try to read home (takeoff) location for proximity-based confirmation
         home_lat = None
         home_lon = None
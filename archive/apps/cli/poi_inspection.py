@@ -5,6 +5,10 @@ import math
 import threading
 from typing import Callable, Optional
 
+# Shared geodesy helpers (Olympe-web-server/geodesy.py)
+import server_path  # noqa: F401
+from geodesy import destination_point
+
 # Exit codes
 EXIT_SUCCESS = 0
 EXIT_TEST_FAILURE = 1
@@ -375,10 +379,7 @@ def main() -> int:
         target_lon = lon
         
         if offset_distance > 0:
-            # At latitude ~48.88, 1 degree ≈ 111km, so convert meters to degrees
-            offset_degrees = offset_distance / 111000.0
-            target_lat = lat + offset_degrees  # Offset north
-            target_lon = lon  # No longitude offset
+            target_lat, target_lon = destination_point(lat, lon, 0.0, offset_distance)  # Offset north
             log(f"Moving to offset position near {name} (offset: {offset_distance}m north): lat={target_lat:.6f}, lon={target_lon:.6f}, alt={alt}m")
         else:
             log(f"Moving to {name}: lat={target_lat:.6f}, lon={target_lon:.6f}, alt={alt}m")
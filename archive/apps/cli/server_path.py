@@ -0,0 +1,13 @@
+"""
+Path setup for the CLI scripts, run from apps/cli: puts the archive root on
+sys.path and imports core.server_path, which adds Olympe-web-server.
+"""
+
+import sys
+from pathlib import Path
+
+ARCHIVE_DIR = str(Path(__file__).resolve().parents[2])
+if ARCHIVE_DIR not in sys.path:
+    sys.path.insert(0, ARCHIVE_DIR)
+
+import core.server_path  # noqa: E402,F401
@@ -0,0 +1,19 @@
+"""
+Make the Olympe-web-server modules (geodesy, mission_planner) importable from
+the archive: core.world_map and the CLI scripts (through apps/cli/server_path)
+import this module first.
+"""
+
+import sys
+from pathlib import Path
+
+SERVER_DIR = str(Path(__file__).resolve().parents[2] / "Olympe-web-server")
+
+
+def add_server_path() -> None:
+    """Put Olympe-web-server on sys.path (once)."""
+    if SERVER_DIR not in sys.path:
+        sys.path.insert(0, SERVER_DIR)
+
+
+add_server_path()
@@ -1,23 +1,32 @@
 """
-Simple world map loader - just load JSON files.
+Simple world map loader - just load JSON files (or their compiled form).
 """
 
 import json
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Mapping
 
-from .coordinate_converter import CoordinateConverter, convert_sphinx_coordinates
+from .coordinate_converter import (
+    CoordinateConverter,
+    convert_sphinx_coordinates,
+    convert_sphinx_coordinates_array,
+    get_converter,
+)
 
 
-def load_world_map(file_path: str) -> Dict[str, Any]:
+def load_world_map(file_path: str, compiled: bool = False) -> Mapping[str, Any]:
     """
     Load a world map from a JSON file.
     
     Args:
         file_path: Path to the JSON file
+        compiled: Return the read-only, memory-mapped compiled map instead of
+            parsing the JSON (Olympe-web-server mission_planner.map_compiler:
+            compiled once per file content, features decoded on access)
         
     Returns:
-        Dictionary containing the world map data
+        Dictionary containing the world map data (a read-only mapping when
+        compiled is True)
         
     Example:
         world_map = load_world_map("maps/paris.json")
@@ -27,8 +36,19 @@ def load_world_map(file_path: str) -> Dict[str, Any]:
     if not path.exists():
         raise FileNotFoundError(f"World map file not found: {file_path}")
     
+    if compiled:
+        from .. import server_path  # noqa: F401
+        from mission_planner.map_compiler import load_map
+        return load_map(str(path))
+    
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
-__all__ = ["load_world_map", "CoordinateConverter", "convert_sphinx_coordinates"]
+__all__ = [
+    "load_world_map",
+    "CoordinateConverter",
+    "convert_sphinx_coordinates",
+    "convert_sphinx_coordinates_array",
+    "get_converter",
+]
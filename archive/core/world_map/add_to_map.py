@@ -1,11 +1,301 @@
 """
 Utility to add Sphinx local coordinates to industrial city map as GPS coordinates.
+
+MapEditSession loads a map once, applies any number of adds / updates /
+deletes in memory (each validated), and commit() writes it back in a single
+atomic write (temporary file in the same directory with the map's file
+mode, fsync, rename, directory fsync): a crash leaves either the old map or
+the new one, never a truncated file. Local coordinates go through the map's
+calibration (calibration.py); bulk adds convert all their points in one
+vectorized call.
+
+    with MapEditSession("maps/industrial_city.json") as session:
+        session.add_pois([{"name": "P1", "local_x": 10, "local_y": 20}, ...])
+        session.update("obstacle", "Tower", height_meters=42.0)
+        session.delete("poi", "Old POI")
+    # committed on exit, discarded if the block raised
+
+The add_*_to_map functions are one-item sessions.
 """
 
 import json
-from pathlib import Path
-from typing import Optional
-from .coordinate_converter import convert_sphinx_coordinates
+import math
+import os
+import stat
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence
+
+from .calibration import calibration_from_world_map, calibration_to_dict
+from .coordinate_converter import CoordinateConverter
+
+# item type -> map section
+SECTIONS = {
+    "poi": "points_of_interest",
+    "obstacle": "obstacles",
+    "boundary": "boundaries",
+}
+BOUNDARY_SHAPES = ("polygon", "circle")
+BOUNDARY_TYPES = ("geofence", "no_fly_zone", "restricted")
+
+
+def _finite(value: Any, field: str, name: str) -> float:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}': {field} must be a number, got {value!r}") from None
+    if not math.isfinite(number):
+        raise ValueError(f"'{name}': {field} must be finite, got {value!r}")
+    return number
+
+
+def _validate_point(item: Dict[str, Any]) -> None:
+    name = item["name"]
+    coords = item.get("coordinates") or {}
+    lat = _finite(coords.get("latitude"), "latitude", name)
+    lon = _finite(coords.get("longitude"), "longitude", name)
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+        raise ValueError(f"'{name}': coordinates out of range ({lat}, {lon})")
+    _finite(coords.get("altitude_meters", 0.0), "altitude_meters", name)
+
+
+def validate_item(item_type: str, item: Dict[str, Any]) -> None:
+    """Raise ValueError if a POI / obstacle / boundary entry is not usable by the mission planner."""
+    if item_type not in SECTIONS:
+        raise ValueError(f"Unknown item_type: {item_type}. Use one of {', '.join(SECTIONS)}")
+    name = item.get("name")
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError(f"{item_type} without a name")
+    if item_type in ("poi", "obstacle"):
+        _validate_point(item)
+    if item_type == "obstacle":
+        if _finite(item.get("height_meters"), "height_meters", name) <= 0:
+            raise ValueError(f"'{name}': height_meters must be positive")
+        for field in ("radius_meters", "width_meters", "length_meters"):
+            if field in item and _finite(item[field], field, name) <= 0:
+                raise ValueError(f"'{name}': {field} must be positive")
+    if item_type == "boundary":
+        if item.get("type") not in BOUNDARY_TYPES:
+            raise ValueError(f"'{name}': type must be one of {', '.join(BOUNDARY_TYPES)}")
+        shape = item.get("boundary_type", "polygon")
+        if shape not in BOUNDARY_SHAPES:
+            raise ValueError(f"'{name}': boundary_type must be polygon or circle")
+        coords = item.get("coordinates") or []
+        for lat, lon in coords:
+            _finite(lat, "latitude", name)
+            _finite(lon, "longitude", name)
+        if shape == "polygon" and len(coords) < 3:
+            raise ValueError(f"'{name}': polygon needs at least 3 coordinates")
+        if shape == "circle" and not (coords and ("radius_meters" in item or len(coords) >= 2)):
+            raise ValueError(f"'{name}': circle needs a center and radius_meters or a point on the circle")
+        for field in ("min_altitude_meters", "max_altitude_meters"):
+            if item.get(field) is not None:
+                _finite(item[field], field, name)
+
+
+def _file_mode(path: str) -> int:
+    """Permissions of the file being replaced, or those of a new file under the current umask."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def _write_json_atomic(path: str, data: Dict[str, Any]) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".map-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file 0600 and os.replace keeps the temporary file's mode
+        os.chmod(tmp, _file_mode(path))
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    # Make the rename itself durable
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class MapEditSession:
+    """
+    In-memory editing session on a world map file.
+
+    Changes are only written by commit(); used as a context manager, the
+    session commits when the block succeeds and discards otherwise.
+    """
+
+    def __init__(self, map_file: str):
+        self.map_file = str(map_file)
+        with open(self.map_file, "r", encoding="utf-8") as f:
+            self.world_map = json.load(f)
+        self.converter = CoordinateConverter(calibration=calibration_from_world_map(self.world_map))
+        self.changes = 0
+        # item type -> {name: entry}
+        self._names: Dict[str, Dict[str, Dict[str, Any]]] = {
+            item_type: {item.get("name"): item for item in self.world_map.get(section) or []}
+            for item_type, section in SECTIONS.items()
+        }
+
+    def __enter__(self) -> "MapEditSession":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+
+    def _get(self, item_type: str, name: str) -> Dict[str, Any]:
+        if item_type not in SECTIONS:
+            raise ValueError(f"Unknown item_type: {item_type}. Use one of {', '.join(SECTIONS)}")
+        item = self._names[item_type].get(name)
+        if item is None:
+            raise KeyError(f"No {item_type} named '{name}'")
+        return item
+
+    def _add(self, item_type: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        validate_item(item_type, item)
+        if item["name"] in self._names[item_type]:
+            raise ValueError(f"A {item_type} named '{item['name']}' already exists")
+        self.world_map.setdefault(SECTIONS[item_type], []).append(item)
+        self._names[item_type][item["name"]] = item
+        self.changes += 1
+        return item
+
+    def _gps(self, local_x: Sequence[float], local_y: Sequence[float]) -> List[List[float]]:
+        lats, lons, _ = self.converter.local_to_gps_array(local_x, local_y)
+        return [[lat, lon] for lat, lon in zip(lats.tolist(), lons.tolist())]
+
+    @staticmethod
+    def _point(name: str, item_type: str, lat: float, lon: float, altitude_meters: float) -> Dict[str, Any]:
+        return {
+            "name": name,
+            "type": item_type,
+            "coordinates": {
+                "latitude": lat,
+                "longitude": lon,
+                "altitude_meters": altitude_meters
+            }
+        }
+
+    def add_pois(self, pois: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Add POIs given as dicts with name, local_x, local_y and optional
+        altitude_meters, type (default "landmark"), description.
+        """
+        positions = self._gps([p["local_x"] for p in pois], [p["local_y"] for p in pois])
+        added = []
+        for spec, (lat, lon) in zip(pois, positions):
+            poi = self._point(spec["name"], spec.get("type", "landmark"), lat, lon, spec.get("altitude_meters", 0.0))
+            if spec.get("description"):
+                poi["description"] = spec["description"]
+            added.append(self._add("poi", poi))
+        return added
+
+    def add_obstacles(self, obstacles: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Add obstacles given as dicts with name, local_x, local_y, height_meters
+        and optional type (default "building"), description, radius_meters,
+        width_meters, length_meters, heading_degrees.
+        """
+        positions = self._gps([o["local_x"] for o in obstacles], [o["local_y"] for o in obstacles])
+        added = []
+        for spec, (lat, lon) in zip(obstacles, positions):
+            obstacle = self._point(spec["name"], spec.get("type", "building"), lat, lon, 0.0)
+            obstacle["height_meters"] = spec.get("height_meters")
+            for field in ("radius_meters", "width_meters", "length_meters", "heading_degrees"):
+                if spec.get(field) is not None:
+                    obstacle[field] = spec[field]
+            if spec.get("description"):
+                obstacle["description"] = spec["description"]
+            added.append(self._add("obstacle", obstacle))
+        return added
+
+    def add_poi(self, name: str, local_x: float, local_y: float, **kwargs) -> Dict[str, Any]:
+        return self.add_pois([dict(kwargs, name=name, local_x=local_x, local_y=local_y)])[0]
+
+    def add_obstacle(self, name: str, local_x: float, local_y: float, height_meters: float, **kwargs) -> Dict[str, Any]:
+        return self.add_obstacles([dict(kwargs, name=name, local_x=local_x, local_y=local_y, height_meters=height_meters)])[0]
+
+    def add_boundary(
+        self,
+        name: str,
+        local_coordinates: list,
+        boundary_type: str = "polygon",
+        geofence_type: str = "geofence",
+        max_altitude_meters: Optional[float] = None,
+        description: Optional[str] = None,
+        min_altitude_meters: Optional[float] = None,
+        radius_meters: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Add a boundary from a list of (x, y) local coordinates."""
+        if any(len(coord) != 2 for coord in local_coordinates):
+            raise ValueError("Each coordinate must be (x, y) tuple")
+        boundary = {
+            "name": name,
+            "type": geofence_type,
+            "boundary_type": boundary_type,
+            "coordinates": self._gps([c[0] for c in local_coordinates], [c[1] for c in local_coordinates])
+        }
+        for field, value in (("min_altitude_meters", min_altitude_meters), ("max_altitude_meters", max_altitude_meters),
+                             ("radius_meters", radius_meters), ("description", description)):
+            if value is not None:
+                boundary[field] = value
+        return self._add("boundary", boundary)
+
+    def update(self, item_type: str, name: str, /, local_x: Optional[float] = None, local_y: Optional[float] = None, **fields) -> Dict[str, Any]:
+        """
+        Change fields of an existing item (local_x/local_y move a POI or
+        obstacle, name=... renames it); the item is left untouched if the
+        result is invalid.
+        """
+        item = self._get(item_type, name)
+        updated = json.loads(json.dumps(item))
+        updated.update(fields)
+        if local_x is not None or local_y is not None:
+            if item_type == "boundary":
+                raise ValueError("Move a boundary by replacing it (delete + add_boundary)")
+            current = self.converter.gps_to_local(item["coordinates"]["latitude"], item["coordinates"]["longitude"])
+            [[lat, lon]] = self._gps([current[0] if local_x is None else local_x], [current[1] if local_y is None else local_y])
+            updated["coordinates"].update(latitude=lat, longitude=lon)
+        validate_item(item_type, updated)
+        if updated["name"] != name and updated["name"] in self._names[item_type]:
+            raise ValueError(f"A {item_type} named '{updated['name']}' already exists")
+        item.clear()
+        item.update(updated)
+        del self._names[item_type][name]
+        self._names[item_type][item["name"]] = item
+        self.changes += 1
+        return item
+
+    def delete(self, item_type: str, name: str) -> Dict[str, Any]:
+        item = self._get(item_type, name)
+        self.world_map[SECTIONS[item_type]].remove(item)
+        del self._names[item_type][name]
+        self.changes += 1
+        return item
+
+    def set_calibration(self, calibration_points: list) -> Dict[str, Any]:
+        """Store ((x, y), (lat, lon)) calibration pairs; later adds use the new fit."""
+        local_points = [local for local, _ in calibration_points]
+        gps_points = [gps for _, gps in calibration_points]
+        self.world_map["calibration"] = calibration_to_dict(local_points, gps_points)
+        self.converter = CoordinateConverter(calibration=calibration_from_world_map(self.world_map))
+        self.changes += 1
+        return self.world_map["calibration"]
+
+    def commit(self) -> None:
+        """Write the map back in one atomic write (nothing to do without changes)."""
+        if self.changes:
+            _write_json_atomic(self.map_file, self.world_map)
+            self.changes = 0
 
 
 def add_poi_to_map(
@@ -19,7 +309,7 @@ def add_poi_to_map(
 ):
     """
     Add a Point of Interest to the world map from Sphinx local coordinates.
-    
+
     Args:
         map_file: Path to the world map JSON file
         name: Name of the POI
@@ -29,37 +319,10 @@ def add_poi_to_map(
         poi_type: Type of POI (landmark, factory, warehouse, etc.)
         description: Optional description
     """
-    # Load map
-    with open(map_file, "r", encoding="utf-8") as f:
-        world_map = json.load(f)
-    
-    # Convert local coordinates to GPS
-    lat, lon, _ = convert_sphinx_coordinates(local_x, local_y, 0)
-    
-    # Create POI entry
-    poi = {
-        "name": name,
-        "type": poi_type,
-        "coordinates": {
-            "latitude": lat,
-            "longitude": lon,
-            "altitude_meters": altitude_meters
-        }
-    }
-    
-    if description:
-        poi["description"] = description
-    
-    # Add to map
-    if "points_of_interest" not in world_map:
-        world_map["points_of_interest"] = []
-    
-    world_map["points_of_interest"].append(poi)
-    
-    # Save map
-    with open(map_file, "w", encoding="utf-8") as f:
-        json.dump(world_map, f, indent=2, ensure_ascii=False)
-    
+    with MapEditSession(map_file) as session:
+        poi = session.add_poi(name, local_x, local_y, altitude_meters=altitude_meters, type=poi_type, description=description)
+
+    lat, lon = poi["coordinates"]["latitude"], poi["coordinates"]["longitude"]
     print(f"✓ Added POI '{name}' at local ({local_x}, {local_y}) -> GPS ({lat:.12f}, {lon:.12f}), altitude: {altitude_meters}m")
     return poi
 
@@ -75,7 +338,7 @@ def add_obstacle_to_map(
 ):
     """
     Add an obstacle to the world map from Sphinx local coordinates.
-    
+
     Args:
         map_file: Path to the world map JSON file
         name: Name of the obstacle
@@ -85,38 +348,10 @@ def add_obstacle_to_map(
         obstacle_type: Type of obstacle (building, tower, structure, etc.)
         description: Optional description
     """
-    # Load map
-    with open(map_file, "r", encoding="utf-8") as f:
-        world_map = json.load(f)
-    
-    # Convert local coordinates to GPS
-    lat, lon, _ = convert_sphinx_coordinates(local_x, local_y, 0)
-    
-    # Create obstacle entry
-    obstacle = {
-        "name": name,
-        "type": obstacle_type,
-        "coordinates": {
-            "latitude": lat,
-            "longitude": lon,
-            "altitude_meters": 0.0
-        },
-        "height_meters": height_meters
-    }
-    
-    if description:
-        obstacle["description"] = description
-    
-    # Add to map
-    if "obstacles" not in world_map:
-        world_map["obstacles"] = []
-    
-    world_map["obstacles"].append(obstacle)
-    
-    # Save map
-    with open(map_file, "w", encoding="utf-8") as f:
-        json.dump(world_map, f, indent=2, ensure_ascii=False)
-    
+    with MapEditSession(map_file) as session:
+        obstacle = session.add_obstacle(name, local_x, local_y, height_meters, type=obstacle_type, description=description)
+
+    lat, lon = obstacle["coordinates"]["latitude"], obstacle["coordinates"]["longitude"]
     print(f"✓ Added obstacle '{name}' at local ({local_x}, {local_y}) -> GPS ({lat:.12f}, {lon:.12f}), height: {height_meters}m")
     return obstacle
 
@@ -132,7 +367,7 @@ def add_boundary_to_map(
 ):
     """
     Add a boundary to the world map from Sphinx local coordinates.
-    
+
     Args:
         map_file: Path to the world map JSON file
         name: Name of the boundary
@@ -142,48 +377,37 @@ def add_boundary_to_map(
         max_altitude_meters: Maximum altitude in meters (optional)
         description: Optional description
     """
-    # Load map
-    with open(map_file, "r", encoding="utf-8") as f:
-        world_map = json.load(f)
-    
-    # Convert local coordinates to GPS
-    gps_coords = []
-    for coord in local_coordinates:
-        if len(coord) == 2:
-            local_x, local_y = coord
-            lat, lon, _ = convert_sphinx_coordinates(local_x, local_y, 0)
-            gps_coords.append([lat, lon])
-        else:
-            raise ValueError("Each coordinate must be (x, y) tuple")
-    
-    # Create boundary entry
-    boundary = {
-        "name": name,
-        "type": geofence_type,
-        "boundary_type": boundary_type,
-        "coordinates": gps_coords
-    }
-    
-    if max_altitude_meters is not None:
-        boundary["max_altitude_meters"] = max_altitude_meters
-    
-    if description:
-        boundary["description"] = description
-    
-    # Add to map
-    if "boundaries" not in world_map:
-        world_map["boundaries"] = []
-    
-    world_map["boundaries"].append(boundary)
-    
-    # Save map
-    with open(map_file, "w", encoding="utf-8") as f:
-        json.dump(world_map, f, indent=2, ensure_ascii=False)
-    
-    print(f"✓ Added boundary '{name}' with {len(gps_coords)} points")
+    with MapEditSession(map_file) as session:
+        boundary = session.add_boundary(
+            name, local_coordinates, boundary_type, geofence_type,
+            max_altitude_meters=max_altitude_meters, description=description
+        )
+
+    print(f"✓ Added boundary '{name}' with {len(boundary['coordinates'])} points")
     return boundary
 
 
+def set_map_calibration(
+    map_file: str,
+    calibration_points: list
+):
+    """
+    Store Sphinx local -> GPS calibration pairs in the world map.
+
+    The pairs are fitted by least squares (calibration.py); each stored pair
+    keeps its residual so bad readings stand out.
+
+    Args:
+        map_file: Path to the world map JSON file
+        calibration_points: List of ((x, y), (lat, lon)) pairs, at least 2
+    """
+    with MapEditSession(map_file) as session:
+        calibration = session.set_calibration(calibration_points)
+
+    print(f"✓ Calibrated map with {len(calibration_points)} points, rms error {calibration['rms_error_m']}m")
+    return calibration
+
+
 # Convenience function for quick additions
 def add_to_industrial_city(
     item_type: str,
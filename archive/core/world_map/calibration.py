@@ -0,0 +1,132 @@
+"""
+Calibration of the Sphinx local frame against GPS.
+
+A calibration is fitted by least squares from N pairs of (local x, local y)
+-> (latitude, longitude): the GPS points are projected to local ENU meters
+around their mean (Olympe-web-server's geodesy.to_local_enu), then an affine transform local -> ENU is solved, which
+captures scale, rotation and shear of the simulator frame. With only two
+pairs, or pairs on a line, a similarity transform (scale + rotation) is
+fitted instead. Residuals (meters) are kept per pair.
+
+Calibration pairs are stored per map, under the map's "calibration" key:
+
+    "calibration": {"points": [{"local": [x, y], "gps": [lat, lon]}, ...]}
+
+calibration_from_world_map() refits them (a few microseconds); maps without
+calibration use the Sphinx pairs below.
+"""
+
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .. import server_path  # noqa: F401
+from geodesy import from_local_enu, to_local_enu
+
+# Coordinate pairs read in the Sphinx simulator (local x, y) -> (lat, lon)
+SPHINX_CALIBRATION_POINTS = [
+    ((0.0, 0.0), (48.87892150878906, 2.367792844772339)),
+    ((0.0, 100.0), (48.87982177734375, 2.367793321609497)),
+    ((100.0, 110.0), (48.879913330078125, 2.369156837463379)),
+]
+
+
+@dataclass(frozen=True, eq=False)
+class Calibration:
+    """
+    Fitted local -> GPS transform: ENU (east, north) = matrix @ (x, y) + offset,
+    ENU meters being around (reference_lat, reference_lon).
+    """
+
+    reference_lat: float
+    reference_lon: float
+    matrix: np.ndarray
+    offset: np.ndarray
+    residuals_m: np.ndarray
+
+    @property
+    def rms_error_m(self) -> float:
+        return float(np.sqrt(np.mean(self.residuals_m ** 2))) if self.residuals_m.size else 0.0
+
+    @property
+    def max_error_m(self) -> float:
+        return float(self.residuals_m.max()) if self.residuals_m.size else 0.0
+
+    def forward(self, local_x: np.ndarray, local_y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Local coordinates (arrays, broadcast) to (latitude, longitude) arrays."""
+        x, y = np.asarray(local_x, dtype=np.float64), np.asarray(local_y, dtype=np.float64)
+        east = self.matrix[0, 0] * x + self.matrix[0, 1] * y + self.offset[0]
+        north = self.matrix[1, 0] * x + self.matrix[1, 1] * y + self.offset[1]
+        return from_local_enu(east, north, self.reference_lat, self.reference_lon)
+
+    def inverse(self, lat: np.ndarray, lon: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(latitude, longitude) arrays to local coordinates; inverse of forward()."""
+        east, north = to_local_enu(lat, lon, self.reference_lat, self.reference_lon)
+        east, north = east - self.offset[0], north - self.offset[1]
+        inv = np.linalg.inv(self.matrix)
+        return inv[0, 0] * east + inv[0, 1] * north, inv[1, 0] * east + inv[1, 1] * north
+
+    def with_origin(self, origin_lat: float, origin_lon: float) -> "Calibration":
+        """Same scale and rotation, translated so that local (0, 0) is at the given GPS point."""
+        offset = np.array(to_local_enu(origin_lat, origin_lon, self.reference_lat, self.reference_lon))
+        return replace(self, offset=offset)
+
+
+def fit_calibration(local_points: Sequence[Sequence[float]], gps_points: Sequence[Sequence[float]]) -> Calibration:
+    """
+    Least-squares calibration from N pairs local (x, y) -> GPS (lat, lon):
+    affine with 3+ pairs not on a line, similarity otherwise (2+ pairs).
+    """
+    local = np.asarray(local_points, dtype=np.float64).reshape(-1, 2)
+    gps = np.asarray(gps_points, dtype=np.float64).reshape(-1, 2)
+    if len(local) != len(gps):
+        raise ValueError(f"{len(local)} local points for {len(gps)} GPS points")
+    if len(local) < 2:
+        raise ValueError("Calibration needs at least 2 point pairs")
+    reference_lat, reference_lon = float(gps[:, 0].mean()), float(gps[:, 1].mean())
+    east, north = to_local_enu(gps[:, 0], gps[:, 1], reference_lat, reference_lon)
+    x, y, ones = local[:, 0], local[:, 1], np.ones(len(local))
+
+    design = np.column_stack([x, y, ones])
+    if len(local) >= 3 and np.linalg.matrix_rank(design) == 3:
+        (a, b, c), *_ = np.linalg.lstsq(design, east, rcond=None)
+        (d, e, f), *_ = np.linalg.lstsq(design, north, rcond=None)
+        matrix, offset = np.array([[a, b], [d, e]]), np.array([c, f])
+    else:
+        # east = s*x - r*y + c, north = r*x + s*y + f
+        zeros = np.zeros(len(local))
+        design = np.concatenate([np.column_stack([x, -y, ones, zeros]), np.column_stack([y, x, zeros, ones])])
+        if np.linalg.matrix_rank(design) < 4:
+            raise ValueError("Calibration points are all at the same local position")
+        (s, r, c, f), *_ = np.linalg.lstsq(design, np.concatenate([east, north]), rcond=None)
+        matrix, offset = np.array([[s, -r], [r, s]]), np.array([c, f])
+
+    predicted = local @ matrix.T + offset
+    residuals = np.hypot(predicted[:, 0] - east, predicted[:, 1] - north)
+    return Calibration(reference_lat, reference_lon, matrix, offset, residuals)
+
+
+def calibration_points(world_map: Optional[Dict[str, Any]]) -> Tuple[list, list]:
+    """(local points, GPS points) stored in a map, else the Sphinx calibration pairs."""
+    points = ((world_map or {}).get("calibration") or {}).get("points")
+    if not points:
+        return [p[0] for p in SPHINX_CALIBRATION_POINTS], [p[1] for p in SPHINX_CALIBRATION_POINTS]
+    return [p["local"] for p in points], [p["gps"] for p in points]
+
+
+def calibration_from_world_map(world_map: Optional[Dict[str, Any]]) -> Calibration:
+    """Calibration fitted from a map's stored pairs (Sphinx pairs if it has none)."""
+    return fit_calibration(*calibration_points(world_map))
+
+
+def calibration_to_dict(local_points: Sequence[Sequence[float]], gps_points: Sequence[Sequence[float]]) -> Dict[str, Any]:
+    """Map "calibration" entry for a set of pairs, with the fit's residuals for reference."""
+    calibration = fit_calibration(local_points, gps_points)
+    return {
+        "points": [
+            {"local": [float(v) for v in local], "gps": [float(v) for v in gps], "residual_m": round(float(res), 3)}
+            for local, gps, res in zip(local_points, gps_points, calibration.residuals_m)
+        ],
+        "rms_error_m": round(calibration.rms_error_m, 3),
+    }
@@ -1,55 +1,57 @@
 """
 Coordinate converter for translating local Sphinx coordinates to GPS lat/long.
 
-Derived from actual coordinate pairs from Sphinx simulator.
+Derived from actual coordinate pairs from Sphinx simulator, fitted by least
+squares (calibration.py).
+
+The *_array methods take NumPy arrays (or anything broadcastable) and convert
+whole point sets in one call; get_converter() returns a shared converter per
+origin instead of building one per point.
 """
 
-import math
-from typing import Tuple
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .calibration import Calibration, SPHINX_CALIBRATION_POINTS, calibration_from_world_map
 
 
 class CoordinateConverter:
     """
     Converts local Sphinx coordinates to GPS coordinates.
     
-    Conversion derived from calibration points:
+    The conversion is a least-squares calibration (see calibration.py): by
+    default fitted from the Sphinx pairs
     - Local (0, 0) -> GPS (48.87892150878906, 2.367792844772339)
     - Local (0, 100) -> GPS (48.87982177734375, 2.367793321609497)
     - Local (100, 110) -> GPS (48.879913330078125, 2.369156837463379)
+    or from the pairs stored in a world map (from_world_map).
     """
     
-    def __init__(self, origin_lat: float, origin_lon: float, origin_alt: float = 0.0):
+    def __init__(
+        self,
+        origin_lat: Optional[float] = None,
+        origin_lon: Optional[float] = None,
+        origin_alt: float = 0.0,
+        calibration: Optional[Calibration] = None
+    ):
         """
         Initialize converter with a reference origin point.
         
         Args:
-            origin_lat: Latitude of the origin point (GPS reference)
-            origin_lon: Longitude of the origin point (GPS reference)
+            origin_lat: Latitude of local (0, 0) (default: from the calibration)
+            origin_lon: Longitude of local (0, 0) (default: from the calibration)
             origin_alt: Altitude of the origin point in meters (default: 0.0)
+            calibration: Fitted calibration (default: the Sphinx pairs)
         """
-        self.origin_lat = origin_lat
-        self.origin_lon = origin_lon
+        self.calibration = calibration or default_calibration()
+        if origin_lat is not None and origin_lon is not None:
+            self.calibration = self.calibration.with_origin(origin_lat, origin_lon)
+        lat, lon = self.calibration.forward(0.0, 0.0)
+        self.origin_lat = float(lat)
+        self.origin_lon = float(lon)
         self.origin_alt = origin_alt
-        
-        # Calibration points from Sphinx
-        # Local (0, 0) -> GPS (48.87892150878906, 2.367792844772339)
-        # Local (0, 100) -> GPS (48.87982177734375, 2.367793321609497)
-        # Local (100, 110) -> GPS (48.879913330078125, 2.369156837463379)
-        
-        # Calculate conversion factors from calibration data
-        # From (0,0) to (0,100): delta_lat = 0.00090026855469, delta_lon ≈ 0
-        # So 100 local units in y direction = 0.00090026855469 degrees latitude
-        self.degrees_per_unit_y = 0.00090026855469 / 100.0  # latitude direction
-        
-        # From (0,0) to (100,110): 
-        # delta_lat = 0.0009918212890625, delta_lon = 0.00136399269104
-        # delta_lat from y component: 110 * degrees_per_unit_y = 0.000990295410159
-        # delta_lon from x component: 100 * degrees_per_unit_x = 0.00136399269104
-        self.degrees_per_unit_x = 0.00136399269104 / 100.0  # longitude direction
-        
-        # Origin point (local 0,0) in GPS
-        self.origin_lat_calibrated = 48.87892150878906
-        self.origin_lon_calibrated = 2.367792844772339
     
     def local_to_gps(
         self, 
@@ -68,10 +70,27 @@ class CoordinateConverter:
         Returns:
             Tuple of (latitude, longitude, altitude_meters)
         """
+        gps_lat, gps_lon, gps_alt = self.local_to_gps_array(local_x, local_y, local_z)
+        return (float(gps_lat), float(gps_lon), float(gps_alt))
+    
+    def local_to_gps_array(
+        self,
+        local_x: np.ndarray,
+        local_y: np.ndarray,
+        local_z: np.ndarray = 0.0
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vectorized local_to_gps: arrays of local coordinates (broadcast
+        together) to arrays of (latitude, longitude, altitude_meters).
+        """
         # Calculate GPS coordinates from local coordinates
-        # Using calibrated origin and conversion factors
-        gps_lat = self.origin_lat_calibrated + (local_y * self.degrees_per_unit_y)
-        gps_lon = self.origin_lon_calibrated + (local_x * self.degrees_per_unit_x)
+        # Using the fitted calibration transform
+        local_x, local_y, local_z = np.broadcast_arrays(
+            np.asarray(local_x, dtype=np.float64),
+            np.asarray(local_y, dtype=np.float64),
+            np.asarray(local_z, dtype=np.float64),
+        )
+        gps_lat, gps_lon = self.calibration.forward(local_x, local_y)
         gps_alt = self.origin_alt + local_z
         
         return (gps_lat, gps_lon, gps_alt)
@@ -93,12 +112,26 @@ class CoordinateConverter:
         Returns:
             Tuple of (local_x, local_y, local_z) in local units
         """
+        local_x, local_y, local_z = self.gps_to_local_array(gps_lat, gps_lon, gps_alt)
+        return (float(local_x), float(local_y), float(local_z))
+    
+    def gps_to_local_array(
+        self,
+        gps_lat: np.ndarray,
+        gps_lon: np.ndarray,
+        gps_alt: np.ndarray = 0.0
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vectorized gps_to_local: arrays of GPS coordinates (broadcast
+        together) to arrays of (local_x, local_y, local_z).
+        """
         # Calculate local coordinates from GPS
-        delta_lat = gps_lat - self.origin_lat_calibrated
-        delta_lon = gps_lon - self.origin_lon_calibrated
-        
-        local_y = delta_lat / self.degrees_per_unit_y
-        local_x = delta_lon / self.degrees_per_unit_x
+        gps_lat, gps_lon, gps_alt = np.broadcast_arrays(
+            np.asarray(gps_lat, dtype=np.float64),
+            np.asarray(gps_lon, dtype=np.float64),
+            np.asarray(gps_alt, dtype=np.float64),
+        )
+        local_x, local_y = self.calibration.inverse(gps_lat, gps_lon)
         local_z = gps_alt - self.origin_alt
         
         return (local_x, local_y, local_z)
@@ -106,11 +139,11 @@ class CoordinateConverter:
     @staticmethod
     def from_world_map(world_map: dict) -> 'CoordinateConverter':
         """
-        Create a converter using the starting position from a world map as origin.
+        Create a converter from a world map's calibration pairs.
         
-        Note: The converter uses calibrated origin (48.87892150878906, 2.367792844772339)
-        which corresponds to local (0, 0). The world map starting position should match
-        this or be converted.
+        Local (0, 0) is where the map's calibration puts it (the Sphinx origin
+        for maps without a "calibration" entry); altitudes are relative to the
+        map's starting position.
         
         Args:
             world_map: World map dictionary (loaded from JSON)
@@ -118,34 +151,47 @@ class CoordinateConverter:
         Returns:
             CoordinateConverter instance
         """
-        # Use the calibrated origin, not the world map starting position
-        # since the calibration is based on local (0,0)
         return CoordinateConverter(
-            origin_lat=48.87892150878906,
-            origin_lon=2.367792844772339,
-            origin_alt=world_map['starting_position']['coordinates'].get('altitude_meters', 0.0)
+            origin_alt=world_map['starting_position']['coordinates'].get('altitude_meters', 0.0),
+            calibration=calibration_from_world_map(world_map)
         )
 
 
+@lru_cache(maxsize=1)
+def default_calibration() -> Calibration:
+    """Calibration fitted once from the Sphinx pairs."""
+    return calibration_from_world_map(None)
+
+
+@lru_cache(maxsize=32)
+def get_converter(
+    origin_lat: Optional[float] = None,
+    origin_lon: Optional[float] = None,
+    origin_alt: float = 0.0
+) -> CoordinateConverter:
+    """Shared converter for an origin (built once, reused by every conversion)."""
+    return CoordinateConverter(origin_lat, origin_lon, origin_alt)
+
+
 def convert_sphinx_coordinates(
     local_x: float,
     local_y: float,
     local_z: float = 0.0,
-    origin_lat: float = 48.87892150878906,
-    origin_lon: float = 2.367792844772339,
+    origin_lat: Optional[float] = None,
+    origin_lon: Optional[float] = None,
     origin_alt: float = 0.0
 ) -> Tuple[float, float, float]:
     """
     Convenience function to convert Sphinx local coordinates to GPS.
     
-    Uses calibrated conversion factors derived from Sphinx coordinate pairs.
+    Uses the least-squares calibration fitted from Sphinx coordinate pairs.
     
     Args:
         local_x: Local x coordinate (longitude direction)
         local_y: Local y coordinate (latitude direction)
         local_z: Local z coordinate (altitude in meters)
-        origin_lat: Reference latitude (default: calibrated origin)
-        origin_lon: Reference longitude (default: calibrated origin)
+        origin_lat: Latitude of local (0, 0) (default: calibrated origin)
+        origin_lon: Longitude of local (0, 0) (default: calibrated origin)
         origin_alt: Reference altitude in meters
         
     Returns:
@@ -159,25 +205,37 @@ def convert_sphinx_coordinates(
             local_z=20.0    # 20m altitude
         )
     """
-    converter = CoordinateConverter(origin_lat, origin_lon, origin_alt)
-    return converter.local_to_gps(local_x, local_y, local_z)
+    return get_converter(origin_lat, origin_lon, origin_alt).local_to_gps(local_x, local_y, local_z)
+
+
+def convert_sphinx_coordinates_array(
+    local_x: np.ndarray,
+    local_y: np.ndarray,
+    local_z: np.ndarray = 0.0,
+    origin_lat: Optional[float] = None,
+    origin_lon: Optional[float] = None,
+    origin_alt: float = 0.0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized convert_sphinx_coordinates: arrays of Sphinx local coordinates
+    to arrays of (latitude, longitude, altitude_meters).
+    
+    Example:
+        # Import a whole Sphinx trajectory at once
+        lats, lons, alts = convert_sphinx_coordinates_array(xs, ys, zs)
+    """
+    return get_converter(origin_lat, origin_lon, origin_alt).local_to_gps_array(local_x, local_y, local_z)
 
 
 def verify_calibration():
     """
     Verify the calibration by converting known points back.
     """
-    converter = CoordinateConverter(0, 0, 0)
-    
-    test_points = [
-        (0, 0, (48.87892150878906, 2.367792844772339)),
-        (0, 100, (48.87982177734375, 2.367793321609497)),
-        (100, 110, (48.879913330078125, 2.369156837463379)),
-    ]
+    converter = get_converter()
     
     print("Calibration Verification:")
     print("=" * 80)
-    for local_x, local_y, expected_gps in test_points:
+    for (local_x, local_y), expected_gps in SPHINX_CALIBRATION_POINTS:
         lat, lon, _ = converter.local_to_gps(local_x, local_y, 0)
         expected_lat, expected_lon = expected_gps
         lat_diff = abs(lat - expected_lat)
@@ -188,6 +246,8 @@ def verify_calibration():
         print(f"  Got:       ({lat}, {lon})")
         print(f"  Error:     lat={lat_diff:.12f}, lon={lon_diff:.12f}")
         print()
+    calibration = converter.calibration
+    print(f"Residuals: rms={calibration.rms_error_m:.3f}m, max={calibration.max_error_m:.3f}m")
 
 
 if __name__ == "__main__":
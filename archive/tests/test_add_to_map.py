@@ -0,0 +1,125 @@
+"""
+Tests unitaires pour la session d'édition de carte (core.world_map.add_to_map).
+"""
+
+import json
+import os
+import stat
+
+import numpy as np
+import pytest
+
+from core.world_map.add_to_map import MapEditSession
+from core.world_map.coordinate_converter import CoordinateConverter
+
+
+@pytest.fixture
+def map_file(tmp_path):
+    """Carte minimale (calibration Sphinx par défaut), lisible par le groupe."""
+    path = tmp_path / "site.json"
+    world_map = {
+        "name": "Site",
+        "points_of_interest": [{"name": "Gate", "type": "landmark",
+                                "coordinates": {"latitude": 48.879, "longitude": 2.368, "altitude_meters": 0.0}}],
+        "obstacles": [],
+        "boundaries": [],
+    }
+    path.write_text(json.dumps(world_map, indent=2), encoding="utf-8")
+    os.chmod(path, 0o640)
+    return path
+
+
+def _load(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def test_commit_writes_once_and_keeps_file_mode(map_file):
+    before = map_file.read_bytes()
+    with MapEditSession(str(map_file)) as session:
+        session.add_poi("Tank", 10.0, 20.0, altitude_meters=5.0, type="factory")
+        session.add_obstacle("Tower", 40.0, 50.0, 30.0, radius_meters=6.0)
+        session.add_boundary("Yard", [(0, 0), (100, 0), (100, 100)], geofence_type="no_fly_zone")
+        session.update("poi", "Gate", name="Main Gate", local_x=5.0)
+        session.delete("obstacle", "Tower")
+        # Rien n'est écrit avant le commit
+        assert map_file.read_bytes() == before and session.changes == 5
+    world_map = _load(map_file)
+    assert [p["name"] for p in world_map["points_of_interest"]] == ["Main Gate", "Tank"]
+    assert world_map["obstacles"] == [] and world_map["boundaries"][0]["type"] == "no_fly_zone"
+    # Le fichier remplacé garde ses droits (mkstemp crée en 0600) et aucun fichier temporaire ne reste
+    assert stat.S_IMODE(os.stat(map_file).st_mode) == 0o640
+    assert sorted(os.listdir(map_file.parent)) == ["site.json"]
+    # Session sans changement: pas de réécriture
+    os.utime(map_file, ns=(1, 1))
+    with MapEditSession(str(map_file)):
+        pass
+    assert os.stat(map_file).st_mtime_ns == 1
+
+
+def test_exception_discards_changes(map_file):
+    before = map_file.read_bytes()
+    with pytest.raises(RuntimeError):
+        with MapEditSession(str(map_file)) as session:
+            session.add_poi("Tank", 10.0, 20.0)
+            raise RuntimeError("interrompu")
+    assert map_file.read_bytes() == before
+    assert sorted(os.listdir(map_file.parent)) == ["site.json"]
+
+
+def test_duplicate_and_invalid_items_are_rejected(map_file):
+    session = MapEditSession(str(map_file))
+    with pytest.raises(ValueError, match="already exists"):
+        session.add_poi("Gate", 0.0, 0.0)
+    with pytest.raises(ValueError, match="height_meters must be positive"):
+        session.add_obstacle("Flat", 0.0, 0.0, 0.0)
+    with pytest.raises(ValueError, match="height_meters must be a number"):
+        session.add_obstacle("Unknown", 0.0, 0.0, None)
+    with pytest.raises(ValueError, match="at least 3 coordinates"):
+        session.add_boundary("Line", [(0, 0), (10, 0)])
+    with pytest.raises(ValueError, match="type must be one of"):
+        session.add_boundary("Zone", [(0, 0), (10, 0), (0, 10)], geofence_type="forbidden")
+    with pytest.raises(ValueError, match="Unknown item_type"):
+        session.update("tree", "Gate")
+    with pytest.raises(KeyError):
+        session.delete("poi", "Missing")
+    # Mise à jour invalide ou renommage vers un nom pris: l'entrée reste intacte
+    session.add_poi("Tank", 10.0, 20.0)
+    gate = json.loads(json.dumps(_load(map_file)["points_of_interest"][0]))
+    with pytest.raises(ValueError, match="out of range"):
+        session.update("poi", "Gate", coordinates={"latitude": 120.0, "longitude": 2.0})
+    with pytest.raises(ValueError, match="already exists"):
+        session.update("poi", "Gate", name="Tank")
+    assert session.world_map["points_of_interest"][0] == gate
+    assert session.changes == 1
+
+
+def test_bulk_adds_convert_in_one_vectorized_call(map_file, monkeypatch):
+    rng = np.random.default_rng(3)
+    xy = rng.uniform(-200.0, 200.0, (50, 2))
+    calls = []
+    convert = CoordinateConverter.local_to_gps_array
+
+    def counting(self, local_x, local_y, local_z=0.0):
+        calls.append(np.size(local_x))
+        return convert(self, local_x, local_y, local_z)
+
+    monkeypatch.setattr(CoordinateConverter, "local_to_gps_array", counting)
+    with MapEditSession(str(map_file)) as session:
+        pois = session.add_pois([{"name": f"P{k}", "local_x": x, "local_y": y} for k, (x, y) in enumerate(xy)])
+        obstacles = session.add_obstacles([{"name": f"B{k}", "local_x": x, "local_y": y, "height_meters": 12.0}
+                                           for k, (x, y) in enumerate(xy[:10])])
+    assert calls == [50, 10]
+    monkeypatch.undo()
+    # Mêmes positions qu'une conversion point par point
+    converter = CoordinateConverter()
+    for item, (x, y) in zip(pois + obstacles, np.vstack([xy, xy[:10]])):
+        lat, lon, _ = converter.local_to_gps(x, y)
+        assert (item["coordinates"]["latitude"], item["coordinates"]["longitude"]) == pytest.approx((lat, lon), abs=1e-12)
+    world_map = _load(map_file)
+    assert len(world_map["points_of_interest"]) == 51 and len(world_map["obstacles"]) == 10
+    # Un élément invalide dans un lot: erreur à cet élément, le fichier n'est pas écrit
+    before = map_file.read_bytes()
+    with pytest.raises(ValueError, match="already exists"):
+        with MapEditSession(str(map_file)) as session:
+            session.add_pois([{"name": "New", "local_x": 0.0, "local_y": 0.0}, {"name": "P3", "local_x": 1.0, "local_y": 1.0}])
+    assert map_file.read_bytes() == before
@@ -0,0 +1,113 @@
+"""
+Tests unitaires pour la calibration repère local Sphinx -> GPS (core.world_map.calibration).
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from core.world_map.calibration import (
+    SPHINX_CALIBRATION_POINTS,
+    calibration_from_world_map,
+    calibration_to_dict,
+    fit_calibration,
+)
+from geodesy import EARTH_RADIUS_M, from_local_enu  # Olympe-web-server, sur le sys.path via core.server_path
+
+REFERENCE = (48.8790, 2.3680)
+# Repère simulé tourné de 25°, étiré en x et cisaillé: ENU = MATRIX @ (x, y) + OFFSET
+MATRIX = np.array([[1.1 * math.cos(math.radians(25.0)), -0.9 * math.sin(math.radians(25.0)) + 0.15],
+                   [1.1 * math.sin(math.radians(25.0)), 0.9 * math.cos(math.radians(25.0))]])
+OFFSET = np.array([12.0, -30.0])
+LOCAL = np.array([[0.0, 0.0], [100.0, 0.0], [0.0, 100.0], [80.0, 120.0], [-50.0, 40.0], [30.0, -70.0]])
+
+
+def _gps(local, matrix=MATRIX, offset=OFFSET):
+    """Positions GPS des points locaux dans un repère de paramètres connus."""
+    east, north = (np.asarray(local, dtype=np.float64) @ matrix.T + offset).T
+    return np.column_stack(from_local_enu(east, north, *REFERENCE))
+
+
+def test_affine_fit_recovers_rotated_sheared_frame():
+    calibration = fit_calibration(LOCAL, _gps(LOCAL))
+    assert calibration.matrix == pytest.approx(MATRIX, abs=1e-4)
+    assert calibration.max_error_m < 1e-3
+    # Points hors des paires: même position que le repère d'origine (au mm)
+    probe = np.array([[250.0, -120.0], [-300.0, 310.0]])
+    lat, lon = calibration.forward(probe[:, 0], probe[:, 1])
+    expected = _gps(probe)
+    k = math.radians(1.0) * EARTH_RADIUS_M
+    assert np.abs(lat - expected[:, 0]).max() * k < 5e-3
+    assert np.abs(lon - expected[:, 1]).max() * k * math.cos(math.radians(REFERENCE[0])) < 5e-3
+
+
+def test_similarity_fallback_for_two_or_collinear_pairs():
+    # Deux paires, ou trois alignées: échelle + rotation seulement (pas de cisaillement)
+    scale, angle = 2.0, math.radians(30.0)
+    similarity = scale * np.array([[math.cos(angle), -math.sin(angle)], [math.sin(angle), math.cos(angle)]])
+    for local in (LOCAL[:2], np.array([[0.0, 0.0], [50.0, 50.0], [100.0, 100.0]])):
+        calibration = fit_calibration(local, _gps(local, similarity))
+        assert calibration.matrix == pytest.approx(similarity, abs=1e-4)
+        assert calibration.matrix[0, 0] == pytest.approx(calibration.matrix[1, 1])
+        assert calibration.matrix[0, 1] == pytest.approx(-calibration.matrix[1, 0])
+        assert calibration.residuals_m.shape == (len(local),) and calibration.max_error_m < 1e-3
+    # Repère cisaillé vu par trois points alignés: la similitude ne le reproduit pas
+    collinear = np.array([[0.0, 0.0], [50.0, 50.0], [100.0, 100.0]])
+    matrix = fit_calibration(collinear, _gps(collinear)).matrix
+    assert matrix[0, 0] == pytest.approx(matrix[1, 1]) and matrix[0, 1] == pytest.approx(-matrix[1, 0])
+
+
+def test_residuals_report_inconsistent_pair():
+    gps = _gps(LOCAL)
+    # 10 m d'erreur vers le nord sur une paire
+    gps[3, 0] += 10.0 / (math.radians(1.0) * EARTH_RADIUS_M)
+    calibration = fit_calibration(LOCAL, gps)
+    assert calibration.residuals_m.shape == (len(LOCAL),)
+    assert int(np.argmax(calibration.residuals_m)) == 3
+    assert 0.0 < calibration.rms_error_m < calibration.max_error_m < 10.0
+    assert calibration.rms_error_m == pytest.approx(float(np.sqrt(np.mean(calibration.residuals_m ** 2))))
+    entry = calibration_to_dict(LOCAL.tolist(), gps.tolist())
+    assert [p["residual_m"] for p in entry["points"]] == [round(float(r), 3) for r in calibration.residuals_m]
+    assert entry["rms_error_m"] == round(calibration.rms_error_m, 3)
+
+
+def test_inverse_round_trips():
+    calibration = fit_calibration(LOCAL, _gps(LOCAL))
+    rng = np.random.default_rng(2)
+    x, y = rng.uniform(-500.0, 500.0, (2, 200))
+    back_x, back_y = calibration.inverse(*calibration.forward(x, y))
+    assert np.abs(back_x - x).max() < 1e-6 and np.abs(back_y - y).max() < 1e-6
+    lat, lon = calibration.forward(x, y)
+    again_lat, again_lon = calibration.forward(*calibration.inverse(lat, lon))
+    assert np.abs(again_lat - lat).max() < 1e-12 and np.abs(again_lon - lon).max() < 1e-12
+    # Scalaires acceptés
+    assert [float(v) for v in calibration.inverse(*calibration.forward(10.0, 20.0))] == pytest.approx([10.0, 20.0])
+
+
+def test_with_origin_translates_only():
+    calibration = fit_calibration(LOCAL, _gps(LOCAL))
+    origin = (48.8801, 2.3702)
+    moved = calibration.with_origin(*origin)
+    assert [float(v) for v in moved.forward(0.0, 0.0)] == pytest.approx(origin, abs=1e-12)
+    assert np.array_equal(moved.matrix, calibration.matrix)
+    assert np.array_equal(moved.residuals_m, calibration.residuals_m)
+    # Même déplacement pour tous les points: seule la translation change
+    lat0, lon0 = calibration.forward(LOCAL[:, 0], LOCAL[:, 1])
+    lat1, lon1 = moved.forward(LOCAL[:, 0], LOCAL[:, 1])
+    assert np.ptp(lat1 - lat0) < 1e-12 and np.ptp(lon1 - lon0) < 1e-12
+    assert moved.inverse(*origin) == pytest.approx((0.0, 0.0), abs=1e-6)
+
+
+def test_invalid_pairs_and_map_fallback():
+    with pytest.raises(ValueError, match="local points"):
+        fit_calibration(LOCAL[:3], _gps(LOCAL[:2]))
+    with pytest.raises(ValueError, match="at least 2"):
+        fit_calibration(LOCAL[:1], _gps(LOCAL[:1]))
+    with pytest.raises(ValueError, match="same local position"):
+        fit_calibration([[5.0, 5.0], [5.0, 5.0]], _gps(LOCAL[:2]))
+    # Carte sans calibration: paires Sphinx; sinon les paires de la carte
+    sphinx = calibration_from_world_map({})
+    assert sphinx.residuals_m.shape == (len(SPHINX_CALIBRATION_POINTS),)
+    stored = {"calibration": {"points": [{"local": list(p), "gps": list(g)} for p, g in zip(LOCAL, _gps(LOCAL))]}}
+    assert calibration_from_world_map(stored).matrix == pytest.approx(MATRIX, abs=1e-4)